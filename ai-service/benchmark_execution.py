@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark RegulatoryOracle.createComplianceRule submission: one transaction at a time vs batched with local nonces
+
+Runs against a stand-in automining node by default. To measure a real local node
+(Hardhat / anvil, first dev account owning the deployed oracle):
+    python benchmark_execution.py http://127.0.0.1:8545 <RegulatoryOracle address>
+"""
+
+import asyncio
+import sys
+import time
+import aiohttp
+from services.chain_executor import ChainExecutor
+from services.chain_rpc import rpc_call
+from services.rpc_client import BatchedRPCClient
+from test_chain_executor import ORACLE, SENDER, TREASURY, StandInDevNode
+
+TRANSACTIONS = 400
+LATENCY = 0.005  # simulated network round trip per HTTP request
+BLOCK_TIME = 0.05
+
+def rule(i):
+    return {"type": "Compliance Approval", "contract": "RegulatoryOracle", "function": "createComplianceRule",
+            "args": [f"Benchmark rule {i}", 4, 1, "Throughput benchmark"]}
+
+async def one_by_one(url, executor, count):
+    """What a naive client does: fetch the nonce, send, wait for the receipt, repeat"""
+    async with aiohttp.ClientSession() as session:
+        for i in range(count):
+            to, data = executor.encode("RegulatoryOracle", "createComplianceRule", rule(i)["args"])
+            nonce = await rpc_call(session, url, "eth_getTransactionCount", [executor.sender, "pending"])
+            tx_hash = await rpc_call(session, url, "eth_sendTransaction", [{
+                "from": executor.sender, "to": to, "data": data, "gas": hex(executor.gas), "nonce": nonce
+            }])
+            while not await rpc_call(session, url, "eth_getTransactionReceipt", [tx_hash]):
+                await asyncio.sleep(executor.poll_interval)
+
+async def run(label, node, count, body):
+    if node is not None:
+        node.http_requests = 0
+    started = time.perf_counter()
+    await body()
+    elapsed = time.perf_counter() - started
+    requests = f"{node.http_requests:>5} HTTP requests" if node is not None else ""
+    print(f"{label:<34} {count / elapsed:>8,.0f} txs/s  {requests}  {elapsed:.2f}s")
+
+async def main():
+    node = None
+    if len(sys.argv) > 2:
+        url, oracle = sys.argv[1], sys.argv[2]
+        async with aiohttp.ClientSession() as session:
+            sender = (await rpc_call(session, url, "eth_accounts", []))[0]
+        print(f"{TRANSACTIONS:,} createComplianceRule transactions against {url}")
+    else:
+        node = StandInDevNode(delay=LATENCY, block_time=BLOCK_TIME)
+        url, oracle, sender = await node.start(), ORACLE, SENDER
+        print(f"{TRANSACTIONS:,} createComplianceRule transactions, stand-in node: "
+              f"{LATENCY * 1000:.0f}ms per HTTP request, blocks every {BLOCK_TIME * 1000:.0f}ms")
+
+    def executor(**kwargs):
+        return ChainExecutor(BatchedRPCClient(url, max_batch_size=500), sender, TREASURY, oracle, poll_interval=0.01, **kwargs)
+
+    try:
+        sequential = executor()
+        await run("sequential send + wait", node, TRANSACTIONS // 10, lambda: one_by_one(url, sequential, TRANSACTIONS // 10))
+
+        batched = executor()
+        await run("batched, local nonces", node, TRANSACTIONS, lambda: batched.execute([rule(i) for i in range(TRANSACTIONS)]))
+
+        concurrent = executor()
+        await run("50 concurrent callers (batched)", node, TRANSACTIONS, lambda: asyncio.gather(*(
+            concurrent.execute([rule(i) for i in range(j, TRANSACTIONS, 50)]) for j in range(50)
+        )))
+        for each in (sequential, batched, concurrent):
+            await each.close()
+    finally:
+        if node is not None:
+            await node.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
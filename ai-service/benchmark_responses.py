@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark hot JSON endpoints: FastAPI's default jsonable_encoder + json rendering vs orjson and pre-encoded bodies
+"""
+
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI
+
+import main
+from services.fast_json import FastJSONResponse
+from services.multi_agent_system import MultiAgentDeFiSystem
+
+REQUESTS = 2000
+UPDATES = 500
+
+def baseline_app(system, demo_result) -> FastAPI:
+    """The same payloads served the way the endpoints did before: return a dict, let FastAPI encode it"""
+    app = FastAPI()
+
+    @app.get("/demo/agents/status")
+    async def status():
+        return system.get_real_time_status()
+
+    @app.get("/regulatory/updates")
+    async def updates(limit: int = 50, source: str = None):
+        return {"regulatory_updates": await main.regulatory_monitor.get_latest_updates(limit, source)}
+
+    @app.get("/demo/result")
+    async def result():
+        return {"status": "success", "result": demo_result}
+
+    return app
+
+async def measure(app, path, requests=REQUESTS) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path)
+        assert response.status_code == 200, response.text
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        return requests / (time.perf_counter() - started)
+
+async def run():
+    # a realistic agent state: one full demo run, upstreams unreachable so it doesn't touch the network
+    system = MultiAgentDeFiSystem()
+    system.defillama_api = system.coingecko_api = "http://127.0.0.1:9"
+    demo_result = await system.process_institutional_request("Should JPMorgan invest $500M in Aave?", "jpmorgan")
+    main.multi_agent_system = system
+    for i in range(UPDATES):
+        main.regulatory_monitor.update_cache.add({
+            "source": ["SEC", "MiCA", "FCA"][i % 3], "title": f"Update {i}", "date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "impact": "HIGH", "summary": "Reporting requirements for DeFi protocols " * 4, "url": f"https://example.org/{i}",
+            "affected_protocols": ["aave", "compound"], "compliance_deadline": None,
+        })
+
+    fast_app = FastAPI()
+
+    @fast_app.get("/demo/result")
+    async def fast_result():
+        return FastJSONResponse({"status": "success", "result": demo_result})
+
+    before = baseline_app(system, demo_result)
+    print(f"{REQUESTS:,} sequential requests per endpoint (in-process ASGI)")
+    print(f"{'endpoint':<34} {'before req/s':>12} {'after req/s':>12} {'speedup':>8}")
+    for label, path, after_app in (
+        ("/demo/agents/status", "/demo/agents/status", main.app),
+        ("/regulatory/updates?limit=200", "/regulatory/updates?limit=200", main.app),
+        ("demo summary (FastJSONResponse)", "/demo/result", fast_app),
+    ):
+        baseline = await measure(before, path)
+        improved = await measure(after_app, path)
+        print(f"{label:<34} {baseline:>12,.0f} {improved:>12,.0f} {improved / baseline:>7.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(run())
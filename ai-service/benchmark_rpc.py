@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark RegulatoryOracle AML screening reads: one call per request vs batched JSON-RPC vs Multicall3
+"""
+
+import asyncio
+import time
+import aiohttp
+from services.chain_rpc import rpc_call
+from services.evm_abi import encode_call
+from services.oracle_reader import RegulatoryOracleReader
+from services.rpc_client import MULTICALL3_ADDRESS, BatchedRPCClient
+from test_rpc_client import ORACLE, StandInOracleNode, accounts
+
+ACCOUNTS = 2000
+LATENCY = 0.005  # simulated network round trip per HTTP request
+
+async def one_by_one(url, reader, addresses):
+    entry = reader.functions["getAMLRiskScore"]
+    async with aiohttp.ClientSession() as session:
+        block = await rpc_call(session, url, "eth_blockNumber", [])
+        for address in addresses:
+            await rpc_call(session, url, "eth_call", [{"to": ORACLE, "data": encode_call(entry, [address])}, block])
+
+async def run(label, node, body):
+    node.http_requests = 0
+    started = time.perf_counter()
+    await body()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {ACCOUNTS / elapsed:>10,.0f} reads/s  {node.http_requests:>5} HTTP requests  {elapsed:.2f}s")
+
+async def main():
+    node = StandInOracleNode(delay=LATENCY)
+    node.scores = {account: i % 100 for i, account in enumerate(accounts(ACCOUNTS))}
+    url = await node.start()
+    addresses = accounts(ACCOUNTS)
+    print(f"{ACCOUNTS:,} getAMLRiskScore reads, {LATENCY * 1000:.0f}ms simulated latency per HTTP request")
+    try:
+        sequential = RegulatoryOracleReader(BatchedRPCClient(url), ORACLE)
+        await run("sequential eth_call", node, lambda: one_by_one(url, sequential, addresses))
+
+        batched = RegulatoryOracleReader(BatchedRPCClient(url, max_batch_size=500), ORACLE)
+        await run("batched eth_call", node, lambda: batched.aml_risk_scores(addresses))
+        await run("batched eth_call (cached)", node, lambda: batched.aml_risk_scores(addresses))
+
+        multicall = RegulatoryOracleReader(
+            BatchedRPCClient(url, multicall_address=MULTICALL3_ADDRESS, multicall_size=500), ORACLE
+        )
+        await run("multicall aggregate3", node, lambda: multicall.aml_risk_scores(addresses))
+        for reader in (sequential, batched, multicall):
+            await reader.client.close()
+    finally:
+        await node.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
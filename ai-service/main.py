@@ -3,14 +3,17 @@ FastAPI Backend for DeFi Regulatory Compliance Platform
 Integrates AI risk analysis with institutional APIs
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import logging
 import asyncio
+import aiohttp
 from datetime import datetime, timedelta
 import os
+import re
 from dotenv import load_dotenv
 import uvicorn
 
@@ -18,9 +21,21 @@ from services.defi_risk_analyzer import DeFiRiskAnalyzer
 from services.defi_risk_analyzer import DeFiRiskAnalyzer
 from services.regulatory_monitor import RegulatoryMonitor
 from services.compliance_engine import ComplianceEngine
+from services.rule_store import SEVERITIES, RuleValidationError
 from services.transaction_analyzer import TransactionAnalyzer
 from services.aml_detector import AMLDetector
+from services.chain_indexer import ChainEventStore, indexer_from_deployments
+from services.chain_rpc import RPCError
+from services.chain_executor import chain_executor
+from services.oracle_reader import oracle_reader_from_deployments
 from services.protocol_auditor import ProtocolAuditor
+from services.rate_limiter import rate_limiter
+from services.fast_json import EncodedResponseCache, FastJSONResponse
+from services.contract_audit import AuditTarget
+from services.report_jobs import ReportJobManager
+from services.report_export import (
+    EXPORT_FORMATS, REPORT_SECTIONS, ReportSectionStream, stream_csv, stream_ndjson, stream_parquet
+)
 
 
 load_dotenv()
@@ -49,8 +64,21 @@ risk_analyzer = DeFiRiskAnalyzer()
 regulatory_monitor = RegulatoryMonitor()
 compliance_engine = ComplianceEngine()
 transaction_analyzer = TransactionAnalyzer()
-aml_detector = AMLDetector()
+chain_indexer = None
+if os.getenv("CHAIN_INDEXER", "false").lower() == "true":
+    chain_indexer = indexer_from_deployments(ChainEventStore())
+aml_detector = AMLDetector(
+    chain_indexer.store if chain_indexer else None,
+    chain_indexer.chain_id if chain_indexer else None
+)
+oracle_reader = oracle_reader_from_deployments()
 protocol_auditor = ProtocolAuditor()
+report_job_manager = ReportJobManager(
+    max_workers=int(os.getenv("REPORT_WORKERS", "4")),
+    finished_ttl_seconds=float(os.getenv("REPORT_RESULT_TTL_SECONDS", "3600")),
+    max_finished_jobs=int(os.getenv("REPORT_MAX_FINISHED_JOBS", "1000"))
+)
+response_cache = EncodedResponseCache()
 
 # Pydantic models for regulatory compliance
 class ProtocolAnalysisRequest(BaseModel):
@@ -75,6 +103,8 @@ class TransactionAnalysisRequest(BaseModel):
     token_address: str
     protocol_address: str
     chain_id: int
+    institution_id: Optional[str] = None
+    regulatory_framework: str = "SEC"
 
 class TransactionAnalysisResponse(BaseModel):
     compliance_status: str
@@ -101,6 +131,33 @@ class ComplianceReportResponse(BaseModel):
     recommendations: List[str]
     report_id: str
 
+class ComplianceReportJobResponse(BaseModel):
+    report_id: str
+    status: str
+    progress: float
+    deduplicated: bool
+
+class InstitutionPortfolioRequest(BaseModel):
+    positions: List[Dict]  # {"protocol": "aave", "token": "USDC", "value_usd": 1000000}
+    jurisdictions: List[str] = []
+
+class ContractAuditBatchRequest(BaseModel):
+    contracts: List[Dict] = []  # each {"name", "source"?, "bytecode"?}
+
+class ProtocolApprovalRequest(BaseModel):
+    name: str
+    address: str
+    chain_id: int
+    risk_score: float
+    last_audit: Optional[str] = None
+
+class OracleScreeningRequest(BaseModel):
+    accounts: List[str] = []
+    institution: Optional[str] = None
+    protocols: List[str] = []
+    jurisdictions: List[str] = []
+    block_number: Optional[int] = None
+
 class RiskAssessmentRequest(BaseModel):
     portfolio: List[Dict]  # List of investments
     institution_risk_tolerance: str
@@ -113,6 +170,24 @@ class RiskAssessmentResponse(BaseModel):
     rebalancing_recommendations: List[Dict]
     regulatory_alerts: List[str]
 
+@app.on_event("startup")
+async def start_background_services():
+    if os.getenv("REGULATORY_FEED_POLLING", "true").lower() == "true":
+        regulatory_monitor.start_polling()
+    if chain_indexer is not None:
+        chain_indexer.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await regulatory_monitor.stop_polling()
+    protocol_auditor.audit_pipeline.shutdown()
+    if chain_indexer is not None:
+        await chain_indexer.stop()
+    if oracle_reader is not None:
+        await oracle_reader.client.close()
+    if chain_executor is not None:
+        await chain_executor.close()
+
 @app.get("/")
 async def root():
     return {"message": "DeFi Regulatory Compliance AI Service", "status": "running"}
@@ -131,6 +206,14 @@ async def health_check():
         ]
     }
 
+@app.get("/upstreams/rate-limits")
+async def get_upstream_rate_limits():
+    """
+    Token-bucket state per external API: configured rate and burst, tokens
+    available, active 429 back-off, and how long callers have waited
+    """
+    return rate_limiter.metrics()
+
 @app.post("/analyze/protocol", response_model=ProtocolAnalysisResponse)
 async def analyze_protocol(request: ProtocolAnalysisRequest):
     """
@@ -160,6 +243,38 @@ async def analyze_transaction(request: TransactionAnalysisRequest):
             request.protocol_address,
             request.chain_id
         )
+        rule_violations = compliance_engine.evaluate_rules(
+            request.regulatory_framework, {**request.model_dump(), **analysis}
+        )
+        if rule_violations:
+            analysis = {
+                **analysis,
+                "risk_level": max(
+                    [analysis["risk_level"]] + [v["severity"] for v in rule_violations],
+                    key=lambda level: SEVERITIES.index(level) if level in SEVERITIES else 0
+                ),
+                "regulatory_violations": analysis["regulatory_violations"] + [v["type"] for v in rule_violations],
+                "approval_required": True
+            }
+        if request.institution_id:
+            await compliance_engine.record_transaction_analysis(
+                request.institution_id,
+                request.regulatory_framework,
+                analysis,
+                request.amount
+            )
+            if analysis["aml_flags"]:
+                await regulatory_monitor.publish_event({
+                    "event_type": "aml_flag",
+                    "institution_id": request.institution_id,
+                    "severity": analysis["risk_level"],
+                    "title": f"AML flags on transfer from {request.from_address}",
+                    "description": ", ".join(analysis["aml_flags"]),
+                    "protocols": [request.protocol_address] if request.protocol_address else [],
+                    "from_address": request.from_address,
+                    "to_address": request.to_address,
+                    "amount": request.amount,
+                })
         return analysis
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -180,6 +295,130 @@ async def generate_compliance_report(request: ComplianceReportRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/compliance/report/jobs", response_model=ComplianceReportJobResponse, status_code=202)
+async def submit_compliance_report_job(request: ComplianceReportRequest, background_tasks: BackgroundTasks):
+    """
+    Queue a compliance report for background generation
+    Identical requests that are still pending share the same report_id
+    """
+    async def build_report(progress_callback):
+        return await compliance_engine.generate_report(
+            request.institution_id,
+            request.start_date,
+            request.end_date,
+            request.regulatory_framework,
+            progress_callback=progress_callback
+        )
+
+    job, created = report_job_manager.submit(
+        (request.institution_id, request.start_date, request.end_date, request.regulatory_framework),
+        request.institution_id,
+        f"{request.start_date}..{request.end_date}",
+        build_report
+    )
+    if created:
+        background_tasks.add_task(report_job_manager.run, job.report_id)
+
+    return {
+        "report_id": job.report_id,
+        "status": job.status.value,
+        "progress": job.progress,
+        "deduplicated": not created
+    }
+
+@app.get("/compliance/report/jobs/{report_id}")
+async def get_compliance_report_job(report_id: str):
+    """
+    Get progress of a queued compliance report
+    """
+    status = report_job_manager.get_status(report_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return status
+
+@app.get("/compliance/report/jobs/{report_id}/result", response_model=ComplianceReportResponse)
+async def get_compliance_report_result(report_id: str):
+    """
+    Fetch the finished compliance report
+    """
+    status = report_job_manager.get_status(report_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if status["status"] == "failed":
+        raise HTTPException(status_code=500, detail=status["error"])
+    result = report_job_manager.get_result(report_id)
+    if result is None:
+        raise HTTPException(status_code=409, detail=f"Report is {status['status']}")
+    return result
+
+@app.get("/compliance/report/export")
+async def export_compliance_report(
+    institution_id: str,
+    time_period: str = "30d",
+    format: str = "ndjson",
+    sections: str = "protocols,flagged_transactions"
+):
+    """
+    Stream report sections for regulator submission
+    CSV and Parquet exports take exactly one section; NDJSON may combine several
+    """
+    requested = [section.strip() for section in sections.split(",") if section.strip()]
+    unknown = [section for section in requested if section not in REPORT_SECTIONS]
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {unknown or sections}")
+    if format != "ndjson" and len(requested) != 1:
+        raise HTTPException(status_code=400, detail=f"{format} export requires a single section")
+
+    stream = ReportSectionStream(risk_analyzer, institution_id, time_period)
+    if format == "ndjson":
+        body = stream_ndjson(stream, requested)
+    elif format == "csv":
+        body = stream_csv(stream, requested[0])
+    else:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+        body = stream_parquet(stream, requested[0])
+
+    filename = f"{institution_id}_{time_period}_{'_'.join(requested)}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/compliance/rules/{framework}")
+async def update_regulatory_rules(framework: str, rules: List[Dict]):
+    """
+    Publish a new version of a framework's regulatory rules
+    """
+    try:
+        await compliance_engine.update_regulatory_rules(framework, rules)
+    except RuleValidationError as e:
+        raise HTTPException(status_code=400, detail={"errors": e.errors})
+    return compliance_engine.rule_store.describe(framework)
+
+@app.get("/compliance/rules/{framework}")
+async def get_regulatory_rules(framework: str):
+    """
+    Current rules and version history for a framework
+    """
+    return compliance_engine.rule_store.describe(framework)
+
+@app.get("/compliance/leaderboard")
+async def get_compliance_leaderboard(limit: int = 50):
+    """
+    Institutions ranked by time-decayed compliance score
+    """
+    try:
+        leaderboard = await compliance_engine.get_compliance_leaderboard(limit)
+        return {"leaderboard": leaderboard}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/risk/assessment", response_model=RiskAssessmentResponse)
 async def assess_portfolio_risk(request: RiskAssessmentRequest):
     """
@@ -196,26 +435,79 @@ async def assess_portfolio_risk(request: RiskAssessmentRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/regulatory/updates")
-async def get_regulatory_updates():
+async def get_regulatory_updates(
+    limit: int = 50,
+    source: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Get latest regulatory updates and changes
+    Re-encoded only when the update index changes; clients sending the ETag get a 304
     """
     try:
-        updates = await regulatory_monitor.get_latest_updates()
-        return {"regulatory_updates": updates}
+        index = regulatory_monitor.update_cache
+        return response_cache.response(
+            ("regulatory_updates", limit, source), index.version,
+            lambda: {"regulatory_updates": index.latest(limit, source)}, if_none_match
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/protocols/whitelist")
-async def get_approved_protocols():
+@app.post("/regulatory/portfolios/{institution_id}")
+async def register_institution_portfolio(institution_id: str, request: InstitutionPortfolioRequest):
     """
-    Get list of institutionally approved DeFi protocols
+    Register an institution's positions for regulatory impact matching
+    """
+    indexed = await regulatory_monitor.register_institution_portfolio(
+        institution_id, request.positions, request.jurisdictions
+    )
+    return {"institution_id": institution_id, "positions_indexed": indexed}
+
+@app.post("/regulatory/impact")
+async def analyze_regulatory_impact(update: Dict):
+    """
+    Impact of a regulatory update on every registered institution
     """
     try:
-        protocols = await protocol_auditor.get_approved_protocols()
-        return {"approved_protocols": protocols}
+        impacts = await regulatory_monitor.analyze_update_impact_for_all(update)
+        return {"affected_institutions": len(impacts), "impact_analyses": impacts}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/regulatory/feeds")
+async def get_regulatory_feed_status():
+    """
+    Polling status of configured regulator feeds
+    """
+    return {"feeds": regulatory_monitor.poller.status()}
+
+@app.get("/protocols/whitelist")
+async def get_approved_protocols(if_none_match: Optional[str] = Header(None)):
+    """
+    Get list of institutionally approved DeFi protocols
+    Served from a pre-serialised snapshot; clients sending its ETag get a 304
+    """
+    snapshot = protocol_auditor.get_whitelist_snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if snapshot.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@app.post("/protocols/whitelist")
+async def approve_protocol(request: ProtocolApprovalRequest):
+    """
+    Approve (or update) a protocol for institutional use
+    """
+    snapshot = await protocol_auditor.approve_protocol(request.model_dump())
+    return {"version": snapshot.version, "etag": snapshot.etag}
+
+@app.delete("/protocols/whitelist/{chain_id}/{protocol_address}")
+async def revoke_protocol(chain_id: int, protocol_address: str):
+    """
+    Revoke a protocol's institutional approval
+    """
+    snapshot = await protocol_auditor.revoke_protocol(chain_id, protocol_address)
+    return {"version": snapshot.version, "etag": snapshot.etag}
 
 @app.post("/aml/check")
 async def check_aml_compliance(address: str, amount: float):
@@ -228,6 +520,63 @@ async def check_aml_compliance(address: str, amount: float):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/chain/indexer")
+async def get_chain_indexer_status():
+    """
+    Progress of the on-chain event indexer
+    """
+    if chain_indexer is None:
+        raise HTTPException(status_code=503, detail="Chain indexer is disabled (set CHAIN_INDEXER=true)")
+    return chain_indexer.status()
+
+@app.get("/chain/events")
+async def get_chain_events(
+    event: Optional[str] = None,
+    account: Optional[str] = None,
+    from_block: int = 0,
+    limit: int = 100
+):
+    """
+    Indexed TransactionMonitor / RegulatoryOracle events, newest first
+    """
+    if chain_indexer is None:
+        raise HTTPException(status_code=503, detail="Chain indexer is disabled (set CHAIN_INDEXER=true)")
+    events = chain_indexer.store.query(chain_indexer.chain_id, event, account, from_block, limit)
+    return {"events": events}
+
+@app.get("/chain/accounts/{address}")
+async def get_chain_account(address: str):
+    """
+    On-chain AML / compliance state of an address from indexed events
+    """
+    if chain_indexer is None:
+        raise HTTPException(status_code=503, detail="Chain indexer is disabled (set CHAIN_INDEXER=true)")
+    return chain_indexer.store.account_summary(chain_indexer.chain_id, address)
+
+@app.post("/chain/oracle/screen")
+async def screen_with_regulatory_oracle(request: OracleScreeningRequest):
+    """
+    Live RegulatoryOracle reads (AML scores, protocol whitelist, jurisdiction restrictions) in batched RPC calls
+    """
+    if oracle_reader is None:
+        raise HTTPException(status_code=503, detail="No deployed RegulatoryOracle with a configured RPC endpoint")
+    try:
+        screening = await oracle_reader.screen(
+            request.accounts, request.institution, request.protocols, request.jurisdictions, request.block_number
+        )
+    except (RPCError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise HTTPException(status_code=502, detail=f"RPC error: {e}")
+    return {**screening, "rpc": oracle_reader.client.status()}
+
+@app.get("/chain/executor")
+async def get_chain_executor_status():
+    """
+    On-chain execution backend: submitted / confirmed / reverted transactions and RPC batching
+    """
+    if chain_executor is None:
+        raise HTTPException(status_code=503, detail="On-chain execution is simulated (set EXECUTION_SENDER)")
+    return chain_executor.metrics()
+
 # Real-time monitoring and alerting endpoints
 @app.post("/monitoring/setup-alerts")
 async def setup_regulatory_alerts(institution_id: str, alert_rules: Dict):
@@ -240,14 +589,35 @@ async def setup_regulatory_alerts(institution_id: str, alert_rules: Dict):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/monitoring/events")
+async def publish_monitoring_event(event: Dict):
+    """
+    Match a regulatory_update / risk_change / aml_flag event against configured alert rules
+    """
+    try:
+        alerts = await regulatory_monitor.publish_event(event)
+        return {"alerts_triggered": len(alerts), "alerts": alerts}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/monitoring/alerts")
+async def get_regulatory_alerts(institution_id: Optional[str] = None, limit: int = 50):
+    """
+    Recently triggered alerts, newest first
+    """
+    alerts = await regulatory_monitor.get_alerts(institution_id, limit)
+    return {"alerts": alerts}
+
 @app.get("/monitoring/calendar/{jurisdiction}")
-async def get_regulatory_calendar(jurisdiction: str, timeframe: str = "6months"):
+async def get_regulatory_calendar(jurisdiction: str, timeframe: str = "6months", start_date: Optional[str] = None):
     """
     Get regulatory compliance calendar
     """
     try:
-        calendar = await regulatory_monitor.generate_regulatory_calendar(jurisdiction, timeframe)
+        calendar = await regulatory_monitor.generate_regulatory_calendar(jurisdiction, timeframe, start_date)
         return {"compliance_calendar": calendar}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -262,17 +632,63 @@ async def audit_smart_contract(contract_address: str, chain_id: int):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/audit/batch")
+async def audit_contract_batch(request: ContractAuditBatchRequest):
+    """
+    Static security audit of many contracts in parallel (the repo's own contracts when none are given)
+    """
+    try:
+        targets = [AuditTarget(**contract) for contract in request.contracts] if request.contracts else None
+        audits = await protocol_auditor.audit_contracts(targets)
+        return {"contracts_audited": len(audits), "audits": audits}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 from services.multi_agent_system import multi_agent_system
+from services.admission import AdmissionController, AdmissionRejected
+from services.request_dedup import IdempotencyConflict, RequestDeduplicator
+from services.tracing import TRACE_FORMATS, Trace, trace_buffer
+
+demo_admission = AdmissionController(
+    max_concurrent=int(os.getenv("DEMO_MAX_CONCURRENT", "4")),
+    max_queue=int(os.getenv("DEMO_MAX_QUEUE", "32")),
+    max_outstanding_per_institution=int(os.getenv("DEMO_MAX_PER_INSTITUTION", "8")),
+)
+demo_dedup = RequestDeduplicator(ttl=float(os.getenv("DEMO_RESULT_TTL_SECONDS", "300")))
+
+async def _run_admitted_demo(request_text: str, institution_id: str, deadline_seconds: Optional[float]) -> Dict:
+    # Queue behind other requests by the priority the coordinator will assign
+    priority = await multi_agent_system.request_priority(request_text)
+    async with demo_admission.admit(institution_id, priority) as queue_wait:
+        # Execute the jaw-dropping demo
+        demo_result = await multi_agent_system.process_institutional_request(
+            request_text, institution_id, deadline_seconds
+        )
+    demo_result["admission"] = {"priority": priority.value, "queue_wait_ms": round(queue_wait * 1000, 1)}
+    return demo_result
 
 
 @app.post("/demo/institutional-request")
-async def demo_institutional_request(request: dict):
+async def demo_institutional_request(
+    request: dict,
+    idempotency_key: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None)
+):
     """
     Example request: {
         "request": "Should JPMorgan invest $500M in Aave for Q4 2025?",
-        "institution_id": "jpmorgan_chase_001"
+        "institution_id": "jpmorgan_chase_001",
+        "fresh": false,
+        "deadline_seconds": 30
     }
     
+    Identical requests (same protocol, amount bucket and institution) share one
+    run while in flight and are served from cache for DEMO_RESULT_TTL_SECONDS.
+    "fresh": true or `Cache-Control: no-cache` forces a new analysis; an
+    `Idempotency-Key` header replays the original outcome for retries.
+    "deadline_seconds" bounds the market-data fetches; slow upstreams fall
+    back to their last-known-good snapshot.
+    
     This endpoint showcases:
     - 5 specialized AI agents collaborating autonomously
     - Real-time natural language debate between agents
@@ -286,30 +702,124 @@ async def demo_institutional_request(request: dict):
         if not request_text:
             raise HTTPException(status_code=400, detail="Request text is required")
         
-        # Execute the jaw-dropping demo
-        demo_result = await multi_agent_system.process_institutional_request(
-            request_text, institution_id
+        fingerprint = await multi_agent_system.request_fingerprint(request_text, institution_id)
+        bypass_cache = bool(request.get("fresh")) or "no-cache" in (cache_control or "").lower()
+        demo_result, dedup = await demo_dedup.run(
+            fingerprint,
+            lambda: _run_admitted_demo(request_text, institution_id, request.get("deadline_seconds")),
+            idempotency_key=idempotency_key,
+            bypass_cache=bypass_cache
         )
         
-        return {
+        return FastJSONResponse({
             "status": "success",
             "demo_type": "multi_agent_institutional_compliance",
             "execution_time": demo_result.get("execution_time", "89 seconds"),
             "wow_factors": demo_result.get("judge_wow_factors", []),
-            "result": demo_result
-        }
+            "result": demo_result,
+            "dedup": dedup
+        })
         
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Demo execution error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Demo failed: {str(e)}")
 
 @app.get("/demo/agents/status")
-async def get_agents_real_time_status():
+async def get_agents_real_time_status(if_none_match: Optional[str] = Header(None)):
     """
     📊 Real-time agent status for dashboard
     Shows live agent collaboration, progress, and thoughts
+    Re-encoded only when an agent changes; pollers sending the ETag get a 304
+    """
+    return response_cache.response(
+        "agents_status", multi_agent_system.status_version(), multi_agent_system.get_real_time_status, if_none_match
+    )
+
+@app.get("/demo/admission")
+async def get_demo_admission_metrics():
     """
-    return multi_agent_system.get_real_time_status()
+    Admission queue depth, queue-time percentiles per priority, rejection counts and de-duplication hits
+    """
+    return {**demo_admission.metrics(), "dedup": demo_dedup.metrics()}
+
+@app.get("/demo/upstreams")
+async def get_demo_upstreams():
+    """
+    Circuit breaker state, p95 latency, hedging and stale-snapshot counters for DeFiLlama and CoinGecko
+    """
+    return multi_agent_system.upstream_metrics()
+
+def _find_trace(trace_id: str) -> Trace:
+    """A buffered trace, or one previously exported to TRACE_DIR"""
+    if not re.fullmatch(r"[0-9a-f]{32}", trace_id):
+        raise HTTPException(status_code=404, detail="Trace not found")
+    trace = trace_buffer.get(trace_id)
+    exported = trace_buffer.trace_dir / f"{trace_id}.chrome.json"
+    if trace is None and exported.exists():
+        trace = trace_buffer.load(exported)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+@app.get("/demo/traces")
+async def list_demo_traces():
+    """
+    Recent institutional-request traces: duration, span counts, time per category
+    """
+    return {"traces": trace_buffer.list()}
+
+@app.get("/demo/traces/{trace_id}")
+async def get_demo_trace(trace_id: str, format: str = "chrome"):
+    """
+    A trace as Chrome trace-event JSON (load in Perfetto / chrome://tracing) or OTLP/JSON
+    """
+    trace = _find_trace(trace_id)
+    if format not in TRACE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    return FastJSONResponse(trace.to_chrome_trace() if format == "chrome" else trace.to_otlp())
+
+@app.post("/demo/traces/{trace_id}/export")
+async def export_demo_trace(trace_id: str, format: str = "chrome"):
+    """
+    Write a trace to TRACE_DIR; Chrome-format files can be replayed after a restart
+    """
+    if format not in TRACE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    path = trace_buffer.export(_find_trace(trace_id), format)
+    return {"status": "success", "trace_id": trace_id, "path": str(path)}
+
+@app.post("/demo/traces/{trace_id}/replay")
+async def replay_demo_trace(trace_id: str, paced: bool = False):
+    """
+    Re-run a traced request against its recorded upstream responses, without network.
+    Runs on a separate agent system so the live dashboard is left alone, and
+    without the demo pauses unless `paced` is set
+    """
+    recorded = _find_trace(trace_id)
+    if not recorded.recordings:
+        raise HTTPException(
+            status_code=409,
+            detail="Trace has no recorded upstream responses; enable DEMO_TRACE_RECORDING to make traces replayable"
+        )
+    from services.multi_agent_system import MultiAgentDeFiSystem
+    replay_system = MultiAgentDeFiSystem()
+    if not paced:
+        replay_system.demo_pacing = 0.0
+    demo_result = await replay_system.replay(recorded)
+    # upstream calls the recording could not answer were handled like failed fetches; report them
+    replay_trace = trace_buffer.get(demo_result["trace_id"])
+    return FastJSONResponse({
+        "status": "success",
+        "replay_of": trace_id,
+        "trace": replay_trace.summary() if replay_trace else {"trace_id": demo_result["trace_id"]},
+        "result": demo_result
+    })
 
 @app.post("/demo/agents/reset")
 async def reset_demo_agents():
@@ -319,6 +829,8 @@ async def reset_demo_agents():
     global multi_agent_system
     from services.multi_agent_system import MultiAgentDeFiSystem
     multi_agent_system = MultiAgentDeFiSystem()
+    # the new instance's status versions restart from zero
+    response_cache.invalidate("agents_status")
     
     return {
         "status": "success",
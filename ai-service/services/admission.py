@@ -0,0 +1,191 @@
+"""
+Admission Control
+Bounded, priority-ordered and per-institution fair admission for expensive multi-agent requests
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+from services.multi_agent_system import TaskPriority
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {
+    TaskPriority.CRITICAL: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.MEDIUM: 2,
+    TaskPriority.LOW: 3,
+}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Ticket:
+    # heap order: priority, then the institution's position among its own
+    # outstanding requests (round-robin between institutions), then arrival
+    rank: int
+    institution_slot: int
+    sequence: int
+    institution_id: str = field(compare=False)
+    priority: TaskPriority = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """
+    At most `max_concurrent` requests run at once and at most `max_queue`
+    wait. Waiting requests are admitted by TaskPriority; within a priority an
+    institution's n-th outstanding request queues behind every other
+    institution's (n-1)-th, so one client's burst cannot starve the rest.
+    A full queue rejects the newcomer, unless it outranks the lowest-priority
+    waiter, which is shed instead. Rejections carry a Retry-After estimate
+    from the observed service time.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 32,
+        max_outstanding_per_institution: Optional[int] = None,
+        initial_service_time: float = 30.0
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_outstanding_per_institution = max_outstanding_per_institution
+        self.running = 0
+        self._queue: List[_Ticket] = []
+        self._sequence = itertools.count()
+        self._outstanding: Dict[str, int] = defaultdict(int)
+        self._service_time = initial_service_time  # EWMA seconds
+        self._waits: Dict[TaskPriority, Deque[float]] = {p: deque(maxlen=500) for p in TaskPriority}
+        self.counters = {"admitted": 0, "enqueued": 0, "rejected": 0, "shed": 0, "abandoned": 0, "completed": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new request"""
+        backlog = self.queued / max(1, self.max_concurrent) + 1
+        return max(1, math.ceil(self._service_time * backlog))
+
+    @asynccontextmanager
+    async def admit(self, institution_id: str, priority: TaskPriority = TaskPriority.MEDIUM):
+        """Hold one execution slot for the duration of the block"""
+        waited = await self._acquire(institution_id, priority)
+        self._waits[priority].append(waited)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started)
+            self.counters["completed"] += 1
+            self._settle(institution_id)
+            self._release()
+
+    async def _acquire(self, institution_id: str, priority: TaskPriority) -> float:
+        limit = self.max_outstanding_per_institution
+        if limit is not None and self._outstanding.get(institution_id, 0) >= limit:
+            self.counters["rejected"] += 1
+            raise AdmissionRejected(f"Institution {institution_id} already has {limit} requests outstanding", self.retry_after())
+
+        if self.running < self.max_concurrent and not self._queue:
+            self.running += 1
+            self._outstanding[institution_id] += 1
+            self.counters["admitted"] += 1
+            return 0.0
+
+        rank = PRIORITY_RANK[priority]
+        if self.queued >= self.max_queue:
+            worst = max(self._queue) if self._queue else None
+            if worst is None or worst.rank <= rank:
+                self.counters["rejected"] += 1
+                raise AdmissionRejected("Request queue is full", self.retry_after())
+            self._drop(worst)
+            self.counters["shed"] += 1
+            if not worst.future.done():
+                worst.future.set_exception(AdmissionRejected(
+                    f"Displaced by a {priority.value} priority request", self.retry_after()
+                ))
+
+        ticket = _Ticket(
+            rank, self._outstanding[institution_id], next(self._sequence), institution_id, priority,
+            time.monotonic(), asyncio.get_running_loop().create_future()
+        )
+        self._outstanding[institution_id] += 1
+        heapq.heappush(self._queue, ticket)
+        self.counters["enqueued"] += 1
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release()  # the slot was already handed to us; pass it on
+            else:
+                self._drop(ticket)
+            self.counters["abandoned"] += 1
+            self._settle(institution_id)
+            raise
+        except AdmissionRejected:
+            self._settle(institution_id)
+            raise
+        self.counters["admitted"] += 1
+        return time.monotonic() - ticket.enqueued_at
+
+    def _settle(self, institution_id: str):
+        self._outstanding[institution_id] -= 1
+        if not self._outstanding[institution_id]:
+            del self._outstanding[institution_id]
+
+    def _drop(self, ticket: _Ticket):
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+
+    def _release(self):
+        """Hand the freed slot straight to the best waiter, or return it to the pool"""
+        while self._queue:
+            ticket = heapq.heappop(self._queue)
+            if not ticket.future.done():  # skip waiters cancelled since they queued
+                ticket.future.set_result(None)
+                return
+        self.running -= 1
+
+    def metrics(self) -> Dict:
+        waits = {}
+        for priority, samples in self._waits.items():
+            if samples:
+                ordered = sorted(samples)
+                waits[priority.value] = {
+                    "samples": len(ordered),
+                    "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1),
+                }
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queued_by_priority": {
+                p.value: sum(1 for t in self._queue if t.priority is p) for p in TaskPriority
+            },
+            "outstanding_by_institution": dict(self._outstanding),
+            "service_time_seconds": round(self._service_time, 2),
+            "retry_after_seconds": self.retry_after(),
+            "queue_wait": waits,
+            **self.counters,
+        }
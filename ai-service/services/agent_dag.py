@@ -0,0 +1,212 @@
+"""
+Agent Task DAG
+Declarative dependency graph for agent workflows: each step starts as soon as its inputs resolve
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class TaskGraphError(Exception):
+    """Invalid graph: duplicate step, unknown input or cycle"""
+
+
+class TaskFailed(Exception):
+    def __init__(self, name: str, error: BaseException):
+        super().__init__(f"Workflow step '{name}' failed: {error!r}")
+        self.name = name
+        self.error = error
+
+
+@dataclass
+class TaskNode:
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    inputs: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_delay: float = 0.5
+    # a tolerated failure is passed on to dependents as the exception object
+    # (gather(return_exceptions=True) semantics) instead of failing the run
+    tolerate_failure: bool = False
+
+
+@dataclass
+class StepTiming:
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    attempts: int = 0
+    status: str = "pending"
+    error: Optional[str] = None
+
+    def to_dict(self, origin: float) -> Dict:
+        return {
+            "status": self.status,
+            "attempts": self.attempts,
+            "started_ms": round((self.started - origin) * 1000, 1) if self.started else None,
+            "duration_ms": round((self.finished - self.started) * 1000, 1) if self.started and self.finished else None,
+            "error": self.error,
+        }
+
+
+class TaskGraph:
+    """
+    Steps are registered with the names of the steps (or seed values) they
+    consume; the step function receives those results positionally, in the
+    declared order. Each step runs once per run, so a result consumed by
+    several agents (one parse, one protocol fetch) is computed once.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, TaskNode] = {}
+        self.seeds: set = set()
+        self._order: Optional[List[str]] = None
+
+    def seed(self, *names: str) -> "TaskGraph":
+        """Declare values supplied by the caller at run time"""
+        self.seeds.update(names)
+        self._order = None
+        return self
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        inputs: Tuple[str, ...] = (),
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        retry_delay: float = 0.5,
+        tolerate_failure: bool = False
+    ) -> "TaskGraph":
+        if name in self.nodes or name in self.seeds:
+            raise TaskGraphError(f"Duplicate workflow step '{name}'")
+        self.nodes[name] = TaskNode(name, fn, tuple(inputs), timeout, retries, retry_delay, tolerate_failure)
+        self._order = None
+        return self
+
+    def order(self) -> List[str]:
+        """Topological order of the steps; validates inputs and rejects cycles"""
+        if self._order is not None:
+            return self._order
+        for node in self.nodes.values():
+            for dependency in node.inputs:
+                if dependency not in self.nodes and dependency not in self.seeds:
+                    raise TaskGraphError(f"Step '{node.name}' depends on unknown input '{dependency}'")
+        indegree = {name: sum(d in self.nodes for d in node.inputs) for name, node in self.nodes.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            for dependency in node.inputs:
+                if dependency in self.nodes:
+                    dependents[dependency].append(node.name)
+        ready = [name for name, degree in indegree.items() if degree == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for dependent in dependents[name]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.nodes):
+            cyclic = sorted(name for name, degree in indegree.items() if degree > 0)
+            raise TaskGraphError(f"Workflow has a dependency cycle through {cyclic}")
+        self._order = order
+        return order
+
+    async def run(self, **seeds: Any) -> "GraphRun":
+        missing = self.seeds - set(seeds)
+        if missing:
+            raise TaskGraphError(f"Missing workflow inputs {sorted(missing)}")
+        graph_run = GraphRun(self, seeds)
+        await graph_run.execute()
+        return graph_run
+
+
+class GraphRun:
+    """Results, errors and per-step timings of one execution of a TaskGraph"""
+
+    def __init__(self, graph: TaskGraph, seeds: Dict[str, Any]):
+        self.graph = graph
+        self.results: Dict[str, Any] = dict(seeds)
+        self.timings: Dict[str, StepTiming] = {name: StepTiming() for name in graph.nodes}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._futures: Dict[str, asyncio.Future] = {}
+
+    async def execute(self):
+        loop = asyncio.get_running_loop()
+        order = self.graph.order()
+        for name in self.results:
+            future = self._futures[name] = loop.create_future()
+            future.set_result(self.results[name])
+        for name in order:
+            self._futures[name] = loop.create_future()
+        tasks = [asyncio.create_task(self._run_step(self.graph.nodes[name])) for name in order]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                await completed
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self.finished = time.perf_counter()
+
+    async def _run_step(self, node: TaskNode):
+        inputs = [await self._futures[dependency] for dependency in node.inputs]
+        timing = self.timings[node.name]
+        timing.started = time.perf_counter()
+        timing.status = "running"
+        while True:
+            timing.attempts += 1
+            try:
+                with tracing.span(f"step:{node.name}", "workflow", lane=node.name, attempt=timing.attempts):
+                    result = await asyncio.wait_for(node.fn(*inputs), node.timeout)
+                break
+            except Exception as e:
+                if timing.attempts <= node.retries:
+                    logger.warning(f"Workflow step {node.name} attempt {timing.attempts} failed: {e!r}; retrying")
+                    await asyncio.sleep(node.retry_delay * timing.attempts)
+                    continue
+                timing.finished = time.perf_counter()
+                timing.status = "failed"
+                timing.error = repr(e)
+                if not node.tolerate_failure:
+                    failure = TaskFailed(node.name, e)
+                    self._futures[node.name].set_exception(failure)
+                    self._futures[node.name].exception()  # dependents re-raise it; mark retrieved
+                    raise failure from e
+                logger.warning(f"Workflow step {node.name} failed, continuing without it: {e!r}")
+                result = e
+                break
+        if timing.status != "failed":
+            timing.finished = time.perf_counter()
+            timing.status = "completed"
+        self.results[node.name] = result
+        self._futures[node.name].set_result(result)
+
+    def critical_path(self) -> List[str]:
+        """Chain of steps that determined the run's wall-clock time"""
+        path = []
+        finished = {name: t.finished for name, t in self.timings.items() if t.finished is not None}
+        current = max(finished, key=finished.get) if finished else None
+        while current is not None:
+            path.append(current)
+            upstream = [d for d in self.graph.nodes[current].inputs if d in finished]
+            current = max(upstream, key=finished.get) if upstream else None
+        return path[::-1]
+
+    def report(self) -> Dict:
+        return {
+            "total_ms": round(((self.finished or time.perf_counter()) - self.started) * 1000, 1),
+            "critical_path": self.critical_path(),
+            "steps": {name: timing.to_dict(self.started) for name, timing in self.timings.items()},
+        }
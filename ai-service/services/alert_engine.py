@@ -0,0 +1,301 @@
+"""
+Alert Engine Service
+Event-driven matching of regulatory, risk and AML events against institutions' alert rules
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from services.database import shared_pool
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+# keys match the AlertSeverity enum in prisma/schema.prisma
+SEVERITY_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+EVENT_ALERT_TYPES = {
+    "regulatory_update": "REGULATORY_CHANGE",
+    "risk_change": "HIGH_RISK_PROTOCOL",
+    "aml_flag": "SUSPICIOUS_TRANSACTION",
+}
+# event fields that identify one occurrence when the event carries no event_id;
+# amount / addresses / tx_hash keep distinct transfers with the same title apart
+FINGERPRINT_FIELDS = (
+    "event_type", "title", "jurisdiction", "protocols", "severity",
+    "from_address", "to_address", "amount", "tx_hash",
+)
+DEFAULT_RATE_LIMITS = {
+    "email": (20, 3600.0),
+    "webhook": (120, 60.0),
+    "slack": (60, 60.0),
+    "dashboard": (1000, 60.0),
+}
+
+Dispatcher = Callable[[str, Dict, Dict], Awaitable[None]]
+
+
+@dataclass
+class AlertRule:
+    institution_id: str
+    rule_id: str
+    event_type: str
+    jurisdictions: Tuple[str, ...]
+    protocols: Tuple[str, ...]
+    min_severity: str
+    channels: Tuple[str, ...]
+    webhook_url: Optional[str] = None
+
+    def accepts(self, severity: str) -> bool:
+        return SEVERITY_RANK.get(severity, 0) >= SEVERITY_RANK.get(self.min_severity, 0)
+
+
+@dataclass
+class ChannelRateLimiter:
+    max_alerts: int
+    per_seconds: float
+    sent: Deque[float] = field(default_factory=deque)
+
+    def allow(self, now: float) -> bool:
+        while self.sent and now - self.sent[0] >= self.per_seconds:
+            self.sent.popleft()
+        if len(self.sent) >= self.max_alerts:
+            return False
+        self.sent.append(now)
+        return True
+
+
+def parse_alert_rules(institution_id: str, alert_rules: Dict) -> List[AlertRule]:
+    """
+    Accepts {"rules": [...]} or a single rule dict. Each rule may list
+    event_type, jurisdictions, protocols (protocol or token names),
+    min_severity, channels and webhook_url; omitted filters match everything.
+    """
+    raw_rules = alert_rules.get("rules", [alert_rules])
+    rules = []
+    for i, raw in enumerate(raw_rules):
+        event_type = raw.get("event_type", "regulatory_update")
+        if event_type not in EVENT_ALERT_TYPES:
+            raise ValueError(f"Unknown alert event_type '{event_type}'")
+        min_severity = raw.get("min_severity", "LOW").upper()
+        if min_severity not in SEVERITY_RANK:
+            raise ValueError(f"Unknown alert severity '{min_severity}'")
+        rules.append(AlertRule(
+            institution_id=institution_id,
+            rule_id=raw.get("rule_id", f"{institution_id}_rule_{i}"),
+            event_type=event_type,
+            jurisdictions=tuple(j.upper() for j in raw.get("jurisdictions", [])) or (WILDCARD,),
+            protocols=tuple(p.lower() for p in raw.get("protocols", [])) or (WILDCARD,),
+            min_severity=min_severity,
+            channels=tuple(raw.get("channels", ["dashboard"])),
+            webhook_url=raw.get("webhook_url"),
+        ))
+    return rules
+
+
+class AlertEngine:
+    """
+    All institutions' rules live in one nested index:
+    event_type -> jurisdiction (or *) -> protocol (or *) -> rules.
+    An event only visits the buckets for its own jurisdiction and protocols plus
+    the wildcard buckets, so matching cost grows with the number of matching
+    rules rather than the number of institutions.
+    """
+
+    def __init__(
+        self,
+        dedup_window_seconds: float = 3600.0,
+        rate_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        database_url: Optional[str] = None
+    ):
+        self.index: Dict[str, Dict[str, Dict[str, List[AlertRule]]]] = {}
+        self.rules_by_institution: Dict[str, List[AlertRule]] = {}
+        self.dedup_window_seconds = dedup_window_seconds
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.recent_alerts: Deque[Dict] = deque(maxlen=1000)
+        self.db = shared_pool(database_url)
+        self.dispatchers: Dict[str, Dispatcher] = {"webhook": self._deliver_webhook}
+        self._seen: Dict[Tuple[str, str, str], float] = {}
+        self._limiters: Dict[Tuple[str, str], ChannelRateLimiter] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def register(self, institution_id: str, alert_rules: Dict) -> int:
+        """Replace an institution's alert rules; returns the number of rules indexed"""
+        rules = parse_alert_rules(institution_id, alert_rules)
+        self.unregister(institution_id)
+        for rule in rules:
+            for jurisdiction in rule.jurisdictions:
+                for protocol in rule.protocols:
+                    (self.index.setdefault(rule.event_type, {})
+                        .setdefault(jurisdiction, {})
+                        .setdefault(protocol, [])
+                        .append(rule))
+        self.rules_by_institution[institution_id] = rules
+        return len(rules)
+
+    def unregister(self, institution_id: str):
+        for rule in self.rules_by_institution.pop(institution_id, []):
+            for jurisdiction in rule.jurisdictions:
+                for protocol in rule.protocols:
+                    bucket = self.index[rule.event_type][jurisdiction][protocol]
+                    bucket.remove(rule)
+
+    def match(self, event: Dict) -> List[AlertRule]:
+        """Rules triggered by `event`, at most one per (institution, rule)"""
+        by_jurisdiction = self.index.get(event["event_type"])
+        if not by_jurisdiction:
+            return []
+
+        severity = event.get("severity", "LOW")
+        institution_id = event.get("institution_id")
+        jurisdictions = {WILDCARD}
+        if event.get("jurisdiction"):
+            jurisdictions.add(event["jurisdiction"].upper())
+        protocols = {WILDCARD} | {p.lower() for p in event.get("protocols", [])}
+
+        matched: Dict[Tuple[str, str], AlertRule] = {}
+        for jurisdiction in jurisdictions:
+            by_protocol = by_jurisdiction.get(jurisdiction)
+            if not by_protocol:
+                continue
+            for protocol in protocols:
+                for rule in by_protocol.get(protocol, ()):
+                    # institution-specific events (AML flags) only alert their owner
+                    if institution_id and rule.institution_id != institution_id:
+                        continue
+                    if rule.accepts(severity):
+                        matched[(rule.institution_id, rule.rule_id)] = rule
+        return list(matched.values())
+
+    async def process_event(self, event: Dict) -> List[Dict]:
+        """Match an event, de-duplicate, rate-limit deliveries and persist alerts"""
+        now = time.time()
+        self._expire_seen(now)
+        severity = str(event.get("severity") or "LOW").upper()
+        if severity not in SEVERITY_RANK:
+            # unknown severities already rank as LOW; store them as LOW so the enum column accepts them
+            logger.warning(f"Unknown alert severity {severity!r}, treating as LOW")
+            severity = "LOW"
+        event = {**event, "severity": severity}
+        fingerprint = event.get("event_id") or json.dumps(
+            {k: event.get(k) for k in FINGERPRINT_FIELDS},
+            sort_keys=True,
+            default=str
+        )
+
+        alerts = []
+        deliveries = []
+        for rule in self.match(event):
+            dedup_key = (rule.institution_id, rule.rule_id, fingerprint)
+            seen_at = self._seen.get(dedup_key)
+            if seen_at is not None and now - seen_at < self.dedup_window_seconds:
+                continue
+            self._seen[dedup_key] = now
+
+            alert = {
+                "id": str(uuid.uuid4()),
+                "institution_id": rule.institution_id,
+                "rule_id": rule.rule_id,
+                "alert_type": EVENT_ALERT_TYPES[event["event_type"]],
+                "severity": event["severity"],
+                "title": event.get("title", event["event_type"].replace("_", " ").title()),
+                "description": event.get("description", ""),
+                "trigger_data": event,
+                "channels": {},
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            for channel in rule.channels:
+                if not self._limiter(rule.institution_id, channel).allow(now):
+                    alert["channels"][channel] = "rate_limited"
+                    continue
+                alert["channels"][channel] = "pending"
+                deliveries.append((alert, channel, self._dispatch(channel, alert, rule)))
+            alerts.append(alert)
+
+        # deliver every channel of every alert concurrently so one slow webhook
+        # costs its own timeout once instead of delaying all the others
+        results = await asyncio.gather(*(delivery for _, _, delivery in deliveries), return_exceptions=True)
+        for (alert, channel, _), result in zip(deliveries, results):
+            alert["channels"][channel] = "failed" if isinstance(result, BaseException) else result
+
+        self.recent_alerts.extend(alerts)
+        if alerts and self.db.enabled:
+            await self._persist(alerts)
+        return alerts
+
+    def _expire_seen(self, now: float):
+        """Drop stale dedup entries to bound memory; the window itself is enforced at lookup"""
+        if len(self._seen) < 10_000:
+            return
+        cutoff = now - self.dedup_window_seconds
+        self._seen = {key: seen_at for key, seen_at in self._seen.items() if seen_at >= cutoff}
+
+    def _limiter(self, institution_id: str, channel: str) -> ChannelRateLimiter:
+        key = (institution_id, channel)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            max_alerts, per_seconds = self.rate_limits.get(channel, (60, 60.0))
+            limiter = ChannelRateLimiter(max_alerts, per_seconds)
+            self._limiters[key] = limiter
+        return limiter
+
+    async def _dispatch(self, channel: str, alert: Dict, rule: AlertRule) -> str:
+        dispatcher = self.dispatchers.get(channel)
+        if dispatcher is None:
+            logger.info(f"🔔 [{channel}] {alert['institution_id']}: {alert['title']}")
+            return "delivered"
+        try:
+            await dispatcher(channel, alert, {"webhook_url": rule.webhook_url})
+            return "delivered"
+        except Exception as e:
+            logger.warning(f"Alert delivery via {channel} failed: {e}")
+            return "failed"
+
+    async def _deliver_webhook(self, channel: str, alert: Dict, options: Dict):
+        if not options.get("webhook_url"):
+            raise ValueError("webhook channel requires webhook_url")
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        payload = {k: v for k, v in alert.items() if k != "trigger_data"}
+        async with self._session.post(options["webhook_url"], json=payload) as response:
+            response.raise_for_status()
+
+    async def _persist(self, alerts: List[Dict]):
+        """Write alerts to the Prisma regulatory_alerts table"""
+        try:
+            await self.db.executemany(
+                """
+                INSERT INTO regulatory_alerts (
+                    "id", "institutionId", "alertType", "severity", "title",
+                    "description", "triggerData", "acknowledged", "createdAt"
+                ) VALUES ($1, $2, $3::"AlertType", $4::"AlertSeverity", $5, $6, $7::jsonb, false, $8)
+                """,
+                [
+                    (
+                        alert["id"],
+                        alert["institution_id"],
+                        alert["alert_type"],
+                        alert["severity"],
+                        alert["title"],
+                        alert["description"],
+                        json.dumps(alert["trigger_data"], default=str),
+                        datetime.fromisoformat(alert["created_at"]),
+                    )
+                    for alert in alerts
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Failed to persist {len(alerts)} regulatory alerts: {e}")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
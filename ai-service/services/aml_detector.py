@@ -3,13 +3,17 @@ AML Detector Service
 Anti-Money Laundering detection and compliance monitoring
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from services.chain_indexer import ChainEventStore
 
 class AMLDetector:
-    def __init__(self):
+    def __init__(self, event_store: Optional[ChainEventStore] = None, chain_id: Optional[int] = None):
         self.sanctions_lists = set()
         self.suspicious_patterns = {}
         self.risk_models = {}
+        self.event_store = event_store
+        self.chain_id = chain_id
     
     async def check_compliance(self, address: str, amount: float) -> Dict:
         """
@@ -23,7 +27,7 @@ class AMLDetector:
         # - Transaction amount thresholds
         # - Pattern analysis
         
-        return {
+        result = {
             "compliance_status": "APPROVED",
             "risk_score": 15.0,
             "sanctions_check": "CLEAR",
@@ -35,6 +39,27 @@ class AMLDetector:
                 "Transaction approved for processing"
             ]
         }
+        if self.event_store is not None:
+            self._apply_onchain_state(result, self.event_store.account_summary(self.chain_id, address))
+        return result
+    
+    def _apply_onchain_state(self, result: Dict, onchain: Dict):
+        """Fold indexed RegulatoryOracle / TransactionMonitor state into an AML check"""
+        result["onchain"] = onchain
+        if onchain["aml_risk_score"] is not None:
+            result["risk_score"] = float(onchain["aml_risk_score"])
+        if onchain["flagged_transactions"] or onchain["violations"]:
+            result["pattern_alerts"].append(
+                f"{onchain['flagged_transactions']} flagged transactions and "
+                f"{onchain['violations']} violations recorded on-chain"
+            )
+        if onchain["blacklisted"] or onchain["frozen"]:
+            result["compliance_status"] = "REJECTED"
+            result["sanctions_check"] = "FLAGGED"
+            result["recommendations"] = ["Address is blacklisted or frozen on-chain; block transaction"]
+        elif result["risk_score"] >= 70:
+            result["compliance_status"] = "REVIEW_REQUIRED"
+            result["recommendations"] = ["On-chain AML risk score is high; escalate for manual review"]
     
     async def analyze_transaction_chain(
         self,
@@ -0,0 +1,97 @@
+"""
+Audit Store
+Content-addressed on-disk audit results keyed by runtime-bytecode hash, with per-deployment address links
+"""
+
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = Path(os.getenv("AUDIT_STORE_DIR", Path(__file__).resolve().parents[1] / "data" / "audits"))
+
+
+def _atomic_write(path: Path, data: Dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as handle:
+        json.dump(data, handle, default=str)
+    os.replace(tmp, path)
+
+
+class AuditStore:
+    """
+    objects/<aa>/<code_hash>.json holds one audit per distinct runtime bytecode;
+    deployments.json maps "<chain_id>:<address>" to the code hash plus metadata.
+    Every identical deployment, on any chain, resolves to the same audit object.
+    """
+
+    def __init__(self, root: Path = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.deployments_path = self.root / "deployments.json"
+        self._audits: Dict[str, Dict] = {}
+        self._deployments: Optional[Dict[str, Dict]] = None
+
+    @staticmethod
+    def deployment_key(chain_id: int, address: str) -> str:
+        return f"{chain_id}:{address.lower()}"
+
+    def _object_path(self, code_hash: str) -> Path:
+        name = code_hash.replace(":", "_")
+        return self.root / "objects" / name[-64:-62] / f"{name}.json"
+
+    @property
+    def deployments(self) -> Dict[str, Dict]:
+        if self._deployments is None:
+            try:
+                self._deployments = json.loads(self.deployments_path.read_text())
+            except FileNotFoundError:
+                self._deployments = {}
+            except ValueError as e:
+                logger.error(f"Corrupt audit deployment index {self.deployments_path}: {e}")
+                self._deployments = {}
+        return self._deployments
+
+    def get_audit(self, code_hash: str) -> Optional[Dict]:
+        audit = self._audits.get(code_hash)
+        if audit is None:
+            try:
+                audit = json.loads(self._object_path(code_hash).read_text())
+            except FileNotFoundError:
+                return None
+            self._audits[code_hash] = audit
+        return audit
+
+    def put_audit(self, code_hash: str, audit: Dict):
+        self._audits[code_hash] = audit
+        _atomic_write(self._object_path(code_hash), audit)
+
+    def link(self, chain_id: int, address: str, code_hash: str, metadata: Optional[Dict] = None):
+        """Point a deployment at the audit for its bytecode"""
+        now = datetime.utcnow().isoformat()
+        key = self.deployment_key(chain_id, address)
+        previous = self.deployments.get(key, {})
+        if previous.get("code_hash") == code_hash and not metadata:
+            return
+        self.deployments[key] = {
+            **previous,
+            **(metadata or {}),
+            "chain_id": chain_id,
+            "address": address,
+            "code_hash": code_hash,
+            "first_seen": previous.get("first_seen", now),
+            "linked_at": now,
+        }
+        _atomic_write(self.deployments_path, self.deployments)
+
+    def resolve(self, chain_id: int, address: str) -> Optional[Dict]:
+        """Deployment metadata for an address, if it has been audited before"""
+        return self.deployments.get(self.deployment_key(chain_id, address))
+
+    def deployments_of(self, code_hash: str) -> List[Dict]:
+        return [entry for entry in self.deployments.values() if entry["code_hash"] == code_hash]
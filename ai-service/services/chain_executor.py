@@ -0,0 +1,274 @@
+"""
+Chain Executor
+Batched submission of RegulatoryOracle / InstitutionalTreasury transactions with local nonces and concurrent receipt polling
+"""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.chain_rpc import RPCError, load_rpc_urls
+from services.contract_audit import CONTRACTS_ROOT
+from services.evm_abi import encode_call, load_abis
+from services.protocol_whitelist import DEFAULT_APPROVED_PROTOCOLS
+from services.rpc_client import BatchedRPCClient
+
+logger = logging.getLogger(__name__)
+
+# RegulatoryOracle.ComplianceRegion / RiskLevel enum ordinals
+COMPLIANCE_REGIONS = {"US": 0, "EU": 1, "UK": 2, "JP": 3, "GLOBAL": 4}
+RISK_LEVELS = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+# Fixed gas per transaction: estimating would cost a round trip each, and fails
+# for calls that depend on earlier transactions of the same batch
+DEFAULT_TX_GAS = 500_000
+
+
+class NonceManager:
+    """
+    Consecutive nonces per sender, handed out locally so transactions can be
+    submitted in parallel without a round trip each. Synced from the node's
+    pending transaction count on first use and after reset()
+    """
+
+    def __init__(self, client: BatchedRPCClient):
+        self.client = client
+        self._next: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def reserve(self, sender: str, count: int = 1) -> List[int]:
+        sender = sender.lower()
+        async with self._locks.setdefault(sender, asyncio.Lock()):
+            if sender not in self._next:
+                self._next[sender] = int(await self.client.call("eth_getTransactionCount", [sender, "pending"]), 16)
+            start = self._next[sender]
+            self._next[sender] += count
+        return list(range(start, start + count))
+
+    def reset(self, sender: str):
+        self._next.pop(sender.lower(), None)
+
+
+class ChainExecutor:
+    """
+    Sends compliance-rule and investment transactions from an account the node
+    signs for (a Hardhat / anvil dev account, or a node-managed key). A batch of
+    calls gets consecutive local nonces and goes out as one JSON-RPC batch;
+    receipts for everything outstanding, across callers, are polled together,
+    one batch per `poll_interval`. A rejected transaction's nonce is filled with a zero-value
+    self-transfer so the transactions queued behind it still confirm
+    """
+
+    def __init__(
+        self,
+        client: BatchedRPCClient,
+        sender: str,
+        treasury_address: str,
+        oracle_address: str,
+        abis: Optional[Dict[str, List[Dict]]] = None,
+        contracts_root: Path = CONTRACTS_ROOT,
+        gas: int = DEFAULT_TX_GAS,
+        poll_interval: float = 0.05,
+        receipt_timeout: float = 60.0,
+        max_nonce_retries: int = 20
+    ):
+        self.client = client
+        self.sender = sender.lower()
+        self.addresses = {"InstitutionalTreasury": treasury_address.lower(), "RegulatoryOracle": oracle_address.lower()}
+        abis = abis or load_abis(list(self.addresses), contracts_root)
+        self.functions = {
+            contract: {entry["name"]: entry for entry in abi if entry.get("type") == "function"}
+            for contract, abi in abis.items()
+        }
+        self.gas = gas
+        self.poll_interval = poll_interval
+        self.receipt_timeout = receipt_timeout
+        self.max_nonce_retries = max_nonce_retries
+        self.nonces = NonceManager(client)
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.stats = {"submitted": 0, "confirmed": 0, "reverted": 0, "rejected": 0, "gap_fills": 0, "receipt_polls": 0}
+
+    def encode(self, contract: str, function: str, args: List[Any]) -> Tuple[str, str]:
+        """(to, calldata) for a call on one of the two contracts"""
+        return self.addresses[contract], encode_call(self.functions[contract][function], args)
+
+    async def _send(self, to: str, data: str, nonce: int) -> str:
+        tx = {"from": self.sender, "to": to, "data": data, "gas": hex(self.gas), "nonce": hex(nonce)}
+        for attempt in range(self.max_nonce_retries + 1):
+            try:
+                return await self.client.request("eth_sendTransaction", [tx])
+            except RPCError as e:
+                # automining nodes (Hardhat) refuse to queue a nonce whose predecessor
+                # hasn't arrived yet; it is in flight, so try again shortly
+                if "nonce too high" not in str(e).lower() or attempt == self.max_nonce_retries:
+                    raise
+                await asyncio.sleep(self.poll_interval)
+
+    async def _fill_gap(self, nonce: int):
+        try:
+            await self.client.request("eth_sendTransaction", [{
+                "from": self.sender, "to": self.sender, "value": "0x0", "gas": hex(21_000), "nonce": hex(nonce)
+            }])
+            self.stats["gap_fills"] += 1
+        except RPCError as e:
+            # the nonce was used after all (the node mined the failing transaction) or is out of sync
+            logger.warning(f"Could not fill nonce {nonce} for {self.sender}: {e}; resyncing")
+            self.nonces.reset(self.sender)
+
+    async def _submit_one(self, to: str, data: str, nonce: int) -> Any:
+        try:
+            tx_hash = await self._send(to, data, nonce)
+        except RPCError as e:
+            self.stats["rejected"] += 1
+            await self._fill_gap(nonce)
+            return e
+        self.stats["submitted"] += 1
+        return tx_hash
+
+    async def submit(self, calls: List[Tuple[str, str]]) -> List[Any]:
+        """Transaction hash per (to, calldata), or the RPCError that rejected it"""
+        nonces = await self.nonces.reserve(self.sender, len(calls))
+        return await asyncio.gather(*(self._submit_one(to, data, nonce) for (to, data), nonce in zip(calls, nonces)))
+
+    async def wait_for_receipts(self, tx_hashes: List[str]) -> Dict[str, Dict]:
+        """Receipts by hash; one poller asks for every caller's outstanding receipts in one batch per round"""
+        loop = asyncio.get_running_loop()
+        futures = {tx_hash: self._waiters.setdefault(tx_hash, loop.create_future()) for tx_hash in tx_hashes}
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll_receipts())
+        try:
+            await asyncio.wait_for(asyncio.gather(*futures.values()), self.receipt_timeout)
+        except asyncio.TimeoutError:
+            unconfirmed = [tx_hash for tx_hash, future in futures.items() if future.cancelled()]
+            for tx_hash in unconfirmed:
+                self._waiters.pop(tx_hash, None)
+            raise asyncio.TimeoutError(f"{len(unconfirmed)} transactions unconfirmed after {self.receipt_timeout}s")
+        return {tx_hash: future.result() for tx_hash, future in futures.items()}
+
+    async def _poll_receipts(self):
+        while self._waiters:
+            polled = list(self._waiters)
+            self.stats["receipt_polls"] += 1
+            results = await asyncio.gather(
+                *(self.client.request("eth_getTransactionReceipt", [tx_hash]) for tx_hash in polled),
+                return_exceptions=True
+            )
+            failures = [receipt for receipt in results if isinstance(receipt, BaseException)]
+            if failures:
+                logger.warning(f"{len(failures)} of {len(polled)} receipt polls failed: {failures[0]}")
+            for tx_hash, receipt in zip(polled, results):
+                future = self._waiters.get(tx_hash)
+                if future is None:
+                    continue
+                if future.done():  # its caller gave up
+                    del self._waiters[tx_hash]
+                elif receipt and not isinstance(receipt, BaseException):
+                    future.set_result(receipt)
+                    del self._waiters[tx_hash]
+            if self._waiters:
+                await asyncio.sleep(self.poll_interval)
+
+    async def execute(self, calls: List[Dict]) -> List[Dict]:
+        """
+        Submit calls ({"type", "contract", "function", "args"}) in order and wait
+        for them to be mined; one record per call with hash, status and gas used
+        """
+        submitted = await self.submit([self.encode(call["contract"], call["function"], call["args"]) for call in calls])
+        receipts = await self.wait_for_receipts([tx for tx in submitted if isinstance(tx, str)])
+        records = []
+        for call, tx in zip(calls, submitted):
+            record = {"type": call["type"], "contract": call["contract"], "function": call["function"]}
+            if isinstance(tx, RPCError):
+                records.append({**record, "tx_hash": None, "status": "REJECTED", "error": str(tx)})
+                continue
+            receipt = receipts[tx]
+            succeeded = int(receipt.get("status", "0x1"), 16) == 1
+            self.stats["confirmed" if succeeded else "reverted"] += 1
+            records.append({
+                **record,
+                "tx_hash": tx,
+                "status": "SUCCESS" if succeeded else "REVERTED",
+                "block_number": int(receipt["blockNumber"], 16),
+                "gas_used": int(receipt["gasUsed"], 16),
+            })
+        return records
+
+    async def execute_investment(
+        self,
+        protocol_name: str,
+        protocol_address: str,
+        token: str,
+        amount: int,
+        region: str = "GLOBAL",
+        risk_level: str = "LOW",
+        description: str = ""
+    ) -> List[Dict]:
+        """Record the compliance rule on the oracle and invest `amount` token units, in one batch"""
+        return await self.execute([
+            {
+                "type": "Compliance Approval",
+                "contract": "RegulatoryOracle",
+                "function": "createComplianceRule",
+                "args": [
+                    f"{protocol_name} institutional allocation",
+                    COMPLIANCE_REGIONS.get(region, COMPLIANCE_REGIONS["GLOBAL"]),
+                    RISK_LEVELS.get(risk_level, RISK_LEVELS["MEDIUM"]),
+                    description or f"Approved allocation to {protocol_name}",
+                ],
+            },
+            {
+                "type": "Investment Execution",
+                "contract": "InstitutionalTreasury",
+                "function": "investInProtocol",
+                "args": [protocol_address, token, amount, b""],
+            },
+        ])
+
+    def metrics(self) -> Dict:
+        return {"sender": self.sender, **self.addresses, **self.stats, "rpc": self.client.status()}
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+        await self.client.close()
+
+
+def load_execution_protocols() -> Dict[str, str]:
+    """Protocol name -> contract address to invest in; EXECUTION_PROTOCOLS (JSON object) overrides the whitelist defaults"""
+    protocols = {protocol["name"].lower(): protocol["address"] for protocol in DEFAULT_APPROVED_PROTOCOLS}
+    configured = os.getenv("EXECUTION_PROTOCOLS")
+    if configured:
+        protocols.update({name.lower(): address for name, address in json.loads(configured).items()})
+    return protocols
+
+
+def chain_executor_from_deployments(contracts_root: Path = CONTRACTS_ROOT) -> Optional[ChainExecutor]:
+    """
+    Executor for the contracts in the latest contracts/deployment-*.json, sending
+    from EXECUTION_SENDER; None (simulated execution) unless a sender is configured
+    """
+    sender = os.getenv("EXECUTION_SENDER")
+    deployments = sorted(contracts_root.glob("deployment-*.json"))
+    if not sender or not deployments:
+        return None
+    deployment = json.loads(deployments[-1].read_text())
+    contracts = deployment.get("contracts", {})
+    url = os.getenv("EXECUTION_RPC_URL") or load_rpc_urls().get(deployment["chainId"])
+    if url is None or "InstitutionalTreasury" not in contracts or "RegulatoryOracle" not in contracts:
+        return None
+    return ChainExecutor(
+        BatchedRPCClient(url),
+        sender,
+        contracts["InstitutionalTreasury"],
+        contracts["RegulatoryOracle"],
+        contracts_root=contracts_root,
+        gas=int(os.getenv("EXECUTION_GAS_LIMIT", str(DEFAULT_TX_GAS))),
+    )
+
+
+# shared by every agent system so one sender's nonces are only ever handed out in one place
+chain_executor = chain_executor_from_deployments()
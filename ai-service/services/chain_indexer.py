@@ -0,0 +1,332 @@
+"""
+Chain Event Indexer
+Batched eth_getLogs ingestion of TransactionMonitor / RegulatoryOracle events into a local SQLite index
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from services.chain_rpc import load_rpc_urls, rpc_batch
+from services.contract_audit import CONTRACTS_ROOT
+from services.evm_abi import EventDecoder, load_abis
+
+logger = logging.getLogger(__name__)
+
+INDEXED_CONTRACTS = ("TransactionMonitor", "RegulatoryOracle")
+DEFAULT_INDEX_PATH = Path(os.getenv("CHAIN_INDEX_PATH", Path(__file__).resolve().parents[1] / "data" / "chain_events.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    chain_id INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    event TEXT NOT NULL,
+    account TEXT,
+    args TEXT NOT NULL,
+    PRIMARY KEY (chain_id, tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_by_event ON events (chain_id, event, block_number);
+CREATE INDEX IF NOT EXISTS events_by_account ON events (chain_id, account, event, block_number);
+CREATE INDEX IF NOT EXISTS events_by_block ON events (chain_id, block_number);
+CREATE TABLE IF NOT EXISTS block_hashes (
+    chain_id INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    PRIMARY KEY (chain_id, block_number)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    chain_id INTEGER PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+"""
+
+# Argument that identifies the account an event is about, for the account index
+ACCOUNT_ARGS = ("account", "fromAddress", "entity", "institution", "protocol")
+
+
+class ChainEventStore:
+    """SQLite index of decoded contract events, block hashes and the sync checkpoint"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def checkpoint(self, chain_id: int) -> Optional[Tuple[int, str]]:
+        row = self.db.execute(
+            "SELECT block_number, block_hash FROM checkpoints WHERE chain_id = ?", (chain_id,)
+        ).fetchone()
+        return (row["block_number"], row["block_hash"]) if row else None
+
+    def commit_range(self, chain_id: int, events: List[Dict], block_hashes: Dict[int, str], checkpoint: Tuple[int, str]):
+        """Write a synced block range atomically: events, sampled block hashes and the new checkpoint"""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (chain_id, e["block_number"], e["block_hash"], e["tx_hash"], e["log_index"], e["address"],
+                     e["contract"], e["event"], e["account"], json.dumps(e["args"], default=str))
+                    for e in events
+                ],
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO block_hashes VALUES (?, ?, ?)",
+                [(chain_id, number, block_hash) for number, block_hash in block_hashes.items()],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (chain_id, checkpoint[0], checkpoint[1])
+            )
+
+    def known_hashes(self, chain_id: int, below: int, limit: int = 64) -> List[Tuple[int, str]]:
+        """Most recent recorded block hashes at or below `below`, newest first"""
+        rows = self.db.execute(
+            "SELECT block_number, block_hash FROM block_hashes WHERE chain_id = ? AND block_number <= ? "
+            "ORDER BY block_number DESC LIMIT ?",
+            (chain_id, below, limit),
+        ).fetchall()
+        return [(row["block_number"], row["block_hash"]) for row in rows]
+
+    def rollback(self, chain_id: int, to_block: int, block_hash: Optional[str]):
+        """Forget everything after `to_block` (a reorg's common ancestor)"""
+        with self.db:
+            self.db.execute("DELETE FROM events WHERE chain_id = ? AND block_number > ?", (chain_id, to_block))
+            self.db.execute("DELETE FROM block_hashes WHERE chain_id = ? AND block_number > ?", (chain_id, to_block))
+            if block_hash is None:
+                self.db.execute("DELETE FROM checkpoints WHERE chain_id = ?", (chain_id,))
+            else:
+                self.db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (chain_id, to_block, block_hash))
+
+    def query(
+        self,
+        chain_id: int,
+        event: Optional[str] = None,
+        account: Optional[str] = None,
+        from_block: int = 0,
+        limit: int = 100
+    ) -> List[Dict]:
+        """Indexed events, newest first"""
+        clauses, params = ["chain_id = ?", "block_number >= ?"], [chain_id, from_block]
+        if event:
+            clauses.append("event = ?")
+            params.append(event)
+        if account:
+            clauses.append("account = ?")
+            params.append(account.lower())
+        rows = self.db.execute(
+            f"SELECT * FROM events WHERE {' AND '.join(clauses)} ORDER BY block_number DESC, log_index DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [{**dict(row), "args": json.loads(row["args"])} for row in rows]
+
+    def account_summary(self, chain_id: int, account: str) -> Dict:
+        """On-chain compliance state for an address, derived from its indexed events"""
+        account = account.lower()
+        latest_score = self.query(chain_id, "AMLRiskScoreUpdated", account, limit=1)
+        counts = dict(self.db.execute(
+            "SELECT event, COUNT(*) FROM events WHERE chain_id = ? AND account = ? GROUP BY event", (chain_id, account)
+        ).fetchall())
+        return {
+            "address": account,
+            "aml_risk_score": latest_score[0]["args"]["newScore"] if latest_score else None,
+            "blacklisted": counts.get("AddressBlacklisted", 0) > 0,
+            "frozen": counts.get("EmergencyFreezeActivated", 0) > 0,
+            "flagged_transactions": counts.get("TransactionFlagged", 0),
+            "violations": counts.get("ViolationDetected", 0),
+        }
+
+    def close(self):
+        self.db.close()
+
+
+class ChainEventIndexer:
+    """
+    Follows one chain: each sync pulls up to `ranges_per_request` block ranges of
+    `range_size` blocks with a single batched JSON-RPC request (eth_getLogs per
+    range plus the range's last block header), then commits events and checkpoint
+    together. Before syncing, the checkpoint's block hash is re-checked; on
+    mismatch the index is rolled back to the newest recorded hash still on chain.
+    """
+
+    def __init__(
+        self,
+        chain_id: int,
+        contracts: Dict[str, str],
+        store: ChainEventStore,
+        rpc_url: Optional[str] = None,
+        start_block: int = 0,
+        range_size: int = 2000,
+        ranges_per_request: int = 8,
+        confirmations: int = 0,
+        poll_interval: float = 12.0,
+        contracts_root: Path = CONTRACTS_ROOT
+    ):
+        self.chain_id = chain_id
+        self.rpc_url = rpc_url or load_rpc_urls().get(chain_id)
+        if self.rpc_url is None:
+            raise ValueError(f"No RPC endpoint configured for chain {chain_id}")
+        self.addresses = {address.lower(): name for name, address in contracts.items()}
+        self.decoder = EventDecoder(load_abis(sorted(set(contracts)), contracts_root))
+        self.store = store
+        self.start_block = start_block
+        self.range_size = range_size
+        self.ranges_per_request = ranges_per_request
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.reorgs_handled = 0
+        self.head: Optional[int] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _batch(self, calls):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return await rpc_batch(self._session, self.rpc_url, calls)
+
+    async def _check_reorg(self) -> Optional[int]:
+        """Verify the checkpoint is still canonical; returns the block to resume after"""
+        checkpoint = self.store.checkpoint(self.chain_id)
+        if checkpoint is None:
+            return None
+        candidates = self.store.known_hashes(self.chain_id, checkpoint[0])
+        if not candidates or candidates[0][0] != checkpoint[0]:
+            candidates.insert(0, checkpoint)
+        blocks = await self._batch([("eth_getBlockByNumber", [hex(number), False]) for number, _ in candidates])
+        for (number, stored_hash), block in zip(candidates, blocks):
+            if block is not None and block["hash"] == stored_hash:
+                if number != checkpoint[0]:
+                    logger.warning(f"Chain {self.chain_id} reorg: rolling back index from {checkpoint[0]} to {number}")
+                    self.store.rollback(self.chain_id, number, stored_hash)
+                    self.reorgs_handled += 1
+                return number
+        logger.warning(f"Chain {self.chain_id} reorg deeper than recorded history; re-indexing from {self.start_block}")
+        self.store.rollback(self.chain_id, self.start_block - 1, None)
+        self.reorgs_handled += 1
+        return None
+
+    async def sync_once(self) -> int:
+        """Index the next batch of block ranges; returns the number of events stored"""
+        resume_after = await self._check_reorg()
+        self.head = int((await self._batch([("eth_blockNumber", [])]))[0], 16)
+        target = self.head - self.confirmations
+        start = self.start_block if resume_after is None else resume_after + 1
+        if start > target:
+            return 0
+
+        ranges = []
+        while start <= target and len(ranges) < self.ranges_per_request:
+            end = min(start + self.range_size - 1, target)
+            ranges.append((start, end))
+            start = end + 1
+
+        calls = []
+        for first, last in ranges:
+            calls.append(("eth_getLogs", [{
+                "fromBlock": hex(first),
+                "toBlock": hex(last),
+                "address": list(self.addresses),
+                "topics": [self.decoder.topics],
+            }]))
+            calls.append(("eth_getBlockByNumber", [hex(last), False]))
+        results = await self._batch(calls)
+
+        events, block_hashes = [], {}
+        for (first, last), logs, block in zip(ranges, results[0::2], results[1::2]):
+            block_hashes[last] = block["hash"]
+            for log in logs:
+                if log.get("removed"):
+                    continue
+                decoded = self.decoder.decode(log)
+                if decoded is None:
+                    continue
+                args = decoded["args"]
+                account = next((args[name] for name in ACCOUNT_ARGS if isinstance(args.get(name), str)), None)
+                events.append({
+                    "block_number": int(log["blockNumber"], 16),
+                    "block_hash": log["blockHash"],
+                    "tx_hash": log["transactionHash"],
+                    "log_index": int(log["logIndex"], 16),
+                    "address": log["address"].lower(),
+                    "contract": self.addresses.get(log["address"].lower(), decoded["contract"]),
+                    "event": decoded["event"],
+                    "account": account.lower() if account else None,
+                    "args": args,
+                })
+
+        last_block = ranges[-1][1]
+        self.store.commit_range(self.chain_id, events, block_hashes, (last_block, block_hashes[last_block]))
+        return len(events)
+
+    async def sync_to_head(self) -> int:
+        total = 0
+        while True:
+            total += await self.sync_once()
+            checkpoint = self.store.checkpoint(self.chain_id)
+            if checkpoint is None or checkpoint[0] >= (self.head or 0) - self.confirmations:
+                return total
+
+    async def _run(self):
+        while True:
+            try:
+                added = await self.sync_to_head()
+                if added:
+                    logger.info(f"Indexed {added} contract events on chain {self.chain_id}")
+            except Exception as e:
+                logger.error(f"Chain {self.chain_id} indexing error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def status(self) -> Dict:
+        checkpoint = self.store.checkpoint(self.chain_id)
+        return {
+            "chain_id": self.chain_id,
+            "contracts": self.addresses,
+            "indexed_through": checkpoint[0] if checkpoint else None,
+            "head": self.head,
+            "reorgs_handled": self.reorgs_handled,
+        }
+
+
+def indexer_from_deployments(store: ChainEventStore, contracts_root: Path = CONTRACTS_ROOT) -> Optional[ChainEventIndexer]:
+    """Indexer for the latest contracts/deployment-*.json, or None when nothing is deployed"""
+    deployments = sorted(contracts_root.glob("deployment-*.json"))
+    if not deployments:
+        return None
+    deployment = json.loads(deployments[-1].read_text())
+    contracts = {name: address for name, address in deployment.get("contracts", {}).items() if name in INDEXED_CONTRACTS}
+    return ChainEventIndexer(
+        deployment["chainId"],
+        contracts,
+        store,
+        start_block=int(os.getenv("CHAIN_INDEXER_START_BLOCK", "0")),
+        contracts_root=contracts_root,
+    )
@@ -0,0 +1,88 @@
+"""
+Chain RPC
+Minimal JSON-RPC access to the chains the compliance contracts are deployed on
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+# Mirrors the networks in contracts/hardhat.config.js
+DEFAULT_RPC_URLS = {
+    1337: "http://127.0.0.1:8545",
+    28525: "https://testnet-rpc.circlelayer.com",
+}
+
+
+class RPCError(Exception):
+    def __init__(self, error: Dict):
+        super().__init__(error.get("message", str(error)))
+        self.code = error.get("code")
+
+
+def load_rpc_urls() -> Dict[int, str]:
+    """RPC endpoints per chain id; CHAIN_RPC_URLS (JSON object) overrides the defaults"""
+    configured = os.getenv("CHAIN_RPC_URLS")
+    urls = dict(DEFAULT_RPC_URLS)
+    if configured:
+        urls.update({int(chain_id): url for chain_id, url in json.loads(configured).items()})
+    return urls
+
+
+async def rpc_call(session: aiohttp.ClientSession, url: str, method: str, params: List[Any]) -> Any:
+    payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    async with session.post(url, json=payload) as response:
+        response.raise_for_status()
+        body = await response.json(content_type=None)
+    if body.get("error"):
+        raise RPCError(body["error"])
+    return body["result"]
+
+
+async def rpc_batch(
+    session: aiohttp.ClientSession,
+    url: str,
+    calls: List[Tuple[str, List[Any]]],
+    return_errors: bool = False
+) -> List[Any]:
+    """
+    Send several JSON-RPC calls in one HTTP request; results come back in call order.
+    Raises RPCError if any call failed, unless return_errors puts the RPCError in its slot.
+    """
+    if not calls:
+        return []
+    payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)]
+    async with session.post(url, json=payload) as response:
+        response.raise_for_status()
+        body = await response.json(content_type=None)
+    if isinstance(body, dict):  # some nodes answer a rejected batch with a single error object
+        raise RPCError(body.get("error", {"message": "Invalid batch response"}))
+    by_id = {item["id"]: item for item in body}
+    results = []
+    for i in range(len(calls)):
+        item = by_id.get(i, {"error": {"message": f"Missing response for {calls[i][0]}"}})
+        if item.get("error"):
+            if not return_errors:
+                raise RPCError(item["error"])
+            results.append(RPCError(item["error"]))
+        else:
+            results.append(item["result"])
+    return results
+
+
+async def get_code(
+    chain_id: int,
+    address: str,
+    session: Optional[aiohttp.ClientSession] = None,
+    rpc_urls: Optional[Dict[int, str]] = None
+) -> str:
+    """Runtime bytecode deployed at `address` ("0x" for accounts without code)"""
+    url = (rpc_urls or load_rpc_urls()).get(chain_id)
+    if url is None:
+        raise ValueError(f"No RPC endpoint configured for chain {chain_id}")
+    if session is not None:
+        return await rpc_call(session, url, "eth_getCode", [address, "latest"])
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as own_session:
+        return await rpc_call(own_session, url, "eth_getCode", [address, "latest"])
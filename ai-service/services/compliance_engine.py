@@ -3,60 +3,130 @@ Compliance Engine Service
 Core regulatory compliance processing and reporting
 """
 
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
+import asyncio
 import uuid
 from datetime import datetime
 
+from services.compliance_rollups import ComplianceRollup, ComplianceRollupStore, parse_report_window
+from services.compliance_scoring import ComplianceScoringEngine
+from services.rule_store import RegulatoryRuleStore
+
 class ComplianceEngine:
-    def __init__(self):
+    def __init__(self, rollup_granularity: str = "daily"):
         self.regulations = {}
         self.reports = {}
         self.institutions = {}
+        self.rollups = ComplianceRollupStore(granularity=rollup_granularity)
+        self.scoring = ComplianceScoringEngine()
+        self.rule_store = RegulatoryRuleStore()
+        self._rule_update_lock = asyncio.Lock()
+    
+    async def record_transaction_analysis(
+        self,
+        institution_id: str,
+        regulatory_framework: str,
+        analysis: Dict,
+        amount: float = 0.0,
+        timestamp: Optional[datetime] = None
+    ) -> None:
+        """
+        Fold a transaction analysis into the institution's compliance rollups
+        and violation history
+        """
+        self.rollups.record_analysis(institution_id, regulatory_framework, analysis, amount, timestamp)
+        self.scoring.register_institution(institution_id)
+        for violation in analysis.get("regulatory_violations", []):
+            self.scoring.record_violation(
+                institution_id, violation, analysis.get("risk_level", "LOW"), timestamp
+            )
     
     async def generate_report(
         self,
         institution_id: str,
         start_date: str,
         end_date: str,
-        regulatory_framework: str
+        regulatory_framework: str,
+        progress_callback: Optional[Callable[[float, str], None]] = None
     ) -> Dict:
         """
         Generate comprehensive compliance report
         TODO: Implement automated report generation
         """
+        def report_progress(progress: float, stage: str):
+            if progress_callback:
+                progress_callback(progress, stage)
+
         # TODO: Implement report generation
-        # - Aggregate transaction data
         # - Calculate compliance metrics
-        # - Identify violations
         # - Generate recommendations
         # - Format for regulatory submission
         
+        report_progress(10.0, "Aggregating transaction data")
         report_id = str(uuid.uuid4())
         
+        # Assemble from pre-aggregated rollups rather than scanning transactions
+        window_start, window_end = parse_report_window(start_date, end_date)
+        rollup, bucket_count = self.rollups.query_range(
+            institution_id, regulatory_framework, window_start, window_end
+        )
+        report_progress(90.0, "Formatting report")
+        
+        return self._build_report_from_rollup(
+            institution_id, regulatory_framework, rollup, bucket_count, report_id
+        )
+    
+    def _build_report_from_rollup(
+        self,
+        institution_id: str,
+        regulatory_framework: str,
+        rollup: ComplianceRollup,
+        bucket_count: int,
+        report_id: str
+    ) -> Dict:
+        """Format a merged rollup as a compliance report; an empty window reports zero activity"""
+        compliance_rate = 100.0
+        if rollup.total_transactions:
+            compliance_rate *= 1 - rollup.flagged_transactions / rollup.total_transactions
+        violations = [
+            {
+                "type": violation_type,
+                "severity": rollup.violation_severity.get(violation_type, "LOW"),
+                "count": count,
+                "penalty_risk": round(rollup.violation_penalties[violation_type], 2)
+            }
+            for violation_type, count in rollup.violation_counts.most_common()
+        ]
+        
+        recommendations = []
+        if rollup.violation_counts:
+            recommendations.append("Remediate recurring violations: " + ", ".join(
+                violation_type for violation_type, _ in rollup.violation_counts.most_common(3)
+            ))
+        if rollup.aml_flag_counts:
+            recommendations.append("Review AML-flagged counterparties")
+        if not rollup.total_transactions:
+            recommendations.append("No analyzed transactions in this period")
+        elif not recommendations:
+            recommendations.append("Current compliance controls adequate")
+        
         return {
             "institution_id": institution_id,
-            "compliance_score": 87.5,
-            "total_transactions": 15420,
-            "flagged_transactions": 23,
-            "violations": [
-                {
-                    "type": "Transaction Limit Exceeded",
-                    "severity": "MEDIUM",
-                    "count": 3,
-                    "penalty_risk": 50000
-                }
-            ],
+            "compliance_score": round(compliance_rate, 2),
+            "total_transactions": rollup.total_transactions,
+            "flagged_transactions": rollup.flagged_transactions,
+            "violations": violations,
             "regulatory_summary": {
                 "framework": regulatory_framework,
-                "compliance_rate": 99.85,
-                "areas_of_concern": [
-                    "Large transaction reporting delays"
-                ]
+                "compliance_rate": round(compliance_rate, 2),
+                "total_volume": round(rollup.total_volume, 2),
+                "estimated_penalty_risk": round(rollup.penalty_risk, 2),
+                "approval_required": rollup.approval_required,
+                "aml_flags": dict(rollup.aml_flag_counts),
+                "rollup_buckets_merged": bucket_count,
+                "areas_of_concern": [v["type"] for v in violations[:3]]
             },
-            "recommendations": [
-                "Implement real-time transaction monitoring",
-                "Enhance KYC procedures for high-value clients"
-            ],
+            "recommendations": recommendations,
             "report_id": report_id
         }
     
@@ -84,28 +154,55 @@ class ComplianceEngine:
     ) -> bool:
         """
         Update regulatory rules and requirements
-        TODO: Implement rule management system
+        Rules are validated, conflict-checked and compiled into a new version;
+        raises RuleValidationError if the update is rejected
         """
-        # TODO: Update rules in database
-        # - Validate rule format
-        # - Check for conflicts
-        # - Update compliance engine
-        # - Notify affected institutions
+        # TODO: Notify affected institutions
+        
+        async with self._rule_update_lock:
+            # Compile off the event loop so large rule sets don't stall requests
+            version = await asyncio.to_thread(self.rule_store.update, framework, rules)
         
+        self.regulations[version.framework] = version.version
         return True
     
+    def evaluate_rules(self, regulatory_framework: str, record: Dict) -> List[Dict]:
+        """
+        Evaluate a transaction record against the framework's current rules
+        """
+        evaluator = self.rule_store.get_evaluator(regulatory_framework)
+        if evaluator is None:
+            return []
+        return evaluator.evaluate(record)
+    
     async def calculate_compliance_score(
         self,
         institution_data: Dict
     ) -> float:
         """
         Calculate overall compliance score
-        TODO: Implement scoring algorithm
+        Violations are weighted by severity and type and decay exponentially with age.
+        Each violation is recorded once, keyed by its "id" (or by type, severity and
+        timestamp when it has none), so scoring the same data again gives the same score
         """
-        # TODO: Implement compliance scoring
-        # - Weight different compliance areas
-        # - Factor in violation history
-        # - Consider regulatory framework
-        # - Apply time-decay for old violations
+        institution_id = institution_data["institution_id"]
+        self.scoring.register_institution(institution_id)
+        for violation in institution_data.get("violations", []):
+            timestamp = violation.get("timestamp")
+            severity = violation.get("severity", "LOW")
+            violation_id = violation.get("id") or f"{violation['type']}|{severity}|{timestamp}"
+            self.scoring.record_violation(
+                institution_id,
+                violation["type"],
+                severity,
+                datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp,
+                violation_id=f"{institution_id}:{violation_id}"
+            )
         
-        return 87.5
+        return round(self.scoring.score(institution_id), 2)
+    
+    async def get_compliance_leaderboard(self, limit: int = 50) -> List[Dict]:
+        """
+        Rank all institutions by time-decayed compliance score in one pass
+        """
+        return self.scoring.leaderboard(limit)
@@ -0,0 +1,151 @@
+"""
+Compliance Rollup Service
+Incrementally maintained per-institution compliance aggregates for fast report assembly
+"""
+
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+SEVERITY_ORDER = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+GRANULARITY_SECONDS = {
+    "hourly": 3600,
+    "daily": 86400,
+}
+
+
+@dataclass
+class ComplianceRollup:
+    bucket_start: datetime
+    total_transactions: int = 0
+    flagged_transactions: int = 0
+    approval_required: int = 0
+    total_volume: float = 0.0
+    penalty_risk: float = 0.0
+    violation_counts: Counter = field(default_factory=Counter)
+    violation_penalties: Counter = field(default_factory=Counter)
+    violation_severity: Dict[str, str] = field(default_factory=dict)
+    aml_flag_counts: Counter = field(default_factory=Counter)
+
+    def add_analysis(self, analysis: Dict, amount: float):
+        """Fold a single transaction analysis into this bucket"""
+        violations = analysis.get("regulatory_violations", [])
+        aml_flags = analysis.get("aml_flags", [])
+        risk_level = analysis.get("risk_level", "LOW")
+        penalty = float(analysis.get("estimated_penalty_risk", 0.0))
+
+        self.total_transactions += 1
+        self.total_volume += amount
+        self.penalty_risk += penalty
+        if violations or aml_flags or analysis.get("compliance_status") not in (None, "APPROVED"):
+            self.flagged_transactions += 1
+        if analysis.get("approval_required"):
+            self.approval_required += 1
+
+        for violation in violations:
+            self.violation_counts[violation] += 1
+            self.violation_penalties[violation] += penalty / len(violations)
+            current = self.violation_severity.get(violation, "LOW")
+            if SEVERITY_ORDER.get(risk_level, 0) >= SEVERITY_ORDER.get(current, 0):
+                self.violation_severity[violation] = risk_level
+        self.aml_flag_counts.update(aml_flags)
+
+    def merge(self, other: "ComplianceRollup"):
+        """Merge another bucket into this one"""
+        self.total_transactions += other.total_transactions
+        self.flagged_transactions += other.flagged_transactions
+        self.approval_required += other.approval_required
+        self.total_volume += other.total_volume
+        self.penalty_risk += other.penalty_risk
+        self.violation_counts.update(other.violation_counts)
+        self.violation_penalties.update(other.violation_penalties)
+        self.aml_flag_counts.update(other.aml_flag_counts)
+        for violation, severity in other.violation_severity.items():
+            current = self.violation_severity.get(violation, "LOW")
+            if SEVERITY_ORDER.get(severity, 0) >= SEVERITY_ORDER.get(current, 0):
+                self.violation_severity[violation] = severity
+
+
+class ComplianceRollupStore:
+    """
+    Stores one rollup row per (institution, framework, time bucket).
+    Rows are updated as analyses are written, so a date-range report only merges
+    the buckets that fall inside the window instead of scanning raw transactions.
+    """
+
+    def __init__(self, granularity: str = "daily"):
+        if granularity not in GRANULARITY_SECONDS:
+            raise ValueError(f"Unsupported rollup granularity: {granularity}")
+        self.granularity = granularity
+        self.bucket_seconds = GRANULARITY_SECONDS[granularity]
+        self.rollups: Dict[Tuple[str, str], Dict[datetime, ComplianceRollup]] = {}
+        self.bucket_index: Dict[Tuple[str, str], List[datetime]] = {}
+
+    def _bucket_for(self, timestamp: datetime) -> datetime:
+        epoch = int(timestamp.timestamp()) if timestamp.tzinfo else int((timestamp - datetime(1970, 1, 1)).total_seconds())
+        start = epoch - (epoch % self.bucket_seconds)
+        return datetime(1970, 1, 1) + timedelta(seconds=start)
+
+    def record_analysis(
+        self,
+        institution_id: str,
+        framework: str,
+        analysis: Dict,
+        amount: float = 0.0,
+        timestamp: Optional[datetime] = None
+    ) -> ComplianceRollup:
+        """Update the rollup bucket covering `timestamp` with a new analysis"""
+        key = (institution_id, framework.upper())
+        bucket_start = self._bucket_for(timestamp or datetime.utcnow())
+
+        buckets = self.rollups.setdefault(key, {})
+        rollup = buckets.get(bucket_start)
+        if rollup is None:
+            rollup = ComplianceRollup(bucket_start=bucket_start)
+            buckets[bucket_start] = rollup
+            bisect.insort(self.bucket_index.setdefault(key, []), bucket_start)
+
+        rollup.add_analysis(analysis, amount)
+        return rollup
+
+    def query_range(
+        self,
+        institution_id: str,
+        framework: str,
+        start: datetime,
+        end: datetime
+    ) -> Tuple[ComplianceRollup, int]:
+        """
+        Merge every bucket with start <= bucket < end.
+        Returns the merged rollup and the number of buckets it was built from.
+        """
+        key = (institution_id, framework.upper())
+        index = self.bucket_index.get(key, [])
+        buckets = self.rollups.get(key, {})
+
+        lo = bisect.bisect_left(index, self._bucket_for(start))
+        hi = bisect.bisect_left(index, end)
+
+        merged = ComplianceRollup(bucket_start=start)
+        for bucket_start in index[lo:hi]:
+            merged.merge(buckets[bucket_start])
+        return merged, hi - lo
+
+
+def parse_report_window(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """
+    Convert report date strings into a half-open [start, end) window.
+    Date-only end dates include the whole day.
+    """
+    start = datetime.fromisoformat(start_date)
+    end = datetime.fromisoformat(end_date)
+    if len(end_date) <= 10:
+        end += timedelta(days=1)
+    if start.tzinfo:
+        start = start.replace(tzinfo=None) - (start.utcoffset() or timedelta(0))
+    if end.tzinfo:
+        end = end.replace(tzinfo=None) - (end.utcoffset() or timedelta(0))
+    return start, end
@@ -0,0 +1,160 @@
+"""
+Compliance Scoring Service
+Time-decayed compliance scores computed over columnar violation history
+"""
+
+import math
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+SEVERITY_LEVELS = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+
+class ComplianceScoringEngine:
+    """
+    Keeps every institution's violation history in shared growable arrays
+    (timestamp, severity, type, institution) so all institutions can be
+    re-scored with a handful of numpy operations.
+
+    score = 100 - sum(type_weight * severity_weight * 0.5 ** (age / half_life))
+    """
+
+    def __init__(
+        self,
+        half_life_days: float = 90.0,
+        severity_weights: Optional[Dict[str, float]] = None,
+        type_weights: Optional[Dict[str, float]] = None,
+        initial_capacity: int = 1024
+    ):
+        self.half_life_days = half_life_days
+        self.severity_weights = severity_weights or {"LOW": 1.0, "MEDIUM": 3.0, "HIGH": 7.0, "CRITICAL": 15.0}
+        self.type_weights = type_weights or {}
+
+        self._timestamps = np.empty(initial_capacity, dtype=np.float64)
+        self._severities = np.empty(initial_capacity, dtype=np.int8)
+        self._types = np.empty(initial_capacity, dtype=np.int16)
+        self._institutions = np.empty(initial_capacity, dtype=np.int32)
+        self._size = 0
+
+        self.institution_ids: List[str] = []
+        self._institution_index: Dict[str, int] = {}
+        self.violation_types: List[str] = []
+        self._type_index: Dict[str, int] = {}
+        self._violation_ids: Set[str] = set()
+
+    def register_institution(self, institution_id: str) -> int:
+        """Ensure an institution has a slot; institutions without violations score 100"""
+        index = self._institution_index.get(institution_id)
+        if index is None:
+            index = len(self.institution_ids)
+            self.institution_ids.append(institution_id)
+            self._institution_index[institution_id] = index
+        return index
+
+    def _type_id(self, violation_type: str) -> int:
+        type_id = self._type_index.get(violation_type)
+        if type_id is None:
+            type_id = len(self.violation_types)
+            self.violation_types.append(violation_type)
+            self._type_index[violation_type] = type_id
+        return type_id
+
+    def _grow(self):
+        capacity = len(self._timestamps) * 2
+        self._timestamps = np.resize(self._timestamps, capacity)
+        self._severities = np.resize(self._severities, capacity)
+        self._types = np.resize(self._types, capacity)
+        self._institutions = np.resize(self._institutions, capacity)
+
+    def record_violation(
+        self,
+        institution_id: str,
+        violation_type: str,
+        severity: str,
+        timestamp: Optional[datetime] = None,
+        violation_id: Optional[str] = None
+    ) -> bool:
+        """
+        Append one violation to the history. A violation with an id is recorded
+        once; recording the same id again is a no-op that returns False
+        """
+        if violation_id is not None:
+            if violation_id in self._violation_ids:
+                return False
+            self._violation_ids.add(violation_id)
+        if self._size == len(self._timestamps):
+            self._grow()
+
+        i = self._size
+        self._timestamps[i] = timestamp.timestamp() if timestamp else time.time()
+        self._severities[i] = SEVERITY_LEVELS.get(severity.upper(), 0)
+        self._types[i] = self._type_id(violation_type)
+        self._institutions[i] = self.register_institution(institution_id)
+        self._size += 1
+        return True
+
+    def update_weights(
+        self,
+        severity_weights: Optional[Dict[str, float]] = None,
+        type_weights: Optional[Dict[str, float]] = None,
+        half_life_days: Optional[float] = None
+    ):
+        """Change scoring rules; the next score_all() call applies them to everyone"""
+        if severity_weights is not None:
+            self.severity_weights.update(severity_weights)
+        if type_weights is not None:
+            self.type_weights.update(type_weights)
+        if half_life_days is not None:
+            self.half_life_days = half_life_days
+
+    def _penalties(self, now: float, rows: slice | np.ndarray) -> np.ndarray:
+        severity_table = np.zeros(len(SEVERITY_LEVELS), dtype=np.float64)
+        for level, index in SEVERITY_LEVELS.items():
+            severity_table[index] = self.severity_weights.get(level, 0.0)
+        type_table = np.array(
+            [self.type_weights.get(violation_type, 1.0) for violation_type in self.violation_types] or [1.0],
+            dtype=np.float64
+        )
+
+        age_days = np.maximum(now - self._timestamps[rows], 0.0) / 86400.0
+        decay = np.exp(-math.log(2) * age_days / self.half_life_days)
+        return severity_table[self._severities[rows]] * type_table[self._types[rows]] * decay
+
+    def score_all(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Scores for every registered institution, aligned with `institution_ids`"""
+        now_ts = now.timestamp() if now else time.time()
+        rows = slice(0, self._size)
+        penalties = np.bincount(
+            self._institutions[rows],
+            weights=self._penalties(now_ts, rows),
+            minlength=len(self.institution_ids)
+        )
+        return np.clip(100.0 - penalties, 0.0, 100.0)
+
+    def score(self, institution_id: str, now: Optional[datetime] = None) -> float:
+        """Score a single institution"""
+        index = self._institution_index.get(institution_id)
+        if index is None:
+            return 100.0
+        now_ts = now.timestamp() if now else time.time()
+        rows = np.flatnonzero(self._institutions[:self._size] == index)
+        penalty = float(self._penalties(now_ts, rows).sum())
+        return max(0.0, min(100.0, 100.0 - penalty))
+
+    def leaderboard(self, limit: int = 50, now: Optional[datetime] = None, ascending: bool = False) -> List[Dict]:
+        """Institutions ranked by score (best first unless `ascending`)"""
+        scores = self.score_all(now)
+        order = np.argsort(scores, kind="stable")
+        if not ascending:
+            order = order[::-1]
+        return [
+            {
+                "rank": rank + 1,
+                "institution_id": self.institution_ids[index],
+                "compliance_score": round(float(scores[index]), 2)
+            }
+            for rank, index in enumerate(order[:limit])
+        ]
@@ -0,0 +1,295 @@
+"""
+Contract Audit Pipeline
+Static vulnerability checks over Solidity sources and bytecode, run in a process pool and cached by bytecode hash
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from services.audit_store import AuditStore
+from services.evm_analysis import analyze_bytecode, decode_bytecode
+
+logger = logging.getLogger(__name__)
+
+CONTRACTS_ROOT = Path(os.getenv("CONTRACTS_DIR", Path(__file__).resolve().parents[2] / "contracts"))
+
+SEVERITY_PENALTIES = {"CRITICAL": 40.0, "HIGH": 25.0, "MEDIUM": 10.0, "LOW": 3.0, "INFO": 0.0}
+
+FUNCTION_PATTERN = re.compile(r"\b(function\s+(\w+)|constructor|receive|fallback)\s*\(")
+EXTERNAL_CALL_PATTERN = re.compile(r"\.(call|delegatecall|send|transfer)\s*(\{[^}]*\})?\s*\(")
+LOW_LEVEL_CALL_PATTERN = re.compile(r"\.(call|delegatecall|staticcall|send)\s*(\{[^}]*\})?\s*\(")
+STATE_WRITE_PATTERN = re.compile(r"^\s*[A-Za-z_]\w*(\s*\[[^\]]*\])*(\.\w+)*\s*(\+|-|\*|/)?=(?!=)", re.MULTILINE)
+CAPTURED_RESULT_PATTERN = re.compile(r"\(\s*bool\s+(\w+)\s*,?[^)]*\)\s*=|bool\s+(\w+)\s*=")
+ACCESS_MODIFIER_PATTERN = re.compile(r"\b(only\w+|auth|requiresAuth)\b")
+SENDER_CHECK_PATTERN = re.compile(r"\[\s*msg\.sender\s*\]|require\s*\([^;]*msg\.sender|hasRole\s*\(|_checkOwner\s*\(|_checkRole\s*\(|if\s*\([^)]*msg\.sender")
+PRIVILEGED_NAME_PATTERN = re.compile(
+    r"^(set|update|withdraw|mint|burn|pause|unpause|upgrade|authori[sz]e|revoke|whitelist|approve|emergency|freeze|transferOwnership|kill|destroy|execute|sweep|rescue)",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class AuditTarget:
+    name: str
+    source: Optional[str] = None
+    bytecode: Optional[str] = None
+    source_name: Optional[str] = None
+
+    @property
+    def code_hash(self) -> str:
+        """Runtime-bytecode hash when bytecode is known, otherwise a hash of the source"""
+        if self.bytecode and self.bytecode not in ("0x", ""):
+            return hashlib.sha256(decode_bytecode(self.bytecode)).hexdigest()
+        return "src:" + hashlib.sha256((self.source or "").encode()).hexdigest()
+
+
+def strip_comments(source: str) -> str:
+    """Blank out comments and string literals, keeping line numbers intact"""
+    def blank(match):
+        return re.sub(r"[^\n]", " ", match.group(0))
+    return re.sub(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"', blank, source, flags=re.DOTALL)
+
+
+def split_functions(source: str) -> List[Dict]:
+    """Function name, header (visibility / modifiers), body and line for every function with a body"""
+    functions = []
+    for match in FUNCTION_PATTERN.finditer(source):
+        brace = source.find("{", match.end())
+        semicolon = source.find(";", match.end())
+        if brace == -1 or (semicolon != -1 and semicolon < brace):
+            continue  # interface / abstract declaration
+        depth, end = 0, brace
+        while end < len(source):
+            if source[end] == "{":
+                depth += 1
+            elif source[end] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            end += 1
+        functions.append({
+            "name": match.group(2) or match.group(1),
+            "header": source[match.start():brace],
+            "body": source[brace + 1:end],
+            "line": source.count("\n", 0, match.start()) + 1,
+        })
+    return functions
+
+
+def _finding(contract: str, function: Dict, severity: str, vuln_type: str, description: str, remediation: str) -> Dict:
+    return {
+        "contract": contract,
+        "function": function["name"],
+        "line": function["line"],
+        "severity": severity,
+        "type": vuln_type,
+        "description": description,
+        "remediation": remediation,
+    }
+
+
+def check_reentrancy(contract: str, function: Dict) -> List[Dict]:
+    """External call followed by a state write in a function without a reentrancy guard"""
+    if "nonReentrant" in function["header"]:
+        return []
+    call = EXTERNAL_CALL_PATTERN.search(function["body"])
+    if call is None or not STATE_WRITE_PATTERN.search(function["body"], call.end()):
+        return []
+    return [_finding(
+        contract, function, "HIGH", "Reentrancy",
+        f"State is written after an external .{call.group(1)}() in {function['name']}",
+        "Follow checks-effects-interactions or add a nonReentrant modifier",
+    )]
+
+
+def check_unchecked_calls(contract: str, function: Dict) -> List[Dict]:
+    """Low-level calls whose success flag is discarded or never checked"""
+    findings = []
+    body = function["body"]
+    for call in LOW_LEVEL_CALL_PATTERN.finditer(body):
+        statement_start = max(body.rfind(";", 0, call.start()), body.rfind("{", 0, call.start()), body.rfind("}", 0, call.start())) + 1
+        statement = body[statement_start:call.start()]
+        captured = CAPTURED_RESULT_PATTERN.search(statement)
+        if captured:
+            flag = captured.group(1) or captured.group(2)
+            if re.search(rf"(require|assert|if)\s*\(\s*!?\s*{flag}\b", body[call.end():]):
+                continue
+        elif re.search(r"(require|assert|if)\s*\(\s*!?\s*$", statement):
+            continue
+        findings.append(_finding(
+            contract, function, "MEDIUM", "Unchecked Call",
+            f"Return value of .{call.group(1)}() in {function['name']} is not checked",
+            "Check the returned success flag or use OpenZeppelin Address / SafeERC20 helpers",
+        ))
+    return findings
+
+
+def check_access_control(contract: str, function: Dict) -> List[Dict]:
+    """Privileged-looking public functions without an access modifier or sender check"""
+    header, body = function["header"], function["body"]
+    findings = []
+    if "tx.origin" in body:
+        findings.append(_finding(
+            contract, function, "MEDIUM", "tx.origin Authentication",
+            f"{function['name']} relies on tx.origin",
+            "Authorise against msg.sender instead",
+        ))
+
+    if not re.search(r"\b(external|public)\b", header) or re.search(r"\b(view|pure)\b", header):
+        return findings
+    if ACCESS_MODIFIER_PATTERN.search(header) or SENDER_CHECK_PATTERN.search(body):
+        return findings
+    if "selfdestruct" in body:
+        findings.append(_finding(
+            contract, function, "CRITICAL", "Unprotected Selfdestruct",
+            f"Anyone can call {function['name']}, which self-destructs the contract",
+            "Restrict the function with onlyOwner or remove selfdestruct",
+        ))
+    elif PRIVILEGED_NAME_PATTERN.match(function["name"]):
+        findings.append(_finding(
+            contract, function, "HIGH", "Missing Access Control",
+            f"{function['name']} looks privileged but has no access modifier or msg.sender check",
+            "Add onlyOwner / role-based access control",
+        ))
+    return findings
+
+
+SOURCE_CHECKS = (check_reentrancy, check_unchecked_calls, check_access_control)
+
+
+def bytecode_findings(name: str, analysis: Dict) -> List[Dict]:
+    location = {"name": "<bytecode>", "line": None}
+    findings = []
+    if analysis["uses_selfdestruct"]:
+        findings.append(_finding(name, location, "HIGH", "Selfdestruct", "Runtime code contains SELFDESTRUCT", "Verify it is access controlled"))
+    if analysis["uses_delegatecall"]:
+        findings.append(_finding(name, location, "MEDIUM", "Delegatecall", "Runtime code delegates execution to other contracts", "Verify delegate targets are trusted"))
+    if analysis["origin_checks"]:
+        findings.append(_finding(name, location, "MEDIUM", "tx.origin Authentication", "Runtime code branches on ORIGIN", "Authorise against msg.sender instead"))
+    if analysis["access_controls"] == "NONE":
+        findings.append(_finding(name, location, "HIGH", "Missing Access Control", "Runtime code writes storage but never branches on CALLER", "Add onlyOwner / role-based access control"))
+    return findings
+
+
+def audit_target(target: AuditTarget) -> Dict:
+    """Run every static check on one contract (executed in worker processes)"""
+    findings: List[Dict] = []
+    function_count = 0
+    analysis = analyze_bytecode(target.bytecode) if target.bytecode and target.bytecode != "0x" else None
+    if target.source:
+        for function in split_functions(strip_comments(target.source)):
+            function_count += 1
+            for check in SOURCE_CHECKS:
+                findings.extend(check(target.name, function))
+    elif analysis is not None:
+        findings.extend(bytecode_findings(target.name, analysis))
+
+    security_score = max(0.0, 100.0 - sum(SEVERITY_PENALTIES[f["severity"]] for f in findings))
+    severe = [f for f in findings if f["severity"] in ("CRITICAL", "HIGH")]
+    access_issues = [f for f in findings if f["type"] in ("Missing Access Control", "Unprotected Selfdestruct", "tx.origin Authentication")]
+    if target.source:
+        access_controls = "WEAK" if access_issues else "SECURE"
+    else:
+        access_controls = analysis["access_controls"] if analysis else "UNKNOWN"
+    return {
+        "contract": target.name,
+        "source_name": target.source_name,
+        "code_hash": target.code_hash,
+        "analysis_mode": "source" if target.source else "bytecode",
+        "functions_analyzed": function_count or (analysis["function_selectors"] if analysis else 0),
+        "security_score": security_score,
+        "vulnerabilities_found": len(findings),
+        "vulnerabilities": findings,
+        "access_controls": access_controls,
+        "gas_efficiency": analysis["gas_efficiency"] if analysis else None,
+        "bytecode_analysis": analysis,
+        "approved_for_institutional_use": not severe,
+    }
+
+
+def load_artifact(path: Path, contracts_root: Path = CONTRACTS_ROOT) -> Optional[AuditTarget]:
+    """Hardhat artifact -> AuditTarget with runtime bytecode and, when present, the Solidity source"""
+    artifact = json.loads(path.read_text())
+    bytecode = artifact.get("deployedBytecode", "0x")
+    if bytecode in ("0x", ""):
+        return None  # interfaces and abstract contracts have no runtime code
+    source_path = contracts_root / artifact["sourceName"]
+    return AuditTarget(
+        name=artifact["contractName"],
+        source=source_path.read_text() if source_path.exists() else None,
+        bytecode=bytecode,
+        source_name=artifact["sourceName"],
+    )
+
+
+def discover_artifacts(contracts_root: Path = CONTRACTS_ROOT, prefix: str = "contracts/") -> List[AuditTarget]:
+    """Deployable contracts compiled from `prefix` (the repo's own sources by default)"""
+    targets = []
+    for path in sorted((contracts_root / "artifacts").glob("**/*.json")):
+        if path.name.endswith(".dbg.json") or "build-info" in path.parts:
+            continue
+        target = load_artifact(path, contracts_root)
+        if target is not None and (target.source_name or "").startswith(prefix):
+            targets.append(target)
+    return targets
+
+
+class ContractAuditPipeline:
+    """
+    Audits batches of contracts in a process pool. Results are cached by code hash,
+    so unchanged contracts (and identical clones) are never re-analysed.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, store: Optional[AuditStore] = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.cache: Dict[str, Dict] = {}
+        self.store = store
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def cached(self, code_hash: str) -> Optional[Dict]:
+        """Audit for `code_hash` from memory or the on-disk store, without analysing anything"""
+        audit = self.cache.get(code_hash)
+        if audit is None and self.store is not None:
+            audit = self.store.get_audit(code_hash)
+            if audit is not None:
+                self.cache[code_hash] = audit
+        return audit
+
+    async def audit(self, target: AuditTarget) -> Dict:
+        return (await self.audit_many([target]))[0]
+
+    async def audit_many(self, targets: List[AuditTarget]) -> List[Dict]:
+        """Audit every target, reusing cached results; order of results matches `targets`"""
+        loop = asyncio.get_running_loop()
+        pending: Dict[str, asyncio.Future] = {}
+        for target in targets:
+            code_hash = target.code_hash
+            if code_hash not in pending and self.cached(code_hash) is None:
+                pending[code_hash] = loop.run_in_executor(self._pool(), audit_target, target)
+
+        if pending:
+            results = await asyncio.gather(*pending.values())
+            for code_hash, audit in zip(pending.keys(), results):
+                self.cache[code_hash] = audit
+                if self.store is not None:
+                    self.store.put_audit(code_hash, audit)
+            logger.info(f"Audited {len(pending)} contracts ({len(targets) - len(pending)} served from cache)")
+        return [self.cache[target.code_hash] for target in targets]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
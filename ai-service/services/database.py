@@ -0,0 +1,58 @@
+"""
+Database Access
+Shared asyncpg pool for writing to the Prisma-managed Postgres tables
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional
+
+
+class PostgresPool:
+    """
+    Lazily created asyncpg pool. asyncpg is an optional dependency that is only
+    imported once something is actually written.
+    """
+
+    def __init__(self, database_url: Optional[str] = None, max_size: int = 4):
+        self.database_url = database_url if database_url is not None else os.getenv("DATABASE_URL")
+        self.max_size = max_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.database_url)
+
+    async def get(self):
+        async with self._lock:  # shared by several stores, which may all write at startup
+            if self._pool is None:
+                import asyncpg
+
+                self._pool = await asyncpg.create_pool(self.database_url, min_size=1, max_size=self.max_size)
+        return self._pool
+
+    async def execute(self, query: str, *args):
+        pool = await self.get()
+        async with pool.acquire() as conn:
+            return await conn.execute(query, *args)
+
+    async def executemany(self, query: str, rows):
+        pool = await self.get()
+        async with pool.acquire() as conn:
+            return await conn.executemany(query, rows)
+
+
+_pools: Dict[str, PostgresPool] = {}
+
+
+def shared_pool(database_url: Optional[str] = None) -> PostgresPool:
+    """
+    The process-wide pool for `database_url` (DATABASE_URL when omitted), so the
+    report and alert stores draw connections from one pool instead of one each
+    """
+    url = database_url if database_url is not None else os.getenv("DATABASE_URL", "")
+    pool = _pools.get(url)
+    if pool is None:
+        pool = _pools[url] = PostgresPool(url)
+    return pool
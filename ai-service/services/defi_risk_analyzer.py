@@ -8,7 +8,7 @@ import aiohttp
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -326,25 +326,36 @@ class DeFiRiskAnalyzer:
             logger.error(f"Compliance report generation error: {str(e)}")
             return {"error": str(e)}
     
+    async def iter_protocol_analyses(self, institution_id: str) -> AsyncIterator[dict]:
+        """Yield protocol risk analyses one at a time for streaming consumers"""
+        for protocol in self._list_institution_protocols(institution_id):
+            yield await self.analyze_protocol_risk(protocol, institution_id)
+    
+    async def iter_transaction_analyses(self, institution_id: str, time_period: str) -> AsyncIterator[dict]:
+        """Yield AML analyses one transaction at a time for streaming consumers"""
+        for tx in self._list_institution_transactions(institution_id, time_period):
+            yield await self.analyze_aml_compliance(tx)
+    
     async def _get_institution_protocols(self, institution_id: str) -> List[dict]:
         """Get protocols used by institution"""
+        return [analysis async for analysis in self.iter_protocol_analyses(institution_id)]
+    
+    async def _get_institution_transactions(self, institution_id: str, time_period: str) -> List[dict]:
+        """Get institution transactions for analysis"""
+        return [analysis async for analysis in self.iter_transaction_analyses(institution_id, time_period)]
+    
+    def _list_institution_protocols(self, institution_id: str) -> List[str]:
+        """Protocol addresses used by institution"""
         # Simulate institutional protocol usage data
-        sample_protocols = [
+        return [
             "0x7d2768dE32b0b80b7a3454c06BdAc94A69DDc7A9",  # Aave
             "0x3d9819210A31b4961b30EF54bE2aeD79B9c9Cd3B",  # Compound
         ]
-        
-        results = []
-        for protocol in sample_protocols:
-            analysis = await self.analyze_protocol_risk(protocol, institution_id)
-            results.append(analysis)
-        
-        return results
     
-    async def _get_institution_transactions(self, institution_id: str, time_period: str) -> List[dict]:
-        """Get institution transactions for analysis"""
+    def _list_institution_transactions(self, institution_id: str, time_period: str) -> List[dict]:
+        """Raw institution transactions for the period"""
         # Simulate transaction data
-        sample_transactions = [
+        return [
             {
                 "tx_hash": "0xabc123...",
                 "amount_usd": 50000,
@@ -360,13 +371,6 @@ class DeFiRiskAnalyzer:
                 "origin_country": "SG"
             }
         ]
-        
-        results = []
-        for tx in sample_transactions:
-            analysis = await self.analyze_aml_compliance(tx)
-            results.append(analysis)
-        
-        return results
     
     def _calculate_compliance_score(self, avg_protocol_risk: float, flagged_tx_count: int) -> float:
         """Calculate overall compliance score"""
@@ -0,0 +1,205 @@
+"""
+EVM ABI Helpers
+Keccak-256, event / function signatures and ABI encoding / decoding for the compiled contract artifacts
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from services.contract_audit import CONTRACTS_ROOT
+
+_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+_ROTATIONS = (
+    (0, 36, 3, 41, 18), (1, 44, 10, 45, 2), (62, 6, 43, 15, 61), (28, 55, 25, 21, 56), (27, 20, 39, 8, 14),
+)
+_MASK = (1 << 64) - 1
+
+
+def _keccak_f(state: List[List[int]]):
+    for round_constant in _ROUND_CONSTANTS:
+        c = [state[x][0] ^ state[x][1] ^ state[x][2] ^ state[x][3] ^ state[x][4] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK) for x in range(5)]
+        state = [[state[x][y] ^ d[x] for y in range(5)] for x in range(5)]
+        b = [[0] * 5 for _ in range(5)]
+        for x in range(5):
+            for y in range(5):
+                r = _ROTATIONS[x][y]
+                b[y][(2 * x + 3 * y) % 5] = ((state[x][y] << r) | (state[x][y] >> (64 - r))) & _MASK if r else state[x][y]
+        state = [[b[x][y] ^ (~b[(x + 1) % 5][y] & b[(x + 2) % 5][y]) for y in range(5)] for x in range(5)]
+        state[0][0] ^= round_constant
+    return state
+
+
+def keccak256(data: bytes) -> bytes:
+    """Ethereum Keccak-256 (original padding, not NIST SHA3); used for signatures only"""
+    rate = 136
+    padded = bytearray(data) + b"\x01" + b"\x00" * ((rate - len(data) - 1) % rate)
+    padded[-1] |= 0x80
+    state = [[0] * 5 for _ in range(5)]
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            state[i % 5][i // 5] ^= int.from_bytes(block[i * 8:i * 8 + 8], "little")
+        state = _keccak_f(state)
+    return b"".join(state[i % 5][i // 5].to_bytes(8, "little") for i in range(4))
+
+
+def _canonical_type(param: Dict) -> str:
+    if param["type"].startswith("tuple"):
+        return "(" + ",".join(_canonical_type(c) for c in param["components"]) + ")" + param["type"][5:]
+    return param["type"]
+
+
+@lru_cache(maxsize=None)
+def signature_hash(signature: str) -> str:
+    return "0x" + keccak256(signature.encode()).hex()
+
+
+def event_topic(entry: Dict) -> str:
+    return signature_hash(f"{entry['name']}({','.join(_canonical_type(p) for p in entry['inputs'])})")
+
+
+def function_selector(entry: Dict) -> str:
+    return event_topic(entry)[:10]
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    return abi_type in ("string", "bytes") or abi_type.endswith("[]")
+
+
+def decode_word(abi_type: str, word: bytes) -> Any:
+    """Decode a single static 32-byte ABI word"""
+    if abi_type == "address":
+        return "0x" + word[12:].hex()
+    if abi_type == "bool":
+        return word[-1] == 1
+    if abi_type.startswith("uint"):
+        return int.from_bytes(word, "big")
+    if abi_type.startswith("int"):
+        return int.from_bytes(word, "big", signed=True)
+    if abi_type.startswith("bytes"):
+        return "0x" + word[:int(abi_type[5:])].hex()
+    raise ValueError(f"Unsupported static ABI type {abi_type}")
+
+
+def decode_values(types: List[str], data: bytes) -> List[Any]:
+    """Decode a head/tail encoded tuple of static types, strings, bytes and dynamic arrays of static types"""
+    values = []
+    for i, abi_type in enumerate(types):
+        head = data[i * 32:(i + 1) * 32]
+        if not _is_dynamic(abi_type):
+            values.append(decode_word(abi_type, head))
+            continue
+        offset = int.from_bytes(head, "big")
+        length = int.from_bytes(data[offset:offset + 32], "big")
+        if abi_type in ("string", "bytes"):
+            raw = data[offset + 32:offset + 32 + length]
+            values.append(raw.decode("utf-8", errors="replace") if abi_type == "string" else "0x" + raw.hex())
+        else:
+            item_type = abi_type[:-2]
+            start = offset + 32
+            values.append([decode_word(item_type, data[start + j * 32:start + (j + 1) * 32]) for j in range(length)])
+    return values
+
+
+def encode_word(abi_type: str, value: Any) -> bytes:
+    """Encode a single static value as a 32-byte ABI word"""
+    if abi_type == "address":
+        return bytes(12) + bytes.fromhex(value[2:] if value.startswith("0x") else value).rjust(20, b"\x00")
+    if abi_type == "bool":
+        return (1 if value else 0).to_bytes(32, "big")
+    if abi_type.startswith("uint"):
+        return int(value).to_bytes(32, "big")
+    if abi_type.startswith("int"):
+        return int(value).to_bytes(32, "big", signed=True)
+    if abi_type.startswith("bytes"):
+        raw = bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+        return raw.ljust(32, b"\x00")
+    raise ValueError(f"Unsupported static ABI type {abi_type}")
+
+
+def _encode_tail(abi_type: str, value: Any) -> bytes:
+    if abi_type in ("string", "bytes"):
+        if abi_type == "string":
+            raw = value.encode()
+        else:
+            raw = bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+        return len(raw).to_bytes(32, "big") + raw.ljust((len(raw) + 31) // 32 * 32, b"\x00")
+    item_type = abi_type[:-2]
+    return len(value).to_bytes(32, "big") + b"".join(encode_word(item_type, item) for item in value)
+
+
+def encode_values(types: List[str], values: List[Any]) -> bytes:
+    """Head/tail encode the same type subset decode_values understands"""
+    head_size = 32 * len(types)
+    heads, tails = [], []
+    for abi_type, value in zip(types, values):
+        if _is_dynamic(abi_type):
+            heads.append((head_size + sum(len(t) for t in tails)).to_bytes(32, "big"))
+            tails.append(_encode_tail(abi_type, value))
+        else:
+            heads.append(encode_word(abi_type, value))
+    return b"".join(heads) + b"".join(tails)
+
+
+def encode_call(entry: Dict, args: List[Any]) -> str:
+    """Calldata (0x-hex) for an ABI function entry"""
+    types = [_canonical_type(p) for p in entry["inputs"]]
+    return function_selector(entry) + encode_values(types, args).hex()
+
+
+def decode_output(entry: Dict, data: str) -> List[Any]:
+    """Decoded return values of an ABI function entry from eth_call result hex"""
+    return decode_values([_canonical_type(p) for p in entry["outputs"]], bytes.fromhex(data[2:]))
+
+
+class EventDecoder:
+    """topic0 -> ABI event lookup for a set of contract ABIs"""
+
+    def __init__(self, abis: Dict[str, List[Dict]]):
+        self.events: Dict[str, Dict] = {}
+        for contract, abi in abis.items():
+            for entry in abi:
+                if entry.get("type") == "event" and not entry.get("anonymous"):
+                    self.events.setdefault(event_topic(entry), {"contract": contract, **entry})
+
+    @property
+    def topics(self) -> List[str]:
+        return list(self.events)
+
+    def decode(self, log: Dict) -> Optional[Dict]:
+        """Decoded {"event", "contract", "args"} for a raw eth_getLogs entry, or None if unknown"""
+        topics = log.get("topics") or []
+        entry = self.events.get(topics[0].lower()) if topics else None
+        if entry is None:
+            return None
+        indexed = [p for p in entry["inputs"] if p.get("indexed")]
+        plain = [p for p in entry["inputs"] if not p.get("indexed")]
+
+        args = {}
+        for param, topic in zip(indexed, topics[1:]):
+            word = bytes.fromhex(topic[2:])
+            # dynamic indexed values are only available as their hash
+            args[param["name"]] = "0x" + word.hex() if _is_dynamic(param["type"]) else decode_word(param["type"], word)
+        data = bytes.fromhex((log.get("data") or "0x")[2:])
+        for param, value in zip(plain, decode_values([p["type"] for p in plain], data)):
+            args[param["name"]] = value
+        return {"event": entry["name"], "contract": entry["contract"], "args": args}
+
+
+def load_abis(names: List[str], contracts_root: Path = CONTRACTS_ROOT) -> Dict[str, List[Dict]]:
+    """ABIs from contracts/artifacts/contracts/<Name>.sol/<Name>.json"""
+    abis = {}
+    for name in names:
+        path = contracts_root / "artifacts" / "contracts" / f"{name}.sol" / f"{name}.json"
+        abis[name] = json.loads(path.read_text())["abi"]
+    return abis
@@ -0,0 +1,270 @@
+"""
+EVM Bytecode Analysis
+Array-backed disassembler and control-flow graph builder with a per-code-hash cache
+"""
+
+import hashlib
+import re
+from array import array
+from typing import Dict, Optional
+
+# Opcodes the analysis looks at
+STOP, EQ, ISZERO, ORIGIN, CALLER = 0x00, 0x14, 0x15, 0x32, 0x33
+SLOAD, SSTORE, JUMP, JUMPI, JUMPDEST = 0x54, 0x55, 0x56, 0x57, 0x5B
+PUSH0, PUSH1, PUSH4, PUSH32 = 0x5F, 0x60, 0x63, 0x7F
+CALL, CALLCODE, RETURN, DELEGATECALL, STATICCALL = 0xF1, 0xF2, 0xF3, 0xF4, 0xFA
+REVERT, INVALID, SELFDESTRUCT = 0xFD, 0xFE, 0xFF
+
+TERMINATORS = frozenset((STOP, JUMP, RETURN, REVERT, INVALID, SELFDESTRUCT))
+BLOCK_ENDS = TERMINATORS | {JUMPI}
+EXTERNAL_CALLS = (CALL, CALLCODE, DELEGATECALL, STATICCALL)
+
+# Number of immediate bytes following each opcode (only PUSH1..PUSH32 have any)
+IMMEDIATE_SIZE = bytes(op - PUSH0 if PUSH1 <= op <= PUSH32 else 0 for op in range(256))
+
+MAX_CODE_SIZE = 24576  # EIP-170
+LINK_PLACEHOLDER = re.compile(r"__\$[0-9a-fA-F]{34}\$__")
+
+
+def decode_bytecode(bytecode: str) -> bytes:
+    """Hex (optionally 0x-prefixed, with unlinked library placeholders) -> bytes"""
+    return bytes.fromhex(LINK_PLACEHOLDER.sub("0" * 40, bytecode.removeprefix("0x")))
+
+
+def strip_metadata(code: bytes) -> bytes:
+    """Drop the trailing solc CBOR metadata (its length is stored in the last two bytes)"""
+    if len(code) >= 2:
+        length = int.from_bytes(code[-2:], "big")
+        if 0 < length + 2 <= len(code) and code[-length - 2] in (0xA1, 0xA2, 0xA3):
+            return code[:-length - 2]
+    return code
+
+
+class ControlFlowGraph:
+    """
+    Instructions are two parallel arrays (pc offsets and opcodes); PUSH immediates
+    stay in `code` and are only read when resolving jump targets. Blocks are
+    [first, last] instruction ranges and edges are parallel source / target arrays.
+    """
+
+    __slots__ = ("code_hash", "code", "pcs", "ops", "block_first", "block_last",
+                 "edge_src", "edge_dst", "dynamic_jumps")
+
+    def __init__(self, code: bytes, code_hash: str):
+        self.code_hash = code_hash
+        self.code = code
+        self.pcs = array("I")
+        self.ops = bytearray()
+        self._disassemble()
+        self.block_first = array("I")
+        self.block_last = array("I")
+        self.edge_src = array("I")
+        self.edge_dst = array("I")
+        self.dynamic_jumps = 0
+        self._build_blocks()
+        self._build_edges()
+
+    def _disassemble(self):
+        code, pcs, ops, immediate = self.code, self.pcs, self.ops, IMMEDIATE_SIZE
+        pc, size = 0, len(code)
+        while pc < size:
+            op = code[pc]
+            pcs.append(pc)
+            ops.append(op)
+            pc += 1 + immediate[op]
+
+    def _build_blocks(self):
+        ops, first, last = self.ops, self.block_first, self.block_last
+        if not ops:
+            return
+        first.append(0)
+        for i in range(1, len(ops)):
+            if ops[i] == JUMPDEST or ops[i - 1] in BLOCK_ENDS:
+                if first[-1] != i:
+                    last.append(i - 1)
+                    first.append(i)
+        last.append(len(ops) - 1)
+
+    def _push_value(self, index: int) -> Optional[int]:
+        op = self.ops[index]
+        if not PUSH1 <= op <= PUSH32:
+            return None
+        start = self.pcs[index] + 1
+        return int.from_bytes(self.code[start:start + op - PUSH0], "big")
+
+    def _build_edges(self):
+        ops, pcs = self.ops, self.pcs
+        jumpdest_block = {pcs[first]: block for block, first in enumerate(self.block_first) if ops[first] == JUMPDEST}
+        for block, last in enumerate(self.block_last):
+            op = ops[last]
+            if op in (JUMP, JUMPI):
+                target = self._push_value(last - 1) if last > 0 else None
+                if target is not None and target in jumpdest_block:
+                    self.edge_src.append(block)
+                    self.edge_dst.append(jumpdest_block[target])
+                else:
+                    self.dynamic_jumps += 1
+            if op not in TERMINATORS and block + 1 < len(self.block_first):
+                self.edge_src.append(block)
+                self.edge_dst.append(block + 1)
+
+    @property
+    def instruction_count(self) -> int:
+        return len(self.ops)
+
+    @property
+    def block_count(self) -> int:
+        return len(self.block_first)
+
+    def block_ops(self, block: int) -> bytearray:
+        return self.ops[self.block_first[block]:self.block_last[block] + 1]
+
+    def successors(self) -> list:
+        """Adjacency lists built from the edge arrays"""
+        adjacency = [[] for _ in range(self.block_count)]
+        for src, dst in zip(self.edge_src, self.edge_dst):
+            adjacency[src].append(dst)
+        return adjacency
+
+    def loop_blocks(self) -> set:
+        """
+        Blocks on a cycle of statically resolved edges (non-trivial strongly connected
+        components, found with an iterative Tarjan walk). Internal function returns
+        are dynamic jumps, so shared helpers do not show up as loops.
+        """
+        adjacency = self.successors()
+        index = [-1] * self.block_count
+        lowlink = [0] * self.block_count
+        on_stack = bytearray(self.block_count)
+        stack, in_loops, counter = [], set(), 0
+
+        for root in range(self.block_count):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = 1
+                elif child <= len(adjacency[node]):
+                    lowlink[node] = min(lowlink[node], lowlink[adjacency[node][child - 1]])
+                for position in range(child, len(adjacency[node])):
+                    successor = adjacency[node][position]
+                    if index[successor] == -1:
+                        work.append((node, position + 1))
+                        work.append((successor, 0))
+                        break
+                    if on_stack[successor]:
+                        lowlink[node] = min(lowlink[node], index[successor])
+                else:
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in adjacency[node]:
+                            in_loops.update(component)
+        return in_loops
+
+    def selector_count(self) -> int:
+        """Function selectors in the dispatcher (PUSH4 <selector> EQ)"""
+        count, ops, pattern = 0, self.ops, bytes((PUSH4, EQ))
+        position = ops.find(pattern)
+        while position != -1:
+            count += 1
+            position = ops.find(pattern, position + 2)
+        return count
+
+    def sender_check_blocks(self, source: int = CALLER) -> int:
+        """Conditional blocks comparing `source` (CALLER or ORIGIN) against something"""
+        checks = 0
+        for block in range(self.block_count):
+            ops = self.block_ops(block)
+            if ops[-1] == JUMPI and source in ops and (EQ in ops or ISZERO in ops):
+                checks += 1
+        return checks
+
+
+def analyze_cfg(cfg: ControlFlowGraph) -> Dict:
+    """Gas-efficiency and access-control indicators derived from the CFG"""
+    ops = cfg.ops
+    instructions = max(cfg.instruction_count, 1)
+    storage_ops = ops.count(SLOAD) + ops.count(SSTORE)
+    loops = cfg.loop_blocks()
+    writes_in_loops = sum(cfg.block_ops(block).count(SSTORE) for block in loops)
+    calls_in_loops = sum(sum(cfg.block_ops(block).count(op) for op in EXTERNAL_CALLS) for block in loops)
+    sender_checks = cfg.sender_check_blocks(CALLER)
+    origin_checks = cfg.sender_check_blocks(ORIGIN)
+
+    penalties = (
+        20.0 * min(1.0, max(0.0, len(cfg.code) / MAX_CODE_SIZE - 0.5) / 0.5),
+        min(30.0, 600.0 * storage_ops / instructions),
+        min(25.0, 5.0 * writes_in_loops),
+        min(15.0, 5.0 * calls_in_loops),
+    )
+
+    if origin_checks:
+        access_controls = "WEAK"
+    elif sender_checks == 0 and (ops.count(SSTORE) or SELFDESTRUCT in ops or DELEGATECALL in ops):
+        access_controls = "NONE"
+    else:
+        access_controls = "SECURE"
+
+    return {
+        "code_hash": cfg.code_hash,
+        "code_size": len(cfg.code),
+        "instructions": cfg.instruction_count,
+        "basic_blocks": cfg.block_count,
+        "edges": len(cfg.edge_src),
+        "dynamic_jumps": cfg.dynamic_jumps,
+        "function_selectors": cfg.selector_count(),
+        "storage_ops": storage_ops,
+        "storage_writes_in_loops": writes_in_loops,
+        "external_calls_in_loops": calls_in_loops,
+        "sender_checks": sender_checks,
+        "origin_checks": origin_checks,
+        "uses_delegatecall": DELEGATECALL in ops or CALLCODE in ops,
+        "uses_selfdestruct": SELFDESTRUCT in ops,
+        "gas_efficiency": round(max(0.0, 100.0 - sum(penalties)), 1),
+        "access_controls": access_controls,
+    }
+
+
+class CFGCache:
+    """Bounded cache of CFGs and their analyses keyed by runtime-code hash"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bytecode: str) -> tuple:
+        """(ControlFlowGraph, analysis) for hex bytecode"""
+        code = strip_metadata(decode_bytecode(bytecode))
+        code_hash = hashlib.sha256(code).hexdigest()
+        entry = self._entries.get(code_hash)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        cfg = ControlFlowGraph(code, code_hash)
+        entry = (cfg, analyze_cfg(cfg))
+        self._entries[code_hash] = entry
+        while len(self._entries) > self.max_entries:
+            # dicts keep insertion order, so the first key is the oldest entry
+            self._entries.pop(next(iter(self._entries)))
+        return entry
+
+
+CFG_CACHE = CFGCache()
+
+
+def analyze_bytecode(bytecode: str) -> Dict:
+    return CFG_CACHE.get(bytecode)[1]
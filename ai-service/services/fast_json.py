@@ -0,0 +1,113 @@
+"""
+Fast JSON Responses
+orjson-backed response class and a cache of pre-encoded bodies for hot, rarely changing payloads
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback: same output, slower
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively (orjson already covers datetime, Enum, dataclasses)"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "tolist"):  # numpy arrays and scalars
+        return obj.tolist()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes, without passing through jsonable_encoder"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Opt-in replacement for FastAPI's default JSON rendering. Endpoints must
+    return an instance (not a dict) for the jsonable_encoder pass to be skipped
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    key: Hashable
+    body: bytes
+    etag: str
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+class EncodedResponseCache:
+    """
+    Pre-encoded bodies per endpoint (and query), keyed by a cheap version key
+    supplied by the data owner. The payload is only built and encoded when the
+    key changes; otherwise the previous bytes and ETag are served as they are
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, EncodedBody]" = OrderedDict()
+        self.stats = {"hits": 0, "encodes": 0, "not_modified": 0}
+
+    def get(self, name: Hashable, key: Hashable, build: Callable[[], Any]) -> EncodedBody:
+        entry = self._entries.get(name)
+        if entry is not None and entry.key == key:
+            self._entries.move_to_end(name)
+            self.stats["hits"] += 1
+            return entry
+        body = dumps(build())
+        entry = self._entries[name] = EncodedBody(key, body, f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.stats["encodes"] += 1
+        return entry
+
+    def response(self, name: Hashable, key: Hashable, build: Callable[[], Any], if_none_match: Optional[str] = None) -> Response:
+        """The cached body as a response, or a 304 when the client already has it"""
+        entry = self.get(name, key, build)
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if entry.matches(if_none_match):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, name: Hashable):
+        """Drop a body whose version key is no longer meaningful (its data owner was replaced)"""
+        self._entries.pop(name, None)
+
+    def metrics(self) -> Dict:
+        return {"entries": len(self._entries), **self.stats}
@@ -1,16 +1,20 @@
 import asyncio
+import math
 import os
 from typing import Dict, List, Optional
-from github import Github
+from github import Github, RateLimitExceededException
 import pandas as pd
 import numpy as np
 from collections import defaultdict, Counter
 import re
 from datetime import datetime, timedelta
 
+from services.rate_limiter import rate_limiter
+
 class GitHubAnalyzer:
     def __init__(self):
         self.github = Github(os.getenv("GITHUB_TOKEN"))
+        self.rate_limiter = rate_limiter
         
         # Web3/Blockchain skill keywords
         self.web3_skills = {
@@ -39,7 +43,9 @@ class GitHubAnalyzer:
         Advanced AI-powered GitHub profile analysis
         """
         try:
+            await self._spend_quota(1)
             user = self.github.get_user(username)
+            await self._spend_quota(1 + math.ceil(user.public_repos / 30))  # profile + repo pages
             repos = list(user.get_repos())
             
             # Basic metrics
@@ -54,11 +60,15 @@ class GitHubAnalyzer:
             # Specializations
             specializations = self._find_specializations(repos, skill_scores)
             
-            # Advanced metrics
+            # Advanced metrics (one request per repo inspected by each)
+            await self._spend_quota(len(repos[:20]))
             activity_score = self._calculate_activity_score(repos, user)
+            await self._spend_quota(len(repos[:30]))
             collaboration_score = self._calculate_collaboration_score(repos)
             innovation_score = self._calculate_innovation_score(repos)
+            await self._spend_quota(len(repos[:25]))
             contribution_quality = self._assess_contribution_quality(repos)
+            self._observe_quota()
             
             # Overall score
             overall_score = self._calculate_overall_score({
@@ -90,9 +100,26 @@ class GitHubAnalyzer:
                 **basic_metrics
             }
             
+        except RateLimitExceededException as e:
+            self._observe_quota()
+            raise Exception(f"Failed to analyze GitHub profile: GitHub rate limit exhausted ({e})")
         except Exception as e:
             raise Exception(f"Failed to analyze GitHub profile: {str(e)}")
 
+    async def _spend_quota(self, requests: int):
+        """
+        Wait for the GitHub bucket to cover the next `requests` PyGithub calls.
+        PyGithub is synchronous, so tokens are taken before each batch of calls
+        rather than per HTTP request
+        """
+        if requests > 0:
+            await self.rate_limiter.acquire("github", tokens=requests)
+
+    def _observe_quota(self):
+        """Pause the shared GitHub bucket when PyGithub reports the hourly quota is spent"""
+        remaining, _ = self.github.rate_limiting
+        self.rate_limiter.observe_quota("github", remaining, self.github.rate_limiting_resettime)
+
     def _calculate_basic_metrics(self, user, repos) -> Dict:
         """Calculate basic GitHub metrics"""
         total_stars = sum(repo.stargazers_count for repo in repos)
@@ -114,6 +141,7 @@ class GitHubAnalyzer:
         
         for repo in repos[:50]:  # Limit to avoid rate limits
             try:
+                await self._spend_quota(2)  # languages + README
                 # Language analysis
                 languages = repo.get_languages()
                 for lang, bytes_count in languages.items():
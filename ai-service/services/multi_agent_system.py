@@ -1,39 +1,34 @@
 """
-Multi-Agent DeFi Compliance@dataclass
-class AgentState:
-    agent_id: str
-    name: str
-    specialization: str
-    status: AgentStatus
-    current_task: Optional[str]
-    progress: float
-    last_action: str
-    timestamp: datetime
-    conversation_history: Optional[List[str]] = None
-    findings: Optional[Dict] = None
-    confidence_level: float = 0.0
-    
-    def __post_init__(self):
-        if self.conversation_history is None:
-            self.conversation_history = []
-        if self.findings is None:
-            self.findings = {}ollaboration between specialized AI agents for institutional compliance decisions
+Multi-Agent DeFi Compliance System
+Collaboration between specialized AI agents for institutional compliance decisions
 """
 
 import asyncio
+import hashlib
 import time
 import os
 import json
 import re
 from datetime import datetime
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
 from enum import Enum
 import logging
 import aiohttp
-from urllib.parse import quote
+from contextlib import nullcontext
+from urllib.parse import urlencode, urlsplit
 import random
 
+from services import tracing
+from services.agent_dag import TaskGraph
+from services.chain_executor import chain_executor, load_execution_protocols
+from services.chain_rpc import RPCError
+from services.rate_limiter import RateLimitExceeded, rate_limiter
+from services.request_context import RequestContext
+from services.upstream_guard import (
+    CircuitBreaker, UpstreamGuard, UpstreamHTTPError, UpstreamRequestError, request_deadline, time_remaining
+)
+
 logger = logging.getLogger(__name__)
 
 class AgentStatus(Enum):
@@ -51,8 +46,24 @@ class TaskPriority(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
-@dataclass
+def priority_for_amount(amount: float) -> Tuple[TaskPriority, str]:
+    """Task priority and estimated handling time for an investment size"""
+    if amount > 1_000_000_000:  # > $1B
+        return TaskPriority.CRITICAL, "120 seconds"
+    if amount > 500_000_000:  # > $500M
+        return TaskPriority.HIGH, "90 seconds"
+    if amount > 100_000_000:  # > $100M
+        return TaskPriority.MEDIUM, "75 seconds"
+    return TaskPriority.LOW, "60 seconds"
+
+@dataclass(frozen=True, slots=True)
 class AgentState:
+    """
+    Immutable snapshot of one agent. Updates replace the record (see
+    MultiAgentDeFiSystem._update_agent), so a record that is still in place is
+    unchanged and its serialised form can be reused. `findings` is shared, not
+    copied, and must not be mutated once published
+    """
     agent_id: str
     name: str
     specialization: str
@@ -61,15 +72,24 @@ class AgentState:
     progress: float
     last_action: str
     timestamp: datetime
-    conversation_history: Optional[List[str]] = None
+    conversation_history: Tuple[str, ...] = ()
     findings: Optional[Dict] = None
     confidence_level: float = 0.0
     
-    def __post_init__(self):
-        if self.conversation_history is None:
-            self.conversation_history = []
-        if self.findings is None:
-            self.findings = {}
+    def to_dict(self) -> Dict:
+        return {
+            "agent_id": self.agent_id,
+            "name": self.name,
+            "specialization": self.specialization,
+            "status": self.status.value,
+            "current_task": self.current_task,
+            "progress": self.progress,
+            "last_action": self.last_action,
+            "timestamp": self.timestamp.isoformat(),
+            "conversation_history": list(self.conversation_history),
+            "findings": self.findings if self.findings is not None else {},
+            "confidence_level": self.confidence_level,
+        }
 
 @dataclass
 class CollaborationMessage:
@@ -87,15 +107,50 @@ class MultiAgentDeFiSystem:
         self.collaboration_log = []
         self.active_requests = {}
         self.blockchain_transactions = []
+        # serialised AgentState per agent, and the last status response with the state it reflects
+        self._agent_snapshots: Dict[str, Tuple[AgentState, Dict]] = {}
+        self._status_snapshot: Optional[Tuple[Tuple, Dict]] = None
+        self.state_version = 0
         
         # API endpoints
         self.defillama_api = "https://api.llama.fi"
         self.coingecko_api = "https://api.coingecko.com/api/v3"
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.coingecko_api_key = os.getenv("COINGECKO_API_KEY")
+        self.coingecko_upstream = "coingecko_pro" if self.coingecko_api_key else "coingecko"
+        self.rate_limiter = rate_limiter
+        # longest a fetch may queue for a rate-limit token before the agents go without it
+        self.max_rate_limit_wait = float(os.getenv("UPSTREAM_MAX_WAIT_SECONDS", "10"))
+        self.request_deadline = float(os.getenv("DEMO_REQUEST_DEADLINE_SECONDS", "45"))
+        self.tracing_enabled = os.getenv("DEMO_TRACING", "true").lower() == "true"
+        # keep upstream response bodies in traces so they can be replayed offline (opt-in: they are large)
+        self.record_responses = os.getenv("DEMO_TRACE_RECORDING", "false").lower() == "true"
+        # scales the dashboard-facing pauses; 0 runs the workflow flat out (replays, benchmarks)
+        self.demo_pacing = float(os.getenv("DEMO_PACING", "1.0"))
+        self.traces = tracing.trace_buffer
+        # on-chain execution; without an executor, token and protocol address the transactions are simulated
+        self.chain_executor = chain_executor
+        self.execution_token = os.getenv("EXECUTION_TOKEN")
+        self.execution_token_decimals = int(os.getenv("EXECUTION_TOKEN_DECIMALS", "6"))
+        self.execution_protocols = load_execution_protocols()
+        hedging = os.getenv("UPSTREAM_HEDGING", "true").lower() == "true"
+        self.upstream_guards = {
+            "defillama": UpstreamGuard(
+                "defillama", timeout=float(os.getenv("DEFILLAMA_TIMEOUT_SECONDS", "8")),
+                breaker=CircuitBreaker("defillama", slow_call_threshold=5.0), hedge=hedging,
+                neutral_errors=(RateLimitExceeded, UpstreamRequestError)
+            ),
+            "coingecko": UpstreamGuard(
+                "coingecko", timeout=float(os.getenv("COINGECKO_TIMEOUT_SECONDS", "5")),
+                breaker=CircuitBreaker("coingecko", slow_call_threshold=3.0), hedge=hedging,
+                neutral_errors=(RateLimitExceeded, UpstreamRequestError)
+            ),
+        }
         
         # Initialize specialized agents
         self._initialize_agents()
+        self.fact_providers = self._fact_providers()
+        self.workflow = self._build_workflow()
     
     def _initialize_agents(self):
         """Initialize specialized DeFi compliance agents"""
@@ -109,8 +164,6 @@ class MultiAgentDeFiSystem:
                 progress=0.0,
                 last_action="Initialized",
                 timestamp=datetime.utcnow(),
-                conversation_history=[],
-                findings={},
                 confidence_level=0.0
             ),
             "risk_agent": AgentState(
@@ -122,8 +175,6 @@ class MultiAgentDeFiSystem:
                 progress=0.0,
                 last_action="Initialized",
                 timestamp=datetime.utcnow(),
-                conversation_history=[],
-                findings={},
                 confidence_level=0.0
             ),
             "regulatory_agent": AgentState(
@@ -135,8 +186,6 @@ class MultiAgentDeFiSystem:
                 progress=0.0,
                 last_action="Initialized",
                 timestamp=datetime.utcnow(),
-                conversation_history=[],
-                findings={},
                 confidence_level=0.0
             ),
             "execution_agent": AgentState(
@@ -148,8 +197,6 @@ class MultiAgentDeFiSystem:
                 progress=0.0,
                 last_action="Initialized", 
                 timestamp=datetime.utcnow(),
-                conversation_history=[],
-                findings={},
                 confidence_level=0.0
             ),
             "coordinator_agent": AgentState(
@@ -161,69 +208,129 @@ class MultiAgentDeFiSystem:
                 progress=0.0,
                 last_action="Initialized",
                 timestamp=datetime.utcnow(),
-                conversation_history=[],
-                findings={},
                 confidence_level=0.0
             )
         }
     
-    async def process_institutional_request(self, request: str, institution_id: str) -> Dict:
+    def _fact_providers(self) -> Dict:
+        """Shared per-request facts; each is computed on first use and then reused by every agent"""
+        async def protocol_data(ctx):
+            return await self._fetch_protocol_data(await ctx.get("protocol_info"))
+
+        async def market_data(ctx):
+            return await self._fetch_market_data(await ctx.get("protocol_info"))
+
+        async def tvl_series(ctx):
+            return [point["totalLiquidityUSD"] for point in (await ctx.get("protocol_data")).get("tvl") or []]
+
+        async def investment_params(ctx):
+            return await self._extract_investment_params(ctx["request"], await ctx.get("protocol_info"))
+
+        return {
+            "protocol_info": lambda ctx: self._extract_protocol_from_request(ctx["request"]),
+            "investment_params": investment_params,
+            "institution": lambda ctx: self._identify_institution_requirements(ctx["institution_id"], ctx["request"]),
+            "protocol_data": protocol_data,
+            "tvl_series": tvl_series,
+            "market_data": market_data,
+        }
+
+    def _build_workflow(self) -> TaskGraph:
+        """
+        Agent workflow as a task DAG: every step starts once its inputs resolve.
+        Risk and regulatory analysis don't wait for research, and the debate runs
+        alongside execution. New agents are added as steps with their inputs;
+        shared inputs come from the request context.
+        """
+        graph = TaskGraph().seed("context", "request_id")
+        graph.add("task_plan", self._create_task_plan, ["context"])
+        graph.add("research", self._research_agent_workflow, ["context"], timeout=60, tolerate_failure=True)
+        graph.add("risk", self._risk_agent_workflow, ["context"], timeout=60, tolerate_failure=True)
+        graph.add("regulatory", self._regulatory_agent_workflow, ["context"], timeout=60, tolerate_failure=True)
+        graph.add("debate", self._agent_collaboration_phase, ["research", "risk", "regulatory"], tolerate_failure=True)
+        graph.add("execution", self._execution_agent_workflow, ["context", "research", "risk", "regulatory"])
+        graph.add("summary", self._generate_demo_summary, ["request_id", "context", "execution", "task_plan", "debate"])
+        graph.order()
+        return graph
+
+    async def process_institutional_request(
+        self,
+        request: str,
+        institution_id: str,
+        deadline_seconds: Optional[float] = None,
+        replay_of: Optional[tracing.Trace] = None
+    ) -> Dict:
         """
         Main demo function: Process high-level institutional request with multi-agent collaboration
         Example: "Should JPMorgan invest $500M in Aave for Q4 2025?"
+        Upstream fetches are bounded by `deadline_seconds` (default DEMO_REQUEST_DEADLINE_SECONDS).
+        The run is traced into self.traces (with upstream responses when
+        record_responses is set); with `replay_of`, upstream calls are answered
+        from that trace's recorded responses instead of the network
         """
         request_id = f"req_{int(time.time())}"
         
         logger.info(f"🚀 DEMO STARTING: Processing institutional request for {institution_id}")
         
-        # Phase 1: Coordinator analyzes request and delegates tasks
-        await self._update_agent_status("coordinator_agent", AgentStatus.ANALYZING, "Analyzing institutional request")
-        
-        task_plan = await self._create_task_plan(request, institution_id)
-        
-        # Phase 2: Parallel agent execution with real-time collaboration
-        tasks = [
-            self._research_agent_workflow(request, institution_id, task_plan),
-            self._risk_agent_workflow(request, institution_id, task_plan),
-            self._regulatory_agent_workflow(request, institution_id, task_plan),
-        ]
-        
-        # Execute research, risk, and regulatory analysis in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Phase 3: Agent collaboration and debate
-        await self._agent_collaboration_phase(results, request, institution_id)
-        
-        # Phase 4: Final decision and blockchain execution
-        final_decision = await self._execution_agent_workflow(request, institution_id, results)
-        
-        # Phase 5: Generate demo summary
-        demo_summary = await self._generate_demo_summary(request_id, request, final_decision)
+        context = RequestContext(self.fact_providers, request=request, institution_id=institution_id)
+        recorder = (
+            tracing.trace(
+                "institutional_request", self.traces, replay_of, self.record_responses and replay_of is None,
+                request=request, institution_id=institution_id
+            )
+            if self.tracing_enabled or replay_of is not None else nullcontext()
+        )
+        with recorder as trace:
+            try:
+                with request_deadline(deadline_seconds or self.request_deadline):
+                    run = await self.workflow.run(context=context, request_id=request_id)
+            finally:
+                await context.close()
+        demo_summary = run.results["summary"]
+        demo_summary["workflow"] = run.report()
+        demo_summary["shared_facts"] = context.report()
+        if trace is not None:
+            demo_summary["trace_id"] = trace.trace_id
         
         return demo_summary
     
-    async def _create_task_plan(self, request: str, institution_id: str) -> Dict:
+    async def replay(self, recorded: tracing.Trace) -> Dict:
+        """Re-run a traced request without network, for profiling and regression benchmarks"""
+        return await self.process_institutional_request(
+            recorded.attrs["request"], recorded.attrs["institution_id"], replay_of=recorded
+        )
+    
+    async def request_priority(self, request: str) -> TaskPriority:
+        """Priority the coordinator will assign to a request, from the parsed investment size"""
+        investment_params = await self._extract_investment_params(request)
+        return priority_for_amount(investment_params["amount"])[0]
+
+    async def request_fingerprint(self, request: str, institution_id: str) -> str:
+        """
+        Normalised identity of a request: parsed protocol, amount bucket (two
+        significant figures) and institution, so rephrasings of the same
+        question share a fingerprint but institutions never share results
+        """
+        investment_params = await self._extract_investment_params(request)
+        amount = investment_params["amount"]
+        bucket = float(f"{amount:.2g}") if amount > 0 else 0.0
+        normalised = json.dumps([investment_params["protocol"], bucket, institution_id.strip().lower()])
+        return hashlib.sha256(normalised.encode()).hexdigest()[:32]
+
+    async def _create_task_plan(self, context: RequestContext) -> Dict:
         """Coordinator creates execution plan"""
-        await asyncio.sleep(0.5)  # Simulate planning time
+        await self._update_agent_status("coordinator_agent", AgentStatus.ANALYZING, "Analyzing institutional request")
+        await self._pause(0.5)  # Simulate planning time
+        
+        request, institution_id = context["request"], context["institution_id"]
+        investment_params = await context.get("investment_params")
         
-        # Extract dynamic information from request
-        investment_params = await self._extract_investment_params(request)
         protocol_name = investment_params["protocol"]
         amount = investment_params["amount"]
         
         # Determine priority based on investment size
-        if amount > 1_000_000_000:  # > $1B
-            priority = TaskPriority.CRITICAL.value
-            estimated_time = "120 seconds"
-        elif amount > 500_000_000:  # > $500M
-            priority = TaskPriority.HIGH.value
-            estimated_time = "90 seconds"
-        elif amount > 100_000_000:  # > $100M
-            priority = TaskPriority.MEDIUM.value
-            estimated_time = "75 seconds"
-        else:
-            priority = TaskPriority.LOW.value
-            estimated_time = "60 seconds"
+        task_priority, estimated_time = priority_for_amount(amount)
+        priority = task_priority.value
         
         plan = {
             "request": request,
@@ -268,30 +375,31 @@ class MultiAgentDeFiSystem:
         
         return plan
     
-    async def _research_agent_workflow(self, request: str, institution_id: str, task_plan: Dict) -> Dict:
+    async def _research_agent_workflow(self, context: RequestContext) -> Dict:
         """Research Agent autonomous workflow"""
         agent_id = "research_agent"
         
         # Phase 1: Extract protocol from request
         await self._update_agent_status(agent_id, AgentStatus.RESEARCHING, "Parsing request and identifying protocol")
-        protocol_info = await self._extract_protocol_from_request(request)
+        protocol_info = await context.get("protocol_info")
+        context.prefetch("protocol_data", "market_data")
         await self._simulate_progress(agent_id, f"Identified protocol: {protocol_info['name']}", 20)
         
         # Phase 2: Fetch real-time protocol data
         await self._update_agent_status(agent_id, AgentStatus.RESEARCHING, "Fetching real-time protocol data")
-        protocol_data = await self._fetch_protocol_data(protocol_info)
+        protocol_data = await context.get("protocol_data")
         await self._simulate_progress(agent_id, "Processing DeFi protocol metrics...", 60)
         
         # Phase 3: Market analysis
         await self._update_agent_status(agent_id, AgentStatus.ANALYZING, "Analyzing market conditions")
-        market_data = await self._fetch_market_data(protocol_info)
+        market_data = await context.get("market_data")
         await self._simulate_progress(agent_id, "Processing market trends and sentiment...", 90)
         
         # Phase 4: Generate dynamic findings
-        findings = await self._generate_research_findings(protocol_info, protocol_data, market_data, request)
+        tvl_series = await context.get("tvl_series")
+        findings = await self._generate_research_findings(protocol_info, tvl_series, market_data, context["request"])
         
-        self.agents[agent_id].findings = findings
-        self.agents[agent_id].confidence_level = findings.get("confidence", 0.8)
+        self._update_agent(agent_id, findings=findings, confidence_level=findings.get("confidence", 0.8))
         
         await self._add_collaboration_message(
             agent_id,
@@ -304,13 +412,13 @@ class MultiAgentDeFiSystem:
         await self._update_agent_status(agent_id, AgentStatus.COMPLETED, "Research analysis complete")
         return findings
     
-    async def _risk_agent_workflow(self, request: str, institution_id: str, task_plan: Dict) -> Dict:
+    async def _risk_agent_workflow(self, context: RequestContext) -> Dict:
         """Risk Analysis Agent autonomous workflow"""
         agent_id = "risk_agent"
         
         # Phase 1: Extract investment amount and protocol
         await self._update_agent_status(agent_id, AgentStatus.ANALYZING, "Analyzing investment parameters")
-        investment_params = await self._extract_investment_params(request)
+        investment_params = await context.get("investment_params")
         await self._simulate_progress(agent_id, f"Analyzing ${investment_params['amount']} investment", 20)
         
         # Phase 2: Protocol risk assessment
@@ -320,14 +428,13 @@ class MultiAgentDeFiSystem:
         
         # Phase 3: Market risk analysis
         await self._update_agent_status(agent_id, AgentStatus.ANALYZING, "Analyzing market conditions")
-        market_risks = await self._assess_market_risks(investment_params)
+        market_risks = await self._assess_market_risks(investment_params, await context.get("market_data"))
         await self._simulate_progress(agent_id, "Stress testing against volatility scenarios...", 80)
         
         # Phase 4: Generate dynamic risk analysis
         risk_analysis = await self._generate_risk_analysis(investment_params, protocol_risks, market_risks)
         
-        self.agents[agent_id].findings = risk_analysis
-        self.agents[agent_id].confidence_level = risk_analysis.get("confidence", 0.8)
+        self._update_agent(agent_id, findings=risk_analysis, confidence_level=risk_analysis.get("confidence", 0.8))
         
         await self._add_collaboration_message(
             agent_id,
@@ -340,18 +447,19 @@ class MultiAgentDeFiSystem:
         await self._update_agent_status(agent_id, AgentStatus.COMPLETED, "Risk analysis complete")
         return risk_analysis
     
-    async def _regulatory_agent_workflow(self, request: str, institution_id: str, task_plan: Dict) -> Dict:
+    async def _regulatory_agent_workflow(self, context: RequestContext) -> Dict:
         """Regulatory Compliance Agent autonomous workflow"""
         agent_id = "regulatory_agent"
+        request = context["request"]
         
         # Phase 1: Parse institution and jurisdiction requirements
         await self._update_agent_status(agent_id, AgentStatus.RESEARCHING, "Identifying institution and jurisdictions")
-        institution_data = await self._identify_institution_requirements(institution_id, request)
+        institution_data = await context.get("institution")
         await self._simulate_progress(agent_id, f"Analyzing requirements for {institution_data['name']}", 20)
         
         # Phase 2: Protocol compliance check
         await self._update_agent_status(agent_id, AgentStatus.RESEARCHING, "Checking protocol compliance status")
-        protocol_compliance = await self._check_protocol_compliance(request, institution_data)
+        protocol_compliance = await self._check_protocol_compliance(await context.get("protocol_info"), institution_data)
         await self._simulate_progress(agent_id, "Verifying regulatory frameworks...", 50)
         
         # Phase 3: AML/KYC analysis
@@ -362,8 +470,7 @@ class MultiAgentDeFiSystem:
         # Phase 4: Generate dynamic compliance analysis
         compliance_analysis = await self._generate_compliance_analysis(institution_data, protocol_compliance, aml_results, request)
         
-        self.agents[agent_id].findings = compliance_analysis
-        self.agents[agent_id].confidence_level = compliance_analysis.get("confidence", 0.8)
+        self._update_agent(agent_id, findings=compliance_analysis, confidence_level=compliance_analysis.get("confidence", 0.8))
         
         compliance_status = "APPROVED" if compliance_analysis["overall_compliance"] == "APPROVED" else "REQUIRES_REVIEW"
         
@@ -378,7 +485,7 @@ class MultiAgentDeFiSystem:
         await self._update_agent_status(agent_id, AgentStatus.COMPLETED, "Regulatory analysis complete")
         return compliance_analysis
     
-    async def _agent_collaboration_phase(self, results: List, request: str, institution_id: str):
+    async def _agent_collaboration_phase(self, research: Dict, risk: Dict, regulatory: Dict) -> List[Dict]:
         """Agents collaborate and debate findings"""
         await self._update_agent_status("coordinator_agent", AgentStatus.COLLABORATING, "Facilitating agent debate")
         
@@ -414,15 +521,17 @@ class MultiAgentDeFiSystem:
             await self._add_collaboration_message(
                 msg["from"], msg["to"], msg["type"], msg["message"], {}
             )
-            await asyncio.sleep(0.8)  # Pause between messages for demo effect
+            await self._pause(0.8)  # Pause between messages for demo effect
+        return debate_messages
     
-    async def _execution_agent_workflow(self, request: str, institution_id: str, results: List) -> Dict:
+    async def _execution_agent_workflow(self, context: RequestContext, research: Dict, risk: Dict, regulatory: Dict) -> Dict:
         """Execution Agent handles smart contract interactions"""
         agent_id = "execution_agent"
+        results = [research, risk, regulatory]
         
         # Phase 1: Analyze previous agent findings
         await self._update_agent_status(agent_id, AgentStatus.ANALYZING, "Analyzing agent findings")
-        investment_params = await self._extract_investment_params(request)
+        investment_params = await context.get("investment_params")
         await self._simulate_progress(agent_id, f"Processing ${investment_params['amount']/1_000_000:.0f}M investment decision", 20)
         
         # Phase 2: Determine execution decision
@@ -453,24 +562,32 @@ class MultiAgentDeFiSystem:
                 "confidence": 0.95
             }
         
-        await self._add_collaboration_message(
-            agent_id,
-            "coordinator_agent",
-            "execution_complete",
-            f"{'🚀' if execution_result['decision'] == 'APPROVED_FOR_EXECUTION' else '⚠️'} EXECUTION {execution_result['decision']}: {investment_params['protocol']} analysis complete",
-            execution_result
-        )
+        decision = execution_result["decision"]
+        if decision in ("PARTIALLY_EXECUTED", "EXECUTION_FAILED"):
+            summary = (
+                f"❌ {decision}: {investment_params['protocol']} transactions confirmed "
+                f"{execution_result['transactions_confirmed']} ({execution_result['execution_error']})"
+            )
+        else:
+            summary = f"{'🚀' if decision == 'APPROVED_FOR_EXECUTION' else '⚠️'} EXECUTION {decision}: {investment_params['protocol']} analysis complete"
+        await self._add_collaboration_message(agent_id, "coordinator_agent", "execution_complete", summary, execution_result)
         
-        await self._update_agent_status(agent_id, AgentStatus.COMPLETED, "Investment execution complete")
+        await self._update_agent_status(
+            agent_id, AgentStatus.COMPLETED,
+            "Investment execution failed" if decision == "EXECUTION_FAILED" else "Investment execution complete"
+        )
         return execution_result
     
-    async def _generate_demo_summary(self, request_id: str, original_request: str, execution_result: Dict) -> Dict:
-        """Generate comprehensive demo summary"""
+    async def _generate_demo_summary(
+        self, request_id: str, context: RequestContext, execution_result: Dict, task_plan: Dict, debate: List[Dict]
+    ) -> Dict:
+        """Generate comprehensive demo summary (runs once the debate has finished)"""
         total_agents = len(self.agents)
         completed_agents = sum(1 for agent in self.agents.values() if agent.status == AgentStatus.COMPLETED)
+        original_request = context["request"]
         
         # Extract dynamic values
-        investment_params = await self._extract_investment_params(original_request)
+        investment_params = await context.get("investment_params")
         protocol_name = execution_result.get("protocol", investment_params["protocol"])
         investment_amount = execution_result.get("recommended_allocation", f"${investment_params['amount']:,.0f}")
         estimated_yield = execution_result.get("estimated_annual_yield", "N/A")
@@ -494,8 +611,10 @@ class MultiAgentDeFiSystem:
             "agents_deployed": total_agents,
             "agents_completed": completed_agents,
             "collaboration_messages": len(self.collaboration_log),
+            "debate_rounds": len(debate) if isinstance(debate, list) else 0,
             "blockchain_transactions": len(self.blockchain_transactions),
             "final_decision": execution_result["decision"],
+            "priority": task_plan["priority"],
             "protocol_analyzed": protocol_name,
             "financial_impact": {
                 "investment_amount": investment_amount,
@@ -527,16 +646,23 @@ class MultiAgentDeFiSystem:
             ]
         }
     
+    def _update_agent(self, agent_id: str, **changes):
+        """Replace an agent's record; the only way agent state changes, so snapshots know what is stale"""
+        self.agents[agent_id] = replace(self.agents[agent_id], **changes)
+        self.state_version += 1
+    
     async def _update_agent_status(self, agent_id: str, status: AgentStatus, task: str):
         """Update agent status for real-time dashboard"""
         if agent_id in self.agents:
-            self.agents[agent_id].status = status
-            self.agents[agent_id].current_task = task
-            self.agents[agent_id].last_action = task
-            self.agents[agent_id].timestamp = datetime.utcnow()
+            self._update_agent(agent_id, status=status, current_task=task, last_action=task, timestamp=datetime.utcnow())
+            tracing.phase(agent_id, None if status is AgentStatus.COMPLETED else task)
             
             logger.info(f"🤖 {self.agents[agent_id].name}: {task}")
     
+    async def _pause(self, seconds: float):
+        if self.demo_pacing > 0:
+            await asyncio.sleep(seconds * self.demo_pacing)
+    
     async def _simulate_progress(self, agent_id: str, action: str, target_progress: float):
         """Simulate agent progress for demo effect"""
         if agent_id not in self.agents:
@@ -547,9 +673,10 @@ class MultiAgentDeFiSystem:
         increment = (target_progress - current_progress) / steps
         
         for i in range(steps):
-            await asyncio.sleep(0.3)  # Smooth progress animation
-            self.agents[agent_id].progress = min(current_progress + (increment * (i + 1)), target_progress)
-            self.agents[agent_id].last_action = action
+            await self._pause(0.3)  # Smooth progress animation
+            self._update_agent(
+                agent_id, progress=min(current_progress + (increment * (i + 1)), target_progress), last_action=action
+            )
             
     async def _add_collaboration_message(self, from_agent: str, to_agent: str, msg_type: str, content: str, data: Dict):
         """Add message to collaboration log"""
@@ -564,13 +691,14 @@ class MultiAgentDeFiSystem:
         )
         
         self.collaboration_log.append(message)
+        tracing.event(msg_type, "collaboration", lane=from_agent, to=to_agent, chars=len(content))
         
         # Add to agent conversation history
         # Only log to conversation history for real agents 
-        if from_agent in self.agents and self.agents[from_agent].conversation_history is not None:
-            self.agents[from_agent].conversation_history.append(f"→ {content}")
-        if to_agent in self.agents and to_agent != "all_agents" and self.agents[to_agent].conversation_history is not None:
-            self.agents[to_agent].conversation_history.append(f"← {content}")
+        if from_agent in self.agents:
+            self._update_agent(from_agent, conversation_history=self.agents[from_agent].conversation_history + (f"→ {content}",))
+        if to_agent in self.agents and to_agent != "all_agents":
+            self._update_agent(to_agent, conversation_history=self.agents[to_agent].conversation_history + (f"← {content}",))
     
     async def _extract_protocol_from_request(self, request: str) -> Dict:
         """Extract protocol information from user request"""
@@ -591,7 +719,7 @@ class MultiAgentDeFiSystem:
         # Default fallback
         return {"name": "Aave", "symbol": "aave", "coingecko_id": "aave", "defi_protocol": "aave"}
     
-    async def _extract_investment_params(self, request: str) -> Dict:
+    async def _extract_investment_params(self, request: str, protocol_info: Optional[Dict] = None) -> Dict:
         """Extract investment amount and parameters from request"""
         import re
         
@@ -609,8 +737,9 @@ class MultiAgentDeFiSystem:
             else:
                 amount = base_amount
         
-        # Extract protocol
-        protocol_info = await self._extract_protocol_from_request(request)
+        # Extract protocol unless the caller already did
+        if protocol_info is None:
+            protocol_info = await self._extract_protocol_from_request(request)
         
         return {
             "amount": amount,
@@ -619,56 +748,126 @@ class MultiAgentDeFiSystem:
             "request": request
         }
     
+    async def _get_json(self, upstream: str, url: str, params: Optional[Dict] = None, hedged: bool = False) -> Dict:
+        """
+        Rate-limited GET against a shared upstream. A 429 pauses the upstream's
+        bucket for its Retry-After and the request is retried once, provided
+        the wait fits in max_rate_limit_wait and the caller's deadline. A hedged
+        attempt only uses spare tokens. 429s and server errors raise so the
+        upstream guard can count them; other non-200 statuses raise
+        UpstreamRequestError so the guard neither counts nor snapshots them.
+        Responses are recorded into the current trace, and served from it when replaying
+        """
+        trace = tracing.current_trace()
+        key = self._recording_key(url, params)
+        with tracing.span(f"fetch:{upstream}", "fetch", upstream=upstream, hedged=hedged):
+            for attempt in range(2):
+                if trace is not None and trace.replaying:
+                    recorded = trace.replayed(key)
+                    if "error" in recorded:
+                        raise ConnectionError(f"Replayed failure: {recorded['error']}")
+                    status, body = recorded["status"], recorded["body"]
+                else:
+                    status, body = await self._http_get(upstream, url, params, hedged, trace, key)
+                tracing.annotate(status=status, attempts=attempt + 1)
+                if status == 200:
+                    return body
+                if status == 429 and not attempt:
+                    continue
+                if status == 429 or status >= 500:
+                    raise UpstreamHTTPError(upstream, status)
+                raise UpstreamRequestError(upstream, status)
+        return {}
+    
+    async def _http_get(
+        self, upstream: str, url: str, params: Optional[Dict], hedged: bool, trace: Optional[tracing.Trace], key: str
+    ) -> Tuple[int, Optional[Dict]]:
+        """One rate-limited request: (status, parsed body for a 200)"""
+        remaining = time_remaining()
+        max_wait = 0.0 if hedged else min(self.max_rate_limit_wait, remaining if remaining is not None else float("inf"))
+        await self.rate_limiter.acquire(upstream, max_wait=max_wait)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, params=params) as response:
+                    self.rate_limiter.observe(upstream, response.status, response.headers)
+                    status = response.status
+                    raw = await response.read()
+                    body = json.loads(raw) if status == 200 else None
+        except Exception as e:
+            if trace is not None:
+                trace.record(key, {"error": repr(e)})
+            raise
+        tracing.annotate(bytes=len(raw))
+        if trace is not None:
+            trace.record(key, {"status": status, "body": body})
+        return status, body
+    
+    def _recording_key(self, url: str, params: Optional[Dict]) -> str:
+        """Request identity for recordings, independent of the configured API hosts; credentials are left out"""
+        bases = sorted((self.defillama_api, self.coingecko_api), key=len, reverse=True)
+        path = next((url[len(base):] for base in bases if url.startswith(base)), urlsplit(url).path)
+        query = sorted((name, value) for name, value in (params or {}).items() if "key" not in name.lower())
+        return f"{path}?{urlencode(query)}"
+    
     async def _fetch_protocol_data(self, protocol_info: Dict) -> Dict:
         """Fetch real-time protocol data from DeFiLlama"""
+        slug = protocol_info["defi_protocol"]
         try:
-            async with aiohttp.ClientSession() as session:
-                # Get protocol TVL data
-                async with session.get(f"{self.defillama_api}/protocol/{protocol_info['defi_protocol']}") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data
-                    else:
-                        logger.warning(f"Failed to fetch protocol data: {response.status}")
-                        return {}
+            # Get protocol TVL data
+            with tracing.span("upstream:defillama", "upstream", key=slug):
+                data, source = await self.upstream_guards["defillama"].call(
+                    slug, lambda hedged: self._get_json("defillama", f"{self.defillama_api}/protocol/{slug}", hedged=hedged)
+                )
+                tracing.annotate(source=source, cache_hit=source == "stale")
+            return data
+        except RateLimitExceeded as e:
+            logger.warning(f"Skipping protocol data: {e}")
+            return {}
         except Exception as e:
-            logger.error(f"Error fetching protocol data: {e}")
+            logger.error(f"Error fetching protocol data: {e!r}")
             return {}
     
     async def _fetch_market_data(self, protocol_info: Dict) -> Dict:
         """Fetch market data from CoinGecko"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Get price and market data
-                params = {}
-                if self.coingecko_api_key:
-                    params["x_cg_pro_api_key"] = self.coingecko_api_key
-                
-                async with session.get(
-                    f"{self.coingecko_api}/coins/{protocol_info['coingecko_id']}?localization=false&tickers=false&community_data=false&developer_data=false",
-                    params=params
-                ) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.warning(f"Failed to fetch market data: {response.status}")
-                        return {}
+            # Get price and market data
+            params = {"localization": "false", "tickers": "false", "community_data": "false", "developer_data": "false"}
+            if self.coingecko_api_key:
+                params["x_cg_pro_api_key"] = self.coingecko_api_key
+            
+            coin = protocol_info["coingecko_id"]
+            with tracing.span("upstream:coingecko", "upstream", key=coin):
+                data, source = await self.upstream_guards["coingecko"].call(
+                    coin, lambda hedged: self._get_json(self.coingecko_upstream, f"{self.coingecko_api}/coins/{coin}", params, hedged)
+                )
+                tracing.annotate(source=source, cache_hit=source == "stale")
+            return data
+        except RateLimitExceeded as e:
+            logger.warning(f"Skipping market data: {e}")
+            return {}
         except Exception as e:
-            logger.error(f"Error fetching market data: {e}")
+            logger.error(f"Error fetching market data: {e!r}")
             return {}
     
-    async def _generate_research_findings(self, protocol_info: Dict, protocol_data: Dict, market_data: Dict, request: str) -> Dict:
+    def upstream_metrics(self) -> Dict:
+        """Circuit state, latency and fallback counters per market-data upstream"""
+        return {name: guard.metrics() for name, guard in self.upstream_guards.items()}
+    
+    async def _generate_research_findings(self, protocol_info: Dict, tvl_series: List[float], market_data: Dict, request: str) -> Dict:
         """Generate dynamic research findings based on real data"""
         
         # Extract key metrics with fallbacks
-        tvl = protocol_data.get("tvl", [{"totalLiquidityUSD": 10_000_000_000}])[-1]["totalLiquidityUSD"] if protocol_data.get("tvl") else 10_000_000_000
+        tvl = tvl_series[-1] if tvl_series else 10_000_000_000
         
         price_data = market_data.get("market_data", {})
-        price_change_24h = price_data.get("price_change_percentage_24h", 0)
+        price_change_24h = price_data.get("price_change_percentage_24h") or 0
         market_cap = price_data.get("market_cap", {}).get("usd", 5_000_000_000)
         
-        # Calculate dynamic metrics
-        tvl_change = price_change_24h * 0.8  # TVL usually correlates with price but less volatile
+        # Calculate dynamic metrics (DeFiLlama TVL points are daily)
+        if len(tvl_series) >= 2 and tvl_series[-2]:
+            tvl_change = (tvl_series[-1] / tvl_series[-2] - 1) * 100
+        else:
+            tvl_change = price_change_24h * 0.8  # TVL usually correlates with price but less volatile
         health_score = min(100, max(0, 75 + (price_change_24h * 2)))  # Base 75, adjust for recent performance
         
         # Dynamic health assessment
@@ -724,10 +923,19 @@ class MultiAgentDeFiSystem:
             "size_impact": size_multiplier
         }
     
-    async def _assess_market_risks(self, investment_params: Dict) -> Dict:
+    async def _assess_market_risks(self, investment_params: Dict, market_data: Dict) -> Dict:
         """Assess current market risks"""
-        # Simulate market volatility analysis
-        market_volatility = random.uniform(0.15, 0.35)  # 15-35% volatility
+        # Annualised volatility estimated from the 24h / 7d / 30d price moves the research agent fetched
+        price_data = market_data.get("market_data", {})
+        daily_moves = [
+            abs(change) / days ** 0.5
+            for key, days in (("price_change_percentage_24h", 1), ("price_change_percentage_7d", 7), ("price_change_percentage_30d", 30))
+            if (change := price_data.get(key)) is not None
+        ]
+        if daily_moves:
+            market_volatility = min(1.0, max(0.05, sum(daily_moves) / len(daily_moves) / 100 * 365 ** 0.5))
+        else:
+            market_volatility = 0.25  # no market data: assume a typical DeFi governance-token volatility
         correlation_risk = random.uniform(0.6, 0.9)     # Market correlation
         
         return {
@@ -803,9 +1011,8 @@ class MultiAgentDeFiSystem:
         # Default
         return institutions["demo_institution"]
     
-    async def _check_protocol_compliance(self, request: str, institution_data: Dict) -> Dict:
+    async def _check_protocol_compliance(self, protocol_info: Dict, institution_data: Dict) -> Dict:
         """Check protocol compliance status"""
-        protocol_info = await self._extract_protocol_from_request(request)
         
         # Simulate compliance checking based on protocol and institution
         compliance_scores = {
@@ -972,7 +1179,8 @@ class MultiAgentDeFiSystem:
             return {
                 "decision": "APPROVED_FOR_EXECUTION",
                 "reason": f"All checks passed for {investment_params['protocol']} investment",
-                "confidence_score": confidence_threshold
+                "confidence_score": confidence_threshold,
+                "risk_level": risk_analysis.get("risk_level", "LOW")
             }
         else:
             issues = []
@@ -993,9 +1201,47 @@ class MultiAgentDeFiSystem:
     async def _execute_investment_transactions(self, investment_params: Dict, execution_decision: Dict) -> Dict:
         """Execute investment transactions on blockchain"""
         
-        # Generate dynamic transaction hashes
-        tx_hash_1 = f"0x{''.join([f'{random.randint(0,15):x}' for _ in range(64)])}"
-        tx_hash_2 = f"0x{''.join([f'{random.randint(0,15):x}' for _ in range(64)])}"
+        protocol = investment_params["protocol"]
+        amount = f"${investment_params['amount']:,.0f}"
+        protocol_address = self.execution_protocols.get(protocol.lower())
+        trace = tracing.current_trace()
+        execution_error = None
+        if self.chain_executor and self.execution_token and protocol_address and not (trace and trace.replaying):
+            try:
+                with tracing.span("chain:execute", "chain", lane="execution_agent", protocol=protocol):
+                    transactions = await self.chain_executor.execute_investment(
+                        protocol, protocol_address, self.execution_token,
+                        int(investment_params["amount"] * 10 ** self.execution_token_decimals),
+                        risk_level=execution_decision.get("risk_level", "LOW"),
+                        description=execution_decision["reason"]
+                    )
+            except (RPCError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"On-chain execution for {protocol} failed: {e!r}")
+                transactions, execution_error = [], str(e)
+            for transaction in transactions:
+                transaction["protocol"] = protocol
+            if transactions:
+                transactions[-1]["amount"] = amount
+        else:
+            # no execution backend configured (or a replay): simulated transactions
+            transactions = [
+                {
+                    "tx_hash": "0x" + os.urandom(32).hex(),
+                    "type": "Compliance Approval",
+                    "protocol": protocol,
+                    "gas_used": random.randint(120000, 180000),
+                    "status": "SUCCESS",
+                    "simulated": True
+                },
+                {
+                    "tx_hash": "0x" + os.urandom(32).hex(),
+                    "type": "Investment Execution",
+                    "protocol": protocol,
+                    "amount": amount,
+                    "status": "SUCCESS",
+                    "simulated": True
+                }
+            ]
         
         # Calculate dynamic yield based on protocol and market conditions
         protocol_yields = {
@@ -1008,50 +1254,79 @@ class MultiAgentDeFiSystem:
         
         annual_yield = investment_params["amount"] * (final_yield / 100)
         
+        decision = self._execution_outcome(transactions)
+        confirmed = [tx for tx in transactions if tx["status"] == "SUCCESS"]
+        approval = next((tx for tx in transactions if tx["type"] == "Compliance Approval"), None)
+        invested = any(tx["type"] == "Investment Execution" for tx in confirmed)
+        if approval is None or approval["status"] != "SUCCESS":
+            documentation = "Not recorded: compliance approval transaction did not confirm"
+        elif approval.get("simulated"):
+            documentation = "Simulated: no execution backend configured, nothing stored on-chain"
+        else:
+            documentation = f"Compliance rule stored on-chain in {approval['tx_hash']}"
+        
         execution_result = {
-            "decision": "APPROVED_FOR_EXECUTION",
+            "decision": decision,
             "protocol": investment_params["protocol"],
             "recommended_allocation": f"${investment_params['amount']:,.0f}",
             "execution_strategy": "Dollar-cost average over 24-48 hours" if investment_params["amount"] > 100_000_000 else "Single transaction execution",
             "smart_contracts_called": [
-                f"RegulatoryOracle.createComplianceRule({investment_params['protocol']})",
-                f"TransactionMonitor.approveProtocol({investment_params['protocol']})",
-                f"InstitutionalTreasury.executeInvestment(${investment_params['amount']:,.0f})"
+                f"RegulatoryOracle.createComplianceRule({protocol})",
+                f"InstitutionalTreasury.investInProtocol({amount})"
             ],
-            "blockchain_transactions": [
-                {
-                    "tx_hash": tx_hash_1,
-                    "type": "Compliance Approval",
-                    "protocol": investment_params["protocol"],
-                    "gas_used": random.randint(120000, 180000),
-                    "status": "SUCCESS"
-                },
-                {
-                    "tx_hash": tx_hash_2,
-                    "type": "Investment Execution",
-                    "protocol": investment_params["protocol"],
-                    "amount": f"${investment_params['amount']:,.0f}",
-                    "status": "SUCCESS"
-                }
-            ],
-            "estimated_annual_yield": f"${annual_yield:,.0f} ({final_yield:.1f}% APY)",
-            "risk_metrics_logged": True,
-            "compliance_documentation": "Auto-generated and stored on-chain",
+            "blockchain_transactions": transactions,
+            "transactions_confirmed": f"{len(confirmed)}/{len(transactions)}",
+            "estimated_annual_yield": f"${annual_yield:,.0f} ({final_yield:.1f}% APY)" if invested else "N/A",
+            "risk_metrics_logged": approval is not None and approval["status"] == "SUCCESS",
+            "compliance_documentation": documentation,
             "execution_time": f"{random.randint(75, 95)} seconds",
             "confidence": 0.96
         }
+        if execution_error:
+            execution_result["execution_error"] = execution_error
+        elif decision != "APPROVED_FOR_EXECUTION":
+            execution_result["execution_error"] = "; ".join(
+                f"{tx['type']} {tx['status']}" + (f": {tx['error']}" if tx.get("error") else "")
+                for tx in transactions if tx["status"] != "SUCCESS"
+            )
         
         # Store blockchain transactions for dashboard
         self.blockchain_transactions.extend(execution_result["blockchain_transactions"])
         
         return execution_result
     
+    @staticmethod
+    def _execution_outcome(transactions: List[Dict]) -> str:
+        """Decision as executed: every transaction confirmed, some of them, or none"""
+        confirmed = sum(tx["status"] == "SUCCESS" for tx in transactions)
+        if transactions and confirmed == len(transactions):
+            return "APPROVED_FOR_EXECUTION"
+        return "PARTIALLY_EXECUTED" if confirmed else "EXECUTION_FAILED"
+    
+    def status_version(self) -> Tuple[int, int, int]:
+        """Changes whenever get_real_time_status would return something different"""
+        return (self.state_version, len(self.collaboration_log), len(self.blockchain_transactions))
+    
     def get_real_time_status(self) -> Dict:
-        """Get current status for dashboard"""
-        return {
-            "agents": {
-                agent_id: asdict(agent) for agent_id, agent in self.agents.items()
-            },
+        """
+        Get current status for dashboard. Agents are re-serialised only when
+        their record was replaced, and an unchanged system returns the previous
+        response object as is, so callers must not mutate it
+        """
+        key = self.status_version()
+        if self._status_snapshot is not None and self._status_snapshot[0] == key:
+            return self._status_snapshot[1]
+        
+        agents = {}
+        for agent_id, agent in self.agents.items():
+            cached = self._agent_snapshots.get(agent_id)
+            if cached is None or cached[0] is not agent:
+                cached = self._agent_snapshots[agent_id] = (agent, agent.to_dict())
+            agents[agent_id] = cached[1]
+        
+        status = {
+            "version": self.state_version,
+            "agents": agents,
             "collaboration_log": [
                 {
                     "from_agent": msg.from_agent,
@@ -1062,9 +1337,11 @@ class MultiAgentDeFiSystem:
                 }
                 for msg in self.collaboration_log[-10:]  # Last 10 messages
             ],
-            "blockchain_transactions": self.blockchain_transactions,
+            "blockchain_transactions": list(self.blockchain_transactions),
             "system_status": "ACTIVE" if any(agent.status != AgentStatus.IDLE for agent in self.agents.values()) else "IDLE"
         }
+        self._status_snapshot = (key, status)
+        return status
 
 # Global instance for FastAPI integration
 multi_agent_system = MultiAgentDeFiSystem()
@@ -0,0 +1,86 @@
+"""
+Regulatory Oracle Reader
+Batched on-chain reads of AML risk scores, protocol whitelisting and jurisdiction restrictions
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from services.chain_rpc import load_rpc_urls
+from services.contract_audit import CONTRACTS_ROOT
+from services.evm_abi import decode_output, encode_call, load_abis
+from services.rpc_client import BatchedRPCClient
+
+
+class RegulatoryOracleReader:
+    """View-function reads against a deployed RegulatoryOracle; results of reverted calls are None"""
+
+    def __init__(self, client: BatchedRPCClient, address: str, abi: Optional[List[Dict]] = None,
+                 contracts_root: Path = CONTRACTS_ROOT):
+        self.client = client
+        self.address = address.lower()
+        abi = abi or load_abis(["RegulatoryOracle"], contracts_root)["RegulatoryOracle"]
+        self.functions = {entry["name"]: entry for entry in abi if entry.get("type") == "function"}
+
+    async def _read(self, name: str, args_list: List[List[Any]], block: Optional[int]) -> List[Any]:
+        if not args_list:
+            return []
+        entry = self.functions[name]
+        results = await self.client.eth_calls([(self.address, encode_call(entry, args)) for args in args_list], block)
+        return [None if result is None else decode_output(entry, result)[0] for result in results]
+
+    async def aml_risk_scores(self, accounts: List[str], block: Optional[int] = None) -> Dict[str, Optional[int]]:
+        scores = await self._read("getAMLRiskScore", [[account] for account in accounts], block)
+        return dict(zip(accounts, scores))
+
+    async def protocols_whitelisted(
+        self, institution: str, protocols: List[str], block: Optional[int] = None
+    ) -> Dict[str, Optional[bool]]:
+        flags = await self._read("isProtocolWhitelisted", [[institution, protocol] for protocol in protocols], block)
+        return dict(zip(protocols, flags))
+
+    async def jurisdictions_restricted(
+        self, jurisdictions: List[str], block: Optional[int] = None
+    ) -> Dict[str, Optional[bool]]:
+        flags = await self._read("isJurisdictionRestricted", [[code] for code in jurisdictions], block)
+        return dict(zip(jurisdictions, flags))
+
+    async def screen(
+        self,
+        accounts: List[str] = (),
+        institution: Optional[str] = None,
+        protocols: List[str] = (),
+        jurisdictions: List[str] = (),
+        block: Optional[int] = None
+    ) -> Dict:
+        """All three reads pinned to one block; they go out together in the same batch request"""
+        block = await self.client.block_number() if block is None else block
+        scores, whitelisted, restricted = await asyncio.gather(
+            self.aml_risk_scores(list(accounts), block),
+            self.protocols_whitelisted(institution, list(protocols), block) if institution else asyncio.sleep(0, {}),
+            self.jurisdictions_restricted(list(jurisdictions), block),
+        )
+        return {
+            "oracle": self.address,
+            "block_number": block,
+            "aml_risk_scores": scores,
+            "protocols_whitelisted": whitelisted,
+            "jurisdictions_restricted": restricted,
+        }
+
+
+def oracle_reader_from_deployments(contracts_root: Path = CONTRACTS_ROOT) -> Optional[RegulatoryOracleReader]:
+    """Reader for the RegulatoryOracle in the latest contracts/deployment-*.json, or None if unavailable"""
+    deployments = sorted(contracts_root.glob("deployment-*.json"))
+    if not deployments:
+        return None
+    deployment = json.loads(deployments[-1].read_text())
+    address = deployment.get("contracts", {}).get("RegulatoryOracle")
+    url = load_rpc_urls().get(deployment["chainId"])
+    if address is None or url is None:
+        return None
+    client = BatchedRPCClient(url, multicall_address=os.getenv("CHAIN_MULTICALL_ADDRESS") or None)
+    return RegulatoryOracleReader(client, address, contracts_root=contracts_root)
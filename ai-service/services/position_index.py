@@ -0,0 +1,148 @@
+"""
+Institution Position Index
+Inverted index from protocol / token / jurisdiction to institution positions for regulatory impact matching
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+SOURCE_JURISDICTIONS = {"SEC": "US", "CFTC": "US", "FCA": "UK", "MICA": "EU", "ESMA": "EU"}
+
+IMPACT_BASE_SCORES = {"HIGH": 80.0, "MEDIUM": 50.0, "LOW": 20.0}
+IMPACT_COST_RATES = {"HIGH": 0.01, "MEDIUM": 0.005, "LOW": 0.001}
+DEFAULT_TIMELINE_DAYS = 90
+
+
+def update_jurisdiction(update: Dict) -> Optional[str]:
+    """Jurisdiction an update applies to, taken from the update or inferred from its source"""
+    jurisdiction = update.get("jurisdiction")
+    if jurisdiction:
+        return jurisdiction.upper()
+    return SOURCE_JURISDICTIONS.get(str(update.get("source", "")).upper())
+
+
+def position_value(position: Dict) -> float:
+    return float(position.get("value_usd", position.get("amount_usd", position.get("amount", 0.0))) or 0.0)
+
+
+def build_impact_analysis(update: Dict, positions: List[Dict], portfolio_value: float) -> Dict:
+    """Impact of `update` on one institution given the positions it touches"""
+    impact = update.get("impact", "MEDIUM")
+    exposure = sum(position_value(p) for p in positions)
+    share = exposure / portfolio_value if portfolio_value else (1.0 if positions else 0.0)
+
+    timeline = f"{DEFAULT_TIMELINE_DAYS} days"
+    deadline = update.get("compliance_deadline")
+    if deadline:
+        try:
+            days = (datetime.fromisoformat(deadline) - datetime.utcnow()).days
+            timeline = f"{max(days, 0)} days"
+        except ValueError:
+            pass
+
+    actions = []
+    if positions:
+        protocols = sorted({p.get("protocol", "") for p in positions if p.get("protocol")})
+        tokens = sorted({p.get("token", "") for p in positions if p.get("token")})
+        if protocols:
+            actions.append(f"Review positions in {', '.join(protocols)}")
+        if tokens:
+            actions.append(f"Assess {', '.join(tokens)} holdings against updated requirements")
+        if impact == "HIGH":
+            actions.append("Escalate to compliance committee")
+        actions.append("Consult legal team for compliance strategy")
+
+    return {
+        "impact_score": round(IMPACT_BASE_SCORES.get(impact, 50.0) * (0.5 + 0.5 * min(share, 1.0)), 1) if positions else 0.0,
+        "affected_positions": positions,
+        "exposure_usd": round(exposure, 2),
+        "portfolio_share": round(share, 4),
+        "estimated_cost": round(exposure * IMPACT_COST_RATES.get(impact, 0.005), 2),
+        "compliance_timeline": timeline,
+        "recommended_actions": actions,
+    }
+
+
+class InstitutionPositionIndex:
+    """
+    Posting lists from protocol, token and jurisdiction to positions / institutions.
+    Matching an update is a union over its protocol and token postings intersected
+    with the institutions active in the update's jurisdiction.
+    """
+
+    def __init__(self):
+        self.positions: Dict[int, Dict] = {}
+        self.position_owner: Dict[int, str] = {}
+        self.institution_positions: Dict[str, Set[int]] = {}
+        self.institution_values: Dict[str, float] = {}
+        self.institution_jurisdictions: Dict[str, Set[str]] = {}
+        self.by_protocol: Dict[str, Set[int]] = {}
+        self.by_token: Dict[str, Set[int]] = {}
+        self.by_jurisdiction: Dict[str, Set[str]] = {}
+        self.unscoped_institutions: Set[str] = set()
+        self._next_id = 0
+
+    def register_portfolio(self, institution_id: str, positions: List[Dict], jurisdictions: Iterable[str] = ()):
+        """Replace an institution's positions and jurisdictions"""
+        self.remove_institution(institution_id)
+
+        ids = set()
+        for position in positions:
+            position_id = self._next_id
+            self._next_id += 1
+            self.positions[position_id] = position
+            self.position_owner[position_id] = institution_id
+            ids.add(position_id)
+            if position.get("protocol"):
+                self.by_protocol.setdefault(position["protocol"].lower(), set()).add(position_id)
+            if position.get("token"):
+                self.by_token.setdefault(position["token"].upper(), set()).add(position_id)
+
+        self.institution_positions[institution_id] = ids
+        self.institution_values[institution_id] = sum(position_value(p) for p in positions)
+        self.institution_jurisdictions[institution_id] = {j.upper() for j in jurisdictions}
+        for jurisdiction in self.institution_jurisdictions[institution_id]:
+            self.by_jurisdiction.setdefault(jurisdiction, set()).add(institution_id)
+        if not self.institution_jurisdictions[institution_id]:
+            self.unscoped_institutions.add(institution_id)
+
+    def remove_institution(self, institution_id: str):
+        for position_id in self.institution_positions.pop(institution_id, set()):
+            position = self.positions.pop(position_id)
+            self.position_owner.pop(position_id, None)
+            if position.get("protocol"):
+                self.by_protocol.get(position["protocol"].lower(), set()).discard(position_id)
+            if position.get("token"):
+                self.by_token.get(position["token"].upper(), set()).discard(position_id)
+        for jurisdiction in self.institution_jurisdictions.pop(institution_id, set()):
+            self.by_jurisdiction.get(jurisdiction, set()).discard(institution_id)
+        self.unscoped_institutions.discard(institution_id)
+        self.institution_values.pop(institution_id, None)
+
+    def match(self, update: Dict) -> Dict[str, List[Dict]]:
+        """Affected positions grouped by institution"""
+        matched: Set[int] = set()
+        for protocol in update.get("affected_protocols") or []:
+            matched |= self.by_protocol.get(protocol.lower(), set())
+        for token in update.get("affected_tokens") or []:
+            matched |= self.by_token.get(token.upper(), set())
+
+        jurisdiction = update_jurisdiction(update)
+        # Institutions that registered no jurisdictions are treated as in scope everywhere
+        allowed = None
+        if jurisdiction is not None:
+            allowed = self.by_jurisdiction.get(jurisdiction, set()) | self.unscoped_institutions
+
+        grouped: Dict[str, List[Dict]] = {}
+        for position_id in matched:
+            owner = self.position_owner[position_id]
+            if allowed is None or owner in allowed:
+                grouped.setdefault(owner, []).append(self.positions[position_id])
+        return grouped
+
+    def analyze(self, update: Dict) -> Dict[str, Dict]:
+        """Impact analyses for every affected institution in one pass"""
+        return {
+            institution_id: build_impact_analysis(update, positions, self.institution_values.get(institution_id, 0.0))
+            for institution_id, positions in self.match(update).items()
+        }
@@ -3,13 +3,58 @@ Protocol Auditor Service
 AI-powered DeFi protocol security and compliance auditing
 """
 
-from typing import Dict, List
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from services.audit_store import AuditStore
+from services.chain_rpc import get_code
+from services.contract_audit import CONTRACTS_ROOT, AuditTarget, ContractAuditPipeline, discover_artifacts
+from services.protocol_whitelist import ProtocolWhitelist, WhitelistSnapshot
+
+logger = logging.getLogger(__name__)
 
 class ProtocolAuditor:
-    def __init__(self):
+    def __init__(
+        self,
+        contracts_root: Path = CONTRACTS_ROOT,
+        max_workers: Optional[int] = None,
+        audit_store: Optional[AuditStore] = None
+    ):
         self.audit_database = {}
-        self.approved_protocols = set()
+        self.approved_protocols = ProtocolWhitelist()
         self.security_models = {}
+        self.contracts_root = contracts_root
+        self.audit_store = audit_store or AuditStore()
+        self.audit_pipeline = ContractAuditPipeline(max_workers, self.audit_store)
+        self.known_contracts: Dict[Tuple[int, str], AuditTarget] = {}
+        self._load_deployments()
+    
+    def _load_deployments(self):
+        """Map the repo's deployed contract addresses to their compiled artifacts"""
+        targets = {target.name: target for target in discover_artifacts(self.contracts_root)} if self.contracts_root.exists() else {}
+        for path in sorted(self.contracts_root.glob("deployment-*.json")):
+            try:
+                deployment = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping deployment file {path.name}: {e}")
+                continue
+            for name, address in deployment.get("contracts", {}).items():
+                if name in targets:
+                    self.register_contract(address, deployment["chainId"], targets[name])
+    
+    def register_contract(self, contract_address: str, chain_id: int, target: AuditTarget):
+        """Make source / bytecode for a deployed address available to audit_smart_contract"""
+        self.known_contracts[(chain_id, contract_address.lower())] = target
+    
+    async def audit_contracts(self, targets: Optional[List[AuditTarget]] = None) -> List[Dict]:
+        """
+        Batch audit in the worker pool; defaults to the repo's own contracts
+        """
+        if targets is None:
+            targets = discover_artifacts(self.contracts_root)
+        return await self.audit_pipeline.audit_many(targets)
     
     async def analyze_protocol(
         self,
@@ -21,8 +66,23 @@ class ProtocolAuditor:
         Comprehensive protocol analysis
         TODO: Implement full protocol auditing pipeline
         """
+        if (chain_id, protocol_address.lower()) in self.known_contracts:
+            audit = await self.audit_smart_contract(protocol_address, chain_id)
+            return {
+                "protocol_address": protocol_address,
+                "risk_score": round(100.0 - audit["security_score"], 1),
+                "compliance_score": 85.0,
+                "audit_status": "AUDITED",
+                "vulnerabilities": [
+                    {key: finding[key] for key in ("severity", "type", "description", "remediation")}
+                    for finding in audit["vulnerabilities"]
+                ],
+                "regulatory_concerns": [],
+                "recommendations": sorted({finding["remediation"] for finding in audit["vulnerabilities"]}),
+                "approved_for_institutional_use": audit["approved_for_institutional_use"]
+            }
+        
         # TODO: Implement protocol analysis
-        # - Smart contract security scan
         # - Code quality assessment
         # - Governance token analysis
         # - Team background check
@@ -55,44 +115,45 @@ class ProtocolAuditor:
     async def get_approved_protocols(self) -> List[Dict]:
         """
         Get list of institutionally approved protocols
-        TODO: Implement protocol approval database
         """
-        # TODO: Return approved protocols with metadata
-        return [
-            {
-                "name": "Aave",
-                "address": "0x...",
-                "chain_id": 1,
-                "risk_score": 25.0,
-                "last_audit": "2024-01-15",
-                "approval_status": "APPROVED"
-            },
-            {
-                "name": "Compound",
-                "address": "0x...",
-                "chain_id": 1,
-                "risk_score": 30.0,
-                "last_audit": "2024-02-01",
-                "approval_status": "APPROVED"
-            }
-        ]
+        return [dict(protocol) for protocol in self.approved_protocols.snapshot.protocols]
+    
+    def get_whitelist_snapshot(self) -> WhitelistSnapshot:
+        """Current approved-protocol snapshot with its pre-serialised body and ETag"""
+        return self.approved_protocols.snapshot
+    
+    async def approve_protocol(self, protocol: Dict) -> WhitelistSnapshot:
+        return self.approved_protocols.approve(protocol)
+    
+    async def revoke_protocol(self, chain_id: int, protocol_address: str) -> WhitelistSnapshot:
+        return self.approved_protocols.revoke(chain_id, protocol_address)
     
     async def audit_smart_contract(self, contract_address: str, chain_id: int) -> Dict:
         """
         Automated smart contract security audit
-        TODO: Implement automated security scanning
+        Static analysis of the contract's source (or runtime bytecode) via the audit pipeline
         """
-        # TODO: Implement security analysis
-        # - Static analysis for common vulnerabilities
-        # - Formal verification where possible
-        # - Gas optimization analysis
-        # - Access control verification
+        # TODO: Formal verification
+        audit = None
+        deployment = self.audit_store.resolve(chain_id, contract_address)
+        if deployment is not None:
+            audit = self.audit_pipeline.cached(deployment["code_hash"])
+        
+        if audit is None:
+            target = self.known_contracts.get((chain_id, contract_address.lower()))
+            if target is None:
+                bytecode = await get_code(chain_id, contract_address)
+                if bytecode in ("0x", ""):
+                    raise ValueError(f"No contract deployed at {contract_address} on chain {chain_id}")
+                target = AuditTarget(name=contract_address, bytecode=bytecode)
+            # identical bytecode audited for any other deployment is reused here
+            audit = await self.audit_pipeline.audit(target)
+            self.audit_store.link(chain_id, contract_address, audit["code_hash"], {"contract": target.name})
         
         return {
-            "security_score": 85.0,
-            "vulnerabilities_found": 2,
-            "gas_efficiency": 78.0,
-            "access_controls": "SECURE"
+            **audit,
+            "contract_address": contract_address,
+            "chain_id": chain_id,
         }
     
     async def check_protocol_compliance(self, protocol_address: str) -> Dict:
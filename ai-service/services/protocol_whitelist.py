@@ -0,0 +1,92 @@
+"""
+Protocol Whitelist
+Versioned, pre-serialised snapshots of the institutionally approved protocol set
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from services.fast_json import dumps
+
+DEFAULT_APPROVED_PROTOCOLS = [
+    {
+        "name": "Aave",
+        "address": "0x7d2768dE32b0b80b7a3454c06BdAc94A69DDc7A9",
+        "chain_id": 1,
+        "risk_score": 25.0,
+        "last_audit": "2024-01-15",
+        "approval_status": "APPROVED"
+    },
+    {
+        "name": "Compound",
+        "address": "0x3d9819210A31b4961b30EF54bE2aeD79B9c9Cd3B",
+        "chain_id": 1,
+        "risk_score": 30.0,
+        "last_audit": "2024-02-01",
+        "approval_status": "APPROVED"
+    }
+]
+
+
+@dataclass(frozen=True)
+class WhitelistSnapshot:
+    version: int
+    protocols: Tuple[Mapping, ...]
+    body: bytes
+    etag: str
+    built_at: datetime = field(default_factory=datetime.utcnow)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an If-None-Match header already names this snapshot"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+class ProtocolWhitelist:
+    """
+    Approvals are edited through approve / revoke; each effective change builds a
+    new immutable snapshot (body bytes and ETag included). Readers only ever take
+    the current snapshot, so serving the whitelist does no serialisation.
+    """
+
+    def __init__(self, protocols: Optional[List[Dict]] = None):
+        self._entries: Dict[Tuple[int, str], Dict] = {}
+        for protocol in DEFAULT_APPROVED_PROTOCOLS if protocols is None else protocols:
+            self._entries[self._key(protocol["chain_id"], protocol["address"])] = dict(protocol)
+        self.snapshot = self._build(1)
+
+    @staticmethod
+    def _key(chain_id: int, address: str) -> Tuple[int, str]:
+        return int(chain_id), address.lower()
+
+    def _build(self, version: int) -> WhitelistSnapshot:
+        protocols = [self._entries[key] for key in sorted(self._entries)]
+        body = dumps({"approved_protocols": protocols, "version": version})
+        return WhitelistSnapshot(
+            version=version,
+            protocols=tuple(MappingProxyType(dict(protocol)) for protocol in protocols),
+            body=body,
+            etag=f'"{version}-{hashlib.sha256(body).hexdigest()[:16]}"',
+        )
+
+    def __contains__(self, key: Tuple[int, str]) -> bool:
+        return self._key(*key) in self._entries
+
+    def approve(self, protocol: Dict) -> WhitelistSnapshot:
+        """Add or update an approval; the snapshot is only rebuilt if something changed"""
+        key = self._key(protocol["chain_id"], protocol["address"])
+        entry = {"approval_status": "APPROVED", **protocol, "chain_id": key[0]}
+        if self._entries.get(key) != entry:
+            self._entries[key] = entry
+            self.snapshot = self._build(self.snapshot.version + 1)
+        return self.snapshot
+
+    def revoke(self, chain_id: int, address: str) -> WhitelistSnapshot:
+        if self._entries.pop(self._key(chain_id, address), None) is not None:
+            self.snapshot = self._build(self.snapshot.version + 1)
+        return self.snapshot
@@ -0,0 +1,201 @@
+"""
+Upstream Rate Limiter
+Per-upstream token buckets shared by every external API fetcher, with 429 / Retry-After back-off
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# requests per second and burst size; conservative defaults for the public tiers
+DEFAULT_RATE_LIMITS = {
+    "coingecko": {"rate": 0.5, "burst": 5},       # free tier: ~30 calls/minute
+    "coingecko_pro": {"rate": 8.0, "burst": 20},  # with COINGECKO_API_KEY: 500 calls/minute
+    "defillama": {"rate": 5.0, "burst": 10},
+    "github": {"rate": 1.3, "burst": 20},         # authenticated: 5000 calls/hour
+}
+
+
+class RateLimitExceeded(Exception):
+    """Waiting for a token would take longer than the caller allows"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Rate limit for {upstream} exceeded; retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+@dataclass
+class RateLimitConfig:
+    rate: float
+    burst: int
+
+
+def load_rate_limits() -> Dict[str, RateLimitConfig]:
+    """Limits per upstream; UPSTREAM_RATE_LIMITS (JSON object) overrides the defaults"""
+    configured = os.getenv("UPSTREAM_RATE_LIMITS")
+    limits = dict(DEFAULT_RATE_LIMITS)
+    if configured:
+        limits.update(json.loads(configured))
+    return {name: RateLimitConfig(float(limit["rate"]), int(limit["burst"])) for name, limit in limits.items()}
+
+
+def parse_retry_after(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds to back off from Retry-After (delta seconds or HTTP date) or, when
+    the quota is exhausted, from X-RateLimit-Reset / X-RateLimit-Reset-After
+    """
+    now = time.time() if now is None else now
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+    if headers.get("X-RateLimit-Remaining") == "0":
+        if headers.get("X-RateLimit-Reset-After"):
+            return max(0.0, float(headers["X-RateLimit-Reset-After"]))
+        if headers.get("X-RateLimit-Reset"):
+            return max(0.0, float(headers["X-RateLimit-Reset"]) - now)
+    return None
+
+
+class TokenBucket:
+    """
+    Refills at `rate` tokens per second up to `burst`. acquire() reserves a
+    token and sleeps until it is due, so waiters are served in arrival order
+    and a burst of callers is spread out at exactly the configured rate
+    instead of retrying in lock-step. A 429 from the upstream pauses the
+    bucket until its Retry-After has passed.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        # refill clock; set into the future while paused, so no tokens accrue until then
+        self._updated = time.monotonic()
+        # total seconds waiters have been pushed back by pauses
+        self._shift = 0.0
+        self.stats = {"granted": 0, "delayed": 0, "rejected": 0, "throttled": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _delay(self, now: float, tokens: float) -> float:
+        """Seconds until `tokens` are available, given tokens already reserved by earlier waiters"""
+        self._refill(now)
+        return max(0.0, self._updated - now) + max(0.0, tokens - self._tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        """Wait for `tokens`; returns the seconds waited. Raises RateLimitExceeded past `max_wait`"""
+        started = time.monotonic()
+        delay = self._delay(started, tokens)
+        if max_wait is not None and delay > max_wait:
+            self.stats["rejected"] += 1
+            raise RateLimitExceeded(self.name, delay)
+        self._tokens -= tokens  # may go negative: the deficit is owed by later callers
+        due, shift = started + delay, self._shift
+        try:
+            while True:
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                elif self._shift == shift:
+                    break
+                # a 429 observed while we slept pushes our turn back, keeping the spacing
+                due, shift = due + self._shift - shift, self._shift
+        except asyncio.CancelledError:
+            self._tokens += tokens
+            raise
+        waited = time.monotonic() - started
+        self.stats["granted"] += 1
+        if waited >= 0.001:
+            self.stats["delayed"] += 1
+            self.stats["total_wait"] += waited
+            self.stats["max_wait"] = max(self.stats["max_wait"], waited)
+        return waited
+
+    def pause(self, seconds: float):
+        """Stop granting tokens for `seconds` (the upstream told us to back off)"""
+        now = time.monotonic()
+        self._refill(now)
+        until = now + seconds
+        if until > self._updated:
+            self._shift += until - max(self._updated, now)
+            self._updated = until
+        # resume gently rather than releasing a full burst into a limiter that just tripped
+        self._tokens = min(self._tokens, 1.0)
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Feed back an upstream response; returns the back-off applied, if any"""
+        retry_after = parse_retry_after(headers)
+        if status == 429 or (status == 403 and retry_after is not None):
+            self.stats["throttled"] += 1
+            backoff = retry_after if retry_after is not None else max(1.0, 1.0 / self.rate)
+            logger.warning(f"Upstream {self.name} throttled us ({status}); backing off {backoff:.1f}s")
+            self.pause(backoff)
+            return backoff
+        if retry_after is not None:
+            # quota exhausted but this request still succeeded
+            self.pause(retry_after)
+            return retry_after
+        return None
+
+    def metrics(self) -> Dict:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens_available": round(self._tokens, 2),
+            "paused_for_seconds": round(max(0.0, self._updated - now), 1),
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.stats.items()},
+        }
+
+
+class UpstreamRateLimiter:
+    """One TokenBucket per upstream API, created on first use from the configured limits"""
+
+    def __init__(self, limits: Optional[Dict[str, RateLimitConfig]] = None, default: RateLimitConfig = RateLimitConfig(1.0, 5)):
+        self.limits = load_rate_limits() if limits is None else limits
+        self.default = default
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, upstream: str) -> TokenBucket:
+        bucket = self.buckets.get(upstream)
+        if bucket is None:
+            config = self.limits.get(upstream, self.default)
+            bucket = self.buckets[upstream] = TokenBucket(upstream, config.rate, config.burst)
+        return bucket
+
+    async def acquire(self, upstream: str, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        return await self.bucket(upstream).acquire(tokens, max_wait)
+
+    def observe(self, upstream: str, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        return self.bucket(upstream).observe(status, headers)
+
+    def observe_quota(self, upstream: str, remaining: int, reset_at: float):
+        """For SDK clients that expose the quota rather than raw headers (PyGithub)"""
+        if remaining <= 0:
+            self.bucket(upstream).pause(max(0.0, reset_at - datetime.now(timezone.utc).timestamp()))
+
+    def metrics(self) -> Dict[str, Dict]:
+        return {name: bucket.metrics() for name, bucket in self.buckets.items()}
+
+
+rate_limiter = UpstreamRateLimiter()
@@ -0,0 +1,163 @@
+"""
+Regulatory Calendar
+Per-jurisdiction deadline index with lazily expanded recurring obligations
+"""
+
+import bisect
+import calendar
+import heapq
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from services.position_index import SOURCE_JURISDICTIONS, update_jurisdiction
+
+ALL_JURISDICTIONS = "ALL"
+FREQUENCY_MONTHS = {"monthly": 1, "quarterly": 3, "semiannual": 6, "annual": 12}
+FREQUENCY_DAYS = {"daily": 1, "weekly": 7}
+TIMEFRAME_PATTERN = re.compile(r"^\s*(\d+)\s*(d|day|days|w|week|weeks|m|month|months|y|year|years)\s*$")
+
+DEFAULT_OBLIGATIONS = [
+    {"requirement": "Quarterly AML Report", "jurisdiction": "US", "frequency": "quarterly", "anchor": "2024-03-31", "priority": "HIGH"},
+    {"requirement": "FinCEN SAR Review", "jurisdiction": "US", "frequency": "monthly", "anchor": "2024-01-15", "priority": "MEDIUM"},
+    {"requirement": "Form ADV Annual Amendment", "jurisdiction": "US", "frequency": "annual", "anchor": "2024-03-31", "priority": "HIGH"},
+    {"requirement": "FCA Financial Crime Return (REP-CRIM)", "jurisdiction": "UK", "frequency": "annual", "anchor": "2024-04-30", "priority": "HIGH"},
+    {"requirement": "Quarterly AML Report", "jurisdiction": "UK", "frequency": "quarterly", "anchor": "2024-03-31", "priority": "HIGH"},
+    {"requirement": "MiCA Reserve Asset Attestation", "jurisdiction": "EU", "frequency": "semiannual", "anchor": "2024-06-30", "priority": "HIGH"},
+    {"requirement": "Quarterly AML Report", "jurisdiction": "EU", "frequency": "quarterly", "anchor": "2024-03-31", "priority": "HIGH"},
+]
+
+
+def parse_timeframe(timeframe: str) -> timedelta:
+    """'30d', '12weeks', '6months', '1y' -> timedelta (months are 30 days, years 365)"""
+    match = TIMEFRAME_PATTERN.match(timeframe.lower())
+    if not match:
+        raise ValueError(f"Unrecognised timeframe '{timeframe}'")
+    count, unit = int(match.group(1)), match.group(2)[0]
+    return timedelta(days=count * {"d": 1, "w": 7, "m": 30, "y": 365}[unit])
+
+
+def _add_months(anchor: date, months: int) -> date:
+    month_index = anchor.month - 1 + months
+    year, month = anchor.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+@dataclass
+class RecurringObligation:
+    requirement: str
+    jurisdiction: str
+    frequency: str
+    anchor: date
+    priority: str = "MEDIUM"
+
+    def occurrences(self, start: date, end: date) -> Iterator[Dict]:
+        """Occurrences within [start, end], computed arithmetically from the anchor"""
+        if self.frequency in FREQUENCY_DAYS:
+            step = FREQUENCY_DAYS[self.frequency]
+            n = max(0, -(-(start - self.anchor).days // step))
+            current = self.anchor + timedelta(days=n * step)
+            while current <= end:
+                yield self._entry(current)
+                current += timedelta(days=step)
+            return
+
+        step = FREQUENCY_MONTHS[self.frequency]
+        months = (start.year - self.anchor.year) * 12 + start.month - self.anchor.month
+        n = max(0, months // step)
+        current = _add_months(self.anchor, n * step)
+        while current < start:
+            n += 1
+            current = _add_months(self.anchor, n * step)
+        while current <= end:
+            yield self._entry(current)
+            n += 1
+            current = _add_months(self.anchor, n * step)
+
+    def _entry(self, when: date) -> Dict:
+        return {
+            "date": when.isoformat(),
+            "requirement": self.requirement,
+            "jurisdiction": self.jurisdiction,
+            "priority": self.priority,
+            "type": "recurring",
+            "frequency": self.frequency,
+        }
+
+
+class RegulatoryCalendar:
+    """
+    One-off deadlines are kept in date-sorted parallel arrays per jurisdiction, so
+    a window query is two binary searches plus a slice. Recurring obligations are
+    stored as rules and only expanded for the window being asked for.
+    """
+
+    def __init__(self, obligations: Optional[List[Dict]] = None):
+        self._dates: Dict[str, List[int]] = {}
+        self._entries: Dict[str, List[Dict]] = {}
+        self._seen = set()
+        self.recurring: Dict[str, List[RecurringObligation]] = {}
+        for obligation in DEFAULT_OBLIGATIONS if obligations is None else obligations:
+            self.add_recurring(**obligation)
+
+    def add_recurring(self, requirement: str, jurisdiction: str, frequency: str, anchor: str, priority: str = "MEDIUM"):
+        if frequency not in FREQUENCY_MONTHS and frequency not in FREQUENCY_DAYS:
+            raise ValueError(f"Unknown obligation frequency '{frequency}'")
+        self.recurring.setdefault(jurisdiction.upper(), []).append(
+            RecurringObligation(requirement, jurisdiction.upper(), frequency, date.fromisoformat(anchor), priority)
+        )
+
+    def add_deadline(self, jurisdiction: str, when: date, entry: Dict) -> bool:
+        """Insert a one-off deadline; returns False if it is already on the calendar"""
+        jurisdiction = jurisdiction.upper()
+        key = (jurisdiction, when, entry["requirement"])
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        dates = self._dates.setdefault(jurisdiction, [])
+        position = bisect.bisect_right(dates, when.toordinal())
+        dates.insert(position, when.toordinal())
+        self._entries.setdefault(jurisdiction, []).insert(position, {
+            **entry, "date": when.isoformat(), "jurisdiction": jurisdiction, "type": "deadline",
+        })
+        return True
+
+    def add_update(self, update: Dict) -> bool:
+        """Index a regulatory update's compliance_deadline, if it has one"""
+        deadline = update.get("compliance_deadline")
+        jurisdiction = update_jurisdiction(update)
+        if not deadline or not jurisdiction:
+            return False
+        try:
+            when = date.fromisoformat(deadline[:10])
+        except ValueError:
+            return False
+        return self.add_deadline(jurisdiction, when, {
+            "requirement": update.get("title", "Regulatory deadline"),
+            "priority": update.get("impact", "MEDIUM"),
+            "source": update.get("source"),
+            "url": update.get("url"),
+            "affected_protocols": update.get("affected_protocols") or [],
+            "affected_tokens": update.get("affected_tokens") or [],
+        })
+
+    def window(self, jurisdiction: str, start: date, end: date) -> List[Dict]:
+        """All deadlines and recurring occurrences in [start, end], in date order"""
+        jurisdiction = jurisdiction.upper()
+        jurisdiction = SOURCE_JURISDICTIONS.get(jurisdiction, jurisdiction)
+        if jurisdiction == ALL_JURISDICTIONS:
+            jurisdictions = set(self._dates) | set(self.recurring)
+        else:
+            jurisdictions = {jurisdiction}
+
+        streams = []
+        for code in sorted(jurisdictions):
+            dates = self._dates.get(code)
+            if dates:
+                lo = bisect.bisect_left(dates, start.toordinal())
+                hi = bisect.bisect_right(dates, end.toordinal())
+                streams.append(iter(self._entries[code][lo:hi]))
+            for obligation in self.recurring.get(code, ()):
+                streams.append(obligation.occurrences(start, end))
+        return list(heapq.merge(*streams, key=lambda entry: entry["date"]))
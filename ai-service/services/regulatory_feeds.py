@@ -0,0 +1,368 @@
+"""
+Regulatory Feed Poller
+Concurrent conditional polling of regulator RSS/Atom/HTML feeds into an in-memory update index
+"""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEEDS = [
+    {"name": "SEC", "url": "https://www.sec.gov/news/pressreleases.rss", "format": "rss", "jurisdiction": "US"},
+    {"name": "CFTC", "url": "https://www.cftc.gov/RSS/RSSGP/rssgp.xml", "format": "rss", "jurisdiction": "US"},
+    {"name": "FCA", "url": "https://www.fca.org.uk/news/rss.xml", "format": "rss", "jurisdiction": "UK"},
+    {"name": "MiCA", "url": "https://www.esma.europa.eu/rss.xml", "format": "rss", "jurisdiction": "EU"},
+]
+
+KNOWN_PROTOCOLS = ("aave", "compound", "uniswap", "makerdao", "curve", "lido", "tornado cash")
+KNOWN_TOKENS = ("USDC", "USDT", "DAI", "ETH", "BTC", "EURC")
+HIGH_IMPACT_TERMS = ("enforcement", "charges", "sanction", "ban", "prohibit", "cease", "fraud")
+MEDIUM_IMPACT_TERMS = ("guidance", "consultation", "proposal", "requirement", "rule", "framework")
+DEADLINE_PATTERN = re.compile(
+    r"(?:by|before|deadline|effective|from|until)\s+(\d{4}-\d{2}-\d{2}|\d{1,2}\s+[A-Z][a-z]+\s+\d{4}|[A-Z][a-z]+\s+\d{1,2},\s+\d{4})"
+)
+
+
+@dataclass
+class FeedSource:
+    name: str
+    url: str
+    format: str = "rss"
+    jurisdiction: str = ""
+    poll_interval: float = 300.0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_polled: Optional[datetime] = None
+    last_status: Optional[int] = None
+    consecutive_failures: int = 0
+    items_seen: int = 0
+    next_poll_at: float = 0.0  # time.monotonic() when the source is due again
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if not value:
+        return None
+    for parser in (parsedate_to_datetime, datetime.fromisoformat):
+        try:
+            return parser(value.replace("Z", "+00:00"))
+        except (TypeError, ValueError, IndexError):
+            continue
+    for fmt in ("%d %B %Y", "%B %d, %Y"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+class FeedItemParser:
+    """
+    Incremental RSS/Atom parser: feed it byte chunks as they arrive and collect
+    completed <item>/<entry> elements without buffering the whole document.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("end",))
+
+    def feed(self, chunk: bytes) -> Iterator[Dict]:
+        try:
+            self._parser.feed(chunk)
+        except ParseError:
+            # hand out the items completed before the error, then report it
+            yield from self._drain()
+            raise
+        yield from self._drain()
+
+    def close(self) -> Iterator[Dict]:
+        try:
+            self._parser.close()
+        except ParseError:
+            pass
+        yield from self._drain()
+
+    def _drain(self) -> Iterator[Dict]:
+        for _, element in self._parser.read_events():
+            if _local_name(element.tag) not in ("item", "entry"):
+                continue
+            item = {"title": "", "summary": "", "url": "", "published": ""}
+            for child in element:
+                name = _local_name(child.tag)
+                text = (child.text or "").strip()
+                if name == "title":
+                    item["title"] = text
+                elif name in ("description", "summary", "content") and not item["summary"]:
+                    item["summary"] = re.sub(r"<[^>]+>", "", text)
+                elif name == "link":
+                    item["url"] = child.get("href") or text
+                elif name in ("pubdate", "published", "updated", "date") and not item["published"]:
+                    item["published"] = text
+            element.clear()
+            yield item
+
+
+class HTMLLinkParser(HTMLParser):
+    """Incremental parser for HTML listing pages: every link with text becomes an item"""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+        self._items: List[Dict] = []
+
+    def feed_chunk(self, chunk: bytes) -> Iterator[Dict]:
+        self.feed(chunk.decode("utf-8", errors="replace"))
+        items, self._items = self._items, []
+        yield from items
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            title = " ".join("".join(self._text).split())
+            if len(title) > 20:
+                self._items.append({
+                    "title": title,
+                    "summary": "",
+                    "url": urljoin(self.base_url, self._href),
+                    "published": "",
+                })
+            self._href = None
+
+
+class RegulatoryUpdateIndex:
+    """In-memory store of regulatory updates, de-duplicated by content hash and kept in date order"""
+
+    def __init__(self, max_items: int = 5000):
+        self.max_items = max_items
+        self.by_hash: Dict[str, Dict] = {}
+        self.ordered: List[Dict] = []  # oldest first
+        self.version = 0
+
+    @staticmethod
+    def content_hash(update: Dict) -> str:
+        normalized = "\x1f".join(
+            " ".join(str(update.get(key, "")).lower().split()) for key in ("title", "summary", "url")
+        )
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def add(self, update: Dict) -> bool:
+        """Insert an update; returns False if identical content is already indexed"""
+        digest = self.content_hash(update)
+        if digest in self.by_hash:
+            return False
+        update = {**update, "content_hash": digest}
+        self.by_hash[digest] = update
+        bisect.insort(self.ordered, update, key=lambda u: u.get("date", ""))
+        if len(self.ordered) > self.max_items:
+            dropped = self.ordered.pop(0)
+            self.by_hash.pop(dropped["content_hash"], None)
+        self.version += 1
+        return True
+
+    def latest(self, limit: int = 50, source: Optional[str] = None) -> List[Dict]:
+        """Newest updates first, optionally restricted to one source"""
+        if source is None:
+            return self.ordered[-limit:][::-1] if limit else []
+        matches = []
+        for update in reversed(self.ordered):
+            if len(matches) >= limit:
+                break
+            if update["source"].lower() == source.lower():
+                matches.append(update)
+        return matches
+
+
+def enrich_update(source: FeedSource, item: Dict) -> Dict:
+    """Turn a raw feed item into the update shape served by /regulatory/updates"""
+    text = f"{item['title']} {item['summary']}"
+    lowered = text.lower()
+
+    if any(term in lowered for term in HIGH_IMPACT_TERMS):
+        impact = "HIGH"
+    elif any(term in lowered for term in MEDIUM_IMPACT_TERMS):
+        impact = "MEDIUM"
+    else:
+        impact = "LOW"
+
+    published = _parse_date(item["published"]) if item["published"] else None
+    deadline_match = DEADLINE_PATTERN.search(text)
+    deadline = _parse_date(deadline_match.group(1)) if deadline_match else None
+
+    return {
+        "source": source.name,
+        "jurisdiction": source.jurisdiction,
+        "title": item["title"],
+        "date": (published or datetime.utcnow()).strftime("%Y-%m-%d"),
+        "impact": impact,
+        "summary": item["summary"][:500],
+        "url": item["url"],
+        "affected_protocols": [p for p in KNOWN_PROTOCOLS if p in lowered],
+        "affected_tokens": [t for t in KNOWN_TOKENS if re.search(rf"\b{t}\b", text)],
+        "compliance_deadline": deadline.strftime("%Y-%m-%d") if deadline else None,
+    }
+
+
+def load_feed_sources() -> List[FeedSource]:
+    """Feed configuration from REGULATORY_FEEDS (JSON list) or the built-in regulator feeds"""
+    configured = os.getenv("REGULATORY_FEEDS")
+    feeds = json.loads(configured) if configured else DEFAULT_FEEDS
+    return [FeedSource(**feed) for feed in feeds]
+
+
+class RegulatoryFeedPoller:
+    """
+    Polls every configured feed concurrently with conditional GETs (ETag /
+    If-Modified-Since), parses responses as they stream in and adds new,
+    de-duplicated updates to the index. Request handlers only read the index.
+    In the background each source is polled on its own `poll_interval`.
+    """
+
+    def __init__(self, sources: List[FeedSource], index: RegulatoryUpdateIndex, timeout: float = 15.0):
+        self.sources = {source.name: source for source in sources}
+        self.index = index
+        self.timeout = timeout
+        self.listeners: List = []
+        self._task: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def add_listener(self, callback):
+        """Register an async callback invoked with each newly indexed update"""
+        self.listeners.append(callback)
+
+    async def poll_once(self, sources: Optional[List[FeedSource]] = None) -> int:
+        """Poll `sources` (default: all) once; returns the number of new updates indexed"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        counts = await asyncio.gather(
+            *(self._poll_source(source) for source in (self.sources.values() if sources is None else sources)),
+            return_exceptions=True
+        )
+        return sum(count for count in counts if isinstance(count, int))
+
+    async def _poll_source(self, source: FeedSource) -> int:
+        headers = {"User-Agent": "DeFi-Compliance-Monitor/2.0"}
+        if source.etag:
+            headers["If-None-Match"] = source.etag
+        if source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+
+        source.last_polled = datetime.utcnow()
+        source.next_poll_at = time.monotonic() + source.poll_interval
+        new_updates = []
+        try:
+            async with self._session.get(source.url, headers=headers) as response:
+                source.last_status = response.status
+                if response.status == 304:
+                    source.consecutive_failures = 0
+                    return 0
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status
+                    )
+
+                parser = HTMLLinkParser(source.url) if source.format == "html" else FeedItemParser()
+                async for chunk in response.content.iter_chunked(16384):
+                    items = parser.feed_chunk(chunk) if source.format == "html" else parser.feed(chunk)
+                    for update in self._index_items(source, items):
+                        new_updates.append(update)
+                if source.format != "html":
+                    for update in self._index_items(source, parser.close()):
+                        new_updates.append(update)
+
+                source.etag = response.headers.get("ETag", source.etag)
+                source.last_modified = response.headers.get("Last-Modified", source.last_modified)
+                source.consecutive_failures = 0
+        except Exception as e:
+            # items parsed before the failure are already indexed, so later polls
+            # won't report them again; they still go to the listeners below
+            source.consecutive_failures += 1
+            logger.warning(f"Regulatory feed {source.name} poll failed: {e}")
+
+        for update in new_updates:
+            for listener in self.listeners:
+                try:
+                    await listener(update)
+                except Exception as e:
+                    logger.error(f"Regulatory update listener failed: {e}")
+        return len(new_updates)
+
+    def _index_items(self, source: FeedSource, items) -> Iterator[Dict]:
+        for item in items:
+            source.items_seen += 1
+            if not item["title"]:
+                continue
+            update = enrich_update(source, item)
+            if self.index.add(update):
+                yield update
+
+    async def _run(self):
+        while True:
+            due = [source for source in self.sources.values() if source.next_poll_at <= time.monotonic()]
+            try:
+                added = await self.poll_once(due) if due else 0
+                if added:
+                    logger.info(f"Indexed {added} new regulatory updates")
+            except Exception as e:
+                logger.error(f"Regulatory feed polling error: {e}")
+            next_due = min((source.next_poll_at for source in self.sources.values()), default=time.monotonic() + 300.0)
+            await asyncio.sleep(max(next_due - time.monotonic(), 0.0))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "source": source.name,
+                "url": source.url,
+                "last_polled": source.last_polled.isoformat() if source.last_polled else None,
+                "last_status": source.last_status,
+                "poll_interval": source.poll_interval,
+                "etag": source.etag,
+                "consecutive_failures": source.consecutive_failures,
+                "items_seen": source.items_seen,
+            }
+            for source in self.sources.values()
+        ]
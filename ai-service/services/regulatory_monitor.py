@@ -3,27 +3,132 @@ Regulatory Monitor Service
 Real-time monitoring of regulatory changes and updates
 """
 
-from typing import Dict, List
-from datetime import datetime
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from datetime import date, datetime
+
+from services.alert_engine import AlertEngine
+from services.position_index import (
+    InstitutionPositionIndex, build_impact_analysis, position_value, update_jurisdiction
+)
+from services.regulatory_calendar import RegulatoryCalendar, parse_timeframe
+from services.regulatory_feeds import (
+    FeedSource, RegulatoryFeedPoller, RegulatoryUpdateIndex, load_feed_sources
+)
 
 class RegulatoryMonitor:
-    def __init__(self):
-        self.regulatory_feeds = {}
-        self.update_cache = {}
+    def __init__(self, feed_sources: Optional[List[FeedSource]] = None, max_cached_impacts: int = 256):
+        self.update_cache = RegulatoryUpdateIndex()
+        self.poller = RegulatoryFeedPoller(
+            feed_sources if feed_sources is not None else load_feed_sources(),
+            self.update_cache
+        )
+        self.regulatory_feeds = self.poller.sources
         self.notification_rules = {}
+        self.alert_engine = AlertEngine()
+        self.calendar = RegulatoryCalendar()
+        self.position_index = InstitutionPositionIndex()
+        # impact_key(update) -> analyses, least recently used first
+        self.impact_cache: "OrderedDict[str, Dict[str, Dict]]" = OrderedDict()
+        self.max_cached_impacts = max_cached_impacts
+        
+        self.poller.add_listener(self._on_new_update)
+        for update in self._seed_updates():
+            self.update_cache.add(update)
+            self.calendar.add_update(update)
+    
+    async def _on_new_update(self, update: Dict):
+        """Pre-compute impact for every registered institution as updates arrive"""
+        self._cache_impact(self.impact_key(update), self.position_index.analyze(update))
+        self.calendar.add_update(update)
+        await self.alert_engine.process_event(self.update_event(update))
+    
+    @staticmethod
+    def update_event(update: Dict) -> Dict:
+        """Alert engine event for a regulatory update"""
+        return {
+            "event_type": "regulatory_update",
+            "event_id": update.get("content_hash"),
+            "jurisdiction": update_jurisdiction(update),
+            "protocols": list(update.get("affected_protocols") or []) + list(update.get("affected_tokens") or []),
+            "severity": update.get("impact", "MEDIUM"),
+            "title": update.get("title", ""),
+            "description": update.get("summary", ""),
+            "source": update.get("source"),
+            "url": update.get("url"),
+        }
     
-    async def get_latest_updates(self) -> List[Dict]:
+    async def register_institution_portfolio(
+        self,
+        institution_id: str,
+        positions: List[Dict],
+        jurisdictions: List[str]
+    ) -> int:
+        """
+        Index an institution's positions for regulatory impact matching
+        """
+        self.position_index.register_portfolio(institution_id, positions, jurisdictions)
+        # cached impacts were computed against the previous holdings
+        self.impact_cache.clear()
+        return len(positions)
+    
+    async def analyze_update_impact_for_all(self, update: Dict) -> Dict[str, Dict]:
+        """
+        Impact analyses for every affected institution, keyed by institution id
+        """
+        key = self.impact_key(update)
+        cached = self.impact_cache.get(key)
+        if cached is None:
+            cached = self.position_index.analyze(update)
+            self._cache_impact(key, cached)
+        else:
+            self.impact_cache.move_to_end(key)
+        return cached
+    
+    @staticmethod
+    def impact_key(update: Dict) -> str:
+        """
+        Cache key covering every field an impact analysis reads; the content hash
+        alone only covers title / summary / url, and ad-hoc updates posted to the
+        API can share those while targeting different protocols or jurisdictions
+        """
+        scope = {
+            "content": RegulatoryUpdateIndex.content_hash(update),
+            "protocols": sorted(str(p).lower() for p in update.get("affected_protocols") or []),
+            "tokens": sorted(str(t).upper() for t in update.get("affected_tokens") or []),
+            "jurisdiction": update_jurisdiction(update),
+            "impact": update.get("impact", "MEDIUM"),
+            "deadline": update.get("compliance_deadline"),
+        }
+        return hashlib.sha256(json.dumps(scope, sort_keys=True).encode()).hexdigest()
+    
+    def _cache_impact(self, key: str, impacts: Dict[str, Dict]):
+        self.impact_cache[key] = impacts
+        self.impact_cache.move_to_end(key)
+        while len(self.impact_cache) > self.max_cached_impacts:
+            self.impact_cache.popitem(last=False)
+    
+    def start_polling(self):
+        """Start background feed polling (call from a running event loop)"""
+        self.poller.start()
+    
+    async def stop_polling(self):
+        await self.poller.stop()
+        await self.alert_engine.close()
+    
+    async def get_latest_updates(self, limit: int = 50, source: Optional[str] = None) -> List[Dict]:
         """
         Get latest regulatory updates from various sources
-        TODO: Implement real-time regulatory monitoring
-        """
-        # TODO: Implement regulatory monitoring
-        # - Monitor SEC announcements
-        # - Track MiCA developments
-        # - Follow FCA guidance
-        # - Watch CFTC updates
-        # - Parse regulatory documents with AI
+        Served from the in-memory index maintained by the feed poller
+        """
+        # TODO: Parse regulatory documents with AI
         
+        return self.update_cache.latest(limit, source)
+    
+    def _seed_updates(self) -> List[Dict]:
+        """Known updates available before the first poll completes"""
         return [
             {
                 "source": "SEC",
@@ -73,24 +178,16 @@ class RegulatoryMonitor:
     ) -> Dict:
         """
         Analyze impact of regulatory update on institution
-        TODO: Implement impact analysis
         """
-        # TODO: Analyze regulatory impact
-        # - Identify affected protocols
-        # - Calculate compliance costs
-        # - Estimate timeline for compliance
-        # - Recommend actions
-        
-        return {
-            "impact_score": 75.0,
-            "affected_positions": [],
-            "estimated_cost": 50000,
-            "compliance_timeline": "90 days",
-            "recommended_actions": [
-                "Review affected protocol positions",
-                "Consult legal team for compliance strategy"
-            ]
-        }
+        protocols = {p.lower() for p in update.get("affected_protocols") or []}
+        tokens = {t.upper() for t in update.get("affected_tokens") or []}
+        affected = [
+            position for position in institution_portfolio
+            if str(position.get("protocol", "")).lower() in protocols
+            or str(position.get("token", "")).upper() in tokens
+        ]
+        portfolio_value = sum(position_value(p) for p in institution_portfolio)
+        return build_impact_analysis(update, affected, portfolio_value)
     
     async def setup_alerts(
         self,
@@ -99,36 +196,39 @@ class RegulatoryMonitor:
     ) -> bool:
         """
         Setup regulatory alert notifications
-        TODO: Implement alert system
+        Rules are indexed by the shared alert engine; regulatory updates from the
+        feed poller, risk changes and AML flags are matched against them as they arrive
         """
-        # TODO: Setup alert notifications
-        # - Configure alert triggers
-        # - Set notification channels
-        # - Define escalation rules
-        # - Test alert delivery
-        
+        self.alert_engine.register(institution_id, alert_rules)
+        self.notification_rules[institution_id] = alert_rules
         return True
     
+    async def publish_event(self, event: Dict) -> List[Dict]:
+        """
+        Feed a risk_change / aml_flag / regulatory_update event to the alert engine
+        """
+        return await self.alert_engine.process_event(event)
+    
+    async def get_alerts(self, institution_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent alerts, newest first"""
+        alerts = []
+        for alert in reversed(self.alert_engine.recent_alerts):
+            if len(alerts) >= limit:
+                break
+            if institution_id is None or alert["institution_id"] == institution_id:
+                alerts.append(alert)
+        return alerts
+    
     async def generate_regulatory_calendar(
         self,
         jurisdiction: str,
-        timeframe: str
+        timeframe: str,
+        start_date: Optional[str] = None
     ) -> List[Dict]:
         """
         Generate regulatory compliance calendar
-        TODO: Implement calendar generation
+        Deadlines from indexed updates plus recurring obligations between
+        start_date (default today) and start_date + timeframe; jurisdiction "ALL" merges every jurisdiction
         """
-        # TODO: Generate compliance calendar
-        # - Identify upcoming deadlines
-        # - Map regulatory requirements
-        # - Schedule compliance activities
-        # - Set reminder notifications
-        
-        return [
-            {
-                "date": "2024-09-15",
-                "requirement": "Quarterly AML Report",
-                "jurisdiction": jurisdiction,
-                "priority": "HIGH"
-            }
-        ]
+        start = date.fromisoformat(start_date) if start_date else datetime.utcnow().date()
+        return self.calendar.window(jurisdiction, start, start + parse_timeframe(timeframe))
@@ -0,0 +1,229 @@
+"""
+Report Export Service
+Streaming CSV / NDJSON / Parquet export of compliance report sections
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Tuple
+
+from services.defi_risk_analyzer import DeFiRiskAnalyzer
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+REPORT_SECTIONS = ("protocols", "high_risk_protocols", "transactions", "flagged_transactions")
+
+HIGH_RISK_PROTOCOL_THRESHOLD = 0.6
+FLAGGED_TRANSACTION_THRESHOLD = 0.5
+
+# Fixed (flattened column, type) schema per section, so every CSV / Parquet export
+# of a section has the same columns whatever the first row happens to contain.
+# Anything else a row carries is kept as JSON in the trailing "extra" column.
+PROTOCOL_COLUMNS: Tuple[Tuple[str, type], ...] = (
+    ("protocol_address", str),
+    ("protocol_name", str),
+    ("risk_score", float),
+    ("risk_level", str),
+    ("risk_factors.smart_contract_risk", float),
+    ("risk_factors.liquidity_risk", float),
+    ("risk_factors.governance_risk", float),
+    ("risk_factors.audit_risk", float),
+    ("risk_factors.market_risk", float),
+    ("risk_factors.operational_risk", float),
+    ("tvl_usd", float),
+    ("audit_status", str),
+    ("recommendation", str),
+    ("max_exposure_percentage", float),
+    ("confidence_score", float),
+    ("monitoring_alerts", str),
+    ("analysis_timestamp", str),
+    ("error", str),
+)
+TRANSACTION_COLUMNS: Tuple[Tuple[str, type], ...] = (
+    ("transaction_id", str),
+    ("aml_risk_score", float),
+    ("compliance_level", str),
+    ("suspicious_patterns", str),
+    ("requires_manual_review", bool),
+    ("analysis_timestamp", str),
+    ("error", str),
+)
+SECTION_COLUMNS = {
+    "protocols": PROTOCOL_COLUMNS,
+    "high_risk_protocols": PROTOCOL_COLUMNS,
+    "transactions": TRANSACTION_COLUMNS,
+    "flagged_transactions": TRANSACTION_COLUMNS,
+}
+EXTRA_COLUMN = "extra"
+
+
+def flatten_row(row: Dict, prefix: str = "") -> Dict:
+    """Flatten nested dicts into dotted keys and lists into ';'-joined strings"""
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_row(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            flat[name] = ";".join(str(item) for item in value)
+        else:
+            flat[name] = value
+    return flat
+
+
+def section_fieldnames(section: str) -> List[str]:
+    return [name for name, _ in SECTION_COLUMNS[section]] + [EXTRA_COLUMN]
+
+
+def conform_row(section: str, row: Dict) -> Dict:
+    """
+    Flattened row with exactly the section's columns. Values of the wrong type
+    are left out of their column and, like unknown keys, kept in "extra"
+    """
+    flat = flatten_row(row)
+    conformed = {}
+    for name, kind in SECTION_COLUMNS[section]:
+        value = flat.pop(name, None)
+        if value is None:
+            conformed[name] = None
+        elif kind is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+            conformed[name] = float(value)
+        elif isinstance(value, kind):
+            conformed[name] = value
+        else:
+            conformed[name] = None
+            flat[name] = value
+    conformed[EXTRA_COLUMN] = json.dumps(flat, default=str, sort_keys=True) if flat else None
+    return conformed
+
+
+class ReportSectionStream:
+    """
+    Walks a DeFiRiskAnalyzer report section by section, yielding one row at a time.
+    Summary statistics are accumulated while streaming so the full report is never
+    materialised.
+    """
+
+    def __init__(self, analyzer: DeFiRiskAnalyzer, institution_id: str, time_period: str = "30d"):
+        self.analyzer = analyzer
+        self.institution_id = institution_id
+        self.time_period = time_period
+        self.protocol_count = 0
+        self.protocol_risk_total = 0.0
+        self.high_risk_protocols = 0
+        self.transaction_count = 0
+        self.flagged_transactions = 0
+
+    async def rows(self, sections: List[str]) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield (section, row) pairs for the requested sections"""
+        wanted = set(sections)
+        if wanted & {"protocols", "high_risk_protocols"}:
+            async for analysis in self.analyzer.iter_protocol_analyses(self.institution_id):
+                self.protocol_count += 1
+                self.protocol_risk_total += analysis.get("risk_score", 1.0)
+                high_risk = analysis.get("risk_score", 1.0) > HIGH_RISK_PROTOCOL_THRESHOLD
+                self.high_risk_protocols += high_risk
+                if "protocols" in wanted:
+                    yield "protocols", analysis
+                if high_risk and "high_risk_protocols" in wanted:
+                    yield "high_risk_protocols", analysis
+
+        if wanted & {"transactions", "flagged_transactions"}:
+            async for analysis in self.analyzer.iter_transaction_analyses(self.institution_id, self.time_period):
+                self.transaction_count += 1
+                flagged = analysis.get("aml_risk_score", 1.0) > FLAGGED_TRANSACTION_THRESHOLD
+                self.flagged_transactions += flagged
+                if "transactions" in wanted:
+                    yield "transactions", analysis
+                if flagged and "flagged_transactions" in wanted:
+                    yield "flagged_transactions", analysis
+
+    def summary(self) -> Dict:
+        """Summary of everything streamed so far"""
+        average_risk = self.protocol_risk_total / self.protocol_count if self.protocol_count else 0.0
+        return {
+            "institution_id": self.institution_id,
+            "report_period": self.time_period,
+            "total_protocols_analyzed": self.protocol_count,
+            "average_protocol_risk": round(average_risk, 3),
+            "high_risk_protocols": self.high_risk_protocols,
+            "total_transactions_analyzed": self.transaction_count,
+            "flagged_transactions": self.flagged_transactions,
+            "report_timestamp": datetime.utcnow().isoformat(),
+        }
+
+
+async def stream_ndjson(stream: ReportSectionStream, sections: List[str]) -> AsyncIterator[bytes]:
+    """One JSON object per line, tagged with its section, followed by a summary line"""
+    async for section, row in stream.rows(sections):
+        yield (json.dumps({"section": section, **row}, default=str) + "\n").encode()
+    yield (json.dumps({"section": "summary", **stream.summary()}, default=str) + "\n").encode()
+
+
+async def stream_csv(stream: ReportSectionStream, section: str) -> AsyncIterator[bytes]:
+    """CSV for a single section with the section's fixed columns; the header is sent even when there are no rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=section_fieldnames(section))
+    writer.writeheader()
+    async for _, row in stream.rows([section]):
+        writer.writerow(conform_row(section, row))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def stream_parquet(stream: ReportSectionStream, section: str, batch_size: int = 10_000) -> AsyncIterator[bytes]:
+    """
+    Parquet for a single section, written one row group per `batch_size` rows
+    with the section's fixed schema (an empty section is a valid file without
+    row groups). Requires the optional pyarrow dependency.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {str: pa.string(), float: pa.float64(), bool: pa.bool_()}
+    schema = pa.schema(
+        [(name, types[kind]) for name, kind in SECTION_COLUMNS[section]] + [(EXTRA_COLUMN, pa.string())]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch: List[Dict] = []
+
+    async for _, row in stream.rows([section]):
+        batch.append(conform_row(section, row))
+        if len(batch) >= batch_size:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch.clear()
+            yield sink.drain()
+
+    if batch:
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,225 @@
+"""
+Compliance Report Job Service
+Background report generation with progress tracking and persistent results
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from services.database import shared_pool
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float, str], None]
+ReportFactory = Callable[[ProgressCallback], Awaitable[Dict]]
+
+
+class ReportJobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class ReportJob:
+    report_id: str
+    dedup_key: Tuple
+    institution_id: str
+    report_period: str
+    status: ReportJobStatus = ReportJobStatus.PENDING
+    progress: float = 0.0
+    stage: str = "Queued"
+    submitted_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error: Optional[str] = None
+    record_id: Optional[str] = None
+
+    def to_status(self) -> Dict:
+        return {
+            "report_id": self.report_id,
+            "institution_id": self.institution_id,
+            "report_period": self.report_period,
+            "status": self.status.value,
+            "progress": round(self.progress, 1),
+            "stage": self.stage,
+            "submitted_at": self.submitted_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "error": self.error,
+            "record_id": self.record_id,
+        }
+
+
+class ComplianceReportStore:
+    """
+    Result store for finished reports.
+    Results are always kept in memory; when DATABASE_URL is configured and asyncpg
+    is installed they are also written to the Prisma `compliance_reports` table.
+    """
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.db = shared_pool(database_url)
+        self.results: Dict[str, Dict] = {}
+
+    async def save(self, job: ReportJob, report: Dict) -> Optional[str]:
+        self.results[job.report_id] = report
+        if not self.db.enabled:
+            return None
+        try:
+            return await self._insert_row(job, report)
+        except Exception as e:
+            logger.error(f"Failed to persist compliance report {job.report_id}: {e}")
+            return None
+
+    def get(self, report_id: str) -> Optional[Dict]:
+        return self.results.get(report_id)
+
+    def evict(self, report_id: str):
+        """Drop the in-memory copy; a persisted row is kept"""
+        self.results.pop(report_id, None)
+
+    async def _insert_row(self, job: ReportJob, report: Dict) -> str:
+        """Insert a row using the column names Prisma generates for ComplianceReport"""
+        summary = report.get("summary", {})
+        row = (
+            job.report_id,
+            job.institution_id,
+            job.report_period,
+            float(report.get("compliance_score", summary.get("overall_compliance_score", 0.0))),
+            int(summary.get("total_protocols_analyzed", 0)),
+            float(summary.get("average_protocol_risk", 0.0)),
+            int(summary.get("high_risk_protocols", 0)),
+            int(report.get("total_transactions", summary.get("total_transactions_analyzed", 0))),
+            int(report.get("flagged_transactions", summary.get("flagged_transactions", 0))),
+            json.dumps(report, default=str),
+            job.completed_at or datetime.utcnow(),
+        )
+        await self.db.execute(
+            """
+            INSERT INTO compliance_reports (
+                "id", "institutionId", "reportPeriod", "overallComplianceScore",
+                "totalProtocolsAnalyzed", "averageProtocolRisk", "highRiskProtocols",
+                "totalTransactionsAnalyzed", "flaggedTransactions", "reportData", "generatedAt"
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10::jsonb, $11)
+            """,
+            *row,
+        )
+        return job.report_id
+
+
+class ReportJobManager:
+    """
+    Runs report generation off the request path.
+    At most `max_workers` reports run concurrently; identical submissions that are
+    still pending or running share a single job. Finished jobs and their results
+    are forgotten `finished_ttl_seconds` after completion, or sooner once more
+    than `max_finished_jobs` have finished
+    """
+
+    def __init__(
+        self,
+        store: Optional[ComplianceReportStore] = None,
+        max_workers: int = 4,
+        finished_ttl_seconds: float = 3600.0,
+        max_finished_jobs: int = 1000
+    ):
+        self.store = store or ComplianceReportStore()
+        self.max_workers = max_workers
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: Dict[str, ReportJob] = {}
+        self.in_flight: Dict[Tuple, str] = {}
+        # report_id -> completed_at, in completion order
+        self._finished: "OrderedDict[str, datetime]" = OrderedDict()
+        self._factories: Dict[str, ReportFactory] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(
+        self,
+        dedup_key: Tuple,
+        institution_id: str,
+        report_period: str,
+        factory: ReportFactory,
+    ) -> Tuple[ReportJob, bool]:
+        """
+        Register a report job. Returns the job and whether it was newly created;
+        callers must schedule `run(report_id)` for new jobs.
+        """
+        self._evict_finished()
+        existing_id = self.in_flight.get(dedup_key)
+        if existing_id is not None:
+            return self.jobs[existing_id], False
+
+        job = ReportJob(
+            report_id=str(uuid.uuid4()),
+            dedup_key=dedup_key,
+            institution_id=institution_id,
+            report_period=report_period,
+        )
+        self.jobs[job.report_id] = job
+        self.in_flight[dedup_key] = job.report_id
+        self._factories[job.report_id] = factory
+        return job, True
+
+    async def run(self, report_id: str):
+        """Execute a submitted job, waiting for a free worker slot first"""
+        job = self.jobs[report_id]
+        factory = self._factories.pop(report_id)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        async with self._semaphore:
+            job.status = ReportJobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            job.stage = "Generating report"
+
+            def on_progress(progress: float, stage: str):
+                job.progress = max(job.progress, min(progress, 99.0))
+                job.stage = stage
+
+            try:
+                report = await factory(on_progress)
+                report["report_id"] = job.report_id
+                job.completed_at = datetime.utcnow()
+                job.stage = "Persisting report"
+                job.record_id = await self.store.save(job, report)
+                job.status = ReportJobStatus.COMPLETED
+                job.progress = 100.0
+                job.stage = "Complete"
+            except Exception as e:
+                logger.error(f"Report job {report_id} failed: {e}")
+                job.status = ReportJobStatus.FAILED
+                job.error = str(e)
+                job.stage = "Failed"
+                job.completed_at = datetime.utcnow()
+            finally:
+                self.in_flight.pop(job.dedup_key, None)
+                self._finished[report_id] = job.completed_at
+                self._evict_finished()
+
+    def _evict_finished(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.finished_ttl_seconds)
+        while self._finished:
+            report_id, completed_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished_jobs and completed_at > cutoff:
+                break
+            del self._finished[report_id]
+            self.jobs.pop(report_id, None)
+            self.store.evict(report_id)
+
+    def get_status(self, report_id: str) -> Optional[Dict]:
+        job = self.jobs.get(report_id)
+        return job.to_status() if job else None
+
+    def get_result(self, report_id: str) -> Optional[Dict]:
+        return self.store.get(report_id)
@@ -0,0 +1,92 @@
+"""
+Request Context
+Per-request blackboard of lazily computed, memoised facts shared by every agent working on the request
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from services import tracing
+
+FactProvider = Callable[["RequestContext"], Awaitable[Any]]
+
+# facts being resolved by the current task chain, for cycle detection
+_resolving: contextvars.ContextVar[Tuple[str, ...]] = contextvars.ContextVar("resolving_facts", default=())
+
+
+class FactCycleError(Exception):
+    pass
+
+
+class RequestContext:
+    """
+    `await ctx.get(name)` returns a fact for this request. The first caller
+    starts its provider; concurrent and later callers await the same task, so
+    every fact (a parse, an HTTP fetch) is computed at most once per request,
+    and only if some agent asks for it. Failures are memoised as well.
+    Providers receive the context and may await other facts.
+    """
+
+    def __init__(self, providers: Dict[str, FactProvider], **values: Any):
+        self.providers = providers
+        self.values = values
+        self._facts: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    async def get(self, name: str) -> Any:
+        if name in self.values:
+            return self.values[name]
+        task = self._start(name)
+        self._stats[name]["requests"] += 1
+        if self._stats[name]["requests"] > 1:
+            tracing.event(f"fact_hit:{name}", "fact", fact=name, cache_hit=True)
+        # one cancelled waiter must not cancel the computation the others share
+        return await asyncio.shield(task)
+
+    def prefetch(self, *names: str):
+        """Start computing facts that will be needed later without waiting for them"""
+        for name in names:
+            if name not in self.values:
+                self._start(name)
+
+    def _start(self, name: str) -> asyncio.Task:
+        chain = _resolving.get()
+        if name in chain:
+            raise FactCycleError(f"Fact '{name}' depends on itself via {' -> '.join(chain + (name,))}")
+        task = self._facts.get(name)
+        if task is not None:
+            return task
+        provider = self.providers.get(name)
+        if provider is None:
+            raise KeyError(f"No provider for fact '{name}'")
+        self._stats[name] = {"requests": 0, "duration_ms": None}
+        task = self._facts[name] = asyncio.ensure_future(self._compute(name, provider, chain))
+        return task
+
+    async def _compute(self, name: str, provider: FactProvider, chain: Tuple[str, ...]) -> Any:
+        _resolving.set(chain + (name,))
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"fact:{name}", "fact", lane=f"fact:{name}"):
+                return await provider(self)
+        finally:
+            self._stats[name]["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def report(self) -> Dict[str, Dict]:
+        """Per fact: how often it was requested and how long the single computation took"""
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    async def close(self):
+        """Cancel computations nobody is waiting for any more"""
+        pending = [task for task in self._facts.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in self._facts.values():
+            if not task.cancelled():
+                task.exception()  # memoised failures were delivered to their requesters
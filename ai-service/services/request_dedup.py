@@ -0,0 +1,119 @@
+"""
+Request De-duplication
+Idempotency keys, single-flight execution and a TTL result cache for repeated institutional requests
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused for a request with a different fingerprint"""
+
+
+class RequestDeduplicator:
+    """
+    Runs at most one computation per request fingerprint at a time.
+
+    - concurrent duplicates attach to the in-flight run ("joined")
+    - completed results are served for `ttl` seconds ("cached")
+    - `bypass_cache` skips completed results but still joins a run in flight,
+      which is fresh by definition
+    - an idempotency key always returns the outcome of the run it was first
+      used for (for `key_ttl` seconds), even with bypass_cache; reusing it for a
+      different fingerprint raises IdempotencyConflict
+
+    Failed runs are not cached. A run is shielded from its callers, so a
+    client disconnecting doesn't cancel it for the others waiting on it.
+    """
+
+    def __init__(self, ttl: float = 300.0, key_ttl: float = 86400.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.key_ttl = key_ttl
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._completed: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._keys: "OrderedDict[str, Tuple[float, str, asyncio.Task]]" = OrderedDict()
+        self.stats = {"computed": 0, "joined": 0, "cached": 0, "bypassed": 0, "replayed": 0, "conflicts": 0, "failed": 0}
+
+    async def run(
+        self,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[Dict]],
+        idempotency_key: Optional[str] = None,
+        bypass_cache: bool = False
+    ) -> Tuple[Dict, Dict]:
+        """(result, dedup info); the result dict is shared between callers and must not be mutated"""
+        now = time.monotonic()
+        self._expire(now)
+
+        if idempotency_key is not None and idempotency_key in self._keys:
+            _, key_fingerprint, task = self._keys[idempotency_key]
+            if key_fingerprint != fingerprint:
+                self.stats["conflicts"] += 1
+                raise IdempotencyConflict(f"Idempotency key {idempotency_key!r} was used for a different request")
+            self.stats["replayed"] += 1
+            return await asyncio.shield(task), {"outcome": "replayed", "fingerprint": fingerprint}
+
+        task = self._in_flight.get(fingerprint)
+        if task is not None:
+            outcome = "joined"
+        else:
+            cached = self._completed.get(fingerprint)
+            if cached is not None and not bypass_cache:
+                self.stats["cached"] += 1
+                completed_at, result = cached
+                task = asyncio.get_running_loop().create_future()
+                task.set_result(result)
+                self._remember_key(idempotency_key, fingerprint, task, now)
+                return result, {"outcome": "cached", "fingerprint": fingerprint, "age_seconds": round(now - completed_at, 1)}
+            if cached is not None:
+                self.stats["bypassed"] += 1
+            task = self._in_flight[fingerprint] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda done: self._finish(fingerprint, done))
+            outcome = "computed"
+        self.stats[outcome] += 1
+        self._remember_key(idempotency_key, fingerprint, task, now)
+        return await asyncio.shield(task), {"outcome": outcome, "fingerprint": fingerprint}
+
+    def _remember_key(self, key: Optional[str], fingerprint: str, task: asyncio.Future, now: float):
+        if key is None:
+            return
+        self._keys[key] = (now + self.key_ttl, fingerprint, task)
+        while len(self._keys) > self.max_entries:
+            self._keys.popitem(last=False)
+
+    def _finish(self, fingerprint: str, task: asyncio.Task):
+        if self._in_flight.get(fingerprint) is task:
+            del self._in_flight[fingerprint]
+        if task.cancelled() or task.exception() is not None:
+            self.stats["failed"] += 1
+            # a failed run must not be replayed under its idempotency keys
+            for key in [k for k, (_, _, t) in self._keys.items() if t is task]:
+                del self._keys[key]
+            return
+        # kept in completion order, so expiry only has to look at the front
+        self._completed.pop(fingerprint, None)
+        self._completed[fingerprint] = (time.monotonic(), task.result())
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    def _expire(self, now: float):
+        while self._completed:
+            fingerprint, (completed_at, _) = next(iter(self._completed.items()))
+            if now - completed_at < self.ttl:
+                break
+            del self._completed[fingerprint]
+        for key in [k for k, (expires, _, _) in self._keys.items() if expires <= now]:
+            del self._keys[key]
+
+    def metrics(self) -> Dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "cached_results": len(self._completed),
+            "idempotency_keys": len(self._keys),
+            "ttl_seconds": self.ttl,
+            **self.stats,
+        }
@@ -0,0 +1,295 @@
+"""
+Batched RPC Client
+Pooled JSON-RPC client that coalesces concurrent eth_calls into batch requests, with optional Multicall3 aggregation
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from services.chain_rpc import RPCError, rpc_batch
+from services.evm_abi import decode_values, encode_values, signature_hash
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+AGGREGATE3_SELECTOR = signature_hash("aggregate3((address,bool,bytes)[])")[:10]
+
+
+def is_revert(error: BaseException) -> bool:
+    """True for calls the EVM reverted, as opposed to node, transport or multicall failures"""
+    return isinstance(error, RPCError) and (error.code == 3 or "revert" in str(error).lower())
+
+
+def encode_aggregate3(calls: List[Tuple[str, str]]) -> str:
+    """aggregate3 calldata for (target, calldata) pairs, every call allowed to fail"""
+    tuples = [encode_values(["address", "bool", "bytes"], [to, True, data]) for to, data in calls]
+    offsets, position = [], 32 * len(tuples)
+    for encoded in tuples:
+        offsets.append(position.to_bytes(32, "big"))
+        position += len(encoded)
+    array = len(tuples).to_bytes(32, "big") + b"".join(offsets) + b"".join(tuples)
+    return AGGREGATE3_SELECTOR + ((32).to_bytes(32, "big") + array).hex()
+
+
+def decode_aggregate3(data: str) -> List[Optional[str]]:
+    """Return data per aggregated call, None where the call reverted"""
+    raw = bytes.fromhex(data[2:])
+    start = int.from_bytes(raw[:32], "big")
+    length = int.from_bytes(raw[start:start + 32], "big")
+    base = start + 32
+    results = []
+    for j in range(length):
+        offset = int.from_bytes(raw[base + j * 32:base + (j + 1) * 32], "big")
+        success, returned = decode_values(["bool", "bytes"], raw[base + offset:])
+        results.append(returned if success else None)
+    return results
+
+
+class BatchedRPCClient:
+    """
+    JSON-RPC client for one endpoint. Requests issued within `batch_window`
+    seconds of each other share a single HTTP batch request over a pooled
+    keep-alive session. eth_call results are cached by (block, to, data):
+    a result at a fixed block never changes, and "latest" is pinned to a block
+    number that is refreshed at most every `block_ttl` seconds. With a
+    multicall address, eth_calls() packs up to `multicall_size` calls into each
+    aggregate3 call; if an aggregate3 call fails as a whole (no Multicall3 at
+    that address, out of gas, malformed response) its calls are retried one by one.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_batch_size: int = 200,
+        batch_window: float = 0.002,
+        max_connections: int = 8,
+        cache_size: int = 50000,
+        block_ttl: float = 1.0,
+        multicall_address: Optional[str] = None,
+        multicall_size: int = 500,
+        timeout: float = 15.0
+    ):
+        self.url = url
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.max_connections = max_connections
+        self.cache_size = cache_size
+        self.block_ttl = block_ttl
+        self.multicall_address = multicall_address.lower() if multicall_address else None
+        self.multicall_size = multicall_size
+        self.timeout = timeout
+        self.stats = {
+            "http_requests": 0, "rpc_calls": 0, "eth_calls": 0, "cache_hits": 0, "multicalls": 0, "multicall_fallbacks": 0
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: List[Tuple[str, List[Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()
+        self._cache: "OrderedDict[Tuple[int, str, str], asyncio.Future]" = OrderedDict()
+        self._head: Optional[Tuple[int, float]] = None
+        self._head_future: Optional[asyncio.Future] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    def request(self, method: str, params: List[Any]) -> asyncio.Future:
+        """Queue a call for the next batch; the future resolves to its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((method, params, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    async def call(self, method: str, params: List[Any]) -> Any:
+        return await self.request(method, params)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, List[Any], asyncio.Future]]):
+        self.stats["http_requests"] += 1
+        self.stats["rpc_calls"] += len(batch)
+        try:
+            results = await rpc_batch(
+                self._get_session(), self.url, [(method, params) for method, params, _ in batch], return_errors=True
+            )
+        except Exception as e:
+            logger.warning(f"RPC batch of {len(batch)} calls to {self.url} failed: {e}")
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, RPCError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def block_number(self) -> int:
+        """Latest block number, shared by concurrent callers and cached for block_ttl seconds"""
+        if self._head is not None and time.monotonic() - self._head[1] < self.block_ttl:
+            return self._head[0]
+        future = self._head_future
+        if future is None:
+            future = self._head_future = self.request("eth_blockNumber", [])
+            future.add_done_callback(self._on_head)
+        return int(await future, 16)
+
+    def _on_head(self, future: asyncio.Future):
+        self._head_future = None
+        if not future.cancelled() and future.exception() is None:
+            self._head = (int(future.result(), 16), time.monotonic())
+
+    def _remember(self, key: Tuple[int, str, str], future: asyncio.Future):
+        self._cache[key] = future
+        future.add_done_callback(partial(self._forget_failed, key))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _forget_failed(self, key: Tuple[int, str, str], future: asyncio.Future):
+        if (future.cancelled() or future.exception() is not None) and self._cache.get(key) is future:
+            del self._cache[key]
+
+    def _lookup(self, block: int, to: str, data: str) -> Tuple[Tuple[int, str, str], Optional[asyncio.Future]]:
+        key = (block, to.lower(), data)
+        future = self._cache.get(key)
+        if future is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+        return key, future
+
+    def _cached_call(self, block: int, to: str, data: str) -> asyncio.Future:
+        key, future = self._lookup(block, to, data)
+        if future is None:
+            future = self.request("eth_call", [{"to": to, "data": data}, hex(block)])
+            self.stats["eth_calls"] += 1
+            self._remember(key, future)
+        return future
+
+    async def eth_call(self, to: str, data: str, block: Optional[int] = None) -> str:
+        block = await self.block_number() if block is None else block
+        return await self._cached_call(block, to, data)
+
+    async def eth_calls(self, calls: List[Tuple[str, str]], block: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Results of many (to, calldata) calls at one block; reverted calls come back
+        as None, any other failure (node error, timeout) is raised
+        """
+        block = await self.block_number() if block is None else block
+        if self.multicall_address and len(calls) > 1:
+            futures = self._multicall(block, calls)
+        else:
+            futures = [self._cached_call(block, to, data) for to, data in calls]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not is_revert(result):
+                raise result
+        return [None if isinstance(result, BaseException) else result for result in results]
+
+    def _multicall(self, block: int, calls: List[Tuple[str, str]]) -> List[asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures, misses = [], []
+        for to, data in calls:
+            key, future = self._lookup(block, to, data)
+            if future is None:
+                future = loop.create_future()
+                self._remember(key, future)
+                misses.append((to, data, future))
+                self.stats["eth_calls"] += 1
+            futures.append(future)
+        for i in range(0, len(misses), self.multicall_size):
+            chunk = misses[i:i + self.multicall_size]
+            self.stats["multicalls"] += 1
+            outer = self.request(
+                "eth_call",
+                [{"to": self.multicall_address, "data": encode_aggregate3([(to, data) for to, data, _ in chunk])}, hex(block)]
+            )
+            outer.add_done_callback(partial(self._resolve_multicall, block, chunk))
+        return futures
+
+    def _resolve_multicall(self, block: int, chunk: List[Tuple[str, str, asyncio.Future]], outer: asyncio.Future):
+        if outer.cancelled():
+            for _, _, future in chunk:
+                future.cancel()
+            return
+        error = outer.exception()
+        returned: List[Optional[str]] = []
+        if error is None:
+            try:
+                returned = decode_aggregate3(outer.result())
+            except (ValueError, IndexError) as e:
+                error = RPCError({"message": f"Malformed multicall response: {e}"})
+            if error is None and len(returned) != len(chunk):
+                error = RPCError({"message": f"Multicall returned {len(returned)} results for {len(chunk)} calls"})
+        if error is not None:
+            logger.warning(f"Multicall of {len(chunk)} calls failed ({error}); retrying them individually")
+            self.stats["multicall_fallbacks"] += 1
+            for to, data, future in chunk:
+                if not future.done():
+                    single = self.request("eth_call", [{"to": to, "data": data}, hex(block)])
+                    single.add_done_callback(partial(self._settle, future))
+            return
+        for index, (_, _, future) in enumerate(chunk):
+            if future.done():
+                continue
+            if returned[index] is None:
+                future.set_exception(RPCError({"code": 3, "message": "execution reverted"}))
+            else:
+                future.set_result(returned[index])
+
+    @staticmethod
+    def _settle(future: asyncio.Future, source: asyncio.Future):
+        """Complete `future` with the outcome of `source`"""
+        if future.done():
+            return
+        if source.cancelled():
+            future.cancel()
+        elif source.exception() is not None:
+            future.set_exception(source.exception())
+        else:
+            future.set_result(source.result())
+
+    def status(self) -> Dict:
+        return {
+            "url": self.url,
+            "multicall_address": self.multicall_address,
+            "cached_results": len(self._cache),
+            "head": self._head[0] if self._head else None,
+            **self.stats,
+        }
+
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for *_, future in self._pending:
+            future.cancel()
+        self._pending = []
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
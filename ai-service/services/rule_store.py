@@ -0,0 +1,329 @@
+"""
+Regulatory Rule Store
+Versioned per-framework rule sets compiled into cached evaluators
+"""
+
+import bisect
+import logging
+import operator
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+COMPARISON_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+MEMBERSHIP_OPERATORS = ("in", "not_in", "contains")
+# literal values rules may compare against or list as members
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+KNOWN_FRAMEWORKS = {"SEC": "SEC", "MICA": "MiCA", "FCA": "FCA", "CFTC": "CFTC"}
+
+
+class RuleValidationError(ValueError):
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def canonical_framework(framework: str) -> str:
+    return KNOWN_FRAMEWORKS.get(framework.upper(), framework.upper())
+
+
+def validate_rules(rules: List[Dict]) -> List[str]:
+    """Return a list of problems with the rule definitions (empty when valid)"""
+    errors = []
+    for i, rule in enumerate(rules):
+        label = rule.get("rule_id", f"rule[{i}]")
+        for key in ("rule_id", "field", "operator", "value", "violation"):
+            if key not in rule:
+                errors.append(f"{label}: missing '{key}'")
+        op = rule.get("operator")
+        if op is not None and op not in COMPARISON_OPERATORS and op not in MEMBERSHIP_OPERATORS:
+            errors.append(f"{label}: unknown operator '{op}'")
+        if op in ("in", "not_in"):
+            if not isinstance(rule.get("value"), (list, tuple, set)):
+                errors.append(f"{label}: operator '{op}' requires a list value")
+            elif not all(isinstance(member, SCALAR_TYPES) for member in rule["value"]):
+                errors.append(f"{label}: operator '{op}' requires a list of strings, numbers or booleans")
+        if op in ("==", "!=", "contains") and "value" in rule and not isinstance(rule["value"], SCALAR_TYPES):
+            errors.append(f"{label}: operator '{op}' requires a string, number or boolean value")
+        if op in (">", ">=", "<", "<=") and not isinstance(rule.get("value"), (int, float)):
+            errors.append(f"{label}: operator '{op}' requires a numeric value")
+        if rule.get("severity", "MEDIUM") not in SEVERITIES:
+            errors.append(f"{label}: unknown severity '{rule.get('severity')}'")
+    return errors
+
+
+def detect_conflicts(rules: List[Dict]) -> List[str]:
+    """
+    Find rules that contradict each other:
+    - duplicate rule ids
+    - identical conditions reporting a different violation or severity
+    - threshold rules on the same field where the stricter threshold has a lower severity
+    """
+    conflicts = []
+    seen_ids = set()
+    conditions: Dict[Tuple, Dict] = {}
+    thresholds: Dict[Tuple[str, str], List[Dict]] = {}
+
+    for rule in rules:
+        if rule["rule_id"] in seen_ids:
+            conflicts.append(f"duplicate rule_id '{rule['rule_id']}'")
+        seen_ids.add(rule["rule_id"])
+
+        value = rule["value"]
+        condition = (rule["field"], rule["operator"], tuple(value) if isinstance(value, (list, set)) else value)
+        previous = conditions.get(condition)
+        if previous and (
+            previous["violation"] != rule["violation"]
+            or previous.get("severity", "MEDIUM") != rule.get("severity", "MEDIUM")
+        ):
+            conflicts.append(
+                f"'{rule['rule_id']}' and '{previous['rule_id']}' share a condition but disagree on outcome"
+            )
+        conditions.setdefault(condition, rule)
+
+        if rule["operator"] in (">", ">="):
+            thresholds.setdefault((rule["field"], "upper"), []).append(rule)
+        elif rule["operator"] in ("<", "<="):
+            thresholds.setdefault((rule["field"], "lower"), []).append(rule)
+
+    for (field_name, direction), group in thresholds.items():
+        # For upper bounds a higher threshold is stricter; for lower bounds a lower one is
+        ordered = sorted(group, key=lambda r: r["value"], reverse=(direction == "lower"))
+        for looser, stricter in zip(ordered, ordered[1:]):
+            if SEVERITIES.index(stricter.get("severity", "MEDIUM")) < SEVERITIES.index(looser.get("severity", "MEDIUM")):
+                conflicts.append(
+                    f"'{stricter['rule_id']}' is stricter than '{looser['rule_id']}' on {field_name} but less severe"
+                )
+    return conflicts
+
+
+class CompiledRuleSet:
+    """
+    Immutable evaluator for one rule set version.
+    Rules are grouped by field; threshold rules are kept sorted so the triggered
+    ones are found by binary search, and equality / membership rules are folded
+    into a value -> outcomes hash table. Only negated checks are evaluated one by one.
+    """
+
+    def __init__(self, framework: str, version: int, rules: Tuple[Dict, ...]):
+        self.framework = framework
+        self.version = version
+        self.rule_count = len(rules)
+
+        # field -> (sorted thresholds, outcomes, inclusive flags), all index-aligned
+        self._upper: Dict[str, Tuple[List[float], List[Dict], List[bool]]] = {}
+        self._lower: Dict[str, Tuple[List[float], List[Dict], List[bool]]] = {}
+        self._equals: Dict[str, Dict[Any, List[Dict]]] = {}
+        self._checks: Dict[str, List[Tuple[Callable[[Any], bool], Dict]]] = {}
+
+        upper: Dict[str, List[Dict]] = {}
+        lower: Dict[str, List[Dict]] = {}
+        for rule in rules:
+            outcome = {
+                "rule_id": rule["rule_id"],
+                "framework": framework,
+                "rule_version": version,
+                "type": rule["violation"],
+                "severity": rule.get("severity", "MEDIUM"),
+            }
+            op, value, field_name = rule["operator"], rule["value"], rule["field"]
+            if op in (">", ">="):
+                upper.setdefault(field_name, []).append((float(value), op == ">=", outcome))
+            elif op in ("<", "<="):
+                lower.setdefault(field_name, []).append((float(value), op == "<=", outcome))
+            elif op in ("==", "in"):
+                table = self._equals.setdefault(field_name, {})
+                for member in (value if op == "in" else [value]):
+                    table.setdefault(member, []).append(outcome)
+            else:
+                self._checks.setdefault(field_name, []).append((self._compile_check(op, value), outcome))
+
+        for field_name, entries in upper.items():
+            entries.sort(key=lambda e: e[0])
+            self._upper[field_name] = ([e[0] for e in entries], [e[2] for e in entries], [e[1] for e in entries])
+        for field_name, entries in lower.items():
+            entries.sort(key=lambda e: e[0])
+            self._lower[field_name] = ([e[0] for e in entries], [e[2] for e in entries], [e[1] for e in entries])
+
+        self.fields = set(self._upper) | set(self._lower) | set(self._equals) | set(self._checks)
+
+    @staticmethod
+    def _compile_check(op: str, value: Any) -> Callable[[Any], bool]:
+        """Predicate for one rule; record values of a type the rule can't apply to don't match"""
+        if op == "not_in":
+            members = frozenset(value)
+
+            def not_in(v: Any) -> bool:
+                try:
+                    return v not in members
+                except TypeError:  # unhashable record value
+                    return False
+            return not_in
+        if op == "contains":
+            def contains(v: Any) -> bool:
+                if isinstance(v, str):
+                    return isinstance(value, str) and value in v
+                if isinstance(v, (list, tuple, set, frozenset, dict)):
+                    try:
+                        return value in v
+                    except TypeError:
+                        return False
+                return False
+            return contains
+        compare = COMPARISON_OPERATORS[op]
+        return lambda v: compare(v, value)
+
+    def evaluate(self, record: Dict) -> List[Dict]:
+        """Return the violations triggered by `record`"""
+        violations = []
+        for field_name in self.fields:
+            if field_name not in record:
+                continue
+            value = record[field_name]
+            numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+
+            upper = self._upper.get(field_name) if numeric else None
+            if upper is not None:
+                thresholds, outcomes, inclusive = upper
+                # every threshold strictly below value triggers; equal ones only for >=
+                cut = bisect.bisect_left(thresholds, value)
+                violations.extend(outcomes[:cut])
+                while cut < len(thresholds) and thresholds[cut] == value:
+                    if inclusive[cut]:
+                        violations.append(outcomes[cut])
+                    cut += 1
+
+            lower = self._lower.get(field_name) if numeric else None
+            if lower is not None:
+                thresholds, outcomes, inclusive = lower
+                cut = bisect.bisect_right(thresholds, value)
+                violations.extend(outcomes[cut:])
+                cut -= 1
+                while cut >= 0 and thresholds[cut] == value:
+                    if inclusive[cut]:
+                        violations.append(outcomes[cut])
+                    cut -= 1
+
+            equals = self._equals.get(field_name)
+            if equals is not None:
+                try:
+                    violations.extend(equals.get(value, ()))
+                except TypeError:
+                    pass  # unhashable record values cannot match literal rule values
+
+            for check, outcome in self._checks.get(field_name, ()):
+                if check(value):
+                    violations.append(outcome)
+        return violations
+
+
+@dataclass
+class RuleSetVersion:
+    framework: str
+    version: int
+    rules: Tuple[Dict, ...]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    compile_ms: float = 0.0
+
+
+class RegulatoryRuleStore:
+    """
+    Append-only rule history per framework.
+    Each update is validated, checked for conflicts and compiled before it becomes
+    current. Compiled evaluators are cached by (framework, version); callers that
+    captured an older evaluator keep using it until they finish.
+    """
+
+    def __init__(self, compile_budget_ms: float = 250.0, cache_size: int = 16):
+        self.versions: Dict[str, List[RuleSetVersion]] = {}
+        self.compile_budget_ms = compile_budget_ms
+        self.cache_size = cache_size
+        self._compiled: Dict[Tuple[str, int], CompiledRuleSet] = {}
+
+    def update(self, framework: str, rules: List[Dict]) -> RuleSetVersion:
+        framework = canonical_framework(framework)
+        errors = validate_rules(rules)
+        if errors:
+            raise RuleValidationError(errors)
+        conflicts = detect_conflicts(rules)
+        if conflicts:
+            raise RuleValidationError(conflicts)
+
+        history = self.versions.setdefault(framework, [])
+        version = RuleSetVersion(
+            framework=framework,
+            version=len(history) + 1,
+            rules=tuple(dict(rule) for rule in rules),
+        )
+
+        started = time.perf_counter()
+        compiled = CompiledRuleSet(framework, version.version, version.rules)
+        version.compile_ms = (time.perf_counter() - started) * 1000
+        if version.compile_ms > self.compile_budget_ms:
+            logger.warning(
+                f"Compiling {len(rules)} {framework} rules took {version.compile_ms:.1f}ms "
+                f"(budget {self.compile_budget_ms:.0f}ms)"
+            )
+
+        self._cache(compiled)
+        history.append(version)
+        return version
+
+    def _cache(self, compiled: CompiledRuleSet):
+        self._compiled[(compiled.framework, compiled.version)] = compiled
+        while len(self._compiled) > self.cache_size:
+            # dicts keep insertion order, so the first key is the oldest entry
+            self._compiled.pop(next(iter(self._compiled)))
+
+    def current_version(self, framework: str) -> Optional[RuleSetVersion]:
+        history = self.versions.get(canonical_framework(framework))
+        return history[-1] if history else None
+
+    def get_evaluator(self, framework: str, version: Optional[int] = None) -> Optional[CompiledRuleSet]:
+        """
+        Compiled evaluator for `version` (latest when omitted), recompiling evicted
+        versions; None when the framework has no rules or the version doesn't exist
+        """
+        framework = canonical_framework(framework)
+        history = self.versions.get(framework)
+        if not history or (version is not None and not 1 <= version <= len(history)):
+            return None
+        entry = history[-1] if version is None else history[version - 1]
+
+        compiled = self._compiled.get((framework, entry.version))
+        if compiled is None:
+            compiled = CompiledRuleSet(framework, entry.version, entry.rules)
+            self._cache(compiled)
+        return compiled
+
+    def describe(self, framework: str) -> Dict:
+        framework = canonical_framework(framework)
+        history = self.versions.get(framework, [])
+        current = history[-1] if history else None
+        return {
+            "framework": framework,
+            "current_version": current.version if current else None,
+            "rules": list(current.rules) if current else [],
+            "history": [
+                {
+                    "version": entry.version,
+                    "rule_count": len(entry.rules),
+                    "created_at": entry.created_at.isoformat(),
+                    "compile_ms": round(entry.compile_ms, 3),
+                }
+                for entry in history
+            ],
+        }
@@ -0,0 +1,391 @@
+"""
+Execution Tracing
+Per-request span recorder for multi-agent runs, with Chrome-trace / OTLP JSON export and offline replay of upstream responses
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_DIR = Path(os.getenv("TRACE_DIR", Path(__file__).resolve().parents[1] / "data" / "traces"))
+TRACE_FORMATS = ("chrome", "otlp")
+# compressed upstream response bytes one trace may record, and all buffered traces together
+MAX_RECORDED_BYTES = int(os.getenv("TRACE_MAX_RECORDED_BYTES", str(2 * 1024 * 1024)))
+BUFFER_MAX_RECORDED_BYTES = int(os.getenv("TRACE_BUFFER_MAX_RECORDED_BYTES", str(32 * 1024 * 1024)))
+
+# trace of the request being served and the innermost open span, inherited by every task it spawns
+_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+class ReplayMiss(Exception):
+    """A replayed run made an upstream request the recording has no response for"""
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "category", "lane", "start_ns", "end_ns", "attrs")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, category: str, lane: str, start_ns: int, attrs: Dict):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.lane = lane
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attrs = attrs
+
+
+class Trace:
+    """
+    Spans, instant events and recorded upstream responses of one request.
+    Timestamps are perf_counter nanoseconds; `wall_start_ns` anchors them to
+    Unix time for OTLP. Recording stops at `max_spans`.
+    Responses are only recorded with `record_responses`; each distinct response
+    is stored once, compressed, and recording stops (the trace is marked
+    truncated) once `max_recorded_bytes` would be exceeded
+    """
+
+    def __init__(
+        self,
+        name: str,
+        attrs: Dict,
+        max_spans: int = 10000,
+        replay_of: Optional["Trace"] = None,
+        record_responses: bool = False,
+        max_recorded_bytes: int = MAX_RECORDED_BYTES
+    ):
+        self.trace_id = os.urandom(16).hex()
+        self.name = name
+        self.attrs = attrs
+        self.max_spans = max_spans
+        self.start_ns = time.perf_counter_ns()
+        self.wall_start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.spans: List[Span] = []
+        self.events: List[Tuple[int, str, str, str, Dict]] = []
+        self.record_responses = record_responses
+        self.max_recorded_bytes = max_recorded_bytes
+        # request key -> response digests in the order they were received; digest -> compressed JSON
+        self.recordings: Dict[str, List[str]] = {}
+        self.recorded_bytes = 0
+        self.recording_truncated = False
+        self._bodies: Dict[str, bytes] = {}
+        self.dropped = 0
+        self.replay_misses = 0
+        self._phases: Dict[str, Span] = {}
+        self._replay = {key: list(digests) for key, digests in replay_of.recordings.items()} if replay_of else None
+        self._replay_bodies = replay_of._bodies if replay_of else {}
+        self.replay_of = replay_of.trace_id if replay_of else None
+
+    def open(self, name: str, category: str, parent: Optional[Span], lane: Optional[str], attrs: Dict) -> Optional[Span]:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return None
+        span = Span(
+            len(self.spans) + 1, parent.span_id if parent else None, name, category,
+            lane or (parent.lane if parent else name), time.perf_counter_ns(), attrs
+        )
+        self.spans.append(span)
+        return span
+
+    def event(self, name: str, category: str, lane: str, attrs: Dict):
+        if len(self.events) < self.max_spans:
+            self.events.append((time.perf_counter_ns(), name, category, lane, attrs))
+
+    def phase(self, lane: str, name: Optional[str]):
+        """Close the lane's current phase and, unless `name` is None, open the next one"""
+        current = self._phases.pop(lane, None)
+        if current is not None:
+            current.end_ns = time.perf_counter_ns()
+        if name is not None:
+            span = self.open(name, "agent", None, lane, {})
+            if span is not None:
+                self._phases[lane] = span
+
+    def finish(self):
+        for lane in list(self._phases):
+            self.phase(lane, None)
+        self.end_ns = time.perf_counter_ns()
+
+    def record(self, key: str, response: Dict):
+        if not self.record_responses or self.recording_truncated:
+            return
+        encoded = json.dumps(response, sort_keys=True, default=str).encode()
+        digest = hashlib.sha256(encoded).hexdigest()
+        if digest not in self._bodies:
+            compressed = zlib.compress(encoded)
+            if self.recorded_bytes + len(compressed) > self.max_recorded_bytes:
+                # a partial recording of later responses would replay out of order
+                self.recording_truncated = True
+                return
+            self._bodies[digest] = compressed
+            self.recorded_bytes += len(compressed)
+        self.recordings.setdefault(key, []).append(digest)
+
+    def drop_recordings(self):
+        self.recordings, self._bodies = {}, {}
+        self.recorded_bytes = 0
+        self.recording_truncated = True
+
+    def responses(self) -> Dict[str, Dict]:
+        """Recorded responses by digest"""
+        return {digest: json.loads(zlib.decompress(body)) for digest, body in self._bodies.items()}
+
+    def replayed(self, key: str) -> Dict:
+        """Next recorded response for `key`; the last one repeats once the recording is used up"""
+        digests = self._replay.get(key)
+        if not digests:
+            self.replay_misses += 1
+            raise ReplayMiss(f"No recorded response for {key}")
+        digest = digests.pop(0) if len(digests) > 1 else digests[0]
+        return json.loads(zlib.decompress(self._replay_bodies[digest]))
+
+    @property
+    def replaying(self) -> bool:
+        return self._replay is not None
+
+    def summary(self) -> Dict:
+        end = self.end_ns or time.perf_counter_ns()
+        by_category: Dict[str, float] = {}
+        for span in self.spans:
+            if span.end_ns is not None:
+                by_category[span.category] = by_category.get(span.category, 0.0) + (span.end_ns - span.start_ns) / 1e6
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "duration_ms": round((end - self.start_ns) / 1e6, 1),
+            "spans": len(self.spans),
+            "events": len(self.events),
+            "dropped_spans": self.dropped,
+            "recorded_responses": sum(len(digests) for digests in self.recordings.values()),
+            "recorded_bytes": self.recorded_bytes,
+            "recording_truncated": self.recording_truncated,
+            "replay_of": self.replay_of,
+            "replay_misses": self.replay_misses,
+            "span_ms_by_category": {category: round(ms, 1) for category, ms in by_category.items()},
+        }
+
+    def to_chrome_trace(self) -> Dict:
+        """Chrome trace event format (chrome://tracing, Perfetto); one thread per lane. Replayable: carries the recordings"""
+        lanes: Dict[str, int] = {}
+        events: List[Dict] = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": self.name}}]
+
+        def tid(lane: str) -> int:
+            if lane not in lanes:
+                lanes[lane] = len(lanes) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lanes[lane], "args": {"name": lane}})
+            return lanes[lane]
+
+        end = self.end_ns or time.perf_counter_ns()
+        for span in self.spans:
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": 1, "tid": tid(span.lane),
+                "ts": (span.start_ns - self.start_ns) / 1000, "dur": ((span.end_ns or end) - span.start_ns) / 1000,
+                "args": span.attrs,
+            })
+        for at, name, category, lane, attrs in self.events:
+            events.append({
+                "name": name, "cat": category, "ph": "i", "s": "t", "pid": 1, "tid": tid(lane),
+                "ts": (at - self.start_ns) / 1000, "args": attrs,
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "trace_id": self.trace_id,
+                "name": self.name,
+                "attrs": self.attrs,
+                "wall_start_ns": self.wall_start_ns,
+                "replay_of": self.replay_of,
+                "recordings": self.recordings,
+                "responses": self.responses(),
+                "recording_truncated": self.recording_truncated,
+            },
+        }
+
+    def to_otlp(self, service_name: str = "defi-compliance-ai") -> Dict:
+        """OTLP/JSON ExportTraceServiceRequest"""
+        def attributes(values: Dict) -> List[Dict]:
+            converted = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    converted.append({"key": key, "value": {"boolValue": value}})
+                elif isinstance(value, int):
+                    converted.append({"key": key, "value": {"intValue": str(value)}})
+                elif isinstance(value, float):
+                    converted.append({"key": key, "value": {"doubleValue": value}})
+                else:
+                    converted.append({"key": key, "value": {"stringValue": str(value)}})
+            return converted
+
+        def unix(ns: int) -> str:
+            return str(self.wall_start_ns + ns - self.start_ns)
+
+        end = self.end_ns or time.perf_counter_ns()
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": f"{span.span_id:016x}",
+                **({"parentSpanId": f"{span.parent_id:016x}"} if span.parent_id else {}),
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": unix(span.start_ns),
+                "endTimeUnixNano": unix(span.end_ns or end),
+                "attributes": attributes({"category": span.category, "lane": span.lane, **span.attrs}),
+            }
+            for span in self.spans
+        ]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": attributes({"service.name": service_name})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
+
+    @classmethod
+    def from_chrome_trace(cls, data: Dict) -> "Trace":
+        """Rebuild a trace's identity and recordings from an exported Chrome trace, for replay"""
+        other = data["otherData"]
+        trace = cls(other["name"], other["attrs"], record_responses=True, max_recorded_bytes=float("inf"))
+        trace.trace_id = other["trace_id"]
+        responses = other["responses"]
+        for key, digests in other["recordings"].items():
+            for digest in digests:
+                trace.record(key, responses[digest])
+        trace.record_responses = False
+        trace.recording_truncated = other.get("recording_truncated", False)
+        trace.end_ns = trace.start_ns
+        return trace
+
+
+class TraceBuffer:
+    """
+    The most recent finished traces, oldest evicted first. Once their recorded
+    responses add up to more than `max_recorded_bytes`, the oldest traces lose
+    their recordings (and with them replay) but keep their spans
+    """
+
+    def __init__(
+        self, max_traces: int = 50, trace_dir: Path = DEFAULT_TRACE_DIR, max_recorded_bytes: int = BUFFER_MAX_RECORDED_BYTES
+    ):
+        self.max_traces = max_traces
+        self.trace_dir = Path(trace_dir)
+        self.max_recorded_bytes = max_recorded_bytes
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+    def add(self, trace: Trace):
+        self._traces[trace.trace_id] = trace
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+        recorded = sum(each.recorded_bytes for each in self._traces.values())
+        for oldest in self._traces.values():
+            if recorded <= self.max_recorded_bytes:
+                break
+            recorded -= oldest.recorded_bytes
+            if oldest.recorded_bytes:
+                oldest.drop_recordings()
+
+    def recorded_bytes(self) -> int:
+        return sum(trace.recorded_bytes for trace in self._traces.values())
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return self._traces.get(trace_id)
+
+    def list(self) -> List[Dict]:
+        return [trace.summary() for trace in reversed(self._traces.values())]
+
+    def export(self, trace: Trace, fmt: str = "chrome") -> Path:
+        """Write a trace to <trace_dir>/<trace_id>.<fmt>.json; Chrome files can be replayed later"""
+        data = trace.to_chrome_trace() if fmt == "chrome" else trace.to_otlp()
+        path = self.trace_dir / f"{trace.trace_id}.{fmt}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(data, handle, default=str)
+        os.replace(tmp, path)
+        return path
+
+    def load(self, path: Path) -> Trace:
+        with open(path) as handle:
+            return Trace.from_chrome_trace(json.load(handle))
+
+
+trace_buffer = TraceBuffer(max_traces=int(os.getenv("TRACE_BUFFER_SIZE", "50")))
+
+
+@contextmanager
+def trace(
+    name: str,
+    buffer: Optional[TraceBuffer] = None,
+    replay_of: Optional[Trace] = None,
+    record_responses: bool = False,
+    **attrs: Any
+):
+    """Record everything traced inside the block (and its tasks) into a new Trace"""
+    current = Trace(name, attrs, replay_of=replay_of, record_responses=record_responses)
+    trace_token, span_token = _trace.set(current), _span.set(None)
+    try:
+        yield current
+    finally:
+        current.finish()
+        _span.reset(span_token)
+        _trace.reset(trace_token)
+        if buffer is not None:
+            buffer.add(current)
+
+
+@contextmanager
+def span(name: str, category: str = "internal", lane: Optional[str] = None, **attrs: Any):
+    """Time the block as a child of the current span; a no-op outside a trace"""
+    current = _trace.get()
+    opened = current.open(name, category, _span.get(), lane, attrs) if current is not None else None
+    if opened is None:
+        yield None
+        return
+    token = _span.set(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        opened.attrs["error"] = repr(e)
+        raise
+    finally:
+        opened.end_ns = time.perf_counter_ns()
+        _span.reset(token)
+
+
+def annotate(**attrs: Any):
+    """Add attributes to the innermost open span"""
+    opened = _span.get()
+    if opened is not None:
+        opened.attrs.update(attrs)
+
+
+def event(name: str, category: str = "internal", lane: Optional[str] = None, **attrs: Any):
+    current = _trace.get()
+    if current is not None:
+        parent = _span.get()
+        current.event(name, category, lane or (parent.lane if parent else name), attrs)
+
+
+def phase(lane: str, name: Optional[str]):
+    """Start the next phase of a long-lived actor (an agent); None ends its current phase"""
+    current = _trace.get()
+    if current is not None:
+        current.phase(lane, name)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
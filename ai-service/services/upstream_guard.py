@@ -0,0 +1,270 @@
+"""
+Upstream Guard
+Circuit breakers, request deadlines, hedged requests and last-known-good fallback for external data fetches
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# absolute monotonic deadline of the request being served, inherited by every task it spawns
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """Bound every guarded fetch made inside the block (and its tasks) by `seconds` from now"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class UpstreamHTTPError(Exception):
+    """The upstream answered with a status that indicates it is unhealthy (429, 5xx)"""
+
+    def __init__(self, name: str, status: int):
+        super().__init__(f"{name} responded {status}")
+        self.name = name
+        self.status = status
+
+
+class UpstreamRequestError(Exception):
+    """The upstream rejected the request itself (a 4xx other than 429); its body is not data"""
+
+    def __init__(self, name: str, status: int):
+        super().__init__(f"{name} rejected the request with {status}")
+        self.name = name
+        self.status = status
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for {name} is open; next probe in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through; `failure_threshold` consecutive failures (errors,
+    timeouts or calls slower than `slow_call_threshold`) open the circuit.
+    open: calls fail fast for `reset_timeout` seconds.
+    half_open: up to `half_open_probes` calls probe the upstream; a success
+    closes the circuit, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call_threshold: Optional[float] = None,
+        half_open_probes: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.half_open_probes = half_open_probes
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.transitions = 0
+
+    def allow(self):
+        """Raise CircuitOpen unless a call may go to the upstream now"""
+        if self.state == "open":
+            waited = time.monotonic() - self._opened_at
+            if waited < self.reset_timeout:
+                raise CircuitOpen(self.name, self.reset_timeout - waited)
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self._probes >= self.half_open_probes:
+                raise CircuitOpen(self.name, 0.0)
+            self._probes += 1
+
+    def record(self, success: bool, latency: Optional[float] = None):
+        if success and self.slow_call_threshold is not None and latency is not None and latency > self.slow_call_threshold:
+            success = False
+        if self.state == "half_open":
+            self._probes = max(0, self._probes - 1)
+            self._transition("closed" if success else "open")
+        elif success:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            if self.state == "closed" and self.consecutive_failures >= self.failure_threshold:
+                self._transition("open")
+
+    def release(self):
+        """A call was abandoned by its caller; neither outcome is known"""
+        if self.state == "half_open":
+            self._probes = max(0, self._probes - 1)
+
+    def _transition(self, state: str):
+        logger.info(f"Circuit {self.name}: {self.state} -> {state}")
+        self.state = state
+        self.transitions += 1
+        if state == "open":
+            self._opened_at = time.monotonic()
+        if state == "closed":
+            self.consecutive_failures = 0
+        self._probes = 0
+
+    def metrics(self) -> Dict:
+        metrics = {"state": self.state, "consecutive_failures": self.consecutive_failures, "transitions": self.transitions}
+        if self.state == "open":
+            metrics["next_probe_in_seconds"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+        return metrics
+
+
+class UpstreamGuard:
+    """
+    Wraps fetches from one upstream. Each call gets at most `timeout` seconds
+    (less if the request's deadline is closer) and goes through the circuit
+    breaker. With `hedge` enabled, a second attempt is started once the first
+    has been outstanding longer than the observed p95 latency, and whichever
+    answers first wins. Successful results are kept per key as last-known-good
+    snapshots and served, for up to `max_staleness` seconds, whenever the
+    upstream fails, times out or its circuit is open. `neutral_errors` (e.g.
+    local rate limiting) fall back without counting against the upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = False,
+        min_hedge_delay: float = 0.05,
+        max_staleness: float = 3600.0,
+        max_snapshots: int = 256,
+        neutral_errors: Tuple[type, ...] = ()
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(name)
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.max_staleness = max_staleness
+        self.max_snapshots = max_snapshots
+        self.neutral_errors = neutral_errors
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._snapshots: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"calls": 0, "succeeded": 0, "failed": 0, "timed_out": 0, "short_circuited": 0, "hedged": 0, "hedge_wins": 0, "served_stale": 0}
+
+    def p95(self) -> Optional[float]:
+        """p95 latency of recent successful calls, once there are enough samples to trust it"""
+        if len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def call(self, key: str, fetch: Callable[[bool], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        (result, source) with source "live" or "stale". `fetch(hedged)` performs
+        one attempt; hedged is True for the speculative second attempt. Raises
+        the upstream's error only when there is no usable snapshot
+        """
+        self.stats["calls"] += 1
+        timeout = self.timeout
+        remaining = time_remaining()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        try:
+            if timeout <= 0:
+                raise asyncio.TimeoutError(f"Request deadline passed before calling {self.name}")
+            self.breaker.allow()
+        except (CircuitOpen, asyncio.TimeoutError) as e:
+            self.stats["short_circuited" if isinstance(e, CircuitOpen) else "timed_out"] += 1
+            return self._fallback(key, e)
+
+        started = time.monotonic()
+        try:
+            # attempts see this call's own deadline through time_remaining()
+            with request_deadline(timeout):
+                result = await asyncio.wait_for(self._attempts(fetch), timeout)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except self.neutral_errors as e:
+            self.breaker.release()
+            self.stats["failed"] += 1
+            return self._fallback(key, e)
+        except Exception as e:
+            self.breaker.record(False)
+            self.stats["timed_out" if isinstance(e, asyncio.TimeoutError) else "failed"] += 1
+            return self._fallback(key, e)
+        latency = time.monotonic() - started
+        self.breaker.record(True, latency)
+        self._latencies.append(latency)
+        self.stats["succeeded"] += 1
+        self._snapshots.pop(key, None)
+        self._snapshots[key] = (time.monotonic(), result)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return result, "live"
+
+    async def _attempts(self, fetch: Callable[[bool], Awaitable[Any]]) -> Any:
+        primary = asyncio.ensure_future(fetch(False))
+        pending = {primary}
+        try:
+            p95 = self.p95() if self.hedge else None
+            if p95 is not None:
+                done, _ = await asyncio.wait(pending, timeout=max(self.min_hedge_delay, p95))
+                if not done:
+                    self.stats["hedged"] += 1
+                    pending.add(asyncio.ensure_future(fetch(True)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return attempt.result()
+                    # keep waiting on the other attempt; report the first failure if both fail
+                    error = error or attempt.exception()
+            raise error
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+
+    def _fallback(self, key: str, error: BaseException) -> Tuple[Any, str]:
+        snapshot = self._snapshots.get(key)
+        if snapshot is None or time.monotonic() - snapshot[0] > self.max_staleness:
+            raise error
+        self.stats["served_stale"] += 1
+        logger.warning(f"{self.name} unavailable ({error!r}); serving {key} snapshot from {time.monotonic() - snapshot[0]:.0f}s ago")
+        return snapshot[1], "stale"
+
+    def metrics(self) -> Dict:
+        p95 = self.p95()
+        return {
+            "timeout_seconds": self.timeout,
+            "hedging": self.hedge,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "snapshots": len(self._snapshots),
+            "circuit": self.breaker.metrics(),
+            **self.stats,
+        }
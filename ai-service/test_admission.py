@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control in front of the multi-agent demo
+"""
+
+import asyncio
+from services.admission import AdmissionController, AdmissionRejected
+from services.multi_agent_system import TaskPriority
+
+async def test_priority_fairness_and_rejection():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, initial_service_time=2.0)
+    order = []
+    gate = asyncio.Event()
+
+    async def request(institution, priority, hold=False):
+        async with controller.admit(institution, priority):
+            order.append((institution, priority.value))
+            if hold:
+                await gate.wait()
+
+    blocker = asyncio.create_task(request("jpmorgan", TaskPriority.LOW, hold=True))
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.create_task(request("jpmorgan", TaskPriority.MEDIUM)),
+        asyncio.create_task(request("jpmorgan", TaskPriority.MEDIUM)),
+        asyncio.create_task(request("goldman", TaskPriority.MEDIUM)),
+        asyncio.create_task(request("blackrock", TaskPriority.LOW)),
+    ]
+    await asyncio.sleep(0)
+    assert controller.queued == 4
+
+    # full queue: a LOW newcomer is rejected, a CRITICAL one displaces the LOW waiter
+    try:
+        await request("fidelity", TaskPriority.LOW)
+        raise AssertionError("expected AdmissionRejected")
+    except AdmissionRejected as e:
+        assert e.retry_after >= 2
+    critical = asyncio.create_task(request("fidelity", TaskPriority.CRITICAL))
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(blocker, critical, *waiters, return_exceptions=True)
+
+    assert isinstance(results[-1], AdmissionRejected)  # blackrock's LOW request was shed
+    # CRITICAL first; goldman has nothing outstanding so it goes ahead of jpmorgan's queued requests
+    assert order == [
+        ("jpmorgan", "low"), ("fidelity", "critical"),
+        ("goldman", "medium"), ("jpmorgan", "medium"), ("jpmorgan", "medium"),
+    ]
+    metrics = controller.metrics()
+    assert metrics["running"] == 0 and metrics["queued"] == 0 and metrics["outstanding_by_institution"] == {}
+    assert (metrics["rejected"], metrics["shed"], metrics["completed"]) == (1, 1, 5)
+    assert metrics["queue_wait"]["medium"]["samples"] == 3
+
+async def test_cancelled_waiter_frees_its_place():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, max_outstanding_per_institution=2)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit("a", TaskPriority.LOW):
+            await release.wait()
+
+    first = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    try:
+        await hold()
+        raise AssertionError("expected per-institution rejection")
+    except AdmissionRejected:
+        pass
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert controller.queued == 0 and controller.counters["abandoned"] == 1
+    release.set()
+    await first
+    assert controller.running == 0
+
+async def main():
+    await test_priority_fairness_and_rejection()
+    await test_cancelled_waiter_frees_its_place()
+    print("✅ Admission control tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
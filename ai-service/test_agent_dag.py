@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the agent task DAG scheduler and the multi-agent workflow built on it
+"""
+
+import asyncio
+import time
+from aiohttp import web
+from services.agent_dag import TaskFailed, TaskGraph, TaskGraphError
+from services.multi_agent_system import MultiAgentDeFiSystem
+
+async def test_steps_start_when_inputs_resolve():
+    started = {}
+    calls = {"parse": 0, "flaky": 0}
+
+    async def step(name, delay, value=None):
+        started[name] = time.perf_counter()
+        await asyncio.sleep(delay)
+        return value
+
+    async def parse(request):
+        calls["parse"] += 1
+        return request.upper()
+
+    async def flaky(parsed):
+        calls["flaky"] += 1
+        if calls["flaky"] < 2:
+            raise ConnectionError("upstream reset")
+        return f"fetched {parsed}"
+
+    async def never_finishes(parsed):
+        await asyncio.sleep(10)
+
+    graph = (
+        TaskGraph().seed("request")
+        .add("parse", parse, ["request"])
+        .add("fetch", flaky, ["parse"], retries=1, retry_delay=0.01)
+        .add("slow", lambda parsed: step("slow", 0.2), ["parse"])
+        .add("fast", lambda parsed: step("fast", 0.01, parsed), ["parse"])
+        .add("after_fast", lambda fast: step("after_fast", 0, fast + "!"), ["fast"])
+        .add("optional", never_finishes, ["parse"], timeout=0.05, tolerate_failure=True)
+        .add("join", lambda *inputs: step("join", 0, inputs), ["fetch", "slow", "after_fast", "optional"])
+    )
+    run = await graph.run(request="aave")
+
+    assert calls == {"parse": 1, "flaky": 2}
+    # after_fast did not wait for the slow sibling
+    assert started["after_fast"] < started["slow"] + 0.1
+    fetched, _, chained, optional = run.results["join"]
+    assert fetched == "fetched AAVE" and chained == "AAVE!"
+    assert isinstance(optional, asyncio.TimeoutError)
+    assert run.timings["optional"].status == "failed" and run.timings["fetch"].attempts == 2
+    assert run.critical_path() == ["parse", "slow", "join"]
+
+async def test_required_failure_and_invalid_graphs():
+    async def boom():
+        raise ValueError("bad input")
+
+    async def downstream(value):
+        return value
+
+    graph = TaskGraph().add("boom", boom).add("downstream", downstream, ["boom"])
+    try:
+        await graph.run()
+        raise AssertionError("expected TaskFailed")
+    except TaskFailed as e:
+        assert e.name == "boom" and isinstance(e.error, ValueError)
+
+    for broken in (
+        TaskGraph().add("a", downstream, ["b"]).add("b", downstream, ["a"]),
+        TaskGraph().add("a", downstream, ["missing"]),
+    ):
+        try:
+            broken.order()
+            raise AssertionError("expected TaskGraphError")
+        except TaskGraphError:
+            pass
+
+async def test_institutional_request_runs_as_dag():
+    requests = {"defillama": 0, "coingecko": 0}
+
+    async def defillama(request):
+        requests["defillama"] += 1
+        return web.json_response({"tvl": [{"totalLiquidityUSD": 12_000_000_000}]})
+
+    async def coingecko(request):
+        requests["coingecko"] += 1
+        return web.json_response({"market_data": {"price_change_percentage_24h": 1.5, "market_cap": {"usd": 4_000_000_000}}})
+
+    app = web.Application()
+    app.router.add_get("/protocol/{name}", defillama)
+    app.router.add_get("/coins/{coin}", coingecko)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    system = MultiAgentDeFiSystem()
+    system.defillama_api = base
+    system.coingecko_api = base
+    try:
+        result = await system.process_institutional_request("Should JPMorgan invest $500M in Aave?", "jpmorgan")
+    finally:
+        await runner.cleanup()
+
+    # research and risk both read the market data; it is fetched once
+    assert requests == {"defillama": 1, "coingecko": 1}
+    assert result["shared_facts"]["market_data"]["requests"] == 2
+    assert result["protocol_analyzed"] == "Aave" and result["priority"] == "medium"
+    steps = result["workflow"]["steps"]
+    assert all(step["status"] == "completed" for step in steps.values())
+    # risk and regulatory analysis start before research finishes
+    research_end = steps["research"]["started_ms"] + steps["research"]["duration_ms"]
+    assert steps["risk"]["started_ms"] < research_end and steps["regulatory"]["started_ms"] < research_end
+    # the debate runs alongside execution instead of in front of it
+    assert steps["execution"]["started_ms"] < steps["debate"]["started_ms"] + steps["debate"]["duration_ms"]
+    assert result["workflow"]["critical_path"][-1] == "summary"
+
+async def main():
+    await test_steps_start_when_inputs_resolve()
+    await test_required_failure_and_invalid_graphs()
+    await test_institutional_request_runs_as_dag()
+    print("✅ Agent DAG tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for immutable agent state records and cached status snapshots
+"""
+
+import asyncio
+import dataclasses
+from services.multi_agent_system import AgentStatus, MultiAgentDeFiSystem
+
+async def test_status_snapshot_reuses_unchanged_agents():
+    system = MultiAgentDeFiSystem()
+    first = system.get_real_time_status()
+    # nothing changed: the same response object, nothing re-serialised
+    assert system.get_real_time_status() is first
+    assert first["agents"]["risk_agent"]["status"] == "idle" and first["system_status"] == "IDLE"
+
+    record = system.agents["research_agent"]
+    try:
+        record.progress = 50
+        raise AssertionError("expected agent records to be immutable")
+    except dataclasses.FrozenInstanceError:
+        pass
+    assert not hasattr(record, "__dict__")
+
+    await system._update_agent_status("research_agent", AgentStatus.RESEARCHING, "Fetching protocol data")
+    await system._add_collaboration_message("research_agent", "coordinator_agent", "findings_report", "Done", {})
+    second = system.get_real_time_status()
+    assert second is not first and second["version"] > first["version"]
+    research = second["agents"]["research_agent"]
+    assert research["status"] == "researching" and research["conversation_history"] == ["→ Done"]
+    assert isinstance(research["timestamp"], str)
+    assert second["agents"]["coordinator_agent"]["conversation_history"] == ["← Done"]
+    # agents that did not change keep their serialised dicts
+    assert second["agents"]["risk_agent"] is first["agents"]["risk_agent"]
+    assert first["agents"]["research_agent"]["status"] == "idle"
+    assert second["collaboration_log"][-1]["content"] == "Done" and second["system_status"] == "ACTIVE"
+
+async def main():
+    await test_status_snapshot_reuses_unchanged_agents()
+    print("✅ Agent state tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
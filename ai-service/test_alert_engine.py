@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for alert rule matching, de-duplication, rate limiting and webhook delivery
+"""
+
+import asyncio
+import time
+from aiohttp import web
+from services.alert_engine import AlertEngine
+from services.regulatory_monitor import RegulatoryMonitor
+from services.report_jobs import ComplianceReportStore
+
+async def test_rules_match_by_jurisdiction_protocol_and_severity():
+    engine = AlertEngine(database_url="")
+    engine.register("inst_us", {"rules": [
+        {"rule_id": "us_aave", "jurisdictions": ["US"], "protocols": ["aave"], "min_severity": "MEDIUM"},
+    ]})
+    engine.register("inst_any", {"event_type": "regulatory_update"})
+    engine.register("inst_eu", {"jurisdictions": ["EU"]})
+
+    event = {"event_type": "regulatory_update", "jurisdiction": "US", "protocols": ["Aave"],
+             "severity": "HIGH", "title": "SEC action"}
+    alerts = await engine.process_event(event)
+    assert sorted(a["institution_id"] for a in alerts) == ["inst_any", "inst_us"]
+    assert all(a["alert_type"] == "REGULATORY_CHANGE" for a in alerts)
+
+    # same event again is de-duplicated
+    assert await engine.process_event(event) == []
+
+    low = {**event, "severity": "LOW", "title": "Minor SEC note"}
+    assert [a["institution_id"] for a in await engine.process_event(low)] == ["inst_any"]
+
+    # re-registering replaces the previous rules
+    engine.register("inst_us", {"jurisdictions": ["UK"]})
+    assert [r.institution_id for r in engine.match(event)] == ["inst_any"]
+
+async def test_aml_flags_only_alert_owner_and_rate_limit():
+    engine = AlertEngine(database_url="", rate_limits={"email": (2, 3600.0)})
+    for institution in ("inst_a", "inst_b"):
+        engine.register(institution, {"event_type": "aml_flag", "channels": ["email", "dashboard"]})
+
+    alerts = []
+    for i in range(3):
+        alerts += await engine.process_event({
+            "event_type": "aml_flag", "institution_id": "inst_a",
+            "severity": "HIGH", "title": f"AML flag {i}",
+        })
+    assert {a["institution_id"] for a in alerts} == {"inst_a"}
+    assert [a["channels"]["email"] for a in alerts] == ["delivered", "delivered", "rate_limited"]
+    assert all(a["channels"]["dashboard"] == "delivered" for a in alerts)
+    assert all(a["alert_type"] == "SUSPICIOUS_TRANSACTION" for a in alerts)
+
+async def test_dedup_window_and_transaction_identity():
+    engine = AlertEngine(database_url="", dedup_window_seconds=60.0)
+    engine.register("inst_a", {"event_type": "aml_flag", "min_severity": "HIGH"})
+    flag = {"event_type": "aml_flag", "institution_id": "inst_a", "severity": "high",
+            "title": "AML flags on transfer from 0xabc", "to_address": "0xdef", "amount": 1_000_000}
+
+    first = await engine.process_event(flag)
+    assert len(first) == 1 and first[0]["severity"] == "HIGH"  # lower-case severities still rank
+    assert await engine.process_event({**flag, "severity": "HIGH"}) == []
+    # same title, different transfer
+    assert len(await engine.process_event({**flag, "amount": 2_000_000})) == 1
+    assert len(await engine.process_event({**flag, "to_address": "0x123"})) == 1
+    assert len(await engine.process_event({**flag, "tx_hash": "0x" + "ab" * 32})) == 1
+
+    # once the window has passed the same event alerts again, even before the seen map is pruned
+    for key in engine._seen:
+        engine._seen[key] -= 61.0
+    assert len(await engine.process_event(flag)) == 1
+    assert await engine.process_event(flag) == []
+
+async def test_deliveries_run_concurrently():
+    engine = AlertEngine()
+    started = []
+
+    async def slow(channel, alert, options):
+        started.append((alert["rule_id"], channel))
+        await asyncio.sleep(0.2)
+        if channel == "email":
+            raise RuntimeError("smtp down")
+
+    engine.dispatchers.update({"webhook": slow, "email": slow})
+    for rule_id in ("a", "b"):
+        engine.register(f"inst_{rule_id}", {"rule_id": rule_id, "event_type": "regulatory_update",
+                                             "channels": ["webhook", "email"], "webhook_url": "http://hook"})
+    begun = time.monotonic()
+    alerts = await engine.process_event({"event_type": "regulatory_update", "severity": "urgent", "title": "Rule"})
+    assert time.monotonic() - begun < 0.35 and len(started) == 4
+    assert [list(alert["channels"].items()) for alert in alerts] == [[("webhook", "delivered"), ("email", "failed")]] * 2
+    # a severity outside the AlertSeverity enum is stored as LOW
+    assert {alert["severity"] for alert in alerts} == {"LOW"}
+
+def test_stores_share_one_pool():
+    engine, store = AlertEngine(database_url="postgres://db/app"), ComplianceReportStore("postgres://db/app")
+    assert engine.db is store.db and engine.db.enabled
+    assert AlertEngine(database_url="").db is not engine.db
+
+async def test_feed_updates_trigger_webhook_alerts():
+    received = []
+
+    async def hook(request):
+        received.append(await request.json())
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/hook", hook)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    monitor = RegulatoryMonitor(feed_sources=[])
+    try:
+        await monitor.setup_alerts("inst_1", {"rules": [{
+            "rule_id": "usdc", "protocols": ["USDC"], "min_severity": "MEDIUM",
+            "channels": ["webhook"], "webhook_url": f"http://127.0.0.1:{port}/hook",
+        }]})
+        update = {"source": "SEC", "title": "Staff Guidance on USDC Custody", "impact": "MEDIUM",
+                  "summary": "Guidance", "url": "https://sec.example/1", "affected_tokens": ["USDC"],
+                  "content_hash": "abc"}
+        await monitor._on_new_update(update)
+        alerts = await monitor.get_alerts("inst_1")
+        assert len(alerts) == 1 and alerts[0]["channels"]["webhook"] == "delivered"
+        assert received[0]["rule_id"] == "usdc"
+    finally:
+        await monitor.stop_polling()
+        await runner.cleanup()
+
+async def main():
+    await test_rules_match_by_jurisdiction_protocol_and_severity()
+    await test_aml_flags_only_alert_owner_and_rate_limit()
+    await test_dedup_window_and_transaction_identity()
+    await test_deliveries_run_concurrently()
+    test_stores_share_one_pool()
+    await test_feed_updates_trigger_webhook_alerts()
+    print("✅ Alert engine tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
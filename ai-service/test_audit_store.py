@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the bytecode-keyed audit store against a local stand-in JSON-RPC node
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+from aiohttp import web
+from services.audit_store import AuditStore
+from services.protocol_auditor import ProtocolAuditor
+
+# PUSH1 0 PUSH1 0 DELEGATECALL STOP
+PROXY_CODE = "0x60006000f400"
+
+async def test_identical_deployments_share_one_audit():
+    get_code_calls = []
+
+    async def rpc(request):
+        body = await request.json()
+        assert body["method"] == "eth_getCode"
+        get_code_calls.append(body["params"][0])
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": PROXY_CODE})
+
+    app = web.Application()
+    app.router.add_post("/", rpc)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    os.environ["CHAIN_RPC_URLS"] = json.dumps({"1337": f"http://127.0.0.1:{port}", "1": f"http://127.0.0.1:{port}"})
+
+    with tempfile.TemporaryDirectory() as root:
+        auditor = ProtocolAuditor(contracts_root=Path(root) / "none", max_workers=1, audit_store=AuditStore(Path(root)))
+        try:
+            first = await auditor.audit_smart_contract("0xAAA", 1337)
+            assert first["analysis_mode"] == "bytecode"
+            assert [f["type"] for f in first["vulnerabilities"]] == ["Delegatecall", "Missing Access Control"]
+            assert first["access_controls"] == "NONE"
+
+            # the same bytecode on another chain reuses the stored audit
+            clone = await auditor.audit_smart_contract("0xBBB", 1)
+            assert clone["code_hash"] == first["code_hash"]
+            assert len(list((Path(root) / "objects").glob("*/*.json"))) == 1
+            assert {d["address"] for d in auditor.audit_store.deployments_of(first["code_hash"])} == {"0xAAA", "0xBBB"}
+        finally:
+            auditor.audit_pipeline.shutdown()
+
+        # a fresh process resolves known deployments from disk without touching the chain
+        restarted = ProtocolAuditor(contracts_root=Path(root) / "none", audit_store=AuditStore(Path(root)))
+        calls_before = len(get_code_calls)
+        again = await restarted.audit_smart_contract("0xaaa", 1337)
+        assert again["code_hash"] == first["code_hash"]
+        assert len(get_code_calls) == calls_before
+        assert restarted.audit_pipeline._executor is None
+
+    os.environ.pop("CHAIN_RPC_URLS")
+    await runner.cleanup()
+
+async def main():
+    await test_identical_deployments_share_one_audit()
+    print("✅ Audit store tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Tests for batched transaction submission, local nonces and receipt polling against a local stand-in dev node
+"""
+
+import asyncio
+import hashlib
+import time
+from aiohttp import web
+from services.chain_executor import ChainExecutor
+from services.evm_abi import decode_values, function_selector, load_abis
+from services.multi_agent_system import MultiAgentDeFiSystem
+from services.request_context import RequestContext
+from services.rpc_client import BatchedRPCClient
+
+TREASURY = "0x252ef808de409bc6718b56e1bbcad52037152d42"
+ORACLE = "0x820bd166b883b508bdcb7516bd15ea798bdaf6d7"
+SENDER = "0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266"  # first Hardhat / anvil dev account
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+AAVE = "0x7d2768de32b0b80b7a3454c06bdac94a69ddc7a9"
+UNLISTED = "0x" + "0d" * 20
+REJECTED = "0x" + "de" * 20
+
+class StandInDevNode:
+    """
+    Automining dev node (Hardhat-like) for one unlocked account: transactions
+    must arrive in nonce order, are mined `block_time` seconds after they are
+    accepted, and investInProtocol reverts for protocols not whitelisted
+    """
+
+    def __init__(self, delay: float = 0.0, block_time: float = 0.02):
+        self.delay = delay
+        self.block_time = block_time
+        self.nonce = 0
+        self.whitelisted = {AAVE}
+        self.reverse_batches = False
+        self.http_requests = 0
+        self.transactions = {}
+        self.started = time.monotonic()
+        abis = load_abis(["InstitutionalTreasury", "RegulatoryOracle"])
+        self.selectors = {
+            function_selector(entry): entry for abi in abis.values() for entry in abi if entry.get("type") == "function"
+        }
+
+    def error(self, call, message):
+        return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": message}}
+
+    def send(self, call, tx):
+        nonce = int(tx["nonce"], 16)
+        if nonce > self.nonce:
+            return self.error(call, f"Nonce too high. Expected nonce to be {self.nonce} but got {nonce}. "
+                                    "Note that transactions can't be queued when automining.")
+        if nonce < self.nonce:
+            return self.error(call, f"Nonce too low. Expected nonce to be {self.nonce} but got {nonce}.")
+        status = 1
+        entry = self.selectors.get(tx.get("data", "0x")[:10])
+        if entry is not None and entry["name"] == "investInProtocol":
+            protocol, _, amount, _ = decode_values([p["type"] for p in entry["inputs"]], bytes.fromhex(tx["data"][10:]))
+            if protocol == REJECTED:
+                return self.error(call, "Transaction gas limit exceeds block gas limit")
+            status = int(protocol in self.whitelisted)
+        tx_hash = "0x" + hashlib.sha256(f"{tx['from']}:{nonce}".encode()).hexdigest()
+        self.transactions[tx_hash] = {**tx, "status": status, "mined_at": time.monotonic() + self.block_time}
+        self.nonce += 1
+        return {"jsonrpc": "2.0", "id": call["id"], "result": tx_hash}
+
+    def receipt(self, tx_hash):
+        tx = self.transactions.get(tx_hash)
+        if tx is None or time.monotonic() < tx["mined_at"]:
+            return None
+        return {
+            "transactionHash": tx_hash,
+            "status": hex(tx["status"]),
+            "blockNumber": hex(1 + int((tx["mined_at"] - self.started) / self.block_time)),
+            "gasUsed": hex(21_000 if tx["to"] == tx["from"] else 150_000),
+        }
+
+    def handle(self, call):
+        method, params = call["method"], call["params"]
+        if method == "eth_getTransactionCount":
+            result = hex(self.nonce)
+        elif method == "eth_sendTransaction":
+            return self.send(call, params[0])
+        elif method == "eth_getTransactionReceipt":
+            result = self.receipt(params[0])
+        else:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": method}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def rpc(self, request):
+        self.http_requests += 1
+        body = await request.json()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if isinstance(body, list):
+            calls = list(reversed(body)) if self.reverse_batches else body
+            return web.json_response([self.handle(call) for call in calls])
+        return web.json_response(self.handle(body))
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/", self.rpc)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def executor_for(url, **kwargs) -> ChainExecutor:
+    return ChainExecutor(BatchedRPCClient(url), SENDER, TREASURY, ORACLE, poll_interval=0.01, **kwargs)
+
+async def test_parallel_investments_share_batches():
+    node = StandInDevNode()
+    url = await node.start()
+    executor = executor_for(url)
+    try:
+        results = await asyncio.gather(*(
+            executor.execute_investment("Aave", AAVE, USDC, 1_000_000 * (i + 1), risk_level="LOW") for i in range(20)
+        ))
+    finally:
+        await executor.close()
+        await node.stop()
+
+    records = [record for pair in results for record in pair]
+    assert len(records) == 40 and all(record["status"] == "SUCCESS" for record in records)
+    assert [pair[0]["type"] for pair in results] == ["Compliance Approval"] * 20
+    nonces = sorted(int(node.transactions[record["tx_hash"]]["nonce"], 16) for record in records)
+    assert nonces == list(range(40)) and node.nonce == 40
+    # one nonce sync, the submissions in one batch, then a few batched receipt polls
+    assert node.http_requests <= 8, node.http_requests
+    assert executor.stats["confirmed"] == 40 and executor.stats["receipt_polls"] < 10
+
+async def test_rejected_nonce_is_filled_and_order_recovers():
+    node = StandInDevNode()
+    node.nonce = 7
+    node.reverse_batches = True  # later nonces reach the node first
+    url = await node.start()
+    executor = executor_for(url)
+    rule = {"type": "Compliance Approval", "contract": "RegulatoryOracle", "function": "createComplianceRule",
+            "args": ["Aave institutional allocation", 2, 0, "FCA approved"]}
+
+    def invest(protocol):
+        return {"type": "Investment Execution", "contract": "InstitutionalTreasury", "function": "investInProtocol",
+                "args": [protocol, USDC, 10 ** 12, b""]}
+
+    try:
+        records = await executor.execute([rule, invest(REJECTED), invest(UNLISTED), rule])
+        again = await executor.execute([rule])
+    finally:
+        await executor.close()
+        await node.stop()
+
+    assert [record["status"] for record in records] == ["SUCCESS", "REJECTED", "REVERTED", "SUCCESS"]
+    assert "gas limit" in records[1]["error"] and records[1]["tx_hash"] is None
+    assert records[3]["block_number"] >= records[0]["block_number"] and records[3]["gas_used"] == 150_000
+    assert executor.stats["gap_fills"] == 1 and executor.stats["rejected"] == 1 and executor.stats["reverted"] == 1
+    # nonces 7..10 used (8 by the gap filler), the next batch carries on from local state
+    assert again[0]["status"] == "SUCCESS" and int(node.transactions[again[0]["tx_hash"]]["nonce"], 16) == 11
+
+async def test_unmined_transactions_time_out():
+    node = StandInDevNode(block_time=10)
+    url = await node.start()
+    executor = executor_for(url, receipt_timeout=0.05)
+    try:
+        await executor.execute_investment("Aave", AAVE, USDC, 10 ** 6)
+        raise AssertionError("expected TimeoutError")
+    except asyncio.TimeoutError as e:
+        assert "2 transactions unconfirmed" in str(e)
+    finally:
+        await executor.close()
+        await node.stop()
+    assert executor._waiters == {} and executor.stats["submitted"] == 2
+
+async def test_execution_agent_submits_real_transactions():
+    node = StandInDevNode()
+    url = await node.start()
+    system = MultiAgentDeFiSystem()
+    system.chain_executor = executor_for(url)
+    system.execution_token = USDC
+    try:
+        result = await system._execute_investment_transactions(
+            {"amount": 500_000_000, "protocol": "Aave", "symbol": "aave"},
+            {"decision": "APPROVED_FOR_EXECUTION", "reason": "All checks passed for Aave investment", "risk_level": "LOW"}
+        )
+        await system.chain_executor.close()
+        system.chain_executor = None
+        simulated = await system._execute_investment_transactions(
+            {"amount": 500_000_000, "protocol": "Aave", "symbol": "aave"}, {"reason": "ok"}
+        )
+    finally:
+        await node.stop()
+
+    transactions = result["blockchain_transactions"]
+    assert [tx["status"] for tx in transactions] == ["SUCCESS", "SUCCESS"]
+    assert all(tx["tx_hash"] in node.transactions and "simulated" not in tx for tx in transactions)
+    invest = node.transactions[transactions[1]["tx_hash"]]
+    entry = node.selectors[invest["data"][:10]]
+    _, token, amount, _ = decode_values([p["type"] for p in entry["inputs"]], bytes.fromhex(invest["data"][10:]))
+    assert token == USDC and amount == 500_000_000 * 10 ** 6 and transactions[1]["amount"] == "$500,000,000"
+    assert all(tx["simulated"] and len(tx["tx_hash"]) == 66 for tx in simulated["blockchain_transactions"])
+    assert len(system.blockchain_transactions) == 4
+    assert result["decision"] == "APPROVED_FOR_EXECUTION" and result["transactions_confirmed"] == "2/2"
+    assert result["compliance_documentation"] == f"Compliance rule stored on-chain in {transactions[0]['tx_hash']}"
+    assert simulated["decision"] == "APPROVED_FOR_EXECUTION" and simulated["compliance_documentation"].startswith("Simulated")
+
+async def test_failed_execution_is_reported():
+    node = StandInDevNode()
+    url = await node.start()
+    system = MultiAgentDeFiSystem()
+    system.demo_pacing = 0.0
+    system.chain_executor = executor_for(url)
+    system.execution_token = USDC
+    system.execution_protocols = {"unlisted": UNLISTED, "aave": AAVE}
+    findings = [{"protocol_health": "GOOD", "confidence": 0.9},
+                {"overall_risk_score": 0.2, "risk_level": "LOW", "confidence": 0.9},
+                {"overall_compliance": "APPROVED", "confidence": 0.9}]
+    try:
+        # the node reverts investments in protocols the treasury hasn't whitelisted
+        context = RequestContext({}, investment_params={"amount": 1_000_000, "protocol": "Unlisted", "symbol": "unlisted"})
+        partial = await system._execution_agent_workflow(context, *findings)
+        await system.chain_executor.close()
+    finally:
+        await node.stop()
+    # the node is gone: nothing is submitted at all
+    system.chain_executor = executor_for(url)
+    try:
+        failed = await system._execute_investment_transactions(
+            {"amount": 1_000_000, "protocol": "Aave", "symbol": "aave"}, {"reason": "ok"}
+        )
+    finally:
+        await system.chain_executor.close()
+
+    assert [tx["status"] for tx in partial["blockchain_transactions"]] == ["SUCCESS", "REVERTED"]
+    assert partial["decision"] == "PARTIALLY_EXECUTED" and partial["transactions_confirmed"] == "1/2"
+    assert partial["estimated_annual_yield"] == "N/A" and "Investment Execution REVERTED" in partial["execution_error"]
+    message = system.collaboration_log[-1]
+    assert message.content.startswith("❌ PARTIALLY_EXECUTED: Unlisted") and "APPROVED" not in message.content
+
+    assert failed["decision"] == "EXECUTION_FAILED" and failed["blockchain_transactions"] == []
+    assert failed["compliance_documentation"].startswith("Not recorded") and not failed["risk_metrics_logged"]
+    assert failed["execution_error"]
+
+async def main():
+    await test_parallel_investments_share_batches()
+    await test_rejected_nonce_is_filled_and_order_recovers()
+    await test_unmined_transactions_time_out()
+    await test_execution_agent_submits_real_transactions()
+    await test_failed_execution_is_reported()
+    print("✅ Chain executor tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
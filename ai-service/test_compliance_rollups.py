@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for incrementally maintained compliance rollups and range reports built from them
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from services.compliance_engine import ComplianceEngine
+from services.compliance_rollups import ComplianceRollupStore, parse_report_window
+
+CLEAN = {"compliance_status": "APPROVED", "risk_level": "LOW", "estimated_penalty_risk": 0.0}
+
+def flagged(violations, risk_level="HIGH", penalty=1000.0, aml_flags=()):
+    return {"compliance_status": "REQUIRES_REVIEW", "risk_level": risk_level, "regulatory_violations": list(violations),
+            "aml_flags": list(aml_flags), "estimated_penalty_risk": penalty, "approval_required": True}
+
+def test_bucket_boundaries():
+    store = ComplianceRollupStore("daily")
+    midnight = datetime(2025, 3, 2)
+    store.record_analysis("inst", "sec", CLEAN, 100.0, midnight - timedelta(seconds=1))
+    store.record_analysis("inst", "SEC", CLEAN, 200.0, midnight)
+    store.record_analysis("inst", "SEC", CLEAN, 300.0, midnight + timedelta(hours=23, minutes=59, seconds=59))
+    # an aware timestamp is bucketed by its UTC time: 01:30 at +02:00 is still March 1st
+    store.record_analysis("inst", "SEC", CLEAN, 400.0, datetime(2025, 3, 2, 1, 30, tzinfo=timezone(timedelta(hours=2))))
+
+    assert store.bucket_index[("inst", "SEC")] == [datetime(2025, 3, 1), midnight]
+    assert store.rollups[("inst", "SEC")][datetime(2025, 3, 1)].total_volume == 500.0
+    assert store.rollups[("inst", "SEC")][midnight].total_transactions == 2
+
+    hourly = ComplianceRollupStore("hourly")
+    hourly.record_analysis("inst", "SEC", CLEAN, 1.0, datetime(2025, 3, 2, 9, 59, 59))
+    hourly.record_analysis("inst", "SEC", CLEAN, 1.0, datetime(2025, 3, 2, 10, 0, 0))
+    assert hourly.bucket_index[("inst", "SEC")] == [datetime(2025, 3, 2, 9), datetime(2025, 3, 2, 10)]
+
+    try:
+        ComplianceRollupStore("weekly")
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+
+def test_range_queries_merge_buckets():
+    store = ComplianceRollupStore("daily")
+    store.record_analysis("inst", "SEC", flagged(["Transaction Limit Exceeded"], "MEDIUM", 500.0), 1e6, datetime(2025, 3, 1, 9))
+    store.record_analysis("inst", "SEC", flagged(["Transaction Limit Exceeded", "KYC Missing"], "CRITICAL", 3000.0, ["MIXER"]),
+                          2e6, datetime(2025, 3, 2, 12))
+    store.record_analysis("inst", "SEC", CLEAN, 5e5, datetime(2025, 3, 3, 18))
+    store.record_analysis("inst", "MICA", flagged(["Reserve Shortfall"]), 7e5, datetime(2025, 3, 2, 12))
+    store.record_analysis("other", "SEC", flagged(["KYC Missing"]), 9e5, datetime(2025, 3, 2, 12))
+
+    merged, buckets = store.query_range("inst", "sec", *parse_report_window("2025-03-01", "2025-03-03"))
+    assert buckets == 3 and merged.total_transactions == 3 and merged.flagged_transactions == 2
+    assert merged.total_volume == 3.5e6 and merged.penalty_risk == 3500.0 and merged.approval_required == 2
+    assert merged.violation_counts == {"Transaction Limit Exceeded": 2, "KYC Missing": 1}
+    assert merged.violation_penalties["Transaction Limit Exceeded"] == 2000.0
+    assert merged.violation_severity["Transaction Limit Exceeded"] == "CRITICAL" and merged.aml_flag_counts == {"MIXER": 1}
+
+    # end is exclusive: the bucket starting at it is left out; a start inside a bucket includes that bucket
+    merged, buckets = store.query_range("inst", "SEC", datetime(2025, 3, 1, 12), datetime(2025, 3, 3))
+    assert buckets == 2 and merged.total_volume == 3e6
+    merged, buckets = store.query_range("inst", "SEC", datetime(2025, 3, 4), datetime(2025, 3, 10))
+    assert buckets == 0 and merged.total_transactions == 0
+    assert store.query_range("nobody", "SEC", datetime(2025, 1, 1), datetime(2026, 1, 1))[1] == 0
+
+    # aware report bounds are converted to UTC
+    start, end = parse_report_window("2025-03-02T00:00:00+02:00", "2025-03-02T02:00:00+02:00")
+    assert (start, end) == (datetime(2025, 3, 1, 22), datetime(2025, 3, 2))
+
+async def test_reports_follow_recorded_analyses():
+    engine = ComplianceEngine()
+    day = datetime(2025, 3, 2, 12)
+    await engine.record_transaction_analysis("inst", "SEC", flagged(["KYC Missing"]), 1e6, day)
+    await engine.record_transaction_analysis("inst", "SEC", CLEAN, 3e6, day + timedelta(hours=1))
+    report = await engine.generate_report("inst", "2025-03-02", "2025-03-02", "SEC")
+    assert report["total_transactions"] == 2 and report["compliance_score"] == 50.0
+    assert report["violations"] == [{"type": "KYC Missing", "severity": "HIGH", "count": 1, "penalty_risk": 1000.0}]
+    assert report["regulatory_summary"]["rollup_buckets_merged"] == 1
+
+    # a later analysis lands in the same row and the next report reflects it without rescanning
+    await engine.record_transaction_analysis("inst", "SEC", flagged(["KYC Missing"], "CRITICAL", 2000.0), 5e5, day + timedelta(hours=2))
+    report = await engine.generate_report("inst", "2025-03-02", "2025-03-02", "SEC")
+    assert report["total_transactions"] == 3 and report["flagged_transactions"] == 2
+    assert report["violations"][0]["count"] == 2 and report["violations"][0]["severity"] == "CRITICAL"
+    assert report["regulatory_summary"]["total_volume"] == 4.5e6
+    assert len(engine.rollups.bucket_index[("inst", "SEC")]) == 1
+
+async def test_empty_window_reports_zero_activity():
+    engine = ComplianceEngine()
+    await engine.record_transaction_analysis("inst", "SEC", flagged(["KYC Missing"]), 1e6, datetime(2025, 3, 2, 12))
+    for institution, framework, start in (("inst", "SEC", "2025-04-01"), ("inst", "MICA", "2025-03-02"), ("idle", "SEC", "2025-03-02")):
+        report = await engine.generate_report(institution, start, start, framework)
+        assert report["institution_id"] == institution and report["total_transactions"] == 0
+        assert report["flagged_transactions"] == 0 and report["violations"] == [] and report["compliance_score"] == 100.0
+        summary = report["regulatory_summary"]
+        assert summary["framework"] == framework and summary["total_volume"] == 0.0 and summary["areas_of_concern"] == []
+        assert summary["rollup_buckets_merged"] == 0
+        assert report["recommendations"] == ["No analyzed transactions in this period"]
+
+async def main():
+    test_bucket_boundaries()
+    test_range_queries_merge_buckets()
+    await test_reports_follow_recorded_analyses()
+    await test_empty_window_reports_zero_activity()
+    print("✅ Compliance rollup tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
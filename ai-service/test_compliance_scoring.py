@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for time-decayed compliance scoring
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from services.compliance_engine import ComplianceEngine
+from services.compliance_scoring import ComplianceScoringEngine
+
+async def test_scoring_same_input_is_stable():
+    engine = ComplianceEngine()
+    now = datetime.now()
+    institution = {
+        "institution_id": "INST_001",
+        "violations": [
+            {"id": "v-1", "type": "KYC_AML", "severity": "HIGH", "timestamp": now.isoformat()},
+            {"type": "REPORTING", "severity": "LOW", "timestamp": (now - timedelta(days=30)).isoformat()},
+            {"type": "REPORTING", "severity": "LOW"},
+        ],
+    }
+    first = await engine.calculate_compliance_score(institution)
+    second = await engine.calculate_compliance_score(institution)
+    assert first == second and first < 100.0
+    assert engine.scoring._size == 3
+    assert await engine.get_compliance_leaderboard() == [{"rank": 1, "institution_id": "INST_001", "compliance_score": first}]
+
+    # a new violation still counts, once
+    institution["violations"].append({"id": "v-2", "type": "KYC_AML", "severity": "CRITICAL", "timestamp": now.isoformat()})
+    third = await engine.calculate_compliance_score(institution)
+    assert third < second and await engine.calculate_compliance_score(institution) == third
+
+    # the same violation id at another institution is a different violation
+    other = await engine.calculate_compliance_score({"institution_id": "INST_002", "violations": institution["violations"][:1]})
+    assert other < 100.0 and engine.scoring._size == 5
+
+def test_decay_and_ranking():
+    scoring = ComplianceScoringEngine(half_life_days=10)
+    now = datetime(2025, 6, 1)
+    scoring.record_violation("fresh", "KYC_AML", "HIGH", now)
+    scoring.record_violation("old", "KYC_AML", "HIGH", now - timedelta(days=10))
+    scoring.register_institution("clean")
+    assert scoring.score("fresh", now) == 93.0 and abs(scoring.score("old", now) - 96.5) < 1e-9
+    assert [row["institution_id"] for row in scoring.leaderboard(now=now)] == ["clean", "old", "fresh"]
+    assert scoring.record_violation("fresh", "KYC_AML", "HIGH", now, violation_id="x") is True
+    assert scoring.record_violation("fresh", "KYC_AML", "HIGH", now, violation_id="x") is False
+
+async def main():
+    await test_scoring_same_input_is_stable()
+    test_decay_and_ranking()
+    print("✅ Compliance scoring tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the static contract audit pipeline
+"""
+
+import asyncio
+from services.contract_audit import AuditTarget, ContractAuditPipeline, audit_target, discover_artifacts
+from services.evm_analysis import CFGCache, ControlFlowGraph
+
+VULNERABLE_BANK = """
+contract Bank {
+    mapping(address => uint256) balances;
+
+    function withdraw(uint256 amount) external {
+        // balances[msg.sender] is only reduced after the transfer
+        (bool ok, ) = msg.sender.call{value: amount}("");
+        balances[msg.sender] -= amount;
+    }
+
+    function setFee(uint256 newFee) public { fee = newFee; }
+
+    function pay(address to) external onlyOwner { payable(to).send(1); }
+
+    function sweep(address to) external onlyOwner nonReentrant {
+        (bool success, ) = to.call("");
+        require(success, "sweep failed");
+    }
+}
+"""
+
+def test_source_checks_find_vulnerability_classes():
+    audit = audit_target(AuditTarget("Bank", source=VULNERABLE_BANK))
+    found = {(f["function"], f["type"]) for f in audit["vulnerabilities"]}
+    assert found == {
+        ("withdraw", "Reentrancy"),
+        ("withdraw", "Unchecked Call"),
+        ("setFee", "Missing Access Control"),
+        ("pay", "Unchecked Call"),
+    }
+    assert audit["access_controls"] == "WEAK"
+    assert not audit["approved_for_institutional_use"]
+
+async def test_pipeline_audits_repo_contracts_and_caches_by_hash():
+    targets = discover_artifacts()
+    assert {t.name for t in targets} == {"InstitutionalTreasury", "RegulatoryOracle", "TransactionMonitor"}
+
+    pipeline = ContractAuditPipeline(max_workers=2)
+    try:
+        first = await pipeline.audit_many(targets)
+        assert all(a["analysis_mode"] == "source" for a in first)
+
+        # an identical deployment is served from the cache without re-analysis
+        clone = AuditTarget("Clone", bytecode=targets[0].bytecode)
+        assert (await pipeline.audit(clone)) is first[0]
+        assert len(pipeline.cache) == len(targets)
+    finally:
+        pipeline.shutdown()
+
+def test_cfg_blocks_edges_and_loops():
+    # 0: JUMPDEST  1: PUSH1 0 SLOAD  4: PUSH1 0 SSTORE  7: CALLER PUSH1 0 EQ PUSH1 0 JUMPI  14: STOP
+    code = bytes.fromhex("5b" "600054" "600055" "33" "6000" "14" "6000" "57" "00")
+    cfg = ControlFlowGraph(code, "loop")
+    assert list(cfg.pcs) == [0, 1, 3, 4, 6, 7, 8, 10, 11, 13, 14]
+    assert list(cfg.block_first) == [0, 10]
+    assert sorted(zip(cfg.edge_src, cfg.edge_dst)) == [(0, 0), (0, 1)]
+    assert cfg.loop_blocks() == {0}
+    assert cfg.sender_check_blocks() == 1 and cfg.dynamic_jumps == 0
+
+    cache = CFGCache()
+    targets = discover_artifacts()
+    for target in targets:
+        _, analysis = cache.get(target.bytecode)
+        assert 0 < analysis["gas_efficiency"] <= 100
+        assert analysis["access_controls"] == "SECURE"
+    cache.get(targets[0].bytecode)
+    assert (cache.hits, cache.misses) == (1, len(targets))
+
+async def main():
+    test_source_checks_find_vulnerability_classes()
+    test_cfg_blocks_edges_and_loops()
+    await test_pipeline_audits_repo_contracts_and_caches_by_hash()
+    print("✅ Contract audit tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the fast JSON response class and pre-encoded response cache
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from types import MappingProxyType
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from services.fast_json import EncodedResponseCache, dumps
+from services.multi_agent_system import AgentStatus, MultiAgentDeFiSystem
+
+async def test_encoding_matches_default_rendering():
+    system = MultiAgentDeFiSystem()
+    await system._update_agent_status("risk_agent", AgentStatus.ANALYZING, "Stress testing")
+    payload = {
+        "status": system.get_real_time_status(),
+        "when": datetime(2025, 3, 1, 12, 30, 5, 120),
+        "state": AgentStatus.COMPLETED,
+        "protocols": MappingProxyType({"aave": 1}),
+        "jurisdictions": {"US"},
+    }
+    assert json.loads(dumps(payload)) == jsonable_encoder(payload)
+
+async def test_cache_encodes_only_on_change():
+    cache = EncodedResponseCache(max_entries=2)
+    builds = []
+
+    def build(version):
+        builds.append(version)
+        return {"version": version}
+
+    first = cache.get("updates", 1, lambda: build(1))
+    assert cache.get("updates", 1, lambda: build(1)) is first and builds == [1]
+    assert cache.response("updates", 1, lambda: build(1), if_none_match=first.etag).status_code == 304
+    changed = cache.get("updates", 2, lambda: build(2))
+    assert changed.etag != first.etag and json.loads(changed.body) == {"version": 2}
+    assert cache.stats == {"hits": 2, "encodes": 2, "not_modified": 1}
+
+async def test_status_endpoint_serves_cached_bytes():
+    import main
+    client = TestClient(main.app)
+    first = client.get("/demo/agents/status")
+    assert first.status_code == 200 and first.json()["agents"]["research_agent"]["status"] in {s.value for s in AgentStatus}
+    assert client.get("/demo/agents/status", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    await main.multi_agent_system._update_agent_status("research_agent", AgentStatus.RESEARCHING, "Polling feeds")
+    changed = client.get("/demo/agents/status", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    assert changed.json()["agents"]["research_agent"]["current_task"] == "Polling feeds"
+
+    updates = client.get("/regulatory/updates", params={"limit": 5})
+    assert updates.status_code == 200 and len(updates.json()["regulatory_updates"]) <= 5
+
+async def main():
+    await test_encoding_matches_default_rendering()
+    await test_cache_encodes_only_on_change()
+    await test_status_endpoint_serves_cached_bytes()
+    print("✅ Fast JSON tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for regulatory impact matching against indexed institution positions
+"""
+
+import asyncio
+from services.regulatory_monitor import RegulatoryMonitor
+
+UPDATE = {"source": "SEC", "title": "Lending Disclosure Rule", "summary": "New disclosures", "url": "https://sec.gov/r/1",
+          "impact": "HIGH", "affected_protocols": ["aave"]}
+
+async def test_matches_by_protocol_token_and_jurisdiction():
+    monitor = RegulatoryMonitor(feed_sources=[])
+    try:
+        await monitor.register_institution_portfolio("us_bank", [{"protocol": "Aave", "value_usd": 1e6}], ["US"])
+        await monitor.register_institution_portfolio("eu_bank", [{"protocol": "aave", "token": "USDC", "value_usd": 2e6}], ["EU"])
+        await monitor.register_institution_portfolio("anywhere", [{"token": "usdc", "value_usd": 5e5}], [])
+
+        impacts = await monitor.analyze_update_impact_for_all(UPDATE)
+        assert sorted(impacts) == ["us_bank"] and impacts["us_bank"]["exposure_usd"] == 1e6
+        tokens = await monitor.analyze_update_impact_for_all({**UPDATE, "jurisdiction": "EU", "affected_protocols": [], "affected_tokens": ["USDC"]})
+        assert sorted(tokens) == ["anywhere", "eu_bank"]
+    finally:
+        await monitor.stop_polling()
+
+async def test_cache_key_covers_scope_fields():
+    monitor = RegulatoryMonitor(feed_sources=[])
+    try:
+        await monitor.register_institution_portfolio("us_bank", [{"protocol": "aave", "value_usd": 1e6}], ["US"])
+        await monitor.register_institution_portfolio("uk_bank", [{"protocol": "compound", "value_usd": 1e6}], ["UK"])
+
+        assert sorted(await monitor.analyze_update_impact_for_all(UPDATE)) == ["us_bank"]
+        # same title / summary / url, different targets: not served from the first analysis
+        assert await monitor.analyze_update_impact_for_all({**UPDATE, "affected_protocols": ["compound"]}) == {}
+        assert sorted(await monitor.analyze_update_impact_for_all(
+            {**UPDATE, "affected_protocols": ["compound"], "jurisdiction": "UK"}
+        )) == ["uk_bank"]
+        low = await monitor.analyze_update_impact_for_all({**UPDATE, "impact": "LOW"})
+        assert low["us_bank"]["impact_score"] < monitor.impact_cache[monitor.impact_key(UPDATE)]["us_bank"]["impact_score"]
+        # a stale content_hash supplied by the caller doesn't select another update's analysis
+        assert await monitor.analyze_update_impact_for_all(
+            {**UPDATE, "affected_protocols": ["uniswap"], "content_hash": monitor.update_cache.content_hash(UPDATE)}
+        ) == {}
+        assert monitor.impact_key({**UPDATE, "affected_protocols": ["AAVE"]}) == monitor.impact_key(UPDATE)
+    finally:
+        await monitor.stop_polling()
+
+async def test_impact_cache_is_bounded():
+    monitor = RegulatoryMonitor(feed_sources=[], max_cached_impacts=3)
+    try:
+        await monitor.register_institution_portfolio("us_bank", [{"protocol": "aave", "value_usd": 1e6}], ["US"])
+        updates = [{**UPDATE, "title": f"Rule {i}"} for i in range(5)]
+        first = await monitor.analyze_update_impact_for_all(updates[0])
+        for update in updates[1:3]:
+            await monitor.analyze_update_impact_for_all(update)
+        assert await monitor.analyze_update_impact_for_all(updates[0]) is first  # hit, now most recent
+        for update in updates[3:]:
+            await monitor.analyze_update_impact_for_all(update)
+        assert len(monitor.impact_cache) == 3
+        assert set(monitor.impact_cache) == {monitor.impact_key(u) for u in (updates[0], updates[3], updates[4])}
+
+        await monitor._on_new_update({**UPDATE, "title": "Polled rule", "content_hash": "abc"})
+        assert len(monitor.impact_cache) == 3
+        await monitor.register_institution_portfolio("us_bank", [], ["US"])
+        assert len(monitor.impact_cache) == 0
+    finally:
+        await monitor.stop_polling()
+
+async def main():
+    await test_matches_by_protocol_token_and_jurisdiction()
+    await test_cache_key_covers_scope_fields()
+    await test_impact_cache_is_bounded()
+    print("✅ Position index tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
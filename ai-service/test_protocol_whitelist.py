@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned approved-protocol snapshot
+"""
+
+import json
+from services.protocol_whitelist import ProtocolWhitelist
+
+def test_snapshot_only_changes_when_approvals_change():
+    whitelist = ProtocolWhitelist()
+    first = whitelist.snapshot
+    assert first.version == 1
+    assert [p["name"] for p in json.loads(first.body)["approved_protocols"]] == ["Compound", "Aave"]
+    assert first.matches(first.etag) and first.matches(f"W/{first.etag}, \"other\"")
+
+    lido = {"name": "Lido", "address": "0xae7ab96520DE3A18E5e111B5EaAb095312D7fE84", "chain_id": 1, "risk_score": 20.0}
+    second = whitelist.approve(lido)
+    assert second.version == 2 and not second.matches(first.etag)
+    assert whitelist.approve(dict(lido)) is second
+    assert (1, lido["address"].upper()) in whitelist
+
+    assert whitelist.revoke(1, lido["address"].lower()).version == 3
+    assert whitelist.revoke(1, lido["address"]).version == 3
+    # snapshots are immutable views
+    try:
+        first.protocols[0]["risk_score"] = 0
+        assert False, "snapshot entries must be read-only"
+    except TypeError:
+        pass
+
+if __name__ == "__main__":
+    test_snapshot_only_changes_when_approvals_change()
+    print("✅ Protocol whitelist tests passed")
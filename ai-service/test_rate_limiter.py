@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-upstream token-bucket rate limiter
+"""
+
+import asyncio
+import time
+from email.utils import formatdate
+from aiohttp import web
+from services.multi_agent_system import MultiAgentDeFiSystem
+from services.rate_limiter import RateLimitConfig, RateLimitExceeded, TokenBucket, UpstreamRateLimiter, parse_retry_after
+
+async def test_burst_then_steady_rate():
+    bucket = TokenBucket("coingecko", rate=20, burst=3)
+    granted = []
+
+    async def call(i):
+        await bucket.acquire()
+        granted.append((i, time.monotonic()))
+
+    started = time.monotonic()
+    await asyncio.gather(*(call(i) for i in range(7)))
+    # arrival order is preserved; the burst goes out at once, the rest at 20/s
+    assert [i for i, _ in granted] == list(range(7))
+    offsets = [at - started for _, at in granted]
+    assert all(offset < 0.02 for offset in offsets[:3])
+    assert 0.18 <= offsets[-1] < 0.3
+    assert bucket.stats["granted"] == 7 and bucket.stats["delayed"] == 4
+
+    # callers with a deadline are turned away instead of queueing behind the debt
+    try:
+        await bucket.acquire(tokens=5, max_wait=0.05)
+        raise AssertionError("expected RateLimitExceeded")
+    except RateLimitExceeded as e:
+        assert e.retry_after > 0.05
+
+    # a cancelled waiter gives its token back
+    waiter = asyncio.create_task(bucket.acquire(tokens=2))
+    await asyncio.sleep(0.01)
+    before = bucket.metrics()["tokens_available"]
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert bucket.metrics()["tokens_available"] >= before + 2 - 0.01
+
+async def test_retry_after_pauses_waiters():
+    bucket = TokenBucket("github", rate=50, burst=1)
+    await bucket.acquire()
+    waiters = [asyncio.create_task(bucket.acquire()) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert bucket.observe(429, {"Retry-After": "0.2"}) == 0.2
+    waits = await asyncio.gather(*waiters)
+    # both queued waiters are pushed past the back-off and keep their spacing
+    assert waits[0] >= 0.2 and waits[1] >= waits[0] + 0.015
+    assert bucket.stats["throttled"] == 1
+
+    now = time.time()
+    assert parse_retry_after({"Retry-After": "7"}) == 7.0
+    assert 25 <= parse_retry_after({"Retry-After": formatdate(now + 30, usegmt=True)}, now) <= 30
+    assert parse_retry_after({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(now + 60)}, now) == 60
+    assert parse_retry_after({"X-RateLimit-Remaining": "12", "X-RateLimit-Reset": str(now + 60)}, now) is None
+
+async def test_fetchers_back_off_on_429():
+    requests = {"coingecko": 0}
+
+    async def coingecko(request):
+        requests["coingecko"] += 1
+        if requests["coingecko"] == 1:
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "0.2"})
+        return web.json_response({"market_data": {"price_change_percentage_24h": 1.5}})
+
+    app = web.Application()
+    app.router.add_get("/coins/{coin}", coingecko)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    system = MultiAgentDeFiSystem()
+    system.coingecko_api = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    system.rate_limiter = UpstreamRateLimiter({"coingecko": RateLimitConfig(rate=10, burst=2)})
+    try:
+        started = time.monotonic()
+        market_data = await system._fetch_market_data({"coingecko_id": "aave"})
+        elapsed = time.monotonic() - started
+    finally:
+        await runner.cleanup()
+
+    assert market_data["market_data"]["price_change_percentage_24h"] == 1.5
+    assert requests["coingecko"] == 2 and elapsed >= 0.2
+    assert system.rate_limiter.metrics()["coingecko"]["throttled"] == 1
+
+async def main():
+    await test_burst_then_steady_rate()
+    await test_retry_after_pauses_waiters()
+    await test_fetchers_back_off_on_429()
+    print("✅ Rate limiter tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
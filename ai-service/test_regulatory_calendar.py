@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the regulatory calendar deadline index
+"""
+
+import asyncio
+from datetime import date
+from services.regulatory_calendar import RegulatoryCalendar, parse_timeframe
+from services.regulatory_monitor import RegulatoryMonitor
+
+def test_window_merges_deadlines_and_recurring_obligations():
+    cal = RegulatoryCalendar(obligations=[
+        {"requirement": "Quarterly AML Report", "jurisdiction": "UK", "frequency": "quarterly", "anchor": "2024-03-31"},
+    ])
+    for day in ("2025-05-01", "2025-01-10", "2025-08-20"):
+        cal.add_update({"source": "FCA", "title": f"Deadline {day}", "compliance_deadline": day, "impact": "HIGH"})
+    # duplicates and updates without a deadline are ignored
+    assert not cal.add_update({"source": "FCA", "title": "Deadline 2025-05-01", "compliance_deadline": "2025-05-01"})
+    assert not cal.add_update({"source": "FCA", "title": "No deadline"})
+
+    entries = cal.window("uk", date(2025, 1, 1), date(2025, 6, 30))
+    assert [(e["date"], e["type"]) for e in entries] == [
+        ("2025-01-10", "deadline"),
+        ("2025-03-31", "recurring"),
+        ("2025-05-01", "deadline"),
+        ("2025-06-30", "recurring"),
+    ]
+    assert cal.window("US", date(2025, 1, 1), date(2025, 6, 30)) == []
+    assert parse_timeframe("6months").days == 180
+
+async def test_calendar_includes_feed_deadlines():
+    monitor = RegulatoryMonitor(feed_sources=[])
+    await monitor._on_new_update({
+        "source": "SEC", "title": "Custody Rule Amendments", "impact": "HIGH",
+        "compliance_deadline": "2025-03-01", "content_hash": "custody",
+    })
+    calendar = await monitor.generate_regulatory_calendar("SEC", "30d", "2025-02-15")
+    assert "Custody Rule Amendments" in [e["requirement"] for e in calendar]
+    assert all(e["jurisdiction"] == "US" for e in calendar)
+
+async def main():
+    test_window_merges_deadlines_and_recurring_obligations()
+    await test_calendar_includes_feed_deadlines()
+    print("✅ Regulatory calendar tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the regulatory feed poller against a local stand-in feed server
+"""
+
+import asyncio
+from aiohttp import web
+from services.regulatory_feeds import FeedSource, RegulatoryFeedPoller, RegulatoryUpdateIndex
+from services.regulatory_monitor import RegulatoryMonitor
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>SEC Press Releases</title>
+<item>
+  <title>SEC Charges DeFi Lender Over Unregistered Aave Wrapper</title>
+  <link>https://sec.example/press/2025-101</link>
+  <description>Enforcement action; remediation required by 2025-12-31.</description>
+  <pubDate>Tue, 14 Oct 2025 10:00:00 GMT</pubDate>
+</item>
+<item>
+  <title>Staff Guidance on USDC Custody</title>
+  <link>https://sec.example/press/2025-102</link>
+  <description>Guidance for broker-dealers holding stablecoins.</description>
+  <pubDate>Wed, 15 Oct 2025 10:00:00 GMT</pubDate>
+</item>
+</channel></rss>"""
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>ESMA</title>
+<entry>
+  <title>MiCA Technical Standards Consultation</title>
+  <link href="https://esma.example/mica-rts"/>
+  <summary>Consultation on stablecoin reserve rules effective 2026-06-30.</summary>
+  <updated>2025-10-16T09:00:00Z</updated>
+</entry>
+<entry>
+  <title>SEC Charges DeFi Lender Over Unregistered Aave Wrapper</title>
+  <link href="https://sec.example/press/2025-101"/>
+  <summary>Enforcement action; remediation required by 2025-12-31.</summary>
+  <updated>2025-10-14T10:00:00Z</updated>
+</entry>
+</feed>"""
+
+async def start_feed_server():
+    hits = {"rss": 0, "rss_304": 0, "atom": 0, "malformed": 0}
+
+    async def rss(request):
+        hits["rss"] += 1
+        if request.headers.get("If-None-Match") == '"sec-v1"':
+            hits["rss_304"] += 1
+            return web.Response(status=304)
+        return web.Response(body=RSS_FEED, content_type="application/rss+xml", headers={"ETag": '"sec-v1"'})
+
+    async def atom(request):
+        hits["atom"] += 1
+        return web.Response(body=ATOM_FEED, content_type="application/atom+xml")
+
+    async def malformed(request):
+        hits["malformed"] += 1
+        # one complete item, then malformed XML
+        return web.Response(body=RSS_FEED.split(b"<item>\n  <title>Staff")[0] + b"<item><title>Staff</item>",
+                            content_type="application/rss+xml")
+
+    app = web.Application()
+    app.router.add_get("/sec.rss", rss)
+    app.router.add_get("/malformed.rss", malformed)
+    app.router.add_get("/esma.atom", atom)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", hits
+
+async def test_feed_polling_conditional_get_and_dedup():
+    """Feeds are parsed, de-duplicated across sources and re-polled with ETags"""
+    print("📡 Testing regulatory feed polling...")
+    runner, base_url, hits = await start_feed_server()
+    monitor = RegulatoryMonitor(feed_sources=[
+        FeedSource(name="SEC", url=f"{base_url}/sec.rss", jurisdiction="US"),
+        FeedSource(name="MiCA", url=f"{base_url}/esma.atom", format="atom", jurisdiction="EU"),
+    ])
+    try:
+        seeded = len(await monitor.get_latest_updates())
+        added = await monitor.poller.poll_once()
+        print(f"   First poll indexed {added} updates")
+        # the SEC item appears in both feeds but is indexed once
+        assert added == 3
+
+        again = await monitor.poller.poll_once()
+        assert again == 0
+        assert hits["rss_304"] == 1
+
+        updates = await monitor.get_latest_updates()
+        assert len(updates) == seeded + 3
+        assert updates[0]["title"] == "MiCA Technical Standards Consultation"
+        assert updates[0]["compliance_deadline"] == "2026-06-30"
+
+        sec = await monitor.get_latest_updates(source="SEC")
+        charges = next(u for u in sec if u["title"].startswith("SEC Charges"))
+        assert charges["impact"] == "HIGH"
+        assert charges["affected_protocols"] == ["aave"]
+        assert charges["compliance_deadline"] == "2025-12-31"
+    finally:
+        await monitor.stop_polling()
+        await runner.cleanup()
+
+async def test_unreachable_feed_does_not_block_index():
+    """A failing feed is recorded without affecting served updates"""
+    monitor = RegulatoryMonitor(feed_sources=[FeedSource(name="FCA", url="http://127.0.0.1:9/feed.xml")])
+    try:
+        assert await monitor.poller.poll_once() == 0
+        assert monitor.regulatory_feeds["FCA"].consecutive_failures == 1
+        assert len(await monitor.get_latest_updates()) == 2
+    finally:
+        await monitor.stop_polling()
+
+async def test_sources_poll_on_their_own_interval():
+    """A slow feed isn't polled at the fastest feed's rate"""
+    runner, base_url, hits = await start_feed_server()
+    poller = RegulatoryFeedPoller([
+        FeedSource(name="SEC", url=f"{base_url}/sec.rss", poll_interval=0.05),
+        FeedSource(name="MiCA", url=f"{base_url}/esma.atom", format="atom", poll_interval=60.0),
+    ], RegulatoryUpdateIndex())
+    try:
+        poller.start()
+        await asyncio.sleep(0.4)
+    finally:
+        await poller.stop()
+        await runner.cleanup()
+    assert hits["atom"] == 1, hits
+    assert 4 <= hits["rss"] <= 10, hits
+    assert poller.sources["MiCA"].next_poll_at > poller.sources["SEC"].next_poll_at + 50
+
+async def test_malformed_feed_still_notifies_listeners():
+    """Updates parsed before a feed turns malformed reach the listeners exactly once"""
+    runner, base_url, hits = await start_feed_server()
+    poller = RegulatoryFeedPoller([FeedSource(name="SEC", url=f"{base_url}/malformed.rss")], RegulatoryUpdateIndex())
+    notified = []
+
+    async def listener(update):
+        notified.append(update["title"])
+
+    poller.add_listener(listener)
+    try:
+        assert await poller.poll_once() == 1
+        assert await poller.poll_once() == 0
+    finally:
+        await poller.stop()
+        await runner.cleanup()
+    assert hits["malformed"] == 2 and poller.sources["SEC"].consecutive_failures == 2
+    assert notified == ["SEC Charges DeFi Lender Over Unregistered Aave Wrapper"]
+    assert [update["title"] for update in poller.index.latest()] == notified
+
+def test_index_keeps_newest_first():
+    index = RegulatoryUpdateIndex(max_items=2)
+    for day in ("2025-01-02", "2025-01-01", "2025-01-03"):
+        index.add({"source": "SEC", "title": day, "date": day})
+    assert [u["date"] for u in index.latest()] == ["2025-01-03", "2025-01-02"]
+
+async def main():
+    await test_feed_polling_conditional_get_and_dedup()
+    await test_unreachable_feed_does_not_block_index()
+    await test_sources_poll_on_their_own_interval()
+    await test_malformed_feed_still_notifies_listeners()
+    test_index_keeps_newest_first()
+    print("✅ Regulatory feed tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming CSV / NDJSON / Parquet export of compliance report sections
+"""
+
+import asyncio
+import csv
+import io
+import json
+from services.report_export import (
+    ReportSectionStream, section_fieldnames, stream_csv, stream_ndjson, stream_parquet
+)
+
+PROTOCOLS = [
+    {"protocol_address": "0xaave", "protocol_name": "Aave", "risk_score": 0.3, "risk_level": "LOW",
+     "risk_factors": {"smart_contract_risk": 0.2, "liquidity_risk": 0.1}, "tvl_usd": 10_000_000_000,
+     "monitoring_alerts": ["TVL_DROP", "GOVERNANCE_VOTE"]},
+    # a failed analysis carries columns the first row doesn't have
+    {"protocol_address": "0xbad", "risk_score": 1.0, "risk_level": "CRITICAL", "error": "timeout",
+     "recommendation": "BLOCKED_ANALYSIS_FAILED", "source": "defillama"},
+]
+TRANSACTIONS = [
+    {"transaction_id": "0xabc", "aml_risk_score": 0.3, "compliance_level": "COMPLIANT", "requires_manual_review": False},
+    {"transaction_id": "0xdef", "aml_risk_score": 0.9, "compliance_level": "BLOCKED", "requires_manual_review": "yes",
+     "suspicious_patterns": ["HIGH_FREQUENCY"]},
+]
+
+class StandInAnalyzer:
+    def __init__(self, protocols=PROTOCOLS, transactions=TRANSACTIONS):
+        self.protocols = protocols
+        self.transactions = transactions
+
+    async def iter_protocol_analyses(self, institution_id):
+        for analysis in self.protocols:
+            yield analysis
+
+    async def iter_transaction_analyses(self, institution_id, time_period):
+        for analysis in self.transactions:
+            yield analysis
+
+async def collect(body) -> bytes:
+    return b"".join([chunk async for chunk in body])
+
+def stream_for(**kwargs) -> ReportSectionStream:
+    return ReportSectionStream(StandInAnalyzer(**kwargs), "inst_1")
+
+async def test_csv_keeps_columns_of_later_rows():
+    rows = list(csv.DictReader(io.StringIO((await collect(stream_csv(stream_for(), "protocols"))).decode())))
+    assert list(rows[0]) == section_fieldnames("protocols")
+    assert rows[0]["risk_factors.smart_contract_risk"] == "0.2" and rows[0]["monitoring_alerts"] == "TVL_DROP;GOVERNANCE_VOTE"
+    assert rows[0]["tvl_usd"] == "10000000000.0" and rows[0]["error"] == "" and rows[0]["extra"] == ""
+    assert rows[1]["error"] == "timeout" and rows[1]["recommendation"] == "BLOCKED_ANALYSIS_FAILED"
+    assert json.loads(rows[1]["extra"]) == {"source": "defillama"}
+
+    empty = (await collect(stream_csv(stream_for(protocols=[]), "high_risk_protocols"))).decode()
+    assert empty.strip() == ",".join(section_fieldnames("high_risk_protocols"))
+
+async def test_ndjson_tags_sections_and_ends_with_summary():
+    stream = stream_for()
+    lines = [json.loads(line) for line in (await collect(stream_ndjson(stream, ["high_risk_protocols", "flagged_transactions"]))).splitlines()]
+    assert [line["section"] for line in lines] == ["high_risk_protocols", "flagged_transactions", "summary"]
+    assert lines[0]["error"] == "timeout" and lines[1]["suspicious_patterns"] == ["HIGH_FREQUENCY"]
+    summary = lines[-1]
+    assert summary["total_protocols_analyzed"] == 2 and summary["high_risk_protocols"] == 1
+    assert summary["total_transactions_analyzed"] == 2 and summary["flagged_transactions"] == 1
+    assert summary["average_protocol_risk"] == 0.65
+
+async def test_parquet_has_fixed_schema_even_when_empty():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:  # optional dependency
+        print("   pyarrow not installed, skipping Parquet export test")
+        return
+    data = await collect(stream_parquet(stream_for(), "transactions", batch_size=1))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column_names == section_fieldnames("transactions")
+    assert table.num_rows == 2 and pq.ParquetFile(io.BytesIO(data)).num_row_groups == 2
+    rows = table.to_pylist()
+    assert rows[0]["requires_manual_review"] is False and rows[1]["suspicious_patterns"] == "HIGH_FREQUENCY"
+    # a value of the wrong type doesn't break the schema; it is kept in extra
+    assert rows[1]["requires_manual_review"] is None and json.loads(rows[1]["extra"]) == {"requires_manual_review": "yes"}
+
+    empty = pq.read_table(io.BytesIO(await collect(stream_parquet(stream_for(transactions=[]), "flagged_transactions"))))
+    assert empty.num_rows == 0 and empty.column_names == section_fieldnames("flagged_transactions")
+    assert str(empty.schema.field("aml_risk_score").type) == "double"
+
+async def main():
+    await test_csv_keeps_columns_of_later_rows()
+    await test_ndjson_tags_sections_and_ends_with_summary()
+    await test_parquet_has_fixed_schema_even_when_empty()
+    print("✅ Report export tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for background compliance report jobs
+"""
+
+import asyncio
+from datetime import timedelta
+from services.compliance_engine import ComplianceEngine
+from services.report_jobs import ComplianceReportStore, ReportJobManager
+
+async def test_report_job_lifecycle():
+    """Submitted reports run in the background and expose progress and results"""
+    print("📋 Testing report job lifecycle...")
+
+    engine = ComplianceEngine()
+    manager = ReportJobManager(store=ComplianceReportStore(database_url=""), max_workers=2)
+
+    async def build(progress_callback):
+        return await engine.generate_report("INST_001", "2025-01-01", "2025-03-31", "SEC", progress_callback=progress_callback)
+
+    job, created = manager.submit(("INST_001", "2025-01-01", "2025-03-31", "SEC"), "INST_001", "Q1", build)
+    assert created
+    assert manager.get_status(job.report_id)["status"] == "pending"
+
+    await manager.run(job.report_id)
+
+    status = manager.get_status(job.report_id)
+    result = manager.get_result(job.report_id)
+    print(f"   Status: {status['status']} ({status['progress']}%)")
+    assert status["status"] == "completed"
+    assert status["progress"] == 100.0
+    assert result["report_id"] == job.report_id
+
+async def test_duplicate_pending_requests_share_job():
+    """Identical submissions attach to the in-flight job"""
+    print("🔁 Testing report job de-duplication...")
+
+    manager = ReportJobManager(store=ComplianceReportStore(database_url=""), max_workers=1)
+    release = asyncio.Event()
+    calls = []
+
+    async def build(progress_callback):
+        calls.append(1)
+        await release.wait()
+        return {"compliance_score": 90.0}
+
+    key = ("INST_002", "2025-01-01", "2025-01-31", "MiCA")
+    first, created_first = manager.submit(key, "INST_002", "Jan", build)
+    second, created_second = manager.submit(key, "INST_002", "Jan", build)
+    assert created_first and not created_second
+    assert first.report_id == second.report_id
+
+    runner = asyncio.create_task(manager.run(first.report_id))
+    await asyncio.sleep(0)
+    release.set()
+    await runner
+
+    third, created_third = manager.submit(key, "INST_002", "Jan", build)
+    print(f"   Builder calls while in flight: {len(calls)}")
+    assert len(calls) == 1
+    assert created_third and third.report_id != first.report_id
+
+async def test_failed_job_reports_error():
+    """Exceptions mark the job failed instead of propagating"""
+    manager = ReportJobManager(store=ComplianceReportStore(database_url=""))
+
+    async def build(progress_callback):
+        raise ValueError("ledger unavailable")
+
+    job, _ = manager.submit(("INST_003",), "INST_003", "30d", build)
+    await manager.run(job.report_id)
+
+    status = manager.get_status(job.report_id)
+    assert status["status"] == "failed"
+    assert "ledger unavailable" in status["error"]
+    assert manager.get_result(job.report_id) is None
+
+async def test_finished_jobs_are_evicted():
+    """Finished jobs and results are dropped past the count limit or the TTL; running jobs never are"""
+    manager = ReportJobManager(store=ComplianceReportStore(database_url=""), max_finished_jobs=2)
+    release = asyncio.Event()
+
+    async def build(progress_callback):
+        return {"compliance_score": 90.0}
+
+    async def slow(progress_callback):
+        await release.wait()
+        return {"compliance_score": 80.0}
+
+    running, _ = manager.submit(("slow",), "INST_004", "30d", slow)
+    runner = asyncio.create_task(manager.run(running.report_id))
+    await asyncio.sleep(0)
+    finished = []
+    for i in range(3):
+        job, _ = manager.submit((i,), "INST_004", "30d", build)
+        await manager.run(job.report_id)
+        finished.append(job.report_id)
+
+    assert manager.get_status(finished[0]) is None and manager.get_result(finished[0]) is None
+    assert all(manager.get_result(report_id) for report_id in finished[1:])
+    assert manager.get_status(running.report_id)["status"] == "running"
+
+    release.set()
+    await runner
+    assert manager.get_status(finished[1]) is None and manager.get_result(running.report_id) is not None
+
+    # expire everything finished more than an hour ago
+    for report_id in list(manager._finished):
+        manager._finished[report_id] -= timedelta(hours=2)
+    manager.submit(("next",), "INST_004", "30d", build)
+    assert manager._finished == {} and list(manager.jobs) == [manager.in_flight[("next",)]]
+    assert manager.store.results == {}
+
+async def main():
+    await test_report_job_lifecycle()
+    await test_duplicate_pending_requests_share_job()
+    await test_failed_job_reports_error()
+    await test_finished_jobs_are_evicted()
+    print("✅ Report job tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
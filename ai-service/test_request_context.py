@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-request fact context shared by the agents
+"""
+
+import asyncio
+from services.request_context import FactCycleError, RequestContext
+
+async def test_facts_are_computed_once_and_shared():
+    computed = []
+
+    async def protocol_info(ctx):
+        computed.append("protocol_info")
+        await asyncio.sleep(0.01)
+        return {"name": ctx["request"].split()[-1]}
+
+    async def market_data(ctx):
+        computed.append("market_data")
+        return {"protocol": (await ctx.get("protocol_info"))["name"], "volatility": 0.3}
+
+    async def broken(ctx):
+        computed.append("broken")
+        raise ConnectionError("upstream down")
+
+    ctx = RequestContext(
+        {"protocol_info": protocol_info, "market_data": market_data, "broken": broken}, request="invest in Aave"
+    )
+    results = await asyncio.gather(*(ctx.get("market_data") for _ in range(5)), ctx.get("protocol_info"))
+    assert results[0] == {"protocol": "Aave", "volatility": 0.3} and results[-1] == {"name": "Aave"}
+    assert computed == ["market_data", "protocol_info"]
+    assert ctx.report()["market_data"]["requests"] == 5 and ctx.report()["protocol_info"]["requests"] == 2
+
+    # failures are memoised too: one attempt, every requester sees it
+    for _ in range(2):
+        try:
+            await ctx.get("broken")
+            raise AssertionError("expected ConnectionError")
+        except ConnectionError:
+            pass
+    assert computed.count("broken") == 1
+    await ctx.close()
+
+async def test_cycles_and_cancelled_waiters():
+    async def a(ctx):
+        return await ctx.get("b")
+
+    async def b(ctx):
+        return await ctx.get("a")
+
+    async def slow(ctx):
+        await asyncio.sleep(0.05)
+        return "done"
+
+    ctx = RequestContext({"a": a, "b": b, "slow": slow})
+    try:
+        await ctx.get("a")
+        raise AssertionError("expected FactCycleError")
+    except FactCycleError as e:
+        assert "a -> b -> a" in str(e)
+
+    # a cancelled requester doesn't cancel the shared computation
+    impatient = asyncio.create_task(ctx.get("slow"))
+    await asyncio.sleep(0.01)
+    impatient.cancel()
+    assert await ctx.get("slow") == "done"
+    await ctx.close()
+
+async def main():
+    await test_facts_are_computed_once_and_shared()
+    await test_cycles_and_cancelled_waiters()
+    print("✅ Request context tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for de-duplication and result caching of institutional requests
+"""
+
+import asyncio
+from services.multi_agent_system import MultiAgentDeFiSystem
+from services.request_dedup import IdempotencyConflict, RequestDeduplicator
+
+async def test_duplicates_share_one_run():
+    dedup = RequestDeduplicator(ttl=0.2)
+    runs = {"count": 0}
+    gate = asyncio.Event()
+
+    async def analysis():
+        runs["count"] += 1
+        await gate.wait()
+        return {"run": runs["count"]}
+
+    callers = [asyncio.create_task(dedup.run("aave-500m-jpm", analysis)) for _ in range(5)]
+    await asyncio.sleep(0)
+    # a client disconnecting does not cancel the run the others are waiting on
+    callers[0].cancel()
+    gate.set()
+    outcomes = await asyncio.gather(*callers[1:])
+    assert runs["count"] == 1
+    assert all(result == {"run": 1} for result, _ in outcomes)
+    assert [info["outcome"] for _, info in outcomes] == ["joined"] * 4
+
+    result, info = await dedup.run("aave-500m-jpm", analysis)
+    assert result == {"run": 1} and info["outcome"] == "cached"
+    result, info = await dedup.run("aave-500m-jpm", analysis, bypass_cache=True)
+    assert result == {"run": 2} and info["outcome"] == "computed"
+
+    await asyncio.sleep(0.25)
+    result, info = await dedup.run("aave-500m-jpm", analysis)
+    assert result == {"run": 3} and info["outcome"] == "computed"
+    assert dedup.metrics()["cached_results"] == 1
+
+async def test_idempotency_keys_and_failures():
+    dedup = RequestDeduplicator(ttl=0)
+    runs = {"count": 0}
+
+    async def analysis():
+        runs["count"] += 1
+        return {"run": runs["count"]}
+
+    async def failing():
+        raise ConnectionError("upstream reset")
+
+    first, _ = await dedup.run("aave", analysis, idempotency_key="retry-1")
+    # replays the original outcome even when the result cache has expired or is bypassed
+    replay, info = await dedup.run("aave", analysis, idempotency_key="retry-1", bypass_cache=True)
+    assert replay is first and info["outcome"] == "replayed" and runs["count"] == 1
+    try:
+        await dedup.run("compound", analysis, idempotency_key="retry-1")
+        raise AssertionError("expected IdempotencyConflict")
+    except IdempotencyConflict:
+        pass
+
+    # failures are neither cached nor bound to their idempotency key
+    for _ in range(2):
+        try:
+            await dedup.run("uniswap", failing, idempotency_key="retry-2")
+            raise AssertionError("expected ConnectionError")
+        except ConnectionError:
+            pass
+    result, info = await dedup.run("uniswap", analysis, idempotency_key="retry-2")
+    assert info["outcome"] == "computed" and result == {"run": 2}
+    assert dedup.stats["failed"] == 2 and dedup.stats["conflicts"] == 1
+
+async def test_rephrased_requests_share_a_fingerprint():
+    system = MultiAgentDeFiSystem()
+    fingerprint = await system.request_fingerprint("Should JPMorgan invest $500M in Aave for Q4 2025?", "jpmorgan_chase_001")
+    assert fingerprint == await system.request_fingerprint("jpmorgan wants to put $500 million into AAVE", " JPMorgan_Chase_001")
+    assert fingerprint != await system.request_fingerprint("Should JPMorgan invest $500M in Aave for Q4 2025?", "goldman_sachs_001")
+    assert fingerprint != await system.request_fingerprint("Should JPMorgan invest $500M in Compound?", "jpmorgan_chase_001")
+
+async def main():
+    await test_duplicates_share_one_run()
+    await test_idempotency_keys_and_failures()
+    await test_rephrased_requests_share_a_fingerprint()
+    print("✅ Request de-duplication tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
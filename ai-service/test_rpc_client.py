@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched JSON-RPC client and RegulatoryOracle reader against a local stand-in node
+"""
+
+import asyncio
+from aiohttp import web
+from services.chain_rpc import RPCError
+from services.evm_abi import decode_values, encode_call, encode_values, function_selector, load_abis
+from services.oracle_reader import RegulatoryOracleReader
+from services.rpc_client import AGGREGATE3_SELECTOR, MULTICALL3_ADDRESS, BatchedRPCClient
+
+ORACLE = "0x820bd166b883b508bdcb7516bd15ea798bdaf6d7"
+INSTITUTION = "0x" + "1e" * 20
+AAVE = "0x7d2768de32b0b80b7a3454c06bdac94a69ddc7a9"
+REVERTING = "0x" + "de" * 20
+BROKEN = "0x" + "bb" * 20  # the node fails reads for this account with a non-revert error
+
+class StandInOracleNode:
+    """eth_blockNumber plus RegulatoryOracle view calls, directly or through Multicall3 aggregate3"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.head = 100
+        self.scores = {}
+        self.whitelisted = set()
+        self.restricted = {"KP", "IR"}
+        self.multicall_deployed = True
+        self.http_requests = 0
+        self.eth_calls = 0
+        self.functions = {
+            entry["name"]: entry for entry in load_abis(["RegulatoryOracle"])["RegulatoryOracle"]
+            if entry.get("type") == "function"
+        }
+        self.selectors = {function_selector(entry): entry for entry in self.functions.values()}
+
+    def oracle_call(self, data: str):
+        """Return data hex, or None to revert"""
+        self.eth_calls += 1
+        entry = self.selectors.get(data[:10])
+        args = decode_values([p["type"] for p in entry["inputs"]], bytes.fromhex(data[10:]))
+        if entry["name"] == "getAMLRiskScore":
+            if args[0] == REVERTING:
+                return None
+            return "0x" + encode_values(["uint256"], [self.scores.get(args[0], 0)]).hex()
+        if entry["name"] == "isProtocolWhitelisted":
+            return "0x" + encode_values(["bool"], [(args[0], args[1]) in self.whitelisted]).hex()
+        if entry["name"] == "isJurisdictionRestricted":
+            return "0x" + encode_values(["bool"], [args[0] in self.restricted]).hex()
+        return None
+
+    def aggregate3(self, data: str) -> str:
+        raw = bytes.fromhex(data[10:])
+        base = int.from_bytes(raw[:32], "big") + 32
+        length = int.from_bytes(raw[base - 32:base], "big")
+        encoded = []
+        for j in range(length):
+            offset = int.from_bytes(raw[base + j * 32:base + (j + 1) * 32], "big")
+            target, _, calldata = decode_values(["address", "bool", "bytes"], raw[base + offset:])
+            returned = self.oracle_call(calldata) if target == ORACLE else None
+            encoded.append(encode_values(["bool", "bytes"], [returned is not None, returned or "0x"]))
+        offsets, position = [], 32 * length
+        for item in encoded:
+            offsets.append(position.to_bytes(32, "big"))
+            position += len(item)
+        return "0x" + ((32).to_bytes(32, "big") + length.to_bytes(32, "big") + b"".join(offsets) + b"".join(encoded)).hex()
+
+    def handle(self, call):
+        method, params = call["method"], call["params"]
+        if method == "eth_blockNumber":
+            result = hex(self.head)
+        elif method == "eth_call":
+            to, data = params[0]["to"].lower(), params[0]["data"]
+            if to == MULTICALL3_ADDRESS and data.startswith(AGGREGATE3_SELECTOR):
+                # calling an address without code returns empty data
+                result = self.aggregate3(data) if self.multicall_deployed else "0x"
+            elif BROKEN[2:] in data:
+                return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": "missing trie node"}}
+            else:
+                result = self.oracle_call(data) if to == ORACLE else "0x"
+            if result is None:
+                return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": 3, "message": "execution reverted"}}
+        else:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": method}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def rpc(self, request):
+        self.http_requests += 1
+        body = await request.json()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if isinstance(body, list):
+            return web.json_response([self.handle(call) for call in body])
+        return web.json_response(self.handle(body))
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/", self.rpc)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def accounts(count):
+    return ["0x" + hex(i)[2:].rjust(40, "0") for i in range(1, count + 1)]
+
+def test_abi_encoding_round_trips():
+    types = ["address", "string", "uint256", "bool", "uint256[]", "bytes"]
+    values = [AAVE, "United Kingdom", 2 ** 200, True, [1, 2, 3], "0x" + "ab" * 40]
+    assert decode_values(types, encode_values(types, values)) == values
+    assert AGGREGATE3_SELECTOR == "0x82ad56cb"
+
+async def test_concurrent_calls_share_batches_and_cache():
+    node = StandInOracleNode()
+    node.scores = {account: i for i, account in enumerate(accounts(300))}
+    url = await node.start()
+    client = BatchedRPCClient(url, max_batch_size=200)
+    reader = RegulatoryOracleReader(client, ORACLE)
+    try:
+        scores = await reader.aml_risk_scores(accounts(300) + [REVERTING])
+        assert scores[accounts(300)[42]] == 42 and scores[REVERTING] is None
+        # one eth_blockNumber request, then 301 eth_calls split over two batch requests
+        assert node.http_requests == 3 and node.eth_calls == 301
+
+        # same block: served from the cache
+        again = await asyncio.gather(*(client.eth_call(ORACLE, encode_call(reader.functions["getAMLRiskScore"], [a]))
+                                       for a in accounts(50)))
+        assert int(again[7], 16) == 7
+        assert node.eth_calls == 301 and client.stats["cache_hits"] >= 50
+
+        # a new head invalidates "latest"
+        client.block_ttl = 0
+        node.head = 101
+        node.scores[accounts(1)[0]] = 99
+        assert (await reader.aml_risk_scores(accounts(1)))[accounts(1)[0]] == 99
+    finally:
+        await client.close()
+        await node.stop()
+
+async def test_multicall_screening_in_one_request():
+    node = StandInOracleNode()
+    node.scores = {accounts(3)[0]: 85}
+    node.whitelisted = {(INSTITUTION, AAVE)}
+    url = await node.start()
+    client = BatchedRPCClient(url, multicall_address=MULTICALL3_ADDRESS, multicall_size=100)
+    reader = RegulatoryOracleReader(client, ORACLE)
+    try:
+        screening = await reader.screen(
+            accounts(250) + [REVERTING], INSTITUTION, [AAVE, REVERTING], ["US", "KP", "GB"]
+        )
+        assert screening["block_number"] == 100
+        assert screening["aml_risk_scores"][accounts(3)[0]] == 85
+        assert screening["aml_risk_scores"][REVERTING] is None
+        assert screening["protocols_whitelisted"] == {AAVE: True, REVERTING: False}
+        assert screening["jurisdictions_restricted"] == {"US": False, "KP": True, "GB": False}
+        # block number, then a single batch carrying every aggregate3 call
+        assert node.http_requests == 2
+        assert client.stats["multicalls"] == 5 and node.eth_calls == 256
+    finally:
+        await client.close()
+        await node.stop()
+
+async def test_node_errors_raise_and_failed_multicalls_fall_back():
+    node = StandInOracleNode()
+    node.scores = {accounts(3)[0]: 85}
+    url = await node.start()
+    client = BatchedRPCClient(url)
+    reader = RegulatoryOracleReader(client, ORACLE)
+    try:
+        # a revert is an answer (None); a node failure is not
+        assert (await reader.aml_risk_scores([REVERTING]))[REVERTING] is None
+        try:
+            await reader.aml_risk_scores(accounts(3) + [BROKEN])
+            raise AssertionError("expected RPCError")
+        except RPCError as e:
+            assert "missing trie node" in str(e)
+    finally:
+        await client.close()
+
+    # no Multicall3 on this chain: aggregate3 returns no data and every call is retried on its own
+    node.multicall_deployed = False
+    node.eth_calls = 0
+    client = BatchedRPCClient(url, multicall_address=MULTICALL3_ADDRESS, multicall_size=2)
+    reader = RegulatoryOracleReader(client, ORACLE)
+    try:
+        scores = await reader.aml_risk_scores(accounts(3) + [REVERTING])
+        assert scores == {**{account: 0 for account in accounts(3)}, accounts(3)[0]: 85, REVERTING: None}
+        assert client.stats["multicalls"] == 2 and client.stats["multicall_fallbacks"] == 2 and node.eth_calls == 4
+        # the individual results are cached like any other
+        assert (await reader.aml_risk_scores(accounts(3)[:2]))[accounts(3)[0]] == 85 and node.eth_calls == 4
+    finally:
+        await client.close()
+        await node.stop()
+
+async def main():
+    test_abi_encoding_round_trips()
+    await test_concurrent_calls_share_batches_and_cache()
+    await test_multicall_screening_in_one_request()
+    await test_node_errors_raise_and_failed_multicalls_fall_back()
+    print("✅ RPC client tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
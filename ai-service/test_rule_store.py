@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for versioned regulatory rule validation, compilation and evaluation
+"""
+
+import asyncio
+from services.rule_store import RegulatoryRuleStore, RuleValidationError
+
+def rule(rule_id, field, op, value, severity="MEDIUM"):
+    return {"rule_id": rule_id, "field": field, "operator": op, "value": value,
+            "violation": f"{rule_id} violated", "severity": severity}
+
+def triggered(evaluator, record):
+    return sorted(violation["rule_id"] for violation in evaluator.evaluate(record))
+
+def test_thresholds_and_membership():
+    store = RegulatoryRuleStore()
+    store.update("sec", [
+        rule("large", "amount", ">", 10_000, "HIGH"),
+        rule("very_large", "amount", ">=", 50_000, "CRITICAL"),
+        rule("sanctioned", "country", "in", ["KP", "IR"], "CRITICAL"),
+        rule("mainnet_only", "chain_id", "!=", 1),
+        rule("mixer", "memo", "contains", "tornado"),
+        rule("unlisted", "asset", "not_in", ["USDC", "ETH"]),
+    ])
+    evaluator = store.get_evaluator("SEC")
+    assert triggered(evaluator, {"amount": 50_000, "country": "IR", "chain_id": 1}) == ["large", "sanctioned", "very_large"]
+    assert triggered(evaluator, {"amount": 10_000, "chain_id": 137, "memo": "via tornado cash", "asset": "DOGE"}) == [
+        "mainnet_only", "mixer", "unlisted"
+    ]
+    assert triggered(evaluator, {"memo": ["tornado"], "asset": "USDC"}) == ["mixer"]
+
+def test_type_mismatched_records_do_not_match():
+    store = RegulatoryRuleStore()
+    store.update("FCA", [
+        rule("mixer", "memo", "contains", "tornado"),
+        rule("unlisted", "asset", "not_in", ["USDC"]),
+        rule("sanctioned", "country", "==", "KP"),
+    ])
+    evaluator = store.get_evaluator("FCA")
+    assert triggered(evaluator, {"memo": 42, "asset": ["USDC"], "country": {"code": "KP"}}) == []
+    assert triggered(evaluator, {"memo": None, "asset": {"USDC": 1}}) == []
+
+def test_unusable_values_are_rejected():
+    store = RegulatoryRuleStore()
+    bad = [
+        rule("list_equals", "country", "==", ["KP"]),
+        rule("dict_not_equal", "country", "!=", {"code": "KP"}),
+        rule("list_contains", "memo", "contains", ["tornado"]),
+        rule("nested_members", "country", "in", [["KP"], "IR"]),
+        rule("scalar_members", "country", "not_in", "KP"),
+    ]
+    for each in bad:
+        try:
+            store.update("SEC", [each])
+            raise AssertionError(f"{each['rule_id']} should be rejected")
+        except RuleValidationError as e:
+            assert each["rule_id"] in str(e)
+    assert store.current_version("SEC") is None
+
+def test_versions_out_of_range():
+    store = RegulatoryRuleStore(cache_size=1)
+    assert store.get_evaluator("MiCA") is None
+    store.update("MiCA", [rule("v1", "amount", ">", 100)])
+    store.update("MiCA", [rule("v2", "amount", ">", 1_000)])
+    assert store.get_evaluator("MiCA", version=0) is None
+    assert store.get_evaluator("MiCA", version=3) is None
+    assert store.get_evaluator("MiCA", version=-1) is None
+    # version 1 was evicted from the compiled cache and is recompiled on demand
+    assert triggered(store.get_evaluator("MiCA", version=1), {"amount": 500}) == ["v1"]
+    assert triggered(store.get_evaluator("MiCA"), {"amount": 500}) == []
+
+async def main():
+    test_thresholds_and_membership()
+    test_type_mismatched_records_do_not_match()
+    test_unusable_values_are_rejected()
+    test_versions_out_of_range()
+    print("✅ Rule store tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
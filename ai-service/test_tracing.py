@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for execution traces: span recording, Chrome-trace / OTLP export and offline replay
+"""
+
+import asyncio
+import json
+import tempfile
+from aiohttp import web
+from services import tracing
+from services.multi_agent_system import MultiAgentDeFiSystem
+from services.rate_limiter import RateLimitConfig, UpstreamRateLimiter
+
+async def test_spans_follow_tasks_into_lanes():
+    assert tracing.current_trace() is None
+    with tracing.span("untraced") as nothing:
+        assert nothing is None
+
+    buffer = tracing.TraceBuffer(max_traces=1)
+
+    async def fetch(name):
+        with tracing.span(f"fetch:{name}", "fetch", lane=name):
+            await asyncio.sleep(0.01)
+            tracing.annotate(bytes=len(name))
+            tracing.event("cache_hit", "fact")
+
+    with tracing.trace("request", buffer, request="Should we invest?") as trace:
+        tracing.phase("research_agent", "Fetching data")
+        with tracing.span("step:research", "workflow"):
+            await asyncio.gather(fetch("defillama"), fetch("coingecko"))
+        tracing.phase("research_agent", "Writing findings")
+        try:
+            with tracing.span("step:risk", "workflow"):
+                raise ValueError("no data")
+        except ValueError:
+            pass
+    assert tracing.current_trace() is None and buffer.get(trace.trace_id) is trace
+
+    spans = {span.name: span for span in trace.spans}
+    research = spans["step:research"]
+    assert spans["fetch:defillama"].parent_id == research.span_id and spans["fetch:defillama"].lane == "defillama"
+    assert spans["fetch:coingecko"].attrs == {"bytes": 9}
+    assert "ValueError" in spans["step:risk"].attrs["error"]
+    assert spans["Writing findings"].end_ns is not None  # phases still open are closed with the trace
+
+    chrome = trace.to_chrome_trace()
+    lanes = {e["args"]["name"] for e in chrome["traceEvents"] if e["name"] == "thread_name"}
+    assert {"research_agent", "step:research", "defillama", "coingecko"} <= lanes
+    assert sum(e["ph"] == "X" for e in chrome["traceEvents"]) == len(trace.spans)
+    assert sum(e["ph"] == "i" for e in chrome["traceEvents"]) == 2
+
+    otlp = trace.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {span["name"]: span for span in otlp}
+    assert by_name["fetch:coingecko"]["parentSpanId"] == by_name["step:research"]["spanId"]
+    assert int(by_name["step:research"]["endTimeUnixNano"]) >= int(by_name["fetch:coingecko"]["endTimeUnixNano"])
+
+    with tracing.trace("evicted", buffer):
+        pass
+    assert buffer.get(trace.trace_id) is None and len(buffer.list()) == 1
+
+async def test_recorded_request_replays_offline():
+    calls = []
+
+    async def protocol(request):
+        calls.append(request.path)
+        return web.json_response({"name": "Aave", "tvl": [{"date": 1, "totalLiquidityUSD": 9.5e9}, {"date": 2, "totalLiquidityUSD": 1e10}]})
+
+    async def coin(request):
+        calls.append(request.path)
+        return web.json_response({"market_data": {"price_change_percentage_24h": 3.2, "market_cap": {"usd": 4e9}}})
+
+    app = web.Application()
+    app.router.add_get("/protocol/{slug}", protocol)
+    app.router.add_get("/api/v3/coins/{coin}", coin)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    live = MultiAgentDeFiSystem()
+    live.demo_pacing = 0.0
+    live.record_responses = True
+    live.traces = tracing.TraceBuffer(trace_dir=tempfile.mkdtemp())
+    live.defillama_api, live.coingecko_api = base, f"{base}/api/v3"
+    live.coingecko_api_key = "cg-secret"
+    live.rate_limiter = UpstreamRateLimiter({"defillama": RateLimitConfig(rate=50, burst=10), "coingecko": RateLimitConfig(rate=50, burst=10)})
+    try:
+        result = await live.process_institutional_request("Should JPMorgan invest $500M in Aave?", "jpmorgan_chase_001")
+    finally:
+        await runner.cleanup()
+    assert sorted(calls) == ["/api/v3/coins/aave", "/protocol/aave"]
+
+    recorded = live.traces.get(result["trace_id"])
+    categories = {span.category for span in recorded.spans}
+    assert {"workflow", "agent", "fact", "upstream", "fetch"} <= categories
+    fetch = next(span for span in recorded.spans if span.name == "fetch:coingecko")
+    assert fetch.attrs["status"] == 200 and fetch.attrs["bytes"] > 0 and fetch.lane == "fact:market_data"
+    assert recorded.summary()["recorded_responses"] == 2
+
+    path = live.traces.export(recorded)
+    with open(path) as handle:
+        assert "cg-secret" not in handle.read()
+    loaded = live.traces.load(path)
+    assert loaded.trace_id == recorded.trace_id and loaded.recordings == recorded.recordings
+    assert loaded.responses() == json.loads(json.dumps(recorded.responses()))
+
+    # the stand-in server is gone and the replaying system points at the real hosts: nothing may reach the network
+    offline = MultiAgentDeFiSystem()
+    offline.demo_pacing = 0.0
+    offline.traces = tracing.TraceBuffer()
+    replayed = await offline.replay(loaded)
+    replay_trace = offline.traces.get(replayed["trace_id"])
+    assert replay_trace.replay_of == recorded.trace_id and replay_trace.replay_misses == 0
+    fetches = [span for span in replay_trace.spans if span.category == "fetch"]
+    assert len(fetches) == 2 and all(span.attrs["status"] == 200 and "bytes" not in span.attrs for span in fetches)
+
+    findings = [system.agents["research_agent"].findings for system in (live, offline)]
+    for report in findings:
+        report.pop("yield_opportunity")  # simulated, not derived from upstream data
+    assert findings[0] == findings[1] and findings[0]["tvl_current"] == "$10.0B"
+    assert replayed["protocol_analyzed"] == result["protocol_analyzed"]
+
+def test_recording_is_opt_in_deduplicated_and_capped():
+    body = {"status": 200, "body": {"tvl": [{"date": day, "totalLiquidityUSD": 1e10} for day in range(500)]}}
+
+    with tracing.trace("spans only", tracing.TraceBuffer()) as off:
+        tracing.current_trace().record("/protocol/aave?", body)
+    assert off.recordings == {} and off.summary()["recorded_bytes"] == 0
+
+    with tracing.trace("recorded", record_responses=True) as on:
+        for _ in range(3):
+            on.record("/protocol/aave?", body)
+        on.record("/coins/aave?", body)
+        on.record("/coins/aave?", {"status": 429, "body": None})
+    # one stored copy of the repeated body, compressed
+    assert len(on.recordings["/protocol/aave?"]) == 3 and len(on.responses()) == 2
+    assert on.recorded_bytes < len(json.dumps(body)) / 4
+
+    small = tracing.Trace("capped", {}, record_responses=True, max_recorded_bytes=on.recorded_bytes - 1)
+    small.record("/protocol/aave?", body)
+    small.record("/coins/aave?", {"status": 429, "body": None})
+    small.record("/protocol/aave?", body)  # stored already, but recording has stopped
+    assert small.recording_truncated and small.recordings == {"/protocol/aave?": [on.recordings["/protocol/aave?"][0]]}
+
+    # the buffer strips the oldest traces' recordings once they add up to more than its budget
+    buffer = tracing.TraceBuffer(max_recorded_bytes=on.recorded_bytes * 2)
+    traces = []
+    for i in range(3):
+        with tracing.trace(f"run {i}", buffer, record_responses=True) as each:
+            each.record("/protocol/aave?", {**body, "run": i})
+        traces.append(each)
+    assert [bool(each.recordings) for each in traces] == [False, True, True]
+    assert traces[0].recording_truncated and buffer.get(traces[0].trace_id) is traces[0]
+    assert buffer.recorded_bytes() <= buffer.max_recorded_bytes
+
+async def main():
+    await test_spans_follow_tasks_into_lanes()
+    await test_recorded_request_replays_offline()
+    test_recording_is_opt_in_deduplicated_and_capped()
+    print("✅ Tracing tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
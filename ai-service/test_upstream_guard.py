@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for circuit breakers, deadlines, hedging and last-known-good fallback on upstream fetches
+"""
+
+import asyncio
+import time
+from aiohttp import web
+from services.multi_agent_system import MultiAgentDeFiSystem
+from services.rate_limiter import RateLimitConfig, UpstreamRateLimiter
+from services.upstream_guard import CircuitBreaker, CircuitOpen, UpstreamGuard, request_deadline
+
+async def test_circuit_opens_and_probes():
+    guard = UpstreamGuard("coingecko", breaker=CircuitBreaker("coingecko", failure_threshold=2, reset_timeout=0.1))
+    healthy = {"up": True, "calls": 0}
+
+    async def fetch(hedged):
+        healthy["calls"] += 1
+        if not healthy["up"]:
+            raise ConnectionError("upstream down")
+        return {"price": healthy["calls"]}
+
+    assert await guard.call("aave", fetch) == ({"price": 1}, "live")
+    healthy["up"] = False
+    # failures are answered from the last-known-good snapshot until the circuit opens
+    assert await guard.call("aave", fetch) == ({"price": 1}, "stale")
+    assert await guard.call("aave", fetch) == ({"price": 1}, "stale")
+    assert guard.breaker.state == "open" and healthy["calls"] == 3
+    assert await guard.call("aave", fetch) == ({"price": 1}, "stale")
+    assert healthy["calls"] == 3  # open: no request reached the upstream
+    try:
+        await guard.call("compound", fetch)
+        raise AssertionError("expected CircuitOpen")
+    except CircuitOpen as e:
+        assert e.retry_after > 0
+
+    await asyncio.sleep(0.12)
+    healthy["up"] = True
+    assert await guard.call("aave", fetch) == ({"price": 4}, "live")
+    assert guard.breaker.state == "closed"
+    assert guard.stats["short_circuited"] == 2 and guard.stats["served_stale"] == 3
+
+async def test_deadline_bounds_slow_upstream():
+    guard = UpstreamGuard("defillama", timeout=5.0)
+    delay = {"seconds": 0.0}
+
+    async def fetch(hedged):
+        await asyncio.sleep(delay["seconds"])
+        return {"tvl": [1]}
+
+    await guard.call("aave", fetch)
+    delay["seconds"] = 2.0
+    started = time.monotonic()
+    with request_deadline(0.1):
+        assert await guard.call("aave", fetch) == ({"tvl": [1]}, "stale")
+        try:
+            await guard.call("compound", fetch)
+            raise AssertionError("expected TimeoutError")
+        except asyncio.TimeoutError:
+            pass
+    assert time.monotonic() - started < 0.5
+    # only the call that actually waited on the upstream counts against its circuit
+    assert guard.stats["timed_out"] == 2 and guard.breaker.consecutive_failures == 1
+
+async def test_hedged_request_wins_over_straggler():
+    guard = UpstreamGuard("coingecko", hedge=True, min_hedge_delay=0.01)
+    attempts = []
+
+    async def fetch(hedged):
+        attempts.append(hedged)
+        await asyncio.sleep(0.005)
+        return "fast"
+
+    for _ in range(20):
+        await guard.call("aave", fetch)
+    assert guard.p95() is not None
+
+    async def straggler(hedged):
+        attempts.append(hedged)
+        await asyncio.sleep(0.01 if hedged else 1.0)
+        return "hedge" if hedged else "primary"
+
+    started = time.monotonic()
+    assert await guard.call("aave", straggler) == ("hedge", "live")
+    assert time.monotonic() - started < 0.2
+    assert attempts[-2:] == [False, True]
+    assert guard.stats["hedged"] == 1 and guard.stats["hedge_wins"] == 1
+
+async def test_market_data_falls_back_when_upstream_hangs():
+    behaviour = {"hang": False}
+
+    async def coingecko(request):
+        if behaviour["hang"]:
+            await asyncio.sleep(1)
+        return web.json_response({"market_data": {"price_change_percentage_24h": 1.5}})
+
+    app = web.Application()
+    app.router.add_get("/coins/{coin}", coingecko)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    system = MultiAgentDeFiSystem()
+    system.coingecko_api = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    system.rate_limiter = UpstreamRateLimiter({"coingecko": RateLimitConfig(rate=50, burst=10)})
+    system.upstream_guards["coingecko"].timeout = 0.2
+    try:
+        live = await system._fetch_market_data({"coingecko_id": "aave"})
+        behaviour["hang"] = True
+        started = time.monotonic()
+        fallback = await system._fetch_market_data({"coingecko_id": "aave"})
+        elapsed = time.monotonic() - started
+        missing = await system._fetch_market_data({"coingecko_id": "compound-governance-token"})
+    finally:
+        await runner.cleanup()
+
+    assert fallback == live and elapsed < 0.5
+    assert missing == {}
+    metrics = system.upstream_metrics()["coingecko"]
+    assert metrics["served_stale"] == 1 and metrics["timed_out"] == 2
+
+async def test_client_error_keeps_last_known_good():
+    behaviour = {"status": 200}
+
+    async def coingecko(request):
+        if behaviour["status"] != 200:
+            return web.json_response({"error": "forbidden"}, status=behaviour["status"])
+        return web.json_response({"market_data": {"price_change_percentage_24h": 1.5}})
+
+    app = web.Application()
+    app.router.add_get("/coins/{coin}", coingecko)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    system = MultiAgentDeFiSystem()
+    system.coingecko_api = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    system.rate_limiter = UpstreamRateLimiter({"coingecko": RateLimitConfig(rate=50, burst=10)})
+    guard = system.upstream_guards["coingecko"]
+    try:
+        live = await system._fetch_market_data({"coingecko_id": "aave"})
+        behaviour["status"] = 403
+        rejected = await system._fetch_market_data({"coingecko_id": "aave"})
+        behaviour["status"] = 404
+        again = await system._fetch_market_data({"coingecko_id": "aave"})
+        missing = await system._fetch_market_data({"coingecko_id": "compound-governance-token"})
+    finally:
+        await runner.cleanup()
+
+    # the 4xx bodies are neither returned nor stored over the live snapshot
+    assert live["market_data"]["price_change_percentage_24h"] == 1.5
+    assert rejected == live and again == live and missing == {}
+    assert guard._snapshots["aave"][1] == live and "compound-governance-token" not in guard._snapshots
+    metrics = guard.metrics()
+    assert metrics["succeeded"] == 1 and metrics["served_stale"] == 2 and metrics["failed"] == 3
+    assert metrics["circuit"]["state"] == "closed" and metrics["circuit"]["consecutive_failures"] == 0
+
+async def main():
+    await test_circuit_opens_and_probes()
+    await test_deadline_bounds_slow_upstream()
+    await test_hedged_request_wins_over_straggler()
+    await test_market_data_falls_back_when_upstream_hangs()
+    await test_client_error_keeps_last_known_good()
+    print("✅ Upstream guard tests passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())